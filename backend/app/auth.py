@@ -10,15 +10,22 @@ authenticated if it presents a valid, unexpired session token via EITHER:
 
 `require_role(...)` builds a dependency that additionally enforces role-based
 access so students can never reach admin endpoints.
+
+`get_current_user` runs on every authenticated request, so it is a coroutine
+on the async repositories and never blocks the event loop, and resolved
+sessions are cached in services/auth_cache.py (invalidated by the
+repositories on logout, user changes and deletes).
 """
 
+import time
 from typing import Any, Dict, Optional
 
 from fastapi import Depends, HTTPException, Request, status
 
 from app.config.settings import SESSION_COOKIE_NAME
 from app.models.user import serialize_user
-from app.repositories import session_repository, user_repository
+from app.repositories.aio import session_repository, user_repository
+from app.services import auth_cache
 from app.services.security import hash_token
 
 
@@ -34,19 +41,29 @@ def _extract_token(request: Request) -> Optional[str]:
     return None
 
 
-def get_current_user(request: Request) -> Dict[str, Any]:
+async def get_current_user(request: Request) -> Dict[str, Any]:
     """Resolve the authenticated user or raise 401. Returns the raw user doc."""
+    started = time.perf_counter()
     token = _extract_token(request)
     if not token:
         raise HTTPException(status.HTTP_401_UNAUTHORIZED, "Not authenticated")
 
-    session = session_repository.find_valid_session(hash_token(token))
+    token_hash = hash_token(token)
+    cached = auth_cache.get(token_hash)
+    if cached is not None:
+        auth_cache.record((time.perf_counter() - started) * 1000, hit=True)
+        return cached[1]
+
+    generation = auth_cache.generation()
+    session = await session_repository.find_valid_session(token_hash)
     if not session:
         raise HTTPException(status.HTTP_401_UNAUTHORIZED, "Invalid or expired session")
 
-    user = user_repository.find_by_id(session["user_id"])
+    user = await user_repository.find_by_id(session["user_id"])
     if not user:
         raise HTTPException(status.HTTP_401_UNAUTHORIZED, "User no longer exists")
+    auth_cache.put(token_hash, session, user, generation)
+    auth_cache.record((time.perf_counter() - started) * 1000, hit=False)
     return user
 
 
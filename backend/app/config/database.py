@@ -1,20 +1,140 @@
-import sys
+import threading
+import time
+from typing import Any, Dict, Optional
 
 import certifi
-from pymongo import ASCENDING, MongoClient
+from pymongo import ASCENDING, MongoClient, monitoring
 from pymongo.server_api import ServerApi
 
-from app.config.settings import MONGODB_URI, MONGODB_DB_NAME
+from app.config.settings import (
+    MONGODB_DB_NAME,
+    MONGODB_URI,
+    MONGO_MAX_IDLE_TIME_MS,
+    MONGO_MAX_POOL_SIZE,
+    MONGO_MIN_POOL_SIZE,
+    MONGO_READ_PREFERENCE,
+    MONGO_WAIT_QUEUE_TIMEOUT_MS,
+)
 
 uri = MONGODB_URI
 
-try:
-    client = MongoClient(uri, server_api=ServerApi("1"), tlsCAFile=certifi.where())
+
+# ── Client factory ─────────────────────────────────────────────────────────────
+# Importing this module does no network I/O. The client is built with
+# connect=False, so the SRV lookup, server discovery and the first pooled
+# connection all happen on the first database operation, not in every worker's
+# import. (It used to ping Atlas here and sys.exit on failure; /health and
+# /api/system/status report reachability instead.)
+
+class _PoolMonitor(monitoring.ConnectionPoolListener):
+    """Counts connection-pool events for pool_stats() / /api/system/status."""
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self.checked_out = 0
+        self.open = 0
+        self.checkouts = 0
+        self.failed = 0
+        self.wait_ms = 0.0
+        self.max_wait_ms = 0.0
+
+    def _waited(self, event: Any) -> float:
+        return (getattr(event, "duration", 0.0) or 0.0) * 1000
+
+    def connection_checked_out(self, event: Any) -> None:
+        wait = self._waited(event)
+        with self._lock:
+            self.checked_out += 1
+            self.checkouts += 1
+            self.wait_ms += wait
+            self.max_wait_ms = max(self.max_wait_ms, wait)
+
+    def connection_check_out_failed(self, event: Any) -> None:
+        with self._lock:
+            self.failed += 1
+
+    def connection_checked_in(self, event: Any) -> None:
+        with self._lock:
+            self.checked_out -= 1
+
+    def connection_created(self, event: Any) -> None:
+        with self._lock:
+            self.open += 1
+
+    def connection_closed(self, event: Any) -> None:
+        with self._lock:
+            self.open -= 1
+
+    def connection_check_out_started(self, event: Any) -> None:
+        pass
+
+    def connection_ready(self, event: Any) -> None:
+        pass
+
+    def pool_created(self, event: Any) -> None:
+        pass
+
+    def pool_ready(self, event: Any) -> None:
+        pass
+
+    def pool_cleared(self, event: Any) -> None:
+        pass
+
+    def pool_closed(self, event: Any) -> None:
+        pass
+
+    def snapshot(self) -> Dict[str, Any]:
+        with self._lock:
+            n = self.checkouts
+            return {
+                "open": self.open,
+                "checked_out": self.checked_out,
+                "checkouts": n,
+                "checkout_failures": self.failed,
+                "avg_wait_ms": round(self.wait_ms / n, 3) if n else 0.0,
+                "max_wait_ms": round(self.max_wait_ms, 3),
+            }
+
+
+_client_lock = threading.Lock()
+_client: Optional[MongoClient] = None
+_client_created_at: Optional[float] = None
+_sync_pool = _PoolMonitor()
+_async_pool = _PoolMonitor()
+
+
+def _client_options(monitor: _PoolMonitor) -> Dict[str, Any]:
+    """Keyword arguments shared by the sync and async clients."""
+    return dict(
+        server_api=ServerApi("1"),
+        tlsCAFile=certifi.where(),
+        maxPoolSize=MONGO_MAX_POOL_SIZE,
+        minPoolSize=MONGO_MIN_POOL_SIZE,
+        maxIdleTimeMS=MONGO_MAX_IDLE_TIME_MS or None,
+        waitQueueTimeoutMS=MONGO_WAIT_QUEUE_TIMEOUT_MS or None,
+        readPreference=MONGO_READ_PREFERENCE,
+        event_listeners=[monitor],
+    )
+
+
+def get_client() -> MongoClient:
+    """The process-wide MongoClient, created on first call (no I/O until used)."""
+    global _client, _client_created_at
+    if _client is None:
+        with _client_lock:
+            if _client is None:
+                _client = MongoClient(uri, connect=False, **_client_options(_sync_pool))
+                _client_created_at = time.time()
+    return _client
+
+
+client = get_client()
+
+
+def ping() -> None:
+    """Round-trip to the server; raises if it can't be reached."""
     client.admin.command("ping")
-    print("[OK] Connected to MongoDB Atlas!")
-except Exception as e:
-    print(f"[ERROR] MongoDB connection failed: {e}")
-    sys.exit(1)
+
 
 db = client[MONGODB_DB_NAME]
 
@@ -27,10 +147,16 @@ courses_collection               = db["courses_collection"]
 raw_moodle_payload_collection    = db["raw_moodle_payload_collection"]
 feature_vectors_collection       = db["feature_vectors"]
 ml_results_collection            = db["ml_results"]
-# Append-only prediction history (one doc per recorded snapshot, capped at
-# 30/user) — separate from ml_results, which is upsert-by-(user, model) and
+# Prediction history: one bucket doc per (user, model) holding the latest 30
+# snapshots — separate from ml_results, which is upsert-by-(user, model) and
 # structurally holds only the latest snapshot. See services/prediction_history.py.
+prediction_history_collection    = db["prediction_history"]
+# The earlier one-doc-per-snapshot history, read only by
+# scripts/migrate_prediction_history.py.
 ml_results_history_collection    = db["ml_results_history"]
+# Precomputed counterfactual plans, one per student, tagged with the hash of
+# the feature vector they were computed from. See services/counterfactual_batch.py.
+counterfactual_plans_collection  = db["counterfactual_plans"]
 auth_sessions_collection         = db["sessions"]
 
 # AcademIQ user accounts (admins + students).
@@ -42,12 +168,60 @@ course_materials_collection = db["course_materials"]
 student_metrics_collection  = db["student_metrics"]
 student_events_collection   = db["student_events"]
 system_events_collection    = db["system_events"]
+# Per-student content digests of the last ingested payload's sections, so
+# unchanged sections are skipped on re-sync (see services/moodle_ingest.py).
+ingest_digests_collection   = db["ingest_digests"]
+# Materialized Evidence Timeline items (see services/timeline_store.py).
+student_timeline_collection = db["student_timeline"]
+# Daily rollups of compacted old events (see services/event_compaction.py).
+student_event_rollups_collection = db["student_event_rollups"]
 
 # Token collections — all short-lived, hashed before storage, single-use.
 password_reset_tokens_collection = db["password_reset_tokens"]
 magic_link_tokens_collection     = db["magic_link_tokens"]
 
 
+# ── Async client ───────────────────────────────────────────────────────────────
+# Async routes use PyMongo's native asyncio client (app/repositories/aio/) so
+# their database calls never block the event loop. It is created on first use:
+# AsyncMongoClient binds to the running loop, which doesn't exist at import.
+# It shares the pool settings of the sync client but has its own pool.
+_async_client = None
+
+
+def get_async_client():
+    """The process-wide AsyncMongoClient, created on first call."""
+    global _async_client
+    if _async_client is None:
+        from pymongo import AsyncMongoClient
+
+        with _client_lock:
+            if _async_client is None:
+                _async_client = AsyncMongoClient(uri, connect=False, **_client_options(_async_pool))
+    return _async_client
+
+
+def get_async_db():
+    """The AcademIQ database on the shared AsyncMongoClient."""
+    return get_async_client()[MONGODB_DB_NAME]
+
+
+def pool_stats() -> Dict[str, Any]:
+    """Pool settings plus live counters of both clients' connection pools."""
+    return {
+        "settings": {
+            "max_pool_size": MONGO_MAX_POOL_SIZE,
+            "min_pool_size": MONGO_MIN_POOL_SIZE,
+            "max_idle_time_ms": MONGO_MAX_IDLE_TIME_MS,
+            "wait_queue_timeout_ms": MONGO_WAIT_QUEUE_TIMEOUT_MS,
+            "read_preference": MONGO_READ_PREFERENCE,
+        },
+        "sync": _sync_pool.snapshot(),
+        "async": _async_pool.snapshot() if _async_client is not None else None,
+        "client_age_s": round(time.time() - _client_created_at, 1) if _client_created_at else None,
+    }
+
+
 # ── Index helpers ──────────────────────────────────────────────────────────────
 
 def _ensure_unique_partial(field: str, name: str) -> None:
@@ -74,6 +248,28 @@ def _ensure_unique_partial(field: str, name: str) -> None:
         users_collection.create_index([(field, ASCENDING)], **spec)
 
 
+def _ensure_ttl(collection, name: str) -> None:
+    """
+    TTL index on `expires_at`: the server deletes each document once its own
+    expiry passes (expireAfterSeconds=0). Replaces an older plain index of
+    the same name; backends without TTL support get the plain index and rely
+    on services/expiry_sweeper.py.
+    """
+    keys = [("expires_at", ASCENDING)]
+    try:
+        collection.create_index(keys, expireAfterSeconds=0, name=name)
+    except Exception:
+        try:
+            collection.drop_index(name)
+        except Exception:
+            pass
+        try:
+            collection.create_index(keys, expireAfterSeconds=0, name=name)
+        except Exception as exc:
+            print(f"[WARN] no TTL index {name} ({exc}); expiry sweeper only")
+            collection.create_index(keys, name=name)
+
+
 def ensure_indexes() -> None:
     """
     Create all indexes the auth/identity-mapping/ingest layers rely on.
@@ -88,25 +284,19 @@ def ensure_indexes() -> None:
     auth_sessions_collection.create_index(
         [("token_hash", ASCENDING)], unique=True, name="uniq_token_hash"
     )
-    auth_sessions_collection.create_index(
-        [("expires_at", ASCENDING)], name="session_expiry"
-    )
+    _ensure_ttl(auth_sessions_collection, "session_expiry")
 
     # ── Password reset tokens ──────────────────────────────────────────────
     password_reset_tokens_collection.create_index(
         [("token_hash", ASCENDING)], unique=True, name="uniq_reset_token_hash"
     )
-    password_reset_tokens_collection.create_index(
-        [("expires_at", ASCENDING)], name="reset_token_expiry"
-    )
+    _ensure_ttl(password_reset_tokens_collection, "reset_token_expiry")
 
     # ── Magic-link tokens ──────────────────────────────────────────────────
     magic_link_tokens_collection.create_index(
         [("token_hash", ASCENDING)], unique=True, name="uniq_magic_token_hash"
     )
-    magic_link_tokens_collection.create_index(
-        [("expires_at", ASCENDING)], name="magic_token_expiry"
-    )
+    _ensure_ttl(magic_link_tokens_collection, "magic_token_expiry")
 
     # ── Normalized Moodle data ─────────────────────────────────────────────
     course_materials_collection.create_index(
@@ -121,6 +311,27 @@ def ensure_indexes() -> None:
         [("academiq_user_id", ASCENDING), ("event_id", ASCENDING)],
         unique=True, name="uniq_user_event",
     )
+    # Timeline range scans: one student's events in date order, optionally
+    # bounded by a date window (timeline_service.build_timeline).
+    student_events_collection.create_index(
+        [("academiq_user_id", ASCENDING), ("timestamp", ASCENDING)],
+        name="user_timestamp",
+    )
+    # Materialized timeline (services/timeline_store.py): every read and
+    # incremental update is a range scan of one view in (date, id) order.
+    student_timeline_collection.create_index(
+        [("academiq_user_id", ASCENDING), ("views", ASCENDING), ("date", ASCENDING), ("id", ASCENDING)],
+        name="user_view_date",
+    )
+    # Rollups are read like events: one student's days in date order.
+    student_event_rollups_collection.create_index(
+        [("academiq_user_id", ASCENDING), ("first", ASCENDING)],
+        name="user_first",
+    )
+
+    ingest_digests_collection.create_index(
+        [("academiq_user_id", ASCENDING)], unique=True, name="uniq_digest_user",
+    )
 
     # One snapshot per student — re-syncs update in place.
     for coll, name in (
@@ -137,17 +348,13 @@ def ensure_indexes() -> None:
         except Exception as exc:
             print(f"[WARN] could not create {name} (resolve duplicates first): {exc}")
 
-    # ── ML prediction history ────────────────────────────────────────────
-    # Compound index covers both query directions this collection needs:
-    # "last N for this user" (descending — dedup check + cap logic in
-    # prediction_history.record_prediction) and "oldest-to-newest" (ascending
-    # — prediction_history.get_history for charting). Mongo can walk a
-    # compound index in either direction, so one index serves both instead
-    # of paying write overhead for two.
-    try:
-        ml_results_history_collection.create_index(
-            [("academiq_user_id", ASCENDING), ("recorded_at", ASCENDING)],
-            name="user_recorded_at",
-        )
-    except Exception as exc:
-        print(f"[WARN] could not create user_recorded_at index: {exc}")
\ No newline at end of file
+    # ── Counterfactual plans ───────────────────────────────────────────────
+    counterfactual_plans_collection.create_index(
+        [("academiq_user_id", ASCENDING)], unique=True, name="uniq_plan_user"
+    )
+
+    # ── Latest ML results (one per user + model) ──────────────────────────
+    ml_results_collection.create_index(
+        [("academiq_user_id", ASCENDING), ("model_name", ASCENDING)],
+        name="user_model",
+    )
@@ -46,6 +46,19 @@ MONGODB_URI: str = _get(
 )
 MONGODB_DB_NAME: str = _get("MONGODB_DB_NAME", "todo_db")
 
+# --- Database connection pool (config/database.py) ------------------------
+# Per client, per process: the sync and async clients each hold a pool.
+MONGO_MAX_POOL_SIZE: int = _get_int("MONGO_MAX_POOL_SIZE", 50)
+# Connections kept open while idle (0 = open on demand only).
+MONGO_MIN_POOL_SIZE: int = _get_int("MONGO_MIN_POOL_SIZE", 0)
+# Idle connections older than this are closed (0 = never).
+MONGO_MAX_IDLE_TIME_MS: int = _get_int("MONGO_MAX_IDLE_TIME_MS", 300_000)
+# A request waiting longer than this for a free connection fails instead of
+# queueing forever (0 = wait indefinitely).
+MONGO_WAIT_QUEUE_TIMEOUT_MS: int = _get_int("MONGO_WAIT_QUEUE_TIMEOUT_MS", 5_000)
+# primary | primaryPreferred | secondary | secondaryPreferred | nearest
+MONGO_READ_PREFERENCE: str = _get("MONGO_READ_PREFERENCE", "primary")
+
 # --- Sessions / auth ------------------------------------------------------
 SESSION_COOKIE_NAME: str = _get("SESSION_COOKIE_NAME", "academiq_session")
 SESSION_TTL_HOURS: int = _get_int("SESSION_TTL_HOURS", 24)
@@ -53,6 +66,20 @@ SESSION_TTL_HOURS: int = _get_int("SESSION_TTL_HOURS", 24)
 SESSION_COOKIE_SECURE: bool = _get_bool("SESSION_COOKIE_SECURE", False)
 SESSION_COOKIE_SAMESITE: str = _get("SESSION_COOKIE_SAMESITE", "lax")
 
+# --- Session auth cache (services/auth_cache.py) --------------------------
+AUTH_CACHE_SIZE: int = _get_int("AUTH_CACHE_SIZE", 10_000)
+# Upper bound on staleness when invalidations can't reach this worker.
+AUTH_CACHE_TTL_SECONDS: int = _get_int("AUTH_CACHE_TTL_SECONDS", 60)
+# Optional: redis://host:6379/0 to share invalidations across workers.
+AUTH_CACHE_REDIS_URL: str = _get("AUTH_CACHE_REDIS_URL", "")
+AUTH_CACHE_CHANNEL: str = _get("AUTH_CACHE_CHANNEL", "academiq:auth-invalidate")
+
+# --- Expired session / token sweeper (services/expiry_sweeper.py) ---------
+# Backstop for the TTL indexes on expires_at (0 disables the sweeper).
+EXPIRY_SWEEP_INTERVAL_SECONDS: int = _get_int("EXPIRY_SWEEP_INTERVAL_SECONDS", 900)
+# Documents deleted per delete_many, so a large backlog never runs as one long delete.
+EXPIRY_SWEEP_BATCH_SIZE: int = _get_int("EXPIRY_SWEEP_BATCH_SIZE", 5_000)
+
 # --- Frontend / email -----------------------------------------------------
 # Used in account-creation emails so students get a working login link.
 APP_LOGIN_URL: str = _get("APP_LOGIN_URL", "http://localhost:3000/signin")
@@ -68,6 +95,77 @@ SMTP_USE_TLS: bool = _get_bool("SMTP_USE_TLS", True)
 # development and the grading environment never block on a mail server.
 EMAIL_ENABLED: bool = bool(SMTP_HOST and SMTP_USER and SMTP_PASSWORD)
 
+# --- ML explanations (services/shap_engine.py) ---------------------------
+# "exact" = TreeSHAP; "approx" = precomputed per-leaf path contributions
+# (Saabas), ~20x cheaper, same additive log-odds scale.
+SHAP_MODE: str = _get("SHAP_MODE", "exact")
+# Explanations cached per engineered feature vector, rounded to this many
+# decimals, so near-identical re-syncs reuse the previous explanation.
+SHAP_CACHE_SIZE: int = _get_int("SHAP_CACHE_SIZE", 4096)
+SHAP_CACHE_DECIMALS: int = _get_int("SHAP_CACHE_DECIMALS", 3)
+
+# --- Prediction memo cache (services/prediction_cache.py) ------------------
+# Model outputs per (model, artifact version, feature hash). Entries also
+# expire after the TTL and are dropped when a sync replaces the feature vector.
+PREDICTION_CACHE_SIZE: int = _get_int("PREDICTION_CACHE_SIZE", 2048)
+PREDICTION_CACHE_TTL_SECONDS: int = _get_int("PREDICTION_CACHE_TTL_SECONDS", 900)
+
+# --- Ingest-time scoring (services/scoring_queue.py) -----------------------
+# Worker threads scoring freshly synced students, and how many students may
+# wait for them. When the queue is full new syncs are not queued (the read
+# path scores them on demand instead), so ingest latency never grows.
+SCORING_WORKERS: int = _get_int("SCORING_WORKERS", 2)
+SCORING_QUEUE_SIZE: int = _get_int("SCORING_QUEUE_SIZE", 1000)
+
+# --- Model inference pool (services/inference_pool.py) ---------------------
+# Model calls from every request and scoring worker share this many threads,
+# so a burst queues instead of oversubscribing the CPU.
+INFERENCE_WORKERS: int = _get_int("INFERENCE_WORKERS", 2)
+
+# --- Bulk ingest (services/bulk_ingest.py) ---------------------------------
+# Payloads written per chunk by POST /raw-moodle-payloads/bulk. Each chunk is
+# a fixed handful of round trips, so larger chunks mean fewer of them.
+BULK_INGEST_CHUNK_SIZE: int = _get_int("BULK_INGEST_CHUNK_SIZE", 200)
+
+# --- Study-buddy index (services/study_buddy_index.py) ---------------------
+# Per-course candidate matrices are refreshed incrementally on sync / opt-in
+# and rebuilt from scratch after this long, which bounds staleness for changes
+# made by another worker process.
+STUDY_BUDDY_INDEX_TTL_SECONDS: int = _get_int("STUDY_BUDDY_INDEX_TTL_SECONDS", 900)
+# Neighbour search per course index (services/neighbour_search.py): brute,
+# kdtree, balltree, or auto (brute below the row threshold, kdtree above).
+# On the 11 behaviour features brute force keeps up with the trees to 100k
+# students (scripts/bench_study_buddy.py), hence the default.
+STUDY_BUDDY_NN_BACKEND: str = _get("STUDY_BUDDY_NN_BACKEND", "brute")
+STUDY_BUDDY_NN_TREE_MIN_ROWS: int = _get_int("STUDY_BUDDY_NN_TREE_MIN_ROWS", 50000)
+
+# --- Model artifacts (services/model_registry.py) ---------------------------
+# Pickles are re-saved uncompressed under MODEL_COMPACT_DIR and memory-mapped,
+# so their arrays are shared by every worker on the host. MODEL_PRELOAD loads
+# all models at import (for gunicorn --preload: workers fork with them
+# loaded); MODEL_WARM_UP imports the ML stacks and runs one dummy prediction
+# per model on a background thread at startup (services/lazy_import.py).
+MODEL_MMAP: bool = _get_bool("MODEL_MMAP", True)
+MODEL_COMPACT_DIR: str = _get(
+    "MODEL_COMPACT_DIR",
+    os.path.join(os.path.dirname(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))),
+                 "models", ".compact"),
+)
+MODEL_PRELOAD: bool = _get_bool("MODEL_PRELOAD", False)
+MODEL_WARM_UP: bool = _get_bool("MODEL_WARM_UP", True)
+
+# --- Materialized timeline (services/timeline_store.py) --------------------
+# Serve the Evidence Timeline from student_timeline, which ingest keeps up to
+# date, instead of re-deriving it from student_events on every request. A
+# student the backfill has not reached yet is built on their first read.
+TIMELINE_MATERIALIZED: bool = _get_bool("TIMELINE_MATERIALIZED", True)
+
+# --- Event compaction (services/event_compaction.py) ------------------------
+# scripts/compact_events.py folds material / grade-page / bare page views
+# older than this many days into one count per (course, day, action, page).
+# Submissions and quiz attempts are never compacted.
+EVENT_ROLLUP_AFTER_DAYS: int = _get_int("EVENT_ROLLUP_AFTER_DAYS", 90)
+
 # --- Moodle ---------------------------------------------------------------
 # Default Moodle instance URL. The frontend login form pre-fills this so
 # students don't have to type it, but they can override it.
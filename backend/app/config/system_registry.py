@@ -43,6 +43,13 @@ _SYSTEM_REGISTRY: Dict[str, Dict[str, Any]] = {
         "details": "Quiz generator has not been checked yet.",
         "updated_at": None,
     },
+    "ml_warm_up": {
+        "loaded": False,
+        "available": False,
+        "status": "Not checked",
+        "details": "ML warm-up has not started yet.",
+        "updated_at": None,
+    },
 }
 
 
@@ -0,0 +1,9 @@
+"""
+Async mirrors of the core repositories, for routes running on the event loop.
+
+Same functions, arguments and return values as the synchronous modules in
+app/repositories, but every call is a coroutine on PyMongo's AsyncMongoClient
+(database.get_async_db). Document shapes, keys and update operators are
+shared with the sync modules, so both layers always read and write the same
+documents.
+"""
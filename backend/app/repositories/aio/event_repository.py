@@ -0,0 +1,37 @@
+"""Async mirror of app.repositories.event_repository."""
+
+from typing import Any, Dict, List
+
+from app.config import database
+from app.repositories import event_rollup_repository
+from app.repositories.event_repository import merge_rollups, upsert_ops
+
+
+def _events():
+    return database.get_async_db()["student_events"]
+
+
+async def upsert_many(academiq_user_id: str, events: List[Dict[str, Any]]) -> int:
+    """Bulk-upsert events for a user. Returns the number of NEW events inserted."""
+    ops = [op for _, op in upsert_ops(academiq_user_id, events or [])]
+    if not ops:
+        return 0
+    result = await _events().bulk_write(ops, ordered=False)
+    return result.upserted_count
+
+
+async def list_for_user(academiq_user_id: str, limit: int = 500) -> List[Dict[str, Any]]:
+    raw = await (
+        _events().find({"academiq_user_id": str(academiq_user_id)})
+        .sort("timestamp", -1)
+        .limit(limit)
+        .to_list(None)
+    )
+    rollups = await (
+        database.get_async_db()["student_event_rollups"]
+        .find(event_rollup_repository.query(academiq_user_id, None, {}))
+        .sort("first", -1)
+        .limit(limit)
+        .to_list(None)
+    )
+    return merge_rollups(raw, [event_rollup_repository.as_event(d) for d in rollups], limit)
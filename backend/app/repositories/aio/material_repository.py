@@ -0,0 +1,73 @@
+"""Async mirror of app.repositories.material_repository."""
+
+from datetime import datetime
+from typing import Any, Dict, List, Optional
+
+from app.config import database
+from app.repositories.material_repository import _key, _update, upsert_op
+
+
+def _materials():
+    return database.get_async_db()["course_materials"]
+
+
+async def upsert(material_doc: Dict[str, Any]) -> bool:
+    """Insert or update a material by (course_id, material_id); True if it was new."""
+    result = await _materials().update_one(
+        _key(material_doc), _update(material_doc, datetime.utcnow()), upsert=True
+    )
+    return result.upserted_id is not None
+
+
+async def upsert_many(material_docs: List[Dict[str, Any]]) -> int:
+    """`upsert` for a list of materials in one unordered bulk write; returns how many were new."""
+    now = datetime.utcnow()
+    unique = {(d.get("course_id"), d.get("material_id")): d for d in material_docs}
+    if not unique:
+        return 0
+    result = await _materials().bulk_write([upsert_op(d, now) for d in unique.values()], ordered=False)
+    return result.upserted_count
+
+
+async def list_by_course(course_id: str) -> List[Dict[str, Any]]:
+    return await _materials().find({"course_id": str(course_id)}).to_list(None)
+
+
+async def list_by_category(course_id: str, category: str) -> List[Dict[str, Any]]:
+    """Materials in a course whose `category` or `semantic_tags` match."""
+    return await _materials().find(
+        {
+            "course_id": str(course_id),
+            "$or": [{"category": category}, {"semantic_tags": category}],
+        }
+    ).to_list(None)
+
+
+async def get(course_id: str, material_id: str) -> Optional[Dict[str, Any]]:
+    return await _materials().find_one(
+        {"course_id": str(course_id), "material_id": str(material_id)}
+    )
+
+
+async def set_content(course_id: str, material_id: str, text: str) -> bool:
+    """Store extracted text for a material (used for quiz generation)."""
+    result = await _materials().update_one(
+        {"course_id": str(course_id), "material_id": str(material_id)},
+        {"$set": {"content_text": text, "content_chars": len(text or "")}},
+        upsert=True,
+    )
+    return result.matched_count > 0 or result.upserted_id is not None
+
+
+async def get_content(course_id: str, material_ids: List[str]) -> str:
+    """Concatenate stored text for the given materials in a course."""
+    ids = [str(m) for m in material_ids]
+    docs = await _materials().find(
+        {"course_id": str(course_id), "material_id": {"$in": ids}, "content_text": {"$exists": True}},
+        {"content_text": 1},
+    ).to_list(None)
+    return "\n\n".join(d.get("content_text", "") for d in docs)
+
+
+async def count() -> int:
+    return await _materials().count_documents({})
@@ -0,0 +1,51 @@
+"""Async mirror of app.repositories.metrics_repository."""
+
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Tuple
+
+from app.config import database
+from app.repositories.metrics_repository import OVERALL, upsert_op
+
+
+def _metrics():
+    return database.get_async_db()["student_metrics"]
+
+
+async def upsert(academiq_user_id: str, course_id: str, metrics: Dict[str, Any]) -> None:
+    """Insert/replace the metrics snapshot for a (user, course) pair."""
+    key = {"academiq_user_id": str(academiq_user_id), "course_id": str(course_id)}
+    await _metrics().update_one(
+        key,
+        {"$set": {**key, "metrics": metrics, "updated_at": datetime.utcnow()}},
+        upsert=True,
+    )
+
+
+async def upsert_many(academiq_user_id: str, snapshots: List[Tuple[str, Dict[str, Any]]]) -> int:
+    """All (course_id, metrics) snapshots of a user in one bulk write; returns how many were new."""
+    now = datetime.utcnow()
+    unique = {str(course_id): metrics for course_id, metrics in snapshots}
+    if not unique:
+        return 0
+    result = await _metrics().bulk_write(
+        [upsert_op(academiq_user_id, cid, m, now) for cid, m in unique.items()], ordered=False
+    )
+    return result.upserted_count
+
+
+async def list_for_user(academiq_user_id: str) -> List[Dict[str, Any]]:
+    return await _metrics().find({"academiq_user_id": str(academiq_user_id)}).to_list(None)
+
+
+async def get(academiq_user_id: str, course_id: str) -> Optional[Dict[str, Any]]:
+    return await _metrics().find_one(
+        {"academiq_user_id": str(academiq_user_id), "course_id": str(course_id)}
+    )
+
+
+async def list_user_ids_for_course(course_id: str) -> List[str]:
+    """All AcademIQ user ids that have synced metrics for this course (not `_overall`)."""
+    if str(course_id) == OVERALL:
+        return []
+    ids = await _metrics().distinct("academiq_user_id", {"course_id": str(course_id)})
+    return [i for i in ids if i]
@@ -0,0 +1,34 @@
+"""Async mirror of app.repositories.ml_result_repository (reads)."""
+
+from typing import Any, Dict, List, Optional
+
+from app.config import database
+
+
+def _results():
+    return database.get_async_db()["ml_results"]
+
+
+async def get_current(
+    academiq_user_id: str,
+    model_name: str,
+    feature_hash: str,
+    artifact_version: str,
+) -> Optional[Dict[str, Any]]:
+    """The stored prediction, only if it was computed from `feature_hash` by `artifact_version`."""
+    doc = await _results().find_one(
+        {
+            "academiq_user_id": str(academiq_user_id), "model_name": model_name,
+            "feature_hash": feature_hash, "artifact_version": artifact_version,
+        },
+        {"prediction": 1},
+    )
+    return (doc or {}).get("prediction")
+
+
+async def list_for_user(academiq_user_id: str) -> List[Dict[str, Any]]:
+    """Every model's stored result for one user (model_name, feature_hash, artifact_version, prediction)."""
+    return await _results().find(
+        {"academiq_user_id": str(academiq_user_id)},
+        {"model_name": 1, "feature_hash": 1, "artifact_version": 1, "prediction": 1},
+    ).to_list(None)
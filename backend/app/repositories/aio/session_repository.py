@@ -0,0 +1,49 @@
+"""Async mirror of app.repositories.session_repository."""
+
+from datetime import datetime, timedelta
+from typing import Any, Dict, Optional
+
+from app.config import database
+from app.config.settings import SESSION_TTL_HOURS
+from app.repositories import auth_hooks
+
+
+def _sessions():
+    return database.get_async_db()["sessions"]
+
+
+async def create_session(token_hash: str, user_id: str, role: str) -> Dict[str, Any]:
+    now = datetime.utcnow()
+    doc = {
+        "token_hash": token_hash,
+        "user_id": str(user_id),
+        "role": role,
+        "created_at": now,
+        "expires_at": now + timedelta(hours=SESSION_TTL_HOURS),
+    }
+    await _sessions().insert_one(doc)
+    return doc
+
+
+async def find_valid_session(token_hash: str) -> Optional[Dict[str, Any]]:
+    """Return the session for a token hash only if it exists and hasn't expired (read only)."""
+    if not token_hash:
+        return None
+    return await _sessions().find_one(
+        {"token_hash": token_hash, "expires_at": {"$gt": datetime.utcnow()}}
+    )
+
+
+async def delete_session(token_hash: str) -> bool:
+    if not token_hash:
+        return False
+    result = await _sessions().delete_one({"token_hash": token_hash})
+    auth_hooks.token_revoked(token_hash)
+    return result.deleted_count > 0
+
+
+async def delete_sessions_for_user(user_id: str) -> int:
+    """Invalidate every session for a user (e.g. after a password reset)."""
+    result = await _sessions().delete_many({"user_id": str(user_id)})
+    auth_hooks.user_changed(user_id)
+    return result.deleted_count
@@ -0,0 +1,84 @@
+"""Async mirror of app.repositories.user_repository."""
+
+from datetime import datetime
+from typing import Any, Dict, List, Optional
+
+from app.config import database
+from app.repositories import auth_hooks
+from app.repositories.user_repository import _oid
+
+
+def _users():
+    return database.get_async_db()["users"]
+
+
+async def create(document: Dict[str, Any]) -> Dict[str, Any]:
+    """Insert a prepared user document and return it with its `_id`."""
+    result = await _users().insert_one(document)
+    document["_id"] = result.inserted_id
+    return document
+
+
+async def find_by_id(user_id: str) -> Optional[Dict[str, Any]]:
+    oid = _oid(user_id)
+    if oid is None:
+        return None
+    return await _users().find_one({"_id": oid})
+
+
+async def find_by_email(email: str) -> Optional[Dict[str, Any]]:
+    if not email:
+        return None
+    return await _users().find_one({"email": email.strip().lower()})
+
+
+async def find_by_moodle_user_id(moodle_user_id: str) -> Optional[Dict[str, Any]]:
+    if not moodle_user_id:
+        return None
+    return await _users().find_one({"moodle_user_id": str(moodle_user_id).strip()})
+
+
+async def find_by_student_id(student_id: str) -> Optional[Dict[str, Any]]:
+    if not student_id:
+        return None
+    return await _users().find_one({"student_id": str(student_id).strip()})
+
+
+async def list_users(search: Optional[str] = None, limit: int = 200) -> List[Dict[str, Any]]:
+    """Return users, newest first, optionally filtered by a search term."""
+    query: Dict[str, Any] = {}
+    if search:
+        rx = {"$regex": search.strip(), "$options": "i"}
+        query = {
+            "$or": [
+                {"full_name": rx},
+                {"email": rx},
+                {"student_id": rx},
+                {"moodle_user_id": rx},
+            ]
+        }
+    return await _users().find(query).sort("created_at", -1).limit(limit).to_list(None)
+
+
+async def update(user_id: str, fields: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+    """Apply a partial update (auto-stamps `updated_at`) and return the new doc."""
+    oid = _oid(user_id)
+    if oid is None:
+        return None
+    fields = {**fields, "updated_at": datetime.utcnow()}
+    await _users().update_one({"_id": oid}, {"$set": fields})
+    auth_hooks.user_changed(str(oid))
+    return await _users().find_one({"_id": oid})
+
+
+async def delete(user_id: str) -> bool:
+    oid = _oid(user_id)
+    if oid is None:
+        return False
+    result = await _users().delete_one({"_id": oid})
+    auth_hooks.user_changed(str(oid))
+    return result.deleted_count > 0
+
+
+async def count() -> int:
+    return await _users().count_documents({})
@@ -0,0 +1,48 @@
+"""
+Callbacks run after repository writes that end sessions or change a user.
+
+session_repository.delete_session calls token_revoked; delete_sessions_for_user,
+user_repository.update and user_repository.delete call user_changed (the sync
+and the aio modules alike). Running them from the write itself means no caller
+can forget, while the repositories stay free of service imports:
+services/auth_cache.py registers its invalidate_token / invalidate_user here
+when it is imported, and the first hook to fire imports it if nothing has yet,
+so scripts writing through the repositories invalidate too.
+"""
+
+import importlib
+from typing import Callable, List
+
+_DEFAULT_HOOKS = "app.services.auth_cache"
+
+_token_hooks: List[Callable[[str], None]] = []
+_user_hooks: List[Callable[[str], None]] = []
+
+
+def on_token_revoked(hook: Callable[[str], None]) -> None:
+    """Call hook(token_hash) after a session is deleted."""
+    if hook not in _token_hooks:
+        _token_hooks.append(hook)
+
+
+def on_user_changed(hook: Callable[[str], None]) -> None:
+    """Call hook(user_id) after a user is updated or deleted, or all their sessions end."""
+    if hook not in _user_hooks:
+        _user_hooks.append(hook)
+
+
+def _load_default() -> None:
+    """Import the auth cache (which registers itself) unless it already has."""
+    importlib.import_module(_DEFAULT_HOOKS)
+
+
+def token_revoked(token_hash: str) -> None:
+    _load_default()
+    for hook in _token_hooks:
+        hook(token_hash)
+
+
+def user_changed(user_id: str) -> None:
+    _load_default()
+    for hook in _user_hooks:
+        hook(str(user_id))
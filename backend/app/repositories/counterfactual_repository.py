@@ -0,0 +1,74 @@
+"""
+Data access for precomputed counterfactual plans.
+
+One document per student (unique on `academiq_user_id`), holding the
+find_counterfactual() result together with the `feature_hash` of the feature
+vector it was computed from, the search `mode` and the `artifact_version` of
+the performance model it searched. A plan is only valid while all three
+match the student's current features, the requested mode and the loaded
+model — readers compare them and recompute on mismatch.
+"""
+
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Tuple
+
+from pymongo import UpdateOne
+
+from app.config.database import counterfactual_plans_collection
+
+
+def get(academiq_user_id: str) -> Optional[Dict[str, Any]]:
+    return counterfactual_plans_collection.find_one({"academiq_user_id": str(academiq_user_id)})
+
+
+def upsert(
+    academiq_user_id: str,
+    feature_hash: str,
+    mode: str,
+    result: Dict[str, Any],
+    artifact_version: str,
+) -> None:
+    upsert_many([{
+        "academiq_user_id": academiq_user_id,
+        "feature_hash": feature_hash,
+        "mode": mode,
+        "artifact_version": artifact_version,
+        "result": result,
+    }])
+
+
+def upsert_many(plans: List[Dict[str, Any]]) -> int:
+    """
+    Bulk-upsert plans (academiq_user_id, feature_hash, mode,
+    artifact_version, result). Returns NEW plans inserted.
+    """
+    now = datetime.utcnow()
+    ops = [
+        UpdateOne(
+            {"academiq_user_id": str(p["academiq_user_id"])},
+            {"$set": {
+                "academiq_user_id": str(p["academiq_user_id"]),
+                "feature_hash": p["feature_hash"],
+                "mode": p["mode"],
+                "artifact_version": p["artifact_version"],
+                "result": p["result"],
+                "computed_at": now,
+            }},
+            upsert=True,
+        )
+        for p in plans
+    ]
+    if not ops:
+        return 0
+    return counterfactual_plans_collection.bulk_write(ops, ordered=False).upserted_count
+
+
+def stored_keys() -> Dict[str, Tuple[str, str, str]]:
+    """{academiq_user_id: (feature_hash, mode, artifact_version)} for every stored plan."""
+    return {
+        d["academiq_user_id"]: (d.get("feature_hash"), d.get("mode"), d.get("artifact_version"))
+        for d in counterfactual_plans_collection.find(
+            {}, {"_id": 0, "academiq_user_id": 1, "feature_hash": 1, "mode": 1, "artifact_version": 1}
+        )
+    }
+
@@ -4,20 +4,30 @@ Data access for the per-student event stream.
 One document per `(academiq_user_id, event_id)`. `event_id` is the extension's
 stable composite key (timestamp-page_type-action_type-course_id), so re-syncing
 the same events never creates duplicates.
+
+Old low-signal events are compacted into daily rollups
+(services/event_compaction.py). The ingest services drop re-synced copies of
+compacted events before writing them, and list_for_user returns the rollups
+among the raw events.
 """
 
+import heapq
 from datetime import datetime
-from typing import Any, Dict, List
+from itertools import islice
+from typing import Any, Dict, List, Optional, Tuple
 
 from pymongo import UpdateOne
 
 from app.config.database import student_events_collection
+from app.repositories import event_rollup_repository
 
 
-def upsert_many(academiq_user_id: str, events: List[Dict[str, Any]]) -> int:
-    """Bulk-upsert events for a user. Returns the number of NEW events inserted."""
+def upsert_ops(
+    academiq_user_id: str, events: List[Dict[str, Any]], now: Optional[datetime] = None
+) -> List[Tuple[str, UpdateOne]]:
+    """(event_id, upsert op) for each event of a user, for batched writers."""
     ops = []
-    now = datetime.utcnow()
+    now = now or datetime.utcnow()
     for ev in events or []:
         event_id = ev.get("_id") or ev.get("event_id")
         if not event_id:
@@ -25,22 +35,62 @@ def upsert_many(academiq_user_id: str, events: List[Dict[str, Any]]) -> int:
             event_id = f"{ev.get('timestamp')}-{ev.get('page_type')}-{ev.get('action_type')}-{ev.get('course_id')}"
         clean = {k: v for k, v in ev.items() if k != "_id"}
         key = {"academiq_user_id": str(academiq_user_id), "event_id": str(event_id)}
-        ops.append(
+        ops.append((
+            key["event_id"],
             UpdateOne(
                 key,
                 {"$set": {**key, **clean}, "$setOnInsert": {"ingested_at": now}},
                 upsert=True,
-            )
-        )
+            ),
+        ))
+    return ops
+
+
+def apply(ops: List[UpdateOne]) -> Any:
+    """Run prepared upsert ops as one unordered bulk write (None if empty)."""
     if not ops:
-        return 0
-    result = student_events_collection.bulk_write(ops, ordered=False)
-    return result.upserted_count
+        return None
+    return student_events_collection.bulk_write(ops, ordered=False)
+
+
+def upsert_new(academiq_user_id: str, events: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """Bulk-upsert events for a user. Returns the events that were NEW (inserted)."""
+    events = events or []
+    result = apply([op for _, op in upsert_ops(academiq_user_id, events)])
+    if result is None:
+        return []
+    # upsert_ops makes one op per event, so op indexes are event indexes.
+    return [events[i] for i in sorted(getattr(result, "upserted_ids", None) or {})]
+
+
+def upsert_many(academiq_user_id: str, events: List[Dict[str, Any]]) -> int:
+    """Bulk-upsert events for a user. Returns the number of NEW events inserted."""
+    return len(upsert_new(academiq_user_id, events))
 
 
 def list_for_user(academiq_user_id: str, limit: int = 500) -> List[Dict[str, Any]]:
-    return list(
+    """
+    The user's `limit` latest events, newest first. A compacted day shows as
+    one event per rollup (event_rollup_repository.as_event: dated at its first
+    event, with rollup_count and last_timestamp).
+    """
+    raw = (
         student_events_collection.find({"academiq_user_id": str(academiq_user_id)})
         .sort("timestamp", -1)
         .limit(limit)
     )
+    return merge_rollups(raw, event_rollup_repository.list_for_user(academiq_user_id, limit), limit)
+
+
+def merge_rollups(raw: Any, rollups: List[Dict[str, Any]], limit: int) -> List[Dict[str, Any]]:
+    """Merge newest-first raw events and rollup events, keeping the first `limit`."""
+    return list(islice(heapq.merge(raw, rollups, key=_newest_first, reverse=True), limit))
+
+
+def _newest_first(ev: Dict[str, Any]) -> Tuple[int, float]:
+    # Mongo sorts strings above numbers and missing values below them; rollups
+    # always have numeric timestamps.
+    ts = ev.get("timestamp")
+    if isinstance(ts, (int, float)):
+        return 1, ts
+    return (0, 0) if ts is None else (2, 0)
@@ -0,0 +1,130 @@
+"""
+Data access for daily event rollups (student_event_rollups).
+
+services/event_compaction.py folds a student's old low-signal events
+(material views, grade-page views, bare page views) into one document per
+`(academiq_user_id, course_id, UTC day, action_type, page_type)`:
+
+    {_id, academiq_user_id, course_id, day, action_type, page_type,
+     count, first, last, run}
+
+`first` / `last` are the epoch-ms timestamps of the earliest and latest event
+folded in, so readers still know when the student was active that day.
+as_event() turns a rollup into an event-shaped document that readers merge
+with the raw events: `timestamp` is `first`, plus `rollup_count` and
+`last_timestamp`.
+
+Each student's compaction state is one more document, without an
+academiq_user_id so user queries never match it:
+
+    {_id: "<user>:_compacted", before, pending}
+
+Compactable events older than `before` (epoch ms) are covered by rollups.
+`pending` is the run in progress ({run, before}) until its raw events are
+deleted.
+"""
+
+from typing import Any, Dict, Iterable, List, Optional
+
+from pymongo import ASCENDING, DESCENDING
+
+from app.config.database import student_event_rollups_collection
+
+
+def rollup_id(academiq_user_id: str, course_id: str, day: int, action_type: str, page_type: str) -> str:
+    return f"{academiq_user_id}:{course_id}:{day}:{action_type}:{page_type}"
+
+
+def query(academiq_user_id: str, course_id: Optional[str], first: Dict[str, Any]) -> Dict[str, Any]:
+    """Rollups of a student (and course) whose first event is in the `first` range."""
+    q: Dict[str, Any] = {"academiq_user_id": str(academiq_user_id)}
+    if first:
+        q["first"] = first
+    if course_id:
+        q["course_id"] = str(course_id)
+    return q
+
+
+def find(academiq_user_id: str, course_id: Optional[str], first: Dict[str, Any], direction: int = ASCENDING):
+    """Cursor over the matching rollups in `first` order."""
+    return student_event_rollups_collection.find(query(academiq_user_id, course_id, first)).sort("first", direction)
+
+
+def daily(academiq_user_id: str, course_id: Optional[str], first: Dict[str, Any]) -> List[Dict[str, Any]]:
+    """
+    Rows of {_id: {page_type, action_type, day}, count, first, last} summing
+    the matching rollups across courses — the shape of timeline_service's
+    per-day event aggregation.
+    """
+    return list(student_event_rollups_collection.aggregate([
+        {"$match": query(academiq_user_id, course_id, first)},
+        {"$group": {
+            "_id": {"page_type": "$page_type", "action_type": "$action_type", "day": "$day"},
+            "count": {"$sum": "$count"},
+            "first": {"$min": "$first"},
+            "last": {"$max": "$last"},
+        }},
+    ]))
+
+
+def as_event(doc: Dict[str, Any]) -> Dict[str, Any]:
+    """An event-shaped document for a rollup, dated at its first event."""
+    return {
+        "academiq_user_id": doc.get("academiq_user_id"),
+        "event_id": f"rollup-{doc['_id']}",
+        "course_id": doc.get("course_id"),
+        "action_type": doc.get("action_type"),
+        "page_type": doc.get("page_type"),
+        "timestamp": doc.get("first"),
+        "last_timestamp": doc.get("last"),
+        "rollup_count": doc.get("count", 0),
+    }
+
+
+def list_for_user(academiq_user_id: str, limit: int = 500) -> List[Dict[str, Any]]:
+    """The student's `limit` latest rollups as events, newest first."""
+    return [as_event(d) for d in find(academiq_user_id, None, {}, DESCENDING).limit(limit)]
+
+
+def apply(ops: List[Any]) -> Any:
+    """Run prepared rollup upserts as one unordered bulk write (None if empty)."""
+    if not ops:
+        return None
+    return student_event_rollups_collection.bulk_write(ops, ordered=False)
+
+
+def done(ids: Iterable[str], run: str) -> set:
+    """Which of the rollups `ids` already hold run `run`'s counts."""
+    return {d["_id"] for d in student_event_rollups_collection.find({"_id": {"$in": list(ids)}, "run": run}, {"_id": 1})}
+
+
+# ── Compaction state ───────────────────────────────────────────────────────────
+
+def _state_id(academiq_user_id: str) -> str:
+    return f"{academiq_user_id}:_compacted"
+
+
+def get_state(academiq_user_id: str) -> Dict[str, Any]:
+    return student_event_rollups_collection.find_one({"_id": _state_id(str(academiq_user_id))}) or {}
+
+
+def watermarks(academiq_user_ids: Iterable[str]) -> Dict[str, int]:
+    """{user id: before} for every listed student compacted so far, in one query."""
+    ids = [_state_id(str(u)) for u in academiq_user_ids]
+    if not ids:
+        return {}
+    cursor = student_event_rollups_collection.find({"_id": {"$in": ids}, "before": {"$ne": None}}, {"before": 1})
+    return {d["_id"].rsplit(":", 1)[0]: d["before"] for d in cursor}
+
+
+def begin(academiq_user_id: str, run: str, before: int) -> None:
+    """Record run `run` as pending and move the watermark up to `before` first."""
+    student_event_rollups_collection.update_one(
+        {"_id": _state_id(str(academiq_user_id))},
+        {"$max": {"before": before}, "$set": {"pending": {"run": run, "before": before}}},
+        upsert=True,
+    )
+
+
+def finish(academiq_user_id: str) -> None:
+    student_event_rollups_collection.update_one({"_id": _state_id(str(academiq_user_id))}, {"$set": {"pending": None}})
@@ -0,0 +1,52 @@
+"""
+Data access for per-student ingest digests.
+
+One document per `academiq_user_id` holding `{section: digest}` for the last
+payload that was fully ingested (see moodle_ingest.section_digests). A section
+whose digest matches is skipped on the next sync. Deleting a student's
+document forces the next sync to re-ingest everything.
+"""
+
+from datetime import datetime
+from typing import Dict, List
+
+from pymongo import UpdateOne
+
+from app.config.database import ingest_digests_collection
+
+
+def get(academiq_user_id: str) -> Dict[str, str]:
+    doc = ingest_digests_collection.find_one({"academiq_user_id": str(academiq_user_id)})
+    return (doc or {}).get("digests") or {}
+
+
+def get_many(academiq_user_ids: List[str]) -> Dict[str, Dict[str, str]]:
+    """{user id: digests} for every listed student that has any, in one query."""
+    cursor = ingest_digests_collection.find(
+        {"academiq_user_id": {"$in": [str(u) for u in academiq_user_ids]}},
+        {"academiq_user_id": 1, "digests": 1},
+    )
+    return {d["academiq_user_id"]: d.get("digests") or {} for d in cursor}
+
+
+def save(academiq_user_id: str, digests: Dict[str, str]) -> None:
+    save_many({academiq_user_id: digests})
+
+
+def save_many(digests_by_user: Dict[str, Dict[str, str]]) -> None:
+    """Replace the stored digests of several students with one bulk write."""
+    now = datetime.utcnow()
+    ops = [
+        UpdateOne(
+            {"academiq_user_id": str(user_id)},
+            {"$set": {"academiq_user_id": str(user_id), "digests": digests, "updated_at": now}},
+            upsert=True,
+        )
+        for user_id, digests in digests_by_user.items()
+    ]
+    if ops:
+        ingest_digests_collection.bulk_write(ops, ordered=False)
+
+
+def clear(academiq_user_id: str) -> None:
+    ingest_digests_collection.delete_one({"academiq_user_id": str(academiq_user_id)})
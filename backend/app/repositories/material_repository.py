@@ -8,9 +8,25 @@ re-synced material updates the existing record instead of inserting a duplicate.
 from datetime import datetime
 from typing import Any, Dict, List, Optional
 
+from pymongo import UpdateOne
+
 from app.config.database import course_materials_collection
 
 
+def _key(material_doc: Dict[str, Any]) -> Dict[str, Any]:
+    return {
+        "course_id": material_doc.get("course_id"),
+        "material_id": material_doc.get("material_id"),
+    }
+
+
+def _update(material_doc: Dict[str, Any], now: datetime) -> Dict[str, Any]:
+    return {
+        "$set": {**material_doc, "last_seen": now},
+        "$setOnInsert": {"first_seen": now},
+    }
+
+
 def upsert(material_doc: Dict[str, Any]) -> bool:
     """
     Insert or update a material by its (course_id, material_id) key.
@@ -19,18 +35,41 @@ def upsert(material_doc: Dict[str, Any]) -> bool:
     updated. `first_seen` is set only on insert; `last_seen` always refreshed.
     """
     now = datetime.utcnow()
-    key = {
-        "course_id": material_doc.get("course_id"),
-        "material_id": material_doc.get("material_id"),
-    }
-    update = {
-        "$set": {**material_doc, "last_seen": now},
-        "$setOnInsert": {"first_seen": now},
-    }
-    result = course_materials_collection.update_one(key, update, upsert=True)
+    result = course_materials_collection.update_one(
+        _key(material_doc), _update(material_doc, now), upsert=True
+    )
     return result.upserted_id is not None
 
 
+def upsert_op(material_doc: Dict[str, Any], now: Optional[datetime] = None) -> UpdateOne:
+    """
+    The `upsert` of one material as a bulk operation, for callers that batch
+    writes from many payloads (bulk ingest) and send them through `apply`.
+    """
+    return UpdateOne(_key(material_doc), _update(material_doc, now or datetime.utcnow()), upsert=True)
+
+
+def apply(ops: List[UpdateOne]) -> Any:
+    """Run prepared upsert ops as one unordered bulk write (None if empty)."""
+    if not ops:
+        return None
+    return course_materials_collection.bulk_write(ops, ordered=False)
+
+
+def upsert_many(material_docs: List[Dict[str, Any]]) -> int:
+    """
+    `upsert` for a list of materials in one unordered bulk write.
+
+    Returns how many were new. Docs sharing a (course_id, material_id) key are
+    collapsed first (last wins) — an unordered bulk write would apply them in
+    no particular order.
+    """
+    now = datetime.utcnow()
+    unique = {(d.get("course_id"), d.get("material_id")): d for d in material_docs}
+    result = apply([upsert_op(doc, now) for doc in unique.values()])
+    return result.upserted_count if result is not None else 0
+
+
 def list_by_course(course_id: str) -> List[Dict[str, Any]]:
     return list(course_materials_collection.find({"course_id": str(course_id)}))
 
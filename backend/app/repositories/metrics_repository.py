@@ -7,7 +7,9 @@ holds the student's cross-course behaviour aggregate.
 """
 
 from datetime import datetime
-from typing import Any, Dict, List
+from typing import Any, Dict, List, Optional, Tuple
+
+from pymongo import UpdateOne
 
 from app.config.database import student_metrics_collection
 
@@ -24,6 +26,37 @@ def upsert(academiq_user_id: str, course_id: str, metrics: Dict[str, Any]) -> No
     )
 
 
+def upsert_op(
+    academiq_user_id: str, course_id: str, metrics: Dict[str, Any], now: Optional[datetime] = None
+) -> UpdateOne:
+    """The `upsert` of one snapshot as a bulk operation (see `apply`)."""
+    key = {"academiq_user_id": str(academiq_user_id), "course_id": str(course_id)}
+    return UpdateOne(
+        key,
+        {"$set": {**key, "metrics": metrics, "updated_at": now or datetime.utcnow()}},
+        upsert=True,
+    )
+
+
+def apply(ops: List[UpdateOne]) -> Any:
+    """Run prepared upsert ops as one unordered bulk write (None if empty)."""
+    if not ops:
+        return None
+    return student_metrics_collection.bulk_write(ops, ordered=False)
+
+
+def upsert_many(academiq_user_id: str, snapshots: List[Tuple[str, Dict[str, Any]]]) -> int:
+    """
+    `upsert` every (course_id, metrics) snapshot of a user in one unordered
+    bulk write. Returns how many (user, course) pairs were new; a course
+    listed twice keeps its last snapshot.
+    """
+    now = datetime.utcnow()
+    unique = {str(course_id): metrics for course_id, metrics in snapshots}
+    result = apply([upsert_op(academiq_user_id, cid, m, now) for cid, m in unique.items()])
+    return result.upserted_count if result is not None else 0
+
+
 def list_for_user(academiq_user_id: str) -> List[Dict[str, Any]]:
     return list(student_metrics_collection.find({"academiq_user_id": str(academiq_user_id)}))
 
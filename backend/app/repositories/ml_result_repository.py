@@ -0,0 +1,69 @@
+"""
+Data access for the latest model outputs (ml_results).
+
+One document per `(academiq_user_id, model_name)`, overwritten on every
+scoring run. `feature_hash` records which feature vector the prediction was
+computed from (feature_pipeline.feature_hash over the raw columns) and
+`artifact_version` which model artifact computed it, so readers can tell a
+current result from a stale one without re-scoring.
+"""
+
+from datetime import datetime
+from typing import Any, Dict, List, Optional
+
+from pymongo import UpdateOne
+
+from app.config.database import ml_results_collection
+
+
+def upsert_many(
+    academiq_user_id: str,
+    predictions: Dict[str, Dict[str, Any]],
+    feature_hash: Optional[str] = None,
+    features: Optional[Dict[str, Any]] = None,
+    artifact_versions: Optional[Dict[str, str]] = None,
+) -> None:
+    """
+    Write {model_name: prediction} for one user in a single bulk write.
+    `artifact_versions` is {model_name: artifact_version()} of the models
+    that computed them.
+    """
+    now = datetime.utcnow()
+    versions = artifact_versions or {}
+    ops = []
+    for model_name, prediction in predictions.items():
+        key = {"academiq_user_id": str(academiq_user_id), "model_name": model_name}
+        fields = {
+            **key, "prediction": prediction, "feature_hash": feature_hash,
+            "artifact_version": versions.get(model_name), "updated_at": now,
+        }
+        if features is not None:
+            fields["input_features_snapshot"] = features
+        ops.append(UpdateOne(key, {"$set": fields, "$setOnInsert": {"created_at": now}}, upsert=True))
+    if ops:
+        ml_results_collection.bulk_write(ops, ordered=False)
+
+
+def get_current(
+    academiq_user_id: str,
+    model_name: str,
+    feature_hash: str,
+    artifact_version: str,
+) -> Optional[Dict[str, Any]]:
+    """The stored prediction, only if it was computed from `feature_hash` by `artifact_version`."""
+    doc = ml_results_collection.find_one(
+        {
+            "academiq_user_id": str(academiq_user_id), "model_name": model_name,
+            "feature_hash": feature_hash, "artifact_version": artifact_version,
+        },
+        {"prediction": 1},
+    )
+    return (doc or {}).get("prediction")
+
+
+def list_for_user(academiq_user_id: str) -> List[Dict[str, Any]]:
+    """Every model's stored result for one user (model_name, feature_hash, artifact_version, prediction)."""
+    return list(ml_results_collection.find(
+        {"academiq_user_id": str(academiq_user_id)},
+        {"model_name": 1, "feature_hash": 1, "artifact_version": 1, "prediction": 1},
+    ))
@@ -35,18 +35,14 @@ def consume_reset_token(token_hash: str) -> Optional[str]:
 
     Returns the user_id on success, None if the token is unknown, expired,
     or already used.
+
+    A single conditional update: it marks the token used only if it is
+    unused and unexpired, so a second request with the same token fails.
+    Expired tokens are left to the TTL index and the expiry sweeper.
     """
-    doc = password_reset_tokens_collection.find_one({"token_hash": token_hash})
-    if not doc:
-        return None
-    if doc.get("used"):
-        return None
-    expires_at = doc.get("expires_at")
-    if isinstance(expires_at, datetime) and expires_at < datetime.utcnow():
-        password_reset_tokens_collection.delete_one({"token_hash": token_hash})
-        return None
-    # Mark as used immediately so a second request with the same token fails.
-    password_reset_tokens_collection.update_one(
-        {"token_hash": token_hash}, {"$set": {"used": True}}
+    doc = password_reset_tokens_collection.find_one_and_update(
+        {"token_hash": token_hash, "used": {"$ne": True}, "expires_at": {"$gt": datetime.utcnow()}},
+        {"$set": {"used": True}},
+        projection={"user_id": 1},
     )
-    return str(doc["user_id"])
+    return str(doc["user_id"]) if doc else None
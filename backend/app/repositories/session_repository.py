@@ -11,6 +11,7 @@ from typing import Any, Dict, Optional
 
 from app.config.database import auth_sessions_collection
 from app.config.settings import SESSION_TTL_HOURS
+from app.repositories import auth_hooks
 
 
 def create_session(token_hash: str, user_id: str, role: str) -> Dict[str, Any]:
@@ -27,28 +28,30 @@ def create_session(token_hash: str, user_id: str, role: str) -> Dict[str, Any]:
 
 
 def find_valid_session(token_hash: str) -> Optional[Dict[str, Any]]:
-    """Return the session for a token hash only if it exists and hasn't expired."""
+    """
+    Return the session for a token hash only if it exists and hasn't expired.
+
+    One read on the unique token_hash index and nothing else: expired
+    sessions are removed by the TTL index on expires_at and the expiry
+    sweeper (services/expiry_sweeper.py), never on the request path.
+    """
     if not token_hash:
         return None
-    doc = auth_sessions_collection.find_one({"token_hash": token_hash})
-    if not doc:
-        return None
-    expires_at = doc.get("expires_at")
-    if isinstance(expires_at, datetime) and expires_at < datetime.utcnow():
-        # Lazily clean up expired sessions on access.
-        auth_sessions_collection.delete_one({"token_hash": token_hash})
-        return None
-    return doc
+    return auth_sessions_collection.find_one(
+        {"token_hash": token_hash, "expires_at": {"$gt": datetime.utcnow()}}
+    )
 
 
 def delete_session(token_hash: str) -> bool:
     if not token_hash:
         return False
     result = auth_sessions_collection.delete_one({"token_hash": token_hash})
+    auth_hooks.token_revoked(token_hash)
     return result.deleted_count > 0
 
 
 def delete_sessions_for_user(user_id: str) -> int:
     """Invalidate every session for a user (e.g. after a password reset)."""
     result = auth_sessions_collection.delete_many({"user_id": str(user_id)})
+    auth_hooks.user_changed(user_id)
     return result.deleted_count
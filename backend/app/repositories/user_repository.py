@@ -13,6 +13,7 @@ from bson import ObjectId
 from bson.errors import InvalidId
 
 from app.config.database import users_collection
+from app.repositories import auth_hooks
 
 
 def _oid(user_id: str) -> Optional[ObjectId]:
@@ -54,6 +55,25 @@ def find_by_student_id(student_id: str) -> Optional[Dict[str, Any]]:
     return users_collection.find_one({"student_id": str(student_id).strip()})
 
 
+def find_by_identities(
+    moodle_user_ids: List[str],
+    student_ids: List[str],
+    emails: List[str],
+) -> List[Dict[str, Any]]:
+    """Every user matching any of the given identifiers, in one query."""
+    clauses = []
+    for field, values in (
+        ("moodle_user_id", [str(v).strip() for v in moodle_user_ids if v]),
+        ("student_id", [str(v).strip() for v in student_ids if v]),
+        ("email", [str(v).strip().lower() for v in emails if v]),
+    ):
+        if values:
+            clauses.append({field: {"$in": sorted(set(values))}})
+    if not clauses:
+        return []
+    return list(users_collection.find({"$or": clauses}))
+
+
 def list_users(search: Optional[str] = None, limit: int = 200) -> List[Dict[str, Any]]:
     """Return users, newest first, optionally filtered by a search term.
 
@@ -82,6 +102,7 @@ def update(user_id: str, fields: Dict[str, Any]) -> Optional[Dict[str, Any]]:
         return None
     fields = {**fields, "updated_at": datetime.utcnow()}
     users_collection.update_one({"_id": oid}, {"$set": fields})
+    auth_hooks.user_changed(str(oid))
     return users_collection.find_one({"_id": oid})
 
 
@@ -90,6 +111,7 @@ def delete(user_id: str) -> bool:
     if oid is None:
         return False
     result = users_collection.delete_one({"_id": oid})
+    auth_hooks.user_changed(str(oid))
     return result.deleted_count > 0
 
 
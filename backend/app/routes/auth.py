@@ -2,10 +2,15 @@
 """
 Authentication routes: login, logout, current-user, forgot/reset password,
 and magic-link one-click login (for the Chrome extension).
+
+Handlers run on the event loop: users and sessions go through the async
+repositories, while bcrypt, email and the token repositories run in the
+threadpool so none of them blocks other requests.
 """
 
 from fastapi import APIRouter, Depends, HTTPException, Request, Response, status
 from pydantic import BaseModel
+from starlette.concurrency import run_in_threadpool
 
 from app.auth import get_current_user
 from app.config.settings import (
@@ -17,7 +22,7 @@ from app.config.settings import (
     SESSION_TTL_HOURS,
 )
 from app.models.user import serialize_user
-from app.repositories import session_repository, user_repository
+from app.repositories.aio import session_repository, user_repository
 from app.repositories.magic_link_repository import (
     consume_magic_token,
     create_magic_token,
@@ -45,10 +50,10 @@ class LoginRequest(BaseModel):
     password: str
 
 
-def _issue_session(response: Response, user: dict) -> str:
+async def _issue_session(response: Response, user: dict) -> str:
     """Create a session, set the httpOnly cookie, return the raw token."""
     token = generate_session_token()
-    session_repository.create_session(
+    await session_repository.create_session(
         token_hash=hash_token(token),
         user_id=str(user["_id"]),
         role=user.get("role", "student"),
@@ -70,11 +75,13 @@ def _issue_session(response: Response, user: dict) -> str:
 @router.post("/login")
 async def login(payload: LoginRequest, response: Response):
     """Authenticate with email + password; returns profile, role, and token."""
-    user = user_repository.find_by_email(payload.email)
-    if not user or not verify_password(payload.password, user.get("password_hash", "")):
+    user = await user_repository.find_by_email(payload.email)
+    if not user or not await run_in_threadpool(
+        verify_password, payload.password, user.get("password_hash", "")
+    ):
         raise HTTPException(status.HTTP_401_UNAUTHORIZED, "Invalid email or password")
 
-    token = _issue_session(response, user)
+    token = await _issue_session(response, user)
     profile = serialize_user(user)
     return {
         "user": profile,
@@ -93,7 +100,7 @@ async def logout(request: Request, response: Response):
         if auth_header.lower().startswith("bearer "):
             token = auth_header[7:].strip()
     if token:
-        session_repository.delete_session(hash_token(token))
+        await session_repository.delete_session(hash_token(token))
     response.delete_cookie(SESSION_COOKIE_NAME, path="/")
     return {"status": "logged_out"}
 
@@ -117,16 +124,17 @@ async def forgot_password(payload: ForgotPasswordRequest):
     Request a password-reset email.
     Always returns 202 to prevent account enumeration.
     """
-    user = user_repository.find_by_email(payload.email)
+    user = await user_repository.find_by_email(payload.email)
     if user:
         raw_token = generate_session_token()
         token_hash = hash_token(raw_token)
-        create_reset_token(token_hash, str(user["_id"]))
+        await run_in_threadpool(create_reset_token, token_hash, str(user["_id"]))
         reset_url = (
             f"{APP_LOGIN_URL.removesuffix('/signin').rstrip('/')}"
             f"/reset-password?token={raw_token}"
         )
-        send_reset_link_email(
+        await run_in_threadpool(
+            send_reset_link_email,
             to_email=user["email"],
             full_name=user.get("full_name", ""),
             reset_url=reset_url,
@@ -154,22 +162,22 @@ async def reset_password(payload: ResetPasswordRequest, response: Response):
         )
 
     token_hash = hash_token(payload.token)
-    user_id = consume_reset_token(token_hash)
+    user_id = await run_in_threadpool(consume_reset_token, token_hash)
     if not user_id:
         raise HTTPException(
             status.HTTP_400_BAD_REQUEST,
             "This reset link is invalid or has expired. Please request a new one.",
         )
 
-    user = user_repository.find_by_id(user_id)
+    user = await user_repository.find_by_id(user_id)
     if not user:
         raise HTTPException(status.HTTP_400_BAD_REQUEST, "Account not found.")
 
-    user_repository.update(user_id, {"password_hash": hash_password(payload.new_password)})
-    session_repository.delete_sessions_for_user(user_id)
+    password_hash = await run_in_threadpool(hash_password, payload.new_password)
+    updated_user = await user_repository.update(user_id, {"password_hash": password_hash})
+    await session_repository.delete_sessions_for_user(user_id)
 
-    updated_user = user_repository.find_by_id(user_id)
-    token = _issue_session(response, updated_user)
+    token = await _issue_session(response, updated_user)
     profile = serialize_user(updated_user)
     return {
         "user": profile,
@@ -194,13 +202,13 @@ async def request_magic_link(payload: MagicLinkRequest):
     Returns { token } only — the caller opens:
         {appBaseUrl}/magic-login?token=<token>
     """
-    user = user_repository.find_by_id(payload.academiq_user_id)
+    user = await user_repository.find_by_id(payload.academiq_user_id)
     if not user:
         raise HTTPException(status.HTTP_404_NOT_FOUND, "User not found.")
 
     raw_token = generate_session_token()
     token_hash = hash_token(raw_token)
-    create_magic_token(token_hash, str(user["_id"]))
+    await run_in_threadpool(create_magic_token, token_hash, str(user["_id"]))
 
     return {"token": raw_token}
 
@@ -297,10 +305,10 @@ async def moodle_login(payload: MoodleLoginRequest, response: Response):
         "full_name": full_name,
         "email": email,
     }
-    user, was_created = resolve_or_create_user(identity)
+    user, was_created = await run_in_threadpool(resolve_or_create_user, identity)
 
     # Step 4: issue a session
-    session_token = _issue_session(response, user)
+    session_token = await _issue_session(response, user)
     profile = serialize_user(user)
     return {
         "user": profile,
@@ -324,18 +332,18 @@ async def magic_login(token: str, response: Response):
         raise HTTPException(status.HTTP_400_BAD_REQUEST, "Token is required.")
 
     token_hash = hash_token(token)
-    user_id = consume_magic_token(token_hash)
+    user_id = await run_in_threadpool(consume_magic_token, token_hash)
     if not user_id:
         raise HTTPException(
             status.HTTP_400_BAD_REQUEST,
             "This login link is invalid or has expired. Please sync again.",
         )
 
-    user = user_repository.find_by_id(user_id)
+    user = await user_repository.find_by_id(user_id)
     if not user:
         raise HTTPException(status.HTTP_400_BAD_REQUEST, "Account not found.")
 
-    session_token = _issue_session(response, user)
+    session_token = await _issue_session(response, user)
     profile = serialize_user(user)
     return {
         "user": profile,
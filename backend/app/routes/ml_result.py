@@ -14,6 +14,7 @@ from bson import ObjectId
 from fastapi import APIRouter, HTTPException
 
 from app.config.database import ml_results_collection, feature_vectors_collection
+from app.services.scoring_queue import PERFORMANCE_MODEL
 
 router = APIRouter(prefix="/api/ml", tags=["ML Results"])
 
@@ -42,9 +43,11 @@ def get_ml_result(academiq_user_id: str) -> Dict[str, Any]:
     if not academiq_user_id:
         raise HTTPException(status_code=400, detail="academiq_user_id is required.")
 
-    # Try the canonical ml_results collection first.
+    # Try the canonical ml_results collection first. Ingest-time scoring also
+    # stores the grade/risk and burnout outputs there, so pick the
+    # performance model's document.
     doc = ml_results_collection.find_one(
-        {"academiq_user_id": academiq_user_id},
+        {"academiq_user_id": academiq_user_id, "model_name": PERFORMANCE_MODEL},
         sort=[("updated_at", -1)],
     )
 
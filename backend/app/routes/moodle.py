@@ -1,16 +1,19 @@
-from fastapi import APIRouter, HTTPException, BackgroundTasks
+from fastapi import APIRouter, HTTPException, BackgroundTasks, Request
+from starlette.concurrency import run_in_threadpool
 from bson import ObjectId
 from datetime import datetime
-from typing import Dict, Any
+from typing import Dict, Any, List
 
 import base64
 
+from app.config import database
 from app.config.database import raw_moodle_payload_collection, feature_vectors_collection, system_events_collection
 from app.services.preprocessing import compute_features
 from app.services.moodle_ingest import normalize_payload, slim_payload
 from app.services.user_provisioning import extract_identity, resolve_or_create_user
-from app.repositories import material_repository
-from app.services import quiz_gen
+from app.repositories import ingest_digest_repository
+from app.repositories.aio import material_repository
+from app.services import bulk_ingest, moodle_ingest, prediction_cache, quiz_gen, scoring_queue, study_buddy_index, timeline_store
 
 router = APIRouter()
 
@@ -32,11 +35,11 @@ async def upload_material_content(payload: Dict[str, Any]):
         raise HTTPException(status_code=400, detail="course_id, material_id, content_base64 required")
     try:
         data = base64.b64decode(b64)
-        text = quiz_gen.extract_pdf_text(data)
+        text = await run_in_threadpool(quiz_gen.extract_pdf_text, data)
     except Exception as exc:
         raise HTTPException(status_code=422, detail=f"Could not read PDF: {exc}")
 
-    material_repository.set_content(course_id, material_id, text)
+    await material_repository.set_content(course_id, material_id, text)
     return {"status": "stored", "material_id": material_id, "chars": len(text)}
 
 
@@ -45,50 +48,54 @@ async def upload_material_content(payload: Dict[str, Any]):
 @router.get("/raw-moodle-payloads")
 async def get_raw_moodle_payloads():
     try:
-        docs = list(raw_moodle_payload_collection.find({}, {"_id": 0}))
-        return docs
+        cursor = database.get_async_db()["raw_moodle_payload_collection"].find({}, {"_id": 0})
+        return await cursor.to_list(None)
     except Exception as e:
         import traceback
         error_msg = f"{type(e).__name__}: {str(e)}\n{traceback.format_exc()}"
         print(error_msg)
         raise HTTPException(status_code=500, detail=error_msg)
 
-# POST: ingest raw payload, compute features, store both
-@router.post("/raw-moodle-payloads")
-async def post_raw_moodle_payload(payload: Dict[str, Any], background_tasks: BackgroundTasks):
-    """
-    Accepts the exact JSON from the Chrome extension.
-    Stores raw payload, computes feature vector, stores it,
-    and optionally triggers ML pipeline in background.
-    """
-    try:
-        identity = extract_identity(payload)
-        academiq_user, was_created = resolve_or_create_user(identity)
-        academiq_user_id = str(academiq_user["_id"])
-        student_id = academiq_user.get("student_id") or identity.get("student_id")
-
-        features = compute_features(payload)
-
-        norm = normalize_payload(payload, academiq_user_id)
-
-        now = datetime.utcnow()
-
-        slim = slim_payload(payload)
-        raw_moodle_payload_collection.update_one(
-            {"academiq_user_id": academiq_user_id},
-            {
-                "$set": {**slim, "academiq_user_id": academiq_user_id, "updated_at": now},
-                "$setOnInsert": {"created_at": now},
-                "$inc": {"sync_count": 1},
-            },
-            upsert=True,
-        )
-        raw_doc = raw_moodle_payload_collection.find_one(
-            {"academiq_user_id": academiq_user_id}, {"_id": 1}
-        )
-        raw_id = str(raw_doc["_id"])
-
-        feature_vectors_collection.update_one(
+def _ingest_payload(payload: Dict[str, Any]) -> Dict[str, Any]:
+    """The whole single-payload ingest: blocking Mongo and CPU work."""
+    identity = extract_identity(payload)
+    academiq_user, was_created = resolve_or_create_user(identity)
+    academiq_user_id = str(academiq_user["_id"])
+    student_id = academiq_user.get("student_id") or identity.get("student_id")
+
+    # Sections identical to the last sync are not re-written; when the
+    # features cannot have moved, the stored features (and scores) stand.
+    digests = moodle_ingest.section_digests(payload)
+    unchanged = moodle_ingest.unchanged_sections(
+        digests, ingest_digest_repository.get(academiq_user_id)
+    )
+    features_changed = moodle_ingest.features_changed(payload, unchanged)
+    features = compute_features(payload) if features_changed else {}
+
+    norm = normalize_payload(payload, academiq_user_id, skip=unchanged)
+
+    now = datetime.utcnow()
+
+    slim = slim_payload(payload)
+    raw_moodle_payload_collection.update_one(
+        {"academiq_user_id": academiq_user_id},
+        {
+            "$set": {**slim, "academiq_user_id": academiq_user_id, "updated_at": now},
+            "$setOnInsert": {"created_at": now},
+            "$inc": {"sync_count": 1},
+        },
+        upsert=True,
+    )
+    if "grades" not in unchanged:
+        timeline_store.refresh_grades(academiq_user_id, payload.get("grades") or [])
+    raw_doc = raw_moodle_payload_collection.find_one(
+        {"academiq_user_id": academiq_user_id}, {"_id": 1}
+    )
+    raw_id = str(raw_doc["_id"])
+
+    scoring = "skipped"
+    if features_changed:
+        previous = feature_vectors_collection.find_one_and_update(
             {"academiq_user_id": academiq_user_id},
             {
                 "$set": {
@@ -99,34 +106,90 @@ async def post_raw_moodle_payload(payload: Dict[str, Any], background_tasks: Bac
                 },
                 "$setOnInsert": {"created_at": now},
             },
+            projection={"features": 1},
             upsert=True,
         )
-        system_events_collection.update_one(
-            {"type": "extension_sync"},
-            {
-                "$set": {
-                    "type": "extension_sync",
-                    "last_sync_at": now,
-                    "status": "success",
-                    "academiq_user_id": academiq_user_id,
-                    "student_id": student_id or features.get("student_id"),
-                }
-            },
-            upsert=True,
-        )
-        return {
-            "inserted_id": raw_id,
-            "status": "features_computed",
-            "academiq_user_id": academiq_user_id,
-            "account_created": was_created,
-            "student_id": student_id or features.get("student_id"),
-            "normalized": norm,
-        }
+        # Model outputs memoized for the replaced vector are now stale.
+        if previous and previous.get("features") != features:
+            prediction_cache.invalidate(previous.get("features"))
+        # Courses, grades or study pattern moved: refresh this student's buddy rows.
+        study_buddy_index.note_changed(academiq_user_id)
+        # Score off the request path; reads serve the stored results.
+        scoring = scoring_queue.submit(academiq_user_id, features)
+    system_events_collection.update_one(
+        {"type": "extension_sync"},
+        {
+            "$set": {
+                "type": "extension_sync",
+                "last_sync_at": now,
+                "status": "success",
+                "academiq_user_id": academiq_user_id,
+                "student_id": student_id or features.get("student_id"),
+            }
+        },
+        upsert=True,
+    )
+    # Stored last, so a sync that failed part-way is redone in full.
+    ingest_digest_repository.save(academiq_user_id, digests)
+    return {
+        "inserted_id": raw_id,
+        "status": "features_computed" if features_changed else "features_unchanged",
+        "scoring": scoring,
+        "academiq_user_id": academiq_user_id,
+        "account_created": was_created,
+        "student_id": student_id or features.get("student_id"),
+        "normalized": norm,
+        "skipped": sorted(unchanged),
+    }
+
 
+# POST: ingest raw payload, compute features, store both
+@router.post("/raw-moodle-payloads")
+async def post_raw_moodle_payload(payload: Dict[str, Any], background_tasks: BackgroundTasks):
+    """
+    Accepts the exact JSON from the Chrome extension.
+    Stores raw payload, computes feature vector, stores it,
+    and optionally triggers ML pipeline in background.
+    """
+    try:
+        # Runs in the threadpool so a sync never stalls the event loop.
+        return await run_in_threadpool(_ingest_payload, payload)
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Processing error: {str(e)}")
 
 
+def _add_lines(job: bulk_ingest.BulkIngest, lines: List[bytes]) -> None:
+    for line in lines:
+        job.add(line)
+
+
+# POST: ingest many payloads (NDJSON, one extension payload per line)
+@router.post("/raw-moodle-payloads/bulk")
+async def post_raw_moodle_payloads_bulk(request: Request):
+    """
+    Bulk variant of POST /raw-moodle-payloads for exporters and replay tools.
+
+    Body: NDJSON, one extension payload per line. Payloads are written in
+    chunks with a few bulk writes each (see services/bulk_ingest.py). Returns
+    a per-line summary (the single endpoint's response, or an error entry)
+    plus payloads-per-second.
+    """
+    job = bulk_ingest.BulkIngest()
+    batch: List[bytes] = []
+    # Lines are read on the event loop; parsing and writing a chunk happen in
+    # the threadpool, one hop per chunk.
+    async for line in bulk_ingest.ndjson_lines(request.stream()):
+        batch.append(line)
+        if len(batch) >= job.chunk_size:
+            await run_in_threadpool(_add_lines, job, batch)
+            batch = []
+    await run_in_threadpool(_add_lines, job, batch)
+    report = await run_in_threadpool(job.finish)
+    if not report["payloads"]:
+        raise HTTPException(status_code=400, detail="Empty NDJSON body")
+    return report
+
+
 # PUT: update raw payload by id (accepts any JSON, no validation)
 @router.put("/raw-moodle-payloads/{id}")
 async def put_raw_moodle_payload(id: str, payload: Dict[str, Any]):
@@ -136,7 +199,7 @@ async def put_raw_moodle_payload(id: str, payload: Dict[str, Any]):
         raise HTTPException(status_code=400, detail="Invalid id format")
 
     try:
-        result = raw_moodle_payload_collection.update_one(
+        result = await database.get_async_db()["raw_moodle_payload_collection"].update_one(
             {"_id": oid},
             {"$set": payload}
         )
@@ -154,7 +217,7 @@ async def delete_raw_moodle_payload(id: str):
         raise HTTPException(status_code=400, detail="Invalid id format")
 
     try:
-        result = raw_moodle_payload_collection.delete_one({"_id": oid})
+        result = await database.get_async_db()["raw_moodle_payload_collection"].delete_one({"_id": oid})
         return {"deleted_count": result.deleted_count}
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"DB error: {str(e)}")
\ No newline at end of file
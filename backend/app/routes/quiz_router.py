@@ -20,6 +20,7 @@ from typing import List, Optional
 
 from fastapi import APIRouter, File, HTTPException, Query, UploadFile
 from pydantic import BaseModel
+from starlette.concurrency import run_in_threadpool
 
 # ── Make quiz_generator modules importable ────────────────────────────────────
 # File lives at:  AcademIQ/backend/app/routes/quiz_router.py
@@ -29,14 +30,19 @@ _QUIZ_GEN_DIR = Path(__file__).resolve().parent.parent.parent.parent / "ai" / "q
 if str(_QUIZ_GEN_DIR) not in sys.path:
     sys.path.insert(0, str(_QUIZ_GEN_DIR))
 
-try:
-    from quiz_generator import QuizGenerator
-    from data_structures import QuizQuestion
-    _QUIZ_GEN_AVAILABLE = True
-    _QUIZ_GEN_ERROR = ""
-except Exception as _import_err:
-    _QUIZ_GEN_AVAILABLE = False
-    _QUIZ_GEN_ERROR = str(_import_err)
+from app.services import lazy_import
+
+# nltk / PyPDF2 / python-pptx load on first use (or in the startup warm-up).
+quiz_generator = lazy_import.module("quiz_generator")
+
+
+def _quiz_gen_error() -> str:
+    """'' when the generator modules import, else the import error."""
+    try:
+        quiz_generator.load()
+        return ""
+    except Exception as exc:
+        return str(exc)
 
 # ── Reuse the existing app MongoDB collection ─────────────────────────────────
 try:
@@ -89,10 +95,11 @@ async def generate_quiz(
     file: UploadFile = File(..., description="PDF or PPTX file"),
     num_questions: int = Query(10, ge=1, le=50, description="Number of questions"),
 ):
-    if not _QUIZ_GEN_AVAILABLE:
+    error = await run_in_threadpool(_quiz_gen_error)
+    if error:
         raise HTTPException(
             status_code=503,
-            detail=f"Quiz generator modules not available: {_QUIZ_GEN_ERROR}",
+            detail=f"Quiz generator modules not available: {error}",
         )
 
     filename = file.filename or ""
@@ -110,8 +117,9 @@ async def generate_quiz(
         tmp.close()
 
     try:
-        generator = QuizGenerator()
-        document  = generator.process_document(tmp_path)
+        # Parsing and generation are CPU-bound — keep them off the event loop.
+        generator = quiz_generator.QuizGenerator()
+        document  = await run_in_threadpool(generator.process_document, tmp_path)
 
         if not document.concepts:
             raise HTTPException(
@@ -119,7 +127,9 @@ async def generate_quiz(
                 detail="No valid concepts found in the document. Please try a different file.",
             )
 
-        questions: List[QuizQuestion] = generator.generate_quiz(document, num_questions)
+        questions = await run_in_threadpool(
+            generator.generate_quiz, document, num_questions
+        )
 
         if not questions:
             raise HTTPException(
@@ -156,11 +166,11 @@ async def generate_quiz(
             },
         }
 
-        result = _col().insert_one(quiz_doc)
+        result = await run_in_threadpool(_col().insert_one, quiz_doc)
         doc_id = str(result.inserted_id)
         print(f"[OK] Quiz saved — id: {doc_id}, questions: {len(questions)}")
 
-        return _fetch_quiz_by_id(doc_id)
+        return await run_in_threadpool(_fetch_quiz_by_id, doc_id)
 
     finally:
         os.unlink(tmp_path)
@@ -192,8 +202,10 @@ def delete_quiz(quiz_id: str):
 # GET /api/quiz/health
 @router.get("/health", summary="Quiz generator health check")
 def quiz_health():
+    error = _quiz_gen_error()
     return {
-        "quiz_generator_available": _QUIZ_GEN_AVAILABLE,
+        "quiz_generator_available": not error,
+        "quiz_generator_error": error or None,
         "quiz_generator_path": str(_QUIZ_GEN_DIR),
         "quiz_generator_path_exists": _QUIZ_GEN_DIR.exists(),
         "collection_ready": _COLLECTION_READY,
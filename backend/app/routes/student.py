@@ -1,13 +1,18 @@
 # backend/app/routes/student.py
 
 from fastapi import APIRouter, HTTPException
+from starlette.concurrency import run_in_threadpool
 from typing import Dict, Any
 from datetime import datetime
 from app.auth import get_current_user
+from app.services import inference_pool, lazy_import
 
 from app.config.database import feature_vectors_collection, ml_results_collection
-from app.services.performance_predict import predict_performance
-from app.services.grade_risk_predict import predict_grade_and_risk
+
+# Imported on first use (or by the startup warm-up): pandas / LightGBM / SHAP
+# and TensorFlow respectively.
+performance_predict = lazy_import.module("app.services.performance_predict")
+grade_risk_predict = lazy_import.module("app.services.grade_risk_predict")
 
 router = APIRouter(prefix="/api/student", tags=["Student"])
 
@@ -32,7 +37,7 @@ def store_prediction(student_id: str, model_name: str, input_features: Dict[str,
 
 @router.get("/insights/{student_id}")
 async def get_insights(student_id: str):
-    features = get_latest_features(student_id)
+    features = await run_in_threadpool(get_latest_features, student_id)
     if not features:
         raise HTTPException(status_code=404, detail="No feature vector found for this student")
 
@@ -50,8 +55,8 @@ async def get_insights(student_id: str):
     }
 
     try:
-        result = predict_performance(raw_input)
-        store_prediction(student_id, "performance_model_v4", raw_input, result)
+        result = await inference_pool.run(performance_predict.predict_performance, raw_input)
+        await run_in_threadpool(store_prediction, student_id, "performance_model_v4", raw_input, result)
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Performance model inference failed: {str(e)}")
 
@@ -84,7 +89,7 @@ async def get_insights(student_id: str):
 
 @router.get("/grade-risk/{student_id}")
 async def get_grade_risk(student_id: str):
-    features = get_latest_features(student_id)
+    features = await run_in_threadpool(get_latest_features, student_id)
     if not features:
         raise HTTPException(status_code=404, detail="No feature vector found for this student")
 
@@ -102,8 +107,8 @@ async def get_grade_risk(student_id: str):
     }
 
     try:
-        result = predict_grade_and_risk(required)
-        store_prediction(student_id, "grade_risk_v1", required, result)
+        result = await inference_pool.run(grade_risk_predict.predict_grade_and_risk, required)
+        await run_in_threadpool(store_prediction, student_id, "grade_risk_v1", required, result)
     except ImportError as e:
         raise HTTPException(status_code=503, detail=f"Grade/risk model not available (TensorFlow required): {str(e)}")
     except Exception as e:
@@ -8,14 +8,23 @@ Paths intentionally have NO /api prefix to match the frontend's api.ts calls
 (/courses, /dashboard, /courses/{id}/performance, ...).
 """
 
+import time
 from datetime import datetime
 from typing import Any, Dict, List, Optional
 
-from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi import APIRouter, Depends, HTTPException, Query, Response
+from fastapi.responses import StreamingResponse
 from pydantic import BaseModel
+from starlette.concurrency import run_in_threadpool
 
 from app.auth import get_current_user
-from app.repositories import material_repository, metrics_repository, user_repository
+from app.config.settings import TIMELINE_MATERIALIZED
+from app.repositories import (
+    counterfactual_repository,
+    material_repository,
+    metrics_repository,
+    user_repository,
+)
 from app.schema.counterfactual_schema import (
     CounterfactualChange,
     CounterfactualResponse,
@@ -25,9 +34,21 @@ from app.schema.prediction_history_schema import (
     PredictionHistoryPoint,
     PredictionTrendResponse,
 )
-from app.schema.timeline_schema import EvidenceTimelineResponse
-from app.services import prediction_history, quiz_gen, student_data, study_buddy
-from app.services.timeline_service import build_timeline
+from app.schema.timeline_schema import EvidenceTimelineItem, EvidenceTimelineResponse, TimelineSummary
+from app.services import (
+    feature_pipeline,
+    inference_pool,
+    prediction_history,
+    quiz_gen,
+    scoring_queue,
+    shap_engine,
+    student_data,
+    study_buddy,
+    study_buddy_index,
+    timeline_service,
+    timeline_store,
+)
+from app.services.student_context import StudentContext
 
 router = APIRouter(tags=["Student data"])
 
@@ -53,6 +74,7 @@ def set_study_buddy_optin(
 ):
     """Toggle whether this student is discoverable as a study buddy (consent)."""
     user_repository.update(str(user["_id"]), {"study_buddy_optin": body.optin})
+    study_buddy_index.note_changed(str(user["_id"]))
     return {"studyBuddyOptIn": body.optin}
 
 
@@ -139,8 +161,42 @@ def performance(course_id: str, user: Dict[str, Any] = Depends(get_current_user)
 
 
 @router.get("/courses/{course_id}/insights")
-def insights(course_id: str, user: Dict[str, Any] = Depends(get_current_user)):
-    return student_data.get_insights(str(user["_id"]), course_id)
+def insights(
+    course_id: str,
+    response: Response,
+    user: Dict[str, Any] = Depends(get_current_user),
+):
+    # Server-Timing shows how much of the response time SHAP accounts for
+    # (browser devtools display it next to the request).
+    t0 = time.perf_counter()
+    with shap_engine.request_timer() as shap_ms:
+        result = student_data.get_insights(str(user["_id"]), course_id)
+    total_ms = (time.perf_counter() - t0) * 1000
+    response.headers["Server-Timing"] = f"shap;dur={sum(shap_ms):.2f}, insights;dur={total_ms:.2f}"
+    return result
+
+
+@router.get("/me/snapshot")
+async def snapshot(
+    response: Response,
+    course_id: Optional[str] = Query(None, description="Also include performance + insights for this course"),
+    user: Dict[str, Any] = Depends(get_current_user),
+):
+    """
+    /dashboard, /courses and /courses/{id}/performance + /insights in one
+    response. The student's documents are fetched once, concurrently, before
+    anything is computed; `timings` (and Server-Timing) report each source's
+    fetch time and each section's compute time.
+    """
+    ctx = await StudentContext(str(user["_id"])).preload()
+    with shap_engine.request_timer() as shap_ms:
+        result = await run_in_threadpool(student_data.get_snapshot, user, course_id, ctx)
+    result["timings"]["compute_ms"]["shap"] = round(sum(shap_ms), 3)
+    response.headers["Server-Timing"] = ", ".join(
+        [ctx.server_timing()]
+        + [f"{name};dur={ms:.2f}" for name, ms in result["timings"]["compute_ms"].items()]
+    )
+    return result
 
 
 @router.get("/courses/{course_id}/materials")
@@ -192,7 +248,11 @@ def generate_quiz(
 # ── Counterfactual Recommendation Engine ────────────────────────────────────
 
 @router.get("/counterfactual", response_model=CounterfactualResponse)
-def counterfactual(user: Dict[str, Any] = Depends(get_current_user)):
+def counterfactual(
+    mode: str = Query("greedy", pattern="^(greedy|beam)$",
+                      description="greedy: 2 model calls; beam: multi-feature search, can find smaller plans"),
+    user: Dict[str, Any] = Depends(get_current_user),
+):
     """
     Return the minimum behavioural changes needed for the authenticated
     student to flip from Not High Performer to High Performer.
@@ -201,6 +261,11 @@ def counterfactual(user: Dict[str, Any] = Depends(get_current_user)):
     as get_insights — not course-scoped, since the underlying performance
     model is a single cross-course behavioural classifier).
 
+    Serves the plan precomputed by the counterfactual batch job (or by an
+    earlier request) when it was computed from the student's current
+    features by the loaded model; otherwise computes it and stores it for
+    next time.
+
     Returns 422 (not 500) when the student has no behavioural data yet, so
     the frontend can show "sync the extension first" instead of a crash.
     """
@@ -213,7 +278,13 @@ def counterfactual(user: Dict[str, Any] = Depends(get_current_user)):
             detail="No behavioural data yet — sync the extension first.",
         )
 
-    perf = student_data._predict(feats)
+    fhash = feature_pipeline.feature_hash(feats)
+    version = scoring_queue.artifact_version(scoring_queue.PERFORMANCE_MODEL)
+    plan = counterfactual_repository.get(user_id)
+    if plan and (plan.get("feature_hash"), plan.get("mode"), plan.get("artifact_version")) == (fhash, mode, version):
+        return _counterfactual_response(plan["result"])
+
+    perf = student_data._predict(feats, user_id)
     if not perf:
         # ML stack unavailable (e.g. missing scikit-learn/lightgbm/shap on
         # this Python version) — same fallback condition get_insights uses.
@@ -225,13 +296,22 @@ def counterfactual(user: Dict[str, Any] = Depends(get_current_user)):
 
     try:
         from app.services.counterfactual import find_counterfactual
-        result = find_counterfactual(feats)
+        result = inference_pool.call(find_counterfactual, feats, mode=mode)
     except Exception as exc:
         raise HTTPException(
             status_code=500,
             detail=f"Counterfactual computation failed: {exc}",
         ) from exc
 
+    try:
+        counterfactual_repository.upsert(user_id, fhash, mode, result, version)
+    except Exception:
+        pass  # caching is best-effort; the fresh result is still returned
+
+    return _counterfactual_response(result)
+
+
+def _counterfactual_response(result: Dict[str, Any]) -> CounterfactualResponse:
     changes = [
         CounterfactualChange(
             feature=feat,
@@ -294,12 +374,18 @@ def get_prediction_trend(user: Dict[str, Any] = Depends(get_current_user)):
 
 # ── Evidence Timeline ──────────────────────────────────────────────────────────
 
+_BEFORE = Query(None, description='Cursor: the page just before it ("latest" = last page of the window)')
+_AFTER = Query(None, description="Cursor: the page just after it")
+
+
 @router.get("/timeline", response_model=EvidenceTimelineResponse)
 def get_timeline(
     course_id: Optional[str]  = Query(None, description="Filter to a single Moodle course"),
     limit:     int            = Query(100,  ge=1, le=500, description="Max items to return"),
     start_date: Optional[datetime] = Query(None, description="ISO 8601 lower bound (inclusive)"),
     end_date:   Optional[datetime] = Query(None, description="ISO 8601 upper bound (inclusive)"),
+    before:     Optional[str] = _BEFORE,
+    after:      Optional[str] = _AFTER,
     user: Dict[str, Any] = Depends(get_current_user),
 ):
     """
@@ -308,19 +394,11 @@ def get_timeline(
     Merges Moodle interaction events, grade records, and ML assessment history
     into a single chronological narrative that answers:
     *"Why did AcademIQ classify me as at risk?"*
+
+    Paged by cursor: follow next_cursor with `after`, prev_cursor with
+    `before`; `before=latest` opens on the most recent page.
     """
-    user_id = str(user["_id"])
-    try:
-        result = build_timeline(
-            academiq_user_id=user_id,
-            course_id=course_id,
-            limit=limit,
-            start_date=start_date,
-            end_date=end_date,
-        )
-        return result
-    except Exception as exc:
-        raise HTTPException(status_code=500, detail=f"Timeline build failed: {exc}") from exc
+    return _timeline_page(str(user["_id"]), course_id, limit, start_date, end_date, before, after)
 
 
 @router.get("/courses/{course_id}/timeline", response_model=EvidenceTimelineResponse)
@@ -329,6 +407,8 @@ def get_course_timeline(
     limit:      int = Query(100, ge=1, le=500),
     start_date: Optional[datetime] = Query(None),
     end_date:   Optional[datetime] = Query(None),
+    before:     Optional[str] = _BEFORE,
+    after:      Optional[str] = _AFTER,
     user: Dict[str, Any] = Depends(get_current_user),
 ):
     """
@@ -338,15 +418,59 @@ def get_course_timeline(
     Provided so the frontend can call it alongside the other
     /courses/{course_id}/... endpoints (performance, insights, materials).
     """
-    user_id = str(user["_id"])
+    return _timeline_page(str(user["_id"]), course_id, limit, start_date, end_date, before, after)
+
+
+def _timeline():
+    """Materialized timeline reads, or derive on every request."""
+    return timeline_store if TIMELINE_MATERIALIZED else timeline_service
+
+
+def _timeline_page(user_id, course_id, limit, start_date, end_date, before, after) -> Dict[str, Any]:
     try:
-        result = build_timeline(
+        return _timeline().build_timeline(
             academiq_user_id=user_id,
             course_id=course_id,
             limit=limit,
             start_date=start_date,
             end_date=end_date,
+            before=before,
+            after=after,
         )
-        return result
+    except ValueError as exc:
+        raise HTTPException(status_code=400, detail=str(exc)) from exc
     except Exception as exc:
-        raise HTTPException(status_code=500, detail=f"Timeline build failed: {exc}") from exc
\ No newline at end of file
+        raise HTTPException(status_code=500, detail=f"Timeline build failed: {exc}") from exc
+
+
+@router.get("/timeline/stream")
+def stream_timeline(
+    course_id:  Optional[str] = Query(None, description="Filter to a single Moodle course"),
+    start_date: Optional[datetime] = Query(None, description="ISO 8601 lower bound (inclusive)"),
+    end_date:   Optional[datetime] = Query(None, description="ISO 8601 upper bound (inclusive)"),
+    after:      Optional[str] = _AFTER,
+    user: Dict[str, Any] = Depends(get_current_user),
+):
+    """
+    The whole Evidence Timeline window as NDJSON (application/x-ndjson).
+
+    One EvidenceTimelineItem per line, oldest first, written as the merged
+    sources produce them, then a final {"summary": TimelineSummary} line.
+    Nothing is buffered, so memory stays flat for very active students and
+    the first line goes out before the window has been read.
+    """
+    user_id = str(user["_id"])
+    if after:
+        try:
+            timeline_service.decode_cursor(after)
+        except ValueError as exc:
+            raise HTTPException(status_code=400, detail=str(exc)) from exc
+
+    def lines():
+        timeline = _timeline()
+        for item in timeline.iter_timeline(user_id, course_id, start_date, end_date, after=after):
+            yield EvidenceTimelineItem(**item).model_dump_json() + "\n"
+        summary = timeline.timeline_summary(user_id, course_id, start_date, end_date)
+        yield '{"summary":' + TimelineSummary(**summary).model_dump_json() + "}\n"
+
+    return StreamingResponse(lines(), media_type="application/x-ndjson")
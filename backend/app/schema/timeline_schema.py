@@ -57,4 +57,8 @@ class EvidenceTimelineResponse(BaseModel):
     student_id: str
     course_id:  Optional[str] = None
     timeline:   list[EvidenceTimelineItem]
-    summary:    TimelineSummary
\ No newline at end of file
+    summary:    TimelineSummary
+    # Opaque cursors for the adjacent pages: pass next_cursor as `after`,
+    # prev_cursor as `before`. None when there is nothing more that way.
+    next_cursor: Optional[str] = None
+    prev_cursor: Optional[str] = None
\ No newline at end of file
@@ -0,0 +1,61 @@
+"""
+Build the materialized Evidence Timeline (student_timeline) for every student.
+
+Runs services/timeline_store.rebuild over each student that has events, a
+raw payload or ml_results. After that, ingest keeps the collection up to
+date incrementally. Re-running is safe: each student's items are replaced
+as a whole. A student ingesting while being rebuilt may have to be rebuilt
+again (check_timeline finds them).
+
+Students not backfilled yet are built on their first timeline read, so the
+backfill only takes that cost off the request path.
+
+Usage (from backend/):
+    python -m app.scripts.backfill_timeline
+    python -m app.scripts.backfill_timeline --user 665f1c... --user 665f1d...
+"""
+
+import argparse
+import time
+
+from app.config.database import (
+    ensure_indexes,
+    ml_results_collection,
+    raw_moodle_payload_collection,
+    student_events_collection,
+)
+from app.services import timeline_store
+
+
+def all_students() -> list:
+    ids = set()
+    for coll in (student_events_collection, raw_moodle_payload_collection, ml_results_collection):
+        ids.update(str(u) for u in coll.distinct("academiq_user_id") if u)
+    return sorted(ids)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Backfill student_timeline.")
+    parser.add_argument("--user", action="append", help="academiq_user_id to rebuild (repeatable); default: everyone")
+    args = parser.parse_args()
+
+    ensure_indexes()
+    students = args.user or all_students()
+    t0 = time.perf_counter()
+    items = failed = 0
+    for n, uid in enumerate(students, 1):
+        try:
+            items += timeline_store.rebuild(uid)
+        except Exception as exc:
+            failed += 1
+            print(f"   ❌ {uid}: {exc}")
+        if n % 100 == 0:
+            print(f"   … {n}/{len(students)} students")
+    took = time.perf_counter() - t0
+    print(f"✅ Timeline backfill finished in {took:.1f}s")
+    print(f"   Students: {len(students) - failed} built, {failed} failed")
+    print(f"   Items:    {items} ({items / took if took else 0:.0f}/s)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,48 @@
+"""
+Benchmark: per-student vs batched risk/grade and burnout inference.
+
+Scores a synthetic cohort (bench_common) with the real bundles, once with
+predict() per student (what a course view did before) and once with a single
+predict_many() call, and reports rows per second for each plus the speed-up.
+It also checks that both paths give identical results. A service whose bundle
+is missing (e.g. models/grade_Risk_Model/risk_grade_model.pkl is not
+committed) is reported as unavailable and skipped.
+
+Usage (from backend/):
+    python -m app.scripts.bench_cohort_inference
+    python -m app.scripts.bench_cohort_inference --rows 100 1000 10000 --repeat 5
+"""
+
+import argparse
+import warnings
+from typing import List
+
+from app.scripts.bench_common import synthetic_cohort, timed
+from app.services import burnout_service, risk_grade_service
+
+SERVICES = {"risk_grade": risk_grade_service, "burnout": burnout_service}
+
+
+def run(sizes: List[int], repeat: int) -> None:
+    warnings.filterwarnings("ignore")
+    for name, service in SERVICES.items():
+        if not service.available():
+            print(f"\n{name}: model unavailable, skipped")
+            continue
+        print(f"\n{name}")
+        print(f"{'rows':>7} | {'per-row rows/s':>14} | {'batched rows/s':>14} | {'speed-up':>8} | same")
+        print("-" * 62)
+        for n in sizes:
+            cohort = synthetic_cohort(n)
+            single_s, single = timed(lambda: [service.predict(f) for f in cohort], repeat)
+            batch_s, batch = timed(lambda: service.predict_many(cohort), repeat)
+            print(f"{n:>7} | {n / single_s:>14,.0f} | {n / batch_s:>14,.0f} | "
+                  f"{single_s / batch_s:>7.1f}x | {single == batch}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Per-row vs batched cohort inference.")
+    parser.add_argument("--rows", type=int, nargs="+", default=[100, 1_000, 10_000])
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+    run(args.rows, args.repeat)
@@ -0,0 +1,98 @@
+"""
+Shared helpers for the benchmark scripts in this folder (bench_*.py).
+
+Nothing here is imported by the running API — it only exists so every
+benchmark builds the same synthetic cohort and loads the model artifacts the
+same way.
+"""
+
+import os
+import time
+from typing import Any, Callable, Dict, List, Tuple
+
+import numpy as np
+
+# Raw behavioural features the performance model expects.
+RAW_FEATURES = [
+    "all_clicks", "active_days", "access_frequency", "material_clicks",
+    "quiz_attempts", "assignment_submissions", "total_time_spent",
+    "procrastination_index", "late_submission_count",
+]
+
+# Rough scale of each feature in the training data (see train_medians.pkl).
+_SCALES = {
+    "all_clicks": 600.0,
+    "active_days": 40.0,
+    "access_frequency": 15.0,
+    "material_clicks": 40.0,
+    "quiz_attempts": 3.0,
+    "assignment_submissions": 5.0,
+    "total_time_spent": 1200.0,
+    "procrastination_index": 3.0,
+    "late_submission_count": 2.0,
+    "avg_quiz_score": 0.35,
+    "avg_assignment_score": 0.35,
+}
+
+
+def synthetic_cohort(n: int, seed: int = 0) -> List[Dict[str, Any]]:
+    """`n` plausible feature-vector dicts (same keys as feature_vectors.features)."""
+    rng = np.random.default_rng(seed)
+    keys = list(_SCALES)
+    draws = rng.gamma(2.0, 1.0, size=(n, len(keys))) * np.array([_SCALES[k] for k in keys])
+    rows = []
+    for i in range(n):
+        row = {k: float(draws[i, j]) for j, k in enumerate(keys)}
+        row["procrastination_index"] -= 3.0
+        row["avg_quiz_score"] = min(row["avg_quiz_score"], 1.0)
+        row["avg_assignment_score"] = min(row["avg_assignment_score"], 1.0)
+        for k in ("all_clicks", "active_days", "material_clicks", "quiz_attempts",
+                  "assignment_submissions", "total_time_spent", "late_submission_count"):
+            row[k] = int(row[k])
+        rows.append(row)
+    return rows
+
+
+def load_performance_model():
+    """
+    Import performance_predict with its artifacts wired in.
+
+    model_calibrated.pkl is not committed to the repo; when it's missing the
+    uncalibrated LightGBM (model_raw.pkl) is used in its place. It has the same
+    predict_proba interface and cost, which is all a benchmark needs.
+    """
+    import joblib
+
+    from app.services import performance_predict as pp
+
+    if pp._calibrated_model is not None:
+        return pp
+
+    for name, filename in pp.ARTIFACTS.items():
+        path = os.path.join(pp.MODEL_DIR, filename)
+        if name == "calibrated_model" and not os.path.exists(path):
+            print("[bench] model_calibrated.pkl missing - using model_raw.pkl instead")
+            path = os.path.join(pp.MODEL_DIR, pp.ARTIFACTS["raw_model"])
+        pp._artifacts = pp._artifacts or {}
+        pp._artifacts[name] = joblib.load(path)
+
+    pp._calibrated_model = pp._artifacts["calibrated_model"]
+    pp._shap_explainer = pp._artifacts["shap_explainer"]
+    pp._behavioral_features = pp._artifacts["behavioral_features"]
+    pp._train_medians = pp._artifacts["train_medians"]
+    pp._hp_medians = pp._artifacts["hp_train_medians"]
+    return pp
+
+
+def timed(fn: Callable[[], Any], repeat: int = 1) -> Tuple[float, Any]:
+    """Best-of-`repeat` wall time in seconds, plus the last return value."""
+    best, out = float("inf"), None
+    for _ in range(max(1, repeat)):
+        t0 = time.perf_counter()
+        out = fn()
+        best = min(best, time.perf_counter() - t0)
+    return best, out
+
+
+def percentile(samples: List[float], q: float) -> float:
+    return float(np.percentile(np.asarray(samples), q)) if samples else 0.0
@@ -0,0 +1,123 @@
+"""
+Benchmark: sequential vs batched counterfactual search.
+
+`legacy_find_counterfactual` below replays the pre-batching engine's call
+pattern (one single-row predict_proba per candidate feature, then one per
+greedy step, then a final re-score) on the same feature pipeline and model
+through the single-row helpers the engine used before batching, so it differs
+from the current engine only in how candidates reach the model.
+
+Reports, per engine, model calls per request and p50/p95 latency over a
+synthetic cohort of Not-High-Performer students.
+
+Usage (from backend/):
+    python -m app.scripts.bench_counterfactual
+    python -m app.scripts.bench_counterfactual --students 500
+"""
+
+import argparse
+import time
+import warnings
+from typing import Any, Dict
+
+import pandas as pd
+
+from app.scripts.bench_common import load_performance_model, percentile, synthetic_cohort
+
+
+class _CountingModel:
+    def __init__(self, model):
+        self.model, self.calls = model, 0
+
+    def predict_proba(self, X):
+        self.calls += 1
+        return self.model.predict_proba(X)
+
+
+def _rebuild_derived(row: pd.Series) -> pd.Series:
+    """All 16 model columns for a row, recomputed from its 9 raw inputs."""
+    from app.services import counterfactual as cf, feature_pipeline
+
+    cf._ensure_loaded()
+    raw = {feat: row[feat] for feat in cf.PRIMARY_MUTABLE}
+    X = cf._pp._feature_pipeline().transform(feature_pipeline.raw_matrix([raw]))
+    return pd.Series(X[0], index=cf._pp._behavioral_features)
+
+
+def _predict_proba(row: pd.Series) -> float:
+    """One single-row predict_proba call on a fully-derived feature row."""
+    from app.services import counterfactual as cf
+
+    cf._ensure_loaded()
+    X_df = pd.DataFrame([row], columns=cf._pp._behavioral_features)
+    return float(cf._pp._calibrated_model.predict_proba(X_df)[0][1])
+
+
+def legacy_find_counterfactual(student_features: Dict[str, Any]) -> Dict[str, Any]:
+    from app.services import counterfactual as cf
+    pp = cf._pp
+
+    raw = {feat: float(student_features.get(feat, 0.0) or 0.0) for feat in cf.PRIMARY_MUTABLE}
+    student_row = _rebuild_derived(pd.Series(raw))
+    orig_p = _predict_proba(student_row)
+    if orig_p >= 0.5:
+        return {"original_probability": orig_p, "changes_needed": {}}
+
+    modified, current_p, changes, gains = student_row.copy(), orig_p, {}, []
+    for feat in cf.PRIMARY_MUTABLE:
+        target = float(cf._safe_median_get(pp._hp_medians, feat, modified[feat]))
+        if abs(target - float(modified[feat])) < 1e-6:
+            continue
+        test = modified.copy()
+        test[feat] = target
+        gains.append((feat, _predict_proba(_rebuild_derived(test)) - current_p, target))
+    gains.sort(key=lambda x: -x[1])
+    for feat, _gain, target in gains:
+        if current_p >= 0.5:
+            break
+        modified[feat] = target
+        modified = _rebuild_derived(modified)
+        current_p = _predict_proba(modified)
+        changes[feat] = target
+    return {"original_probability": orig_p, "new_probability": _predict_proba(modified),
+            "changes_needed": changes}
+
+
+def run(n_students: int) -> None:
+    pp = load_performance_model()
+    from app.services import counterfactual as cf
+
+    counter = _CountingModel(pp._calibrated_model)
+    pp._calibrated_model = counter
+
+    # Only students the engine actually has to search for.
+    cohort = [r for r in synthetic_cohort(n_students * 3, seed=11)
+              if float(pp.predict_performance(r)["probability"]) < 0.5][:n_students]
+
+    engines = [
+        ("legacy sequential", legacy_find_counterfactual),
+        ("batched greedy", lambda r: cf.find_counterfactual(r)),
+        ("batched beam", lambda r: cf.find_counterfactual(r, mode="beam")),
+    ]
+    print(f"\n{len(cohort)} Not-High-Performer students")
+    print(f"{'engine':>18} | {'calls/req':>9} | {'p50 ms':>7} | {'p95 ms':>7} | {'avg changes':>11}")
+    print("-" * 66)
+    for name, fn in engines:
+        latencies, calls, n_changes = [], 0, 0
+        for row in cohort:
+            counter.calls = 0
+            t0 = time.perf_counter()
+            out = fn(row)
+            latencies.append((time.perf_counter() - t0) * 1000)
+            calls += counter.calls
+            n_changes += len(out["changes_needed"])
+        print(f"{name:>18} | {calls / len(cohort):>9.1f} | {percentile(latencies, 50):>7.2f} | "
+              f"{percentile(latencies, 95):>7.2f} | {n_changes / len(cohort):>11.2f}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark the counterfactual engine.")
+    parser.add_argument("--students", type=int, default=200)
+    args = parser.parse_args()
+    warnings.filterwarnings("ignore")
+    run(args.students)
@@ -0,0 +1,132 @@
+"""
+Benchmark: worker startup cost and request latency vs. connection-pool size.
+
+Two measurements:
+
+    startup   time to import app.config.database in a fresh interpreter
+              (--workers times), with and without the first ping. "eager" is
+              what every worker paid when the module pinged Atlas at import;
+              "lazy" is what it pays now.
+    load      --threads concurrent "requests" (find_one by _id on users)
+              against clients built with each of --pool-sizes, reporting
+              p50 / p95 / p99 latency, throughput and the pool's checkout
+              waits (database._PoolMonitor).
+
+Point MONGODB_URI at a local mongod as a stand-in for Atlas
+(MONGODB_URI=mongodb://localhost:27017), or pass --mongomock to run
+in-process with no server at all (the load numbers then show only the
+Python-side overhead and no pool counters).
+
+Usage (from backend/):
+    MONGODB_URI=mongodb://localhost:27017 python -m app.scripts.bench_db_pool
+    python -m app.scripts.bench_db_pool --mongomock --threads 32 --requests 5000
+    python -m app.scripts.bench_db_pool --pool-sizes 4,16,64 --workers 10
+"""
+
+import argparse
+import statistics
+import subprocess
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, List
+
+from app.scripts.bench_common import percentile
+
+_IMPORT = (
+    "import time; t = time.perf_counter(); "
+    "from app.config import database; {extra}"
+    "print(time.perf_counter() - t)"
+)
+_MONGOMOCK = "import mongomock, pymongo; pymongo.MongoClient = lambda *a, **k: mongomock.MongoClient(); "
+
+
+def startup(workers: int, use_mongomock: bool) -> Dict[str, float]:
+    prefix = _MONGOMOCK if use_mongomock else ""
+    results = {}
+    for mode, extra in (("lazy", ""), ("eager", "database.ping(); ")):
+        samples = []
+        for _ in range(workers):
+            out = subprocess.run(
+                [sys.executable, "-c", prefix + _IMPORT.format(extra=extra)],
+                capture_output=True, text=True, timeout=120,
+            )
+            if out.returncode != 0:
+                print(f"[WARN] {mode} import failed: {out.stderr.strip().splitlines()[-1:]}")
+                continue
+            samples.append(float(out.stdout.strip().splitlines()[-1]) * 1000)
+        results[mode] = statistics.median(samples) if samples else float("nan")
+    return results
+
+
+def _client(pool_size: int, use_mongomock: bool):
+    from app.config import database
+
+    if use_mongomock:
+        import mongomock
+
+        return mongomock.MongoClient(), None
+    monitor = database._PoolMonitor()
+    options = {**database._client_options(monitor), "maxPoolSize": pool_size}
+    return database.MongoClient(database.uri, **options), monitor
+
+
+def load(pool_size: int, threads: int, requests: int, use_mongomock: bool) -> Dict[str, Any]:
+    from app.config.settings import MONGODB_DB_NAME
+
+    client, monitor = _client(pool_size, use_mongomock)
+    users = client[MONGODB_DB_NAME]["users"]
+    ids = [d["_id"] for d in users.find({}, {"_id": 1}).limit(200)] or [None]
+    users.find_one({"_id": ids[0]})  # connect before timing
+
+    def one(i: int) -> float:
+        t0 = time.perf_counter()
+        users.find_one({"_id": ids[i % len(ids)]})
+        return (time.perf_counter() - t0) * 1000
+
+    t0 = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=threads) as pool:
+        latencies: List[float] = list(pool.map(one, range(requests)))
+    elapsed = time.perf_counter() - t0
+    client.close()
+    return {
+        "p50": percentile(latencies, 50),
+        "p95": percentile(latencies, 95),
+        "p99": percentile(latencies, 99),
+        "rps": requests / elapsed,
+        "pool": monitor.snapshot() if monitor else None,
+    }
+
+
+def run(workers: int, pool_sizes: List[int], threads: int, requests: int, use_mongomock: bool) -> None:
+    if use_mongomock:
+        import mongomock
+        import pymongo
+
+        pymongo.MongoClient = lambda *a, **k: mongomock.MongoClient()
+
+    s = startup(workers, use_mongomock)
+    print(f"\nworker startup (median of {workers} fresh interpreters)")
+    print(f"  lazy  (import only)          {s['lazy']:>8.1f} ms")
+    print(f"  eager (import + first ping)  {s['eager']:>8.1f} ms")
+
+    print(f"\n{threads} threads, {requests} find_one requests per pool size")
+    print(f"{'pool':>5} | {'p50 ms':>8} | {'p95 ms':>8} | {'p99 ms':>8} | {'req/s':>8} | "
+          f"{'avg wait ms':>11} | {'max wait ms':>11}")
+    print("-" * 78)
+    for size in pool_sizes:
+        r = load(size, threads, requests, use_mongomock)
+        pool = r["pool"] or {}
+        print(f"{size:>5} | {r['p50']:>8.2f} | {r['p95']:>8.2f} | {r['p99']:>8.2f} | {r['rps']:>8.0f} | "
+              f"{pool.get('avg_wait_ms', 0.0):>11.3f} | {pool.get('max_wait_ms', 0.0):>11.3f}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Worker startup and latency vs. MongoDB pool size.")
+    parser.add_argument("--workers", type=int, default=5, help="fresh interpreters for the startup timing")
+    parser.add_argument("--pool-sizes", default="4,16,50")
+    parser.add_argument("--threads", type=int, default=32)
+    parser.add_argument("--requests", type=int, default=3000)
+    parser.add_argument("--mongomock", action="store_true", help="in-process stand-in, no server needed")
+    args = parser.parse_args()
+    run(args.workers, [int(x) for x in args.pool_sizes.split(",")], args.threads, args.requests, args.mongomock)
@@ -0,0 +1,188 @@
+"""
+Microbenchmark: row-wise feature engineering vs the shared NumPy kernel.
+
+The `legacy_*` functions below are verbatim copies of the per-student code
+the services used before app/services/feature_pipeline.py existed
+(performance_predict._engineer_features, counterfactual._rebuild_derived and
+the burnout/risk-grade `_row` dict builders). They are the baseline here;
+tests/feature_reference.py keeps its own copy as the parity reference.
+
+Reports microseconds per row for: the legacy row-wise path, the kernel called
+with one row at a time (the per-request API path), and the kernel on a whole
+cohort (batch jobs).
+
+Usage (from backend/):
+    python -m app.scripts.bench_feature_pipeline
+    python -m app.scripts.bench_feature_pipeline --rows 5000
+"""
+
+import argparse
+from typing import Any, Dict
+
+import numpy as np
+import pandas as pd
+
+from app.scripts.bench_common import synthetic_cohort, timed
+from app.services import feature_pipeline
+
+# Burnout / risk-grade bundle layout (feature_cols, log_cols, proc_clip exactly
+# as stored in the committed burnout_model.pkl) — no model needed here.
+BURNOUT_BUNDLE = {
+    "feature_cols": [
+        "all_clicks", "active_days", "access_frequency", "material_clicks", "avg_quiz_score",
+        "quiz_attempts", "avg_assignment_score", "assignment_submissions", "total_time_spent",
+        "procrastination_index", "late_submission_count", "clicks_per_day", "time_per_day",
+        "time_per_click", "material_intensity", "quiz_rate", "late_ratio", "quiz_performance",
+        "assignment_performance",
+    ],
+    "log_cols": [
+        "all_clicks", "material_clicks", "total_time_spent", "clicks_per_day",
+        "time_per_day", "time_per_click", "material_intensity",
+    ],
+    "proc_clip": (-11.621370003460399, 48.6),
+}
+
+RISK_GRADE_BUNDLE = {
+    "feature_cols": BURNOUT_BUNDLE["feature_cols"][:12],
+    "log_cols": ["all_clicks", "material_clicks", "total_time_spent", "clicks_per_day"],
+    "proc_clip": (-11.621370003460399, 48.6),
+}
+
+BEHAVIORAL_FEATURES = [
+    "all_clicks", "active_days", "access_frequency", "material_clicks", "quiz_attempts",
+    "assignment_submissions", "total_time_spent", "procrastination_index",
+    "late_submission_count", "clicks_per_day", "time_per_click", "engagement_consistency",
+    "behavioral_risk_score", "all_clicks_relative", "total_time_spent_relative",
+    "active_days_relative",
+]
+
+TRAIN_MEDIANS = pd.Series({"all_clicks": 583.5, "total_time_spent": 1167.0, "active_days": 41.0})
+
+
+# ── Legacy row-wise implementations (baseline / parity reference) ────────────
+
+def legacy_engineer_features(row: pd.Series, train_medians: pd.Series) -> pd.Series:
+    row = row.copy()
+    row["clicks_per_day"] = row["all_clicks"] / (row["active_days"] + 1)
+    row["time_per_click"] = row["total_time_spent"] / (row["all_clicks"] + 1)
+    row["engagement_consistency"] = row["active_days"] / (row["total_time_spent"] / 60 + 1)
+    row["behavioral_risk_score"] = (
+        max(row["procrastination_index"], 0) * 0.6 +
+        row["late_submission_count"] * 10 * 0.4
+    )
+    for col in ["all_clicks", "total_time_spent", "active_days"]:
+        median_val = train_medians.get(col, 1)
+        row[f"{col}_relative"] = row[col] / (median_val + 1)
+    return row
+
+
+def legacy_performance_row(raw: Dict[str, Any], features, train_medians) -> np.ndarray:
+    engineered = legacy_engineer_features(pd.Series(raw), train_medians)
+    return engineered[features].values.reshape(1, -1)
+
+
+def _legacy_pct(v) -> float:
+    v = float(v or 0)
+    return v * 100 if 0 <= v <= 1 else v
+
+
+def legacy_burnout_row(b, feats: Dict[str, Any]) -> np.ndarray:
+    ac   = float(feats.get("all_clicks", 0) or 0)
+    ad   = float(feats.get("active_days", 0) or 0)
+    mc   = float(feats.get("material_clicks", 0) or 0)
+    tt   = float(feats.get("total_time_spent", 0) or 0)
+    qa   = float(feats.get("quiz_attempts", 0) or 0)
+    asub = float(feats.get("assignment_submissions", 0) or 0)
+    late = float(feats.get("late_submission_count", 0) or 0)
+    qs   = _legacy_pct(feats.get("avg_quiz_score"))
+    asc  = _legacy_pct(feats.get("avg_assignment_score"))
+
+    r = {
+        "all_clicks": ac,
+        "active_days": ad,
+        "access_frequency": float(feats.get("access_frequency", 0) or 0),
+        "material_clicks": mc,
+        "avg_quiz_score": qs,
+        "quiz_attempts": qa,
+        "avg_assignment_score": asc,
+        "assignment_submissions": asub,
+        "total_time_spent": tt,
+        "procrastination_index": float(feats.get("procrastination_index", 0) or 0),
+        "late_submission_count": late,
+        "clicks_per_day": ac / ad if ad > 0 else 0.0,
+        "time_per_day": tt / ad if ad > 0 else 0.0,
+        "time_per_click": tt / ac if ac > 0 else 0.0,
+        "material_intensity": mc / ad if ad > 0 else 0.0,
+        "quiz_rate": qa / ad if ad > 0 else 0.0,
+        "late_ratio": late / asub if asub > 0 else 0.0,
+        "quiz_performance": qs * float(np.log1p(qa)),
+        "assignment_performance": asc * float(np.log1p(asub)),
+    }
+    for c in b["log_cols"]:
+        r[c] = float(np.log1p(r[c]))
+    lo, hi = b["proc_clip"]
+    r["procrastination_index"] = min(max(r["procrastination_index"], lo), hi)
+    return np.array([[r[c] for c in b["feature_cols"]]], dtype=float)
+
+
+def legacy_risk_grade_row(b, feats: Dict[str, Any]) -> np.ndarray:
+    r = {
+        "all_clicks": float(feats.get("all_clicks", 0) or 0),
+        "active_days": float(feats.get("active_days", 0) or 0),
+        "access_frequency": float(feats.get("access_frequency", 0) or 0),
+        "material_clicks": float(feats.get("material_clicks", 0) or 0),
+        "avg_quiz_score": _legacy_pct(feats.get("avg_quiz_score")),
+        "quiz_attempts": float(feats.get("quiz_attempts", 0) or 0),
+        "avg_assignment_score": _legacy_pct(feats.get("avg_assignment_score")),
+        "assignment_submissions": float(feats.get("assignment_submissions", 0) or 0),
+        "total_time_spent": float(feats.get("total_time_spent", 0) or 0),
+        "procrastination_index": float(feats.get("procrastination_index", 0) or 0),
+        "late_submission_count": float(feats.get("late_submission_count", 0) or 0),
+    }
+    r["clicks_per_day"] = r["all_clicks"] / r["active_days"] if r["active_days"] > 0 else 0.0
+    for c in b["log_cols"]:
+        r[c] = float(np.log1p(r[c]))
+    lo, hi = b["proc_clip"]
+    r["procrastination_index"] = min(max(r["procrastination_index"], lo), hi)
+    return np.array([[r[c] for c in b["feature_cols"]]], dtype=float)
+
+
+# ── Benchmark ────────────────────────────────────────────────────────────────
+
+def run(n_rows: int, repeat: int) -> None:
+    rows = synthetic_cohort(n_rows)
+    perf_rows = [{k: r[k] for k in feature_pipeline.PERFORMANCE_RAW} for r in rows]
+
+    perf = feature_pipeline.performance_pipeline(BEHAVIORAL_FEATURES, TRAIN_MEDIANS)
+    burnout = feature_pipeline.burnout_pipeline(BURNOUT_BUNDLE)
+    risk = feature_pipeline.risk_grade_pipeline(RISK_GRADE_BUNDLE)
+
+    cases = [
+        ("performance",
+         lambda: [legacy_performance_row(r, BEHAVIORAL_FEATURES, TRAIN_MEDIANS) for r in perf_rows],
+         lambda: [perf.transform(feature_pipeline.raw_matrix([r])) for r in perf_rows],
+         lambda: perf.transform(feature_pipeline.raw_matrix(perf_rows))),
+        ("burnout",
+         lambda: [legacy_burnout_row(BURNOUT_BUNDLE, r) for r in rows],
+         lambda: [burnout.transform_rows([r]) for r in rows],
+         lambda: burnout.transform_rows(rows)),
+        ("risk_grade",
+         lambda: [legacy_risk_grade_row(RISK_GRADE_BUNDLE, r) for r in rows],
+         lambda: [risk.transform_rows([r]) for r in rows],
+         lambda: risk.transform_rows(rows)),
+    ]
+
+    print(f"\n{n_rows} rows, microseconds per row (best of {repeat})")
+    print(f"{'model':>12} | {'legacy row':>10} | {'kernel row':>10} | {'kernel batch':>12}")
+    print("-" * 54)
+    for name, legacy, single, batch in cases:
+        us = [timed(fn, repeat)[0] / n_rows * 1e6 for fn in (legacy, single, batch)]
+        print(f"{name:>12} | {us[0]:>10.1f} | {us[1]:>10.1f} | {us[2]:>12.2f}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark the shared feature pipeline.")
+    parser.add_argument("--rows", type=int, default=2000)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+    run(args.rows, args.repeat)
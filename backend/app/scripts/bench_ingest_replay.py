@@ -0,0 +1,168 @@
+"""
+Benchmark: replaying identical extension syncs, with and without digests.
+
+The extension re-sends the whole payload on every sync. This replays the
+same payload --syncs times per synthetic student through the
+POST /raw-moodle-payloads handler, twice:
+
+    full     the student's ingest digests are cleared before every sync, so
+             each one does all the work (the behaviour before digests)
+    digest   digests are kept, so every sync after the first skips the
+             unchanged sections, compute_features and scoring
+
+Reports per-sync latency (p50 / p95 / mean), how many syncs would have been
+queued for scoring (scoring_queue.submit is replaced by a counter, so model
+time is not part of the numbers) and how many sections were skipped.
+
+Runs against the configured MongoDB. Everything it writes (synthetic
+accounts, raw payloads, feature vectors, metrics, events, digests and the
+materials of its made-up courses) is deleted afterwards.
+
+Usage (from backend/):
+    python -m app.scripts.bench_ingest_replay
+    python -m app.scripts.bench_ingest_replay --students 20 --syncs 10 --materials 400
+"""
+
+import argparse
+import asyncio
+import time
+from typing import Any, Dict, List
+
+from fastapi import BackgroundTasks
+
+from app.config.database import (
+    course_materials_collection,
+    feature_vectors_collection,
+    ingest_digests_collection,
+    raw_moodle_payload_collection,
+    student_events_collection,
+    student_metrics_collection,
+    users_collection,
+)
+from app.repositories import ingest_digest_repository
+from app.routes import moodle
+from app.scripts.bench_common import percentile
+from app.services import scoring_queue
+
+MOODLE_ID_PREFIX = "bench-replay-"
+COURSE_IDS = ["990001", "990002", "990003"]
+
+
+def synthetic_payload(i: int, n_materials: int, n_events: int) -> Dict[str, Any]:
+    """An extension payload shaped like a real sync, for student `i`."""
+    return {
+        "student": {
+            "moodle_user_id": f"{MOODLE_ID_PREFIX}{i}",
+            "full_name": f"Replay Student {i}",
+            "email": f"bench-replay-{i}@academiq.local",
+        },
+        "behavior": {"total_time_spent_on_moodle": 7200 + i, "active_days_count": 12},
+        "metricsByCourse": {
+            cid: {
+                "course_name": f"Bench course {cid}",
+                "click_count": 40 + i,
+                "total_visits": 9,
+                "number_of_resources_clicked": 14,
+                "quiz_attempts": 2,
+                "assignment_submissions": 3,
+            }
+            for cid in COURSE_IDS
+        },
+        "materials": [
+            {
+                "course_id": COURSE_IDS[m % len(COURSE_IDS)],
+                "material_id": f"bench-{m}",
+                "title": f"Week {m} slides",
+                "type": "resource",
+                "url": f"https://moodle.example/mod/resource/view.php?id={m}",
+            }
+            for m in range(n_materials)
+        ],
+        "events": [
+            {
+                "event_id": f"{1704067200 + e}-course-view-{COURSE_IDS[e % 3]}",
+                "timestamp": 1704067200 + e,
+                "page_type": "course",
+                "action_type": "view",
+                "course_id": COURSE_IDS[e % 3],
+            }
+            for e in range(n_events)
+        ],
+        "grades": [
+            {"course_id": COURSE_IDS[0], "item_type": "quiz", "percentage": "72%"},
+            {"course_id": COURSE_IDS[1], "item_type": "assign", "percentage": "81%", "submission_status": "late"},
+        ],
+    }
+
+
+def replay(payloads: List[Dict[str, Any]], syncs: int, keep_digests: bool) -> Dict[str, Any]:
+    latencies: List[float] = []
+    skipped = scored = 0
+    for payload in payloads:
+        for _ in range(syncs):
+            if not keep_digests:
+                user = users_collection.find_one({"moodle_user_id": payload["student"]["moodle_user_id"]})
+                if user:
+                    ingest_digest_repository.clear(str(user["_id"]))
+            t0 = time.perf_counter()
+            out = asyncio.run(moodle.post_raw_moodle_payload(payload, BackgroundTasks()))
+            latencies.append((time.perf_counter() - t0) * 1000)
+            skipped += len(out["skipped"])
+            scored += out["scoring"] != "skipped"
+    return {
+        "syncs": len(latencies),
+        "p50": percentile(latencies, 50),
+        "p95": percentile(latencies, 95),
+        "mean": sum(latencies) / len(latencies),
+        "scored": scored,
+        "skipped_sections": skipped,
+    }
+
+
+def cleanup() -> None:
+    users = list(users_collection.find({"moodle_user_id": {"$regex": f"^{MOODLE_ID_PREFIX}"}}, {"_id": 1}))
+    ids = [str(u["_id"]) for u in users]
+    for coll in (
+        raw_moodle_payload_collection, feature_vectors_collection, student_metrics_collection,
+        student_events_collection, ingest_digests_collection,
+    ):
+        coll.delete_many({"academiq_user_id": {"$in": ids}})
+    course_materials_collection.delete_many({"course_id": {"$in": COURSE_IDS}})
+    users_collection.delete_many({"_id": {"$in": [u["_id"] for u in users]}})
+
+
+def run(students: int, syncs: int, n_materials: int, n_events: int) -> None:
+    payloads = [synthetic_payload(i, n_materials, n_events) for i in range(students)]
+    submit = scoring_queue.submit
+    scoring_queue.submit = lambda user_id, features: "queued"
+    try:
+        cleanup()
+        # One untimed sync per student so account creation isn't measured.
+        replay(payloads, 1, keep_digests=True)
+        results = {
+            "full": replay(payloads, syncs, keep_digests=False),
+            "digest": replay(payloads, syncs, keep_digests=True),
+        }
+    finally:
+        scoring_queue.submit = submit
+        cleanup()
+
+    print(f"\n{students} students x {syncs} identical syncs, "
+          f"{n_materials} materials / {n_events} events per payload")
+    print(f"{'mode':>7} | {'p50 ms':>8} | {'p95 ms':>8} | {'mean ms':>8} | {'scored':>6} | {'sections skipped':>16}")
+    print("-" * 70)
+    for mode, r in results.items():
+        print(f"{mode:>7} | {r['p50']:>8.1f} | {r['p95']:>8.1f} | {r['mean']:>8.1f} | "
+              f"{r['scored']:>6} | {r['skipped_sections']:>16}")
+    speedup = results["full"]["mean"] / results["digest"]["mean"] if results["digest"]["mean"] else 0.0
+    print(f"\nmean sync time: {speedup:.1f}x faster with digests")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Replay identical syncs with and without ingest digests.")
+    parser.add_argument("--students", type=int, default=10)
+    parser.add_argument("--syncs", type=int, default=5)
+    parser.add_argument("--materials", type=int, default=300)
+    parser.add_argument("--events", type=int, default=200)
+    args = parser.parse_args()
+    run(args.students, args.syncs, args.materials, args.events)
@@ -0,0 +1,85 @@
+"""
+Benchmark: per-worker memory and cold start of the model artifacts.
+
+Starts --workers processes the way a multi-worker server would and has each
+load every model through services/model_registry.py, then reports per
+worker: cold-start (artifact load) ms, RSS, PSS, and the private vs shared
+part of its RSS. Three modes:
+
+    pickle    MODEL_MMAP off: every worker unpickles private copies
+    mmap      workers memory-map the compact copies (written on first run)
+    preload   the parent loads everything and freezes the GC, workers fork
+              with the models already in memory (gunicorn --preload)
+
+Lower PSS per worker means more workers per host. Linux only (reads
+/proc/self/smaps_rollup; the fork start method is required for preload).
+
+Usage (from backend/):
+    python -m app.scripts.bench_model_memory
+    python -m app.scripts.bench_model_memory --workers 8 --modes mmap preload
+"""
+
+import argparse
+import multiprocessing as mp
+import warnings
+from typing import Any, Dict, List
+
+
+def _load_all() -> Dict[str, Any]:
+    from app.services import model_registry
+
+    warnings.filterwarnings("ignore")
+    for service in model_registry._services():
+        try:
+            service.available() if hasattr(service, "available") else service.load_artifacts()
+        except Exception:
+            pass
+    return model_registry.stats()
+
+
+def _worker(mode: str, out: "mp.Queue") -> None:
+    from app.services import model_registry
+
+    if mode == "pickle":
+        model_registry.MODEL_MMAP = False
+    stats = _load_all()
+    if mode == "preload":
+        stats["cold_start_ms"] = 0.0          # loaded by the parent before the fork
+    out.put({k: stats[k] for k in ("pid", "cold_start_ms", "rss_mb", "pss_mb", "private_mb", "shared_mb")})
+
+
+def run(workers: int, modes: List[str]) -> None:
+    ctx = mp.get_context("fork")
+    for mode in modes:
+        if mode == "mmap":
+            first = ctx.Process(target=_load_all)       # make sure compact copies exist
+            first.start()
+            first.join()
+        if mode == "preload":
+            from app.services import model_registry
+
+            model_registry.preload()
+        out = ctx.Queue()
+        procs = [ctx.Process(target=_worker, args=(mode, out)) for _ in range(workers)]
+        for p in procs:
+            p.start()
+        rows = [out.get() for _ in procs]
+        for p in procs:
+            p.join()
+
+        print(f"\n{mode}: {workers} workers")
+        print(f"{'pid':>8} | {'cold ms':>8} | {'RSS MB':>8} | {'PSS MB':>8} | {'private MB':>10} | {'shared MB':>9}")
+        print("-" * 66)
+        for r in rows:
+            print(f"{r['pid']:>8} | {r['cold_start_ms']:>8.0f} | {r['rss_mb'] or 0:>8.1f} | {r['pss_mb'] or 0:>8.1f} | "
+                  f"{r['private_mb'] or 0:>10.1f} | {r['shared_mb'] or 0:>9.1f}")
+        print(f"total PSS: {sum(r['pss_mb'] or 0 for r in rows):.0f} MB")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Per-worker model memory and cold start.")
+    parser.add_argument("--workers", type=int, default=4)
+    parser.add_argument("--modes", nargs="+", default=["pickle", "mmap", "preload"],
+                        choices=["pickle", "mmap", "preload"])
+    args = parser.parse_args()
+    run(args.workers, args.modes)
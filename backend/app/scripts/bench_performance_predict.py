@@ -0,0 +1,48 @@
+"""
+Benchmark: per-student vs batched performance-model inference.
+
+Compares calling predict_performance() once per student (what the API does
+per request) with one predict_performance_batch() call for the whole cohort,
+and reports students/second at each cohort size.
+
+The per-row loop is capped at --loop-max students per size (it's slow by
+design); its rate is measured on that prefix.
+
+Usage (from backend/):
+    python -m app.scripts.bench_performance_predict
+    python -m app.scripts.bench_performance_predict --sizes 1 100 10000 --loop-max 500
+"""
+
+import argparse
+import warnings
+
+from app.scripts.bench_common import load_performance_model, synthetic_cohort, timed
+
+
+def run(sizes, loop_max: int, repeat: int) -> None:
+    pp = load_performance_model()
+    cohort = synthetic_cohort(max(sizes))
+
+    print(f"\n{'rows':>8} | {'per-row st/s':>13} | {'batch st/s':>11} | {'speedup':>7}")
+    print("-" * 50)
+    for n in sizes:
+        rows = cohort[:n]
+        loop_rows = rows[:loop_max]
+
+        t_loop, _ = timed(lambda: [pp.predict_performance(r) for r in loop_rows], repeat)
+        t_batch, out = timed(lambda: pp.predict_performance_batch(rows), repeat)
+        assert len(out) == n
+
+        loop_rate = len(loop_rows) / t_loop
+        batch_rate = n / t_batch
+        print(f"{n:>8} | {loop_rate:>13.1f} | {batch_rate:>11.1f} | {batch_rate / loop_rate:>6.1f}x")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark batched performance inference.")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1, 100, 10000])
+    parser.add_argument("--loop-max", type=int, default=500, help="Max students timed in the per-row loop.")
+    parser.add_argument("--repeat", type=int, default=3, help="Best-of-N timing.")
+    args = parser.parse_args()
+    warnings.filterwarnings("ignore")
+    run(args.sizes, args.loop_max, args.repeat)
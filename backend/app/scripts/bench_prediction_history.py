@@ -0,0 +1,167 @@
+"""
+Benchmark: prediction history write throughput, per-snapshot docs vs buckets.
+
+Replays --writes predictions for --users students (a random walk of the
+probability, so some writes are near-duplicates) through --threads workers
+two ways, each into its own scratch collection:
+
+    snapshots  the old record_prediction: find_one for the last entry,
+               insert_one, count_documents, find for the overflow ids and
+               delete_many (with the old user_recorded_at index)
+    buckets    prediction_history.record_prediction: one conditional
+               $push/$slice upsert per write
+
+and reports writes/s, p50 / p95 per write and database calls per write,
+then the p50 of reading the history and the trend pair back. The scratch
+collections are dropped afterwards.
+
+Run it against a real MongoDB (a local mongod is fine): round trips are
+what this measures, and an in-memory stand-in has none.
+
+Usage (from backend/):
+    MONGODB_URI=mongodb://localhost:27017 python -m app.scripts.bench_prediction_history
+    python -m app.scripts.bench_prediction_history --users 2000 --writes 50000 --threads 8
+"""
+
+import argparse
+import random
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from typing import Any, Callable, Dict, List, Tuple
+
+from pymongo import ASCENDING
+
+from app.config import database
+from app.scripts.bench_common import percentile
+from app.services import prediction_history as ph
+
+SNAPSHOTS, BUCKETS = "bench_history_snapshots", "bench_history_buckets"
+
+
+class _Counted:
+    """Counts the calls made on a collection (each one is a round trip here)."""
+
+    def __init__(self, collection: Any):
+        self._collection = collection
+        self.calls = 0
+        self._lock = threading.Lock()
+
+    def __getattr__(self, name: str) -> Any:
+        attr = getattr(self._collection, name)
+        if not callable(attr):
+            return attr
+
+        def call(*args, **kwargs):
+            with self._lock:
+                self.calls += 1
+            return attr(*args, **kwargs)
+        return call
+
+
+def _snapshot_record(collection: Any) -> Callable[[str, Dict[str, Any]], None]:
+    """The per-snapshot write path record_prediction had before buckets."""
+    def record(user_id: str, result: Dict[str, Any]) -> None:
+        key = {"academiq_user_id": user_id, "model_name": ph.MODEL_NAME}
+        last = collection.find_one(key, sort=[("recorded_at", -1)])
+        if last is not None and abs(last.get("probability", 0.0) - result["probability"]) < ph.CHANGE_THRESHOLD:
+            return
+        collection.insert_one({**key, "probability": result["probability"],
+                               "classification": result["classification"], "top_negative_drivers": [],
+                               "shap_map": ph._shap_map_from_result(result), "recorded_at": datetime.utcnow()})
+        overflow = collection.count_documents(key) - ph.MAX_HISTORY_PER_USER
+        if overflow > 0:
+            stale = [d["_id"] for d in collection.find(key, {"_id": 1}, sort=[("recorded_at", 1)], limit=overflow)]
+            if stale:
+                collection.delete_many({"_id": {"$in": stale}})
+    return record
+
+
+def workload(users: int, writes: int, seed: int = 0) -> List[Tuple[str, Dict[str, Any]]]:
+    rng = random.Random(seed)
+    probability = {f"bench-user-{u}": rng.random() for u in range(users)}
+    out = []
+    for _ in range(writes):
+        user = f"bench-user-{rng.randrange(users)}"
+        step = rng.choice([0.0, 0.004, -0.004, 0.03, -0.03, 0.08, -0.08])
+        probability[user] = min(1.0, max(0.0, probability[user] + step))
+        out.append((user, {
+            "probability": probability[user],
+            "classification": "At Risk" if probability[user] < 0.5 else "On Track",
+            "recommendations": [{"feature": f, "shap_impact": rng.uniform(-0.2, 0.2)}
+                                for f in ("active_days", "quiz_attempts", "material_clicks")],
+        }))
+    return out
+
+
+def _replay(record: Callable, work: List[Tuple[str, Dict[str, Any]]], threads: int) -> Dict[str, float]:
+    samples: List[float] = []
+    lock = threading.Lock()
+
+    def one(item):
+        t0 = time.perf_counter()
+        record(*item)
+        took = (time.perf_counter() - t0) * 1000
+        with lock:
+            samples.append(took)
+
+    t0 = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=threads) as pool:
+        list(pool.map(one, work))
+    wall = time.perf_counter() - t0
+    return {"per_s": len(work) / wall if wall else 0.0, "p50": percentile(samples, 50), "p95": percentile(samples, 95)}
+
+
+def _read_p50(read: Callable[[str], Any], users: List[str]) -> float:
+    samples = []
+    for user in users:
+        t0 = time.perf_counter()
+        read(user)
+        samples.append((time.perf_counter() - t0) * 1000)
+    return percentile(samples, 50)
+
+
+def run(users: int, writes: int, threads: int) -> None:
+    snapshots, buckets = database.db[SNAPSHOTS], database.db[BUCKETS]
+    for c in (snapshots, buckets):
+        c.drop()
+    snapshots.create_index([("academiq_user_id", ASCENDING), ("recorded_at", ASCENDING)], name="user_recorded_at")
+
+    work = workload(users, writes)
+    counted_snapshots, counted_buckets = _Counted(snapshots), _Counted(buckets)
+    original = ph.prediction_history_collection
+    ph.prediction_history_collection = counted_buckets
+    try:
+        results = {
+            "snapshots": _replay(_snapshot_record(counted_snapshots), work, threads),
+            "buckets": _replay(ph.record_prediction, work, threads),
+        }
+        calls = {"snapshots": counted_snapshots.calls, "buckets": counted_buckets.calls}
+
+        print(f"\n{writes:,} writes for {users:,} students, {threads} threads")
+        print(f"{'layout':>9} | {'writes/s':>9} | {'p50 ms':>7} | {'p95 ms':>7} | {'calls/write':>11}")
+        print("-" * 56)
+        for name, r in results.items():
+            print(f"{name:>9} | {r['per_s']:>9,.0f} | {r['p50']:>7.3f} | {r['p95']:>7.3f} | "
+                  f"{calls[name] / writes:>11.2f}")
+
+        sample = [f"bench-user-{u}" for u in range(min(users, 500))]
+        key = lambda u: {"academiq_user_id": u, "model_name": ph.MODEL_NAME}  # noqa: E731
+        print("\nreads (p50 ms)     history |   trend")
+        print(f"{'snapshots':>17} {_read_p50(lambda u: list(snapshots.find(key(u)).sort('recorded_at', -1).limit(30)), sample):>8.3f} | "
+              f"{_read_p50(lambda u: list(snapshots.find(key(u)).sort('recorded_at', -1).limit(2)), sample):>7.3f}")
+        print(f"{'buckets':>17} {_read_p50(ph.get_history, sample):>8.3f} | {_read_p50(ph.get_trend_summary, sample):>7.3f}")
+    finally:
+        ph.prediction_history_collection = original
+        for c in (snapshots, buckets):
+            c.drop()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Prediction history write throughput.")
+    parser.add_argument("--users", type=int, default=1_000)
+    parser.add_argument("--writes", type=int, default=20_000)
+    parser.add_argument("--threads", type=int, default=4)
+    args = parser.parse_args()
+    run(args.users, args.writes, args.threads)
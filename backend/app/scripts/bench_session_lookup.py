@@ -0,0 +1,141 @@
+"""
+Benchmark: session validation latency with a large sessions collection.
+
+Fills a scratch collection (bench_sessions, same indexes as `sessions`:
+unique token_hash plus the TTL index on expires_at) with --sessions
+documents, a --expired-share of them already expired, then times
+--lookups validations of random tokens four ways:
+
+    valid     session_repository.find_valid_session on a live token
+    expired   the same call on an expired token (no match, no write)
+    missing   an unknown token
+    lazy      the old path for expired tokens: find_one by token_hash,
+              check expires_at in Python, delete_one (what validation
+              cost before the TTL index)
+
+and reports p50 / p95 / p99 per mode, plus the query plan of the new lookup
+(index used, documents examined) and one expiry_sweeper pass over the
+expired share. The scratch collection is dropped afterwards.
+
+Run it against a real MongoDB (a local mongod is fine): the numbers depend
+on real indexes, and an in-memory stand-in scans every document.
+
+Usage (from backend/):
+    MONGODB_URI=mongodb://localhost:27017 python -m app.scripts.bench_session_lookup
+    python -m app.scripts.bench_session_lookup --sessions 200000 --lookups 5000
+"""
+
+import argparse
+import hashlib
+import random
+import time
+from datetime import datetime, timedelta
+from typing import Any, Dict, List
+
+from pymongo import ASCENDING
+
+from app.config import database
+from app.repositories import session_repository
+from app.scripts.bench_common import percentile
+from app.services import expiry_sweeper
+
+COLLECTION = "bench_sessions"
+
+
+def _token(i: int) -> str:
+    return hashlib.sha256(f"bench-session-{i}".encode()).hexdigest()
+
+
+def fill(collection: Any, n: int, expired_share: float, batch: int = 10_000) -> None:
+    now = datetime.utcnow()
+    n_expired = int(n * expired_share)
+    for start in range(0, n, batch):
+        collection.insert_many(
+            [
+                {
+                    "token_hash": _token(i),
+                    "user_id": f"bench-user-{i % 50_000}",
+                    "role": "student",
+                    "created_at": now,
+                    "expires_at": now - timedelta(hours=1) if i < n_expired else now + timedelta(hours=24),
+                }
+                for i in range(start, min(start + batch, n))
+            ],
+            ordered=False,
+        )
+
+
+def _time(fn, tokens: List[str]) -> Dict[str, float]:
+    samples = []
+    for token in tokens:
+        t0 = time.perf_counter()
+        fn(token)
+        samples.append((time.perf_counter() - t0) * 1000)
+    return {"p50": percentile(samples, 50), "p95": percentile(samples, 95), "p99": percentile(samples, 99)}
+
+
+def _lazy(collection: Any):
+    def lookup(token_hash: str) -> None:
+        doc = collection.find_one({"token_hash": token_hash})
+        if doc and doc["expires_at"] < datetime.utcnow():
+            collection.delete_one({"token_hash": token_hash})
+    return lookup
+
+
+def run(n: int, lookups: int, expired_share: float) -> None:
+    collection = database.db[COLLECTION]
+    collection.drop()
+    collection.create_index([("token_hash", ASCENDING)], unique=True, name="uniq_token_hash")
+    database._ensure_ttl(collection, "session_expiry")
+
+    original = session_repository.auth_sessions_collection
+    session_repository.auth_sessions_collection = collection
+    try:
+        t0 = time.perf_counter()
+        fill(collection, n, expired_share)
+        print(f"\ninserted {n:,} sessions ({expired_share:.0%} expired) in {time.perf_counter() - t0:.1f}s")
+
+        rng = random.Random(0)
+        n_expired = int(n * expired_share)
+        valid = [_token(rng.randrange(n_expired, n)) for _ in range(lookups)]
+        expired = [_token(rng.randrange(0, n_expired)) for _ in range(lookups)] if n_expired else []
+        missing = [hashlib.sha256(f"missing-{i}".encode()).hexdigest() for i in range(lookups)]
+
+        results = {
+            "valid": _time(session_repository.find_valid_session, valid),
+            "expired": _time(session_repository.find_valid_session, expired),
+            "missing": _time(session_repository.find_valid_session, missing),
+            "lazy": _time(_lazy(collection), expired),
+        }
+        try:
+            plan = collection.find(
+                {"token_hash": valid[0], "expires_at": {"$gt": datetime.utcnow()}}
+            ).explain()
+            stats = plan.get("executionStats", {})
+            winning = plan.get("queryPlanner", {}).get("winningPlan", {})
+            print(f"plan: {winning.get('inputStage', winning).get('indexName', '?')}, "
+                  f"docs examined {stats.get('totalDocsExamined', '?')}")
+        except Exception as exc:
+            print(f"plan: unavailable ({exc})")
+
+        print(f"\n{lookups} lookups per mode")
+        print(f"{'mode':>8} | {'p50 ms':>8} | {'p95 ms':>8} | {'p99 ms':>8}")
+        print("-" * 42)
+        for mode, r in results.items():
+            print(f"{mode:>8} | {r['p50']:>8.3f} | {r['p95']:>8.3f} | {r['p99']:>8.3f}")
+
+        t0 = time.perf_counter()
+        swept = expiry_sweeper.sweep_collection(collection)
+        print(f"\nsweeper: {swept:,} expired sessions deleted in {time.perf_counter() - t0:.1f}s")
+    finally:
+        session_repository.auth_sessions_collection = original
+        collection.drop()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Session lookup latency at scale.")
+    parser.add_argument("--sessions", type=int, default=1_000_000)
+    parser.add_argument("--lookups", type=int, default=2_000)
+    parser.add_argument("--expired-share", type=float, default=0.3)
+    args = parser.parse_args()
+    run(args.sessions, args.lookups, args.expired_share)
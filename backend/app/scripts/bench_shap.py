@@ -0,0 +1,121 @@
+"""
+Benchmark: SHAP explanation modes, cache and cross-request batching.
+
+Reports, on a synthetic cohort run through the real performance artifacts:
+  * microseconds per row for exact TreeSHAP and approx path contributions,
+    one row at a time (per-request path) and as one batch
+  * a cache hit (same vectors explained again)
+  * how closely approx matches exact: correlation of the SHAP values and
+    how often the top-3 negative drivers (what the UI shows) are identical
+  * concurrent single-row requests: explainer calls made and wall time,
+    with and without the batcher's coalescing
+
+Usage (from backend/):
+    python -m app.scripts.bench_shap
+    python -m app.scripts.bench_shap --rows 2000 --threads 32
+"""
+
+import argparse
+import threading
+import time
+import warnings
+from collections import OrderedDict
+
+import numpy as np
+
+from app.scripts.bench_common import load_performance_model, synthetic_cohort, timed
+from app.services import shap_engine
+
+
+def _fresh() -> None:
+    """Empty the cache and batch counters; the loaded explainer / leaf table stay."""
+    shap_engine._cache = OrderedDict()
+    shap_engine._batchers = {m: shap_engine._Batcher() for m in shap_engine.MODES}
+
+
+def _top3(S: np.ndarray):
+    out = []
+    for row in S:
+        idx = np.argsort(row)[:3]
+        out.append(frozenset(idx[row[idx] < 0]))
+    return out
+
+
+def _concurrent(X: np.ndarray, explainer, columns, n_threads: int, coalesce: bool) -> float:
+    rows = iter(range(len(X)))
+    lock = threading.Lock()
+
+    def worker():
+        while True:
+            with lock:
+                i = next(rows, None)
+            if i is None:
+                return
+            if coalesce:
+                shap_engine.explain(X[i:i + 1], explainer, columns, mode="exact")
+            else:
+                shap_engine._exact(explainer, columns)(X[i:i + 1])
+
+    _fresh()
+    threads = [threading.Thread(target=worker) for _ in range(n_threads)]
+    t0 = time.perf_counter()
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    return time.perf_counter() - t0
+
+
+def run(n_rows: int, n_single: int, n_threads: int) -> None:
+    pp = load_performance_model()
+    explainer, columns = pp._shap_explainer, pp._behavioral_features
+    X = pp._engineer_matrix(synthetic_cohort(n_rows))
+
+    t0 = time.perf_counter()
+    shap_engine.explain(X[:1], explainer, columns, mode="approx")
+    print(f"approx leaf-contribution table built in {(time.perf_counter() - t0) * 1000:.0f} ms (once per process)")
+
+    print(f"\n{n_rows} rows ({n_single} for the per-row loop), microseconds per row")
+    print(f"{'mode':>8} | {'per row':>9} | {'batch':>9} | {'cache hit':>9}")
+    print("-" * 46)
+    values = {}
+    for mode in shap_engine.MODES:
+        def per_row():
+            _fresh()
+            for i in range(n_single):
+                shap_engine.explain(X[i:i + 1], explainer, columns, mode=mode)
+
+        def batch():
+            _fresh()
+            return shap_engine.explain(X, explainer, columns, mode=mode)
+
+        single_s, _ = timed(per_row)
+        batch_s, values[mode] = timed(batch)
+        hit_s, _ = timed(lambda: shap_engine.explain(X, explainer, columns, mode=mode))
+        print(f"{mode:>8} | {single_s / n_single * 1e6:>9.1f} | {batch_s / n_rows * 1e6:>9.1f} | "
+              f"{hit_s / n_rows * 1e6:>9.1f}")
+
+    exact, approx = values["exact"], values["approx"]
+    same_top3 = np.mean([a == b for a, b in zip(_top3(exact), _top3(approx))])
+    print(f"\napprox vs exact: corr {np.corrcoef(exact.ravel(), approx.ravel())[0, 1]:.3f}, "
+          f"sign agreement {np.mean(np.sign(exact) == np.sign(approx)):.1%}, "
+          f"identical top-3 negative drivers {same_top3:.1%}")
+
+    n_req = min(n_rows, 400)
+    plain = _concurrent(X[:n_req], explainer, columns, n_threads, coalesce=False)
+    batched = _concurrent(X[:n_req], explainer, columns, n_threads, coalesce=True)
+    stats = shap_engine.stats()
+    print(f"\n{n_req} single-row requests from {n_threads} threads (exact):")
+    print(f"  one call per request : {n_req} explainer calls, {plain:.2f}s")
+    print(f"  coalesced            : {stats['explainer_calls']} explainer calls "
+          f"(avg {stats['avg_rows_per_explainer_call']} rows), {batched:.2f}s")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark the SHAP explanation engine.")
+    parser.add_argument("--rows", type=int, default=1000)
+    parser.add_argument("--single", type=int, default=200, help="rows timed one at a time")
+    parser.add_argument("--threads", type=int, default=16)
+    args = parser.parse_args()
+    warnings.filterwarnings("ignore")
+    run(args.rows, min(args.single, args.rows), args.threads)
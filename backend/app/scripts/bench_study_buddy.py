@@ -0,0 +1,114 @@
+"""
+Benchmark: study-buddy neighbour search at campus scale.
+
+Builds an in-memory CourseIndex of --sizes synthetic students (bench_common
+feature vectors, random grades, risk clusters and a 60% opt-in rate) and
+times study_buddy.recommend for --queries random students with each
+neighbour-search backend:
+
+    pool      the previous ranking: stack the filtered pool, z-score it and
+              compute every distance on each request (np.vstack + argsort)
+    brute     neighbour_search.BruteForce on the persisted z-scores
+    kdtree    sklearn KDTree built once per course
+    balltree  sklearn BallTree built once per course
+
+Per size it prints the index build and tree build times, p50 / p99 query
+latency, and how many recommendations match brute force. The tier / offset
+filters are the real ones, so the masks are as selective as in production.
+No database is used.
+
+Usage (from backend/):
+    python -m app.scripts.bench_study_buddy
+    python -m app.scripts.bench_study_buddy --sizes 1000 10000 --queries 500
+"""
+
+import argparse
+import time
+from typing import Any, Dict, List
+
+import numpy as np
+
+from app.scripts.bench_common import percentile, synthetic_cohort, timed
+from app.services import neighbour_search, risk_grade_service, study_buddy, study_buddy_index
+
+COURSE = "bench"
+
+
+def _rows(n: int, seed: int = 0) -> List[Dict[str, Any]]:
+    rng = np.random.default_rng(seed)
+    rows = []
+    for i, feats in enumerate(synthetic_cohort(n, seed)):
+        rows.append({
+            "user_id": f"u{i}",
+            "name": f"Student {i}",
+            "email": f"s{i}@bench.edu",
+            "optin": bool(rng.random() < 0.6),
+            "vec": [float(feats.get(c, 0) or 0) for c in study_buddy_index.BEHAVIOUR],
+            "grade": float(np.clip(rng.normal(65, 15), 0, 100)) if rng.random() < 0.9 else None,
+            "cluster": int(rng.integers(0, 3)),
+        })
+    return rows
+
+
+class _PoolRanking:
+    """The pre-index ranking: z-score the filtered pool on every query."""
+
+    name = "pool"
+
+    def __init__(self, index: study_buddy_index.CourseIndex):
+        self.X = index.X
+
+    def query(self, q_row: int, k: int, mask: np.ndarray) -> np.ndarray:
+        rows = np.flatnonzero(mask)
+        M = np.vstack([self.X[q_row][None, :], self.X[rows]])
+        mu, sd = M.mean(0), M.std(0)
+        sd[sd == 0] = 1.0
+        Z = (M - mu) / sd
+        return rows[np.argsort(np.linalg.norm(Z[1:] - Z[0], axis=1), kind="stable")[:k]]
+
+
+def run(sizes: List[int], queries: int, k: int) -> None:
+    original = (risk_grade_service.risk_map, study_buddy_index.get)
+    risk_grade_service.risk_map = lambda: {0: "High Risk", 1: "Medium Risk", 2: "Low Risk"}
+    try:
+        for n in sizes:
+            rows = _rows(n)
+            build_s, index = timed(lambda: study_buddy_index.CourseIndex(COURSE, rows, seq=0))
+            study_buddy_index.get = lambda course_id: index
+            targets = np.random.default_rng(1).choice(n, size=min(queries, n), replace=False)
+
+            print(f"\n{n:,} students ({int(index.optin.sum()):,} opted in), index built in {build_s * 1000:.0f} ms")
+            print(f"{'backend':>9} | {'build ms':>9} | {'p50 ms':>8} | {'p99 ms':>8} | {'= brute':>7}")
+            print("-" * 54)
+            reference = None
+            for name in ("pool", "brute", "kdtree", "balltree"):
+                if name == "pool":
+                    pool = _PoolRanking(index)
+                    tree_s = 0.0
+                    index.nearest = lambda row, mask, k, pool=pool: pool.query(row, k, mask)
+                else:
+                    tree_s, searcher = timed(lambda: neighbour_search.build(index.Z, name))
+                    index.__dict__.pop("nearest", None)
+                    index._searcher = searcher
+                samples, picks = [], []
+                for t in targets:
+                    t0 = time.perf_counter()
+                    result = study_buddy.recommend(index.user_ids[t], COURSE, k=k)
+                    samples.append((time.perf_counter() - t0) * 1000)
+                    picks.append([b["studentId"] for b in result["buddies"]])
+                if name == "brute":
+                    reference = picks
+                same = "-" if reference is None else f"{sum(p == r for p, r in zip(picks, reference)) / len(picks):.0%}"
+                print(f"{name:>9} | {tree_s * 1000:>9.1f} | {percentile(samples, 50):>8.3f} | "
+                      f"{percentile(samples, 99):>8.3f} | {same:>7}")
+    finally:
+        risk_grade_service.risk_map, study_buddy_index.get = original
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Study-buddy neighbour search at scale.")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1_000, 10_000, 100_000])
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--k", type=int, default=5)
+    args = parser.parse_args()
+    run(args.sizes, args.queries, args.k)
@@ -0,0 +1,47 @@
+"""
+Consistency check: materialized timeline vs the derived one.
+
+For each student, compares what services/timeline_store.py serves from
+student_timeline with what services/timeline_service.py derives from the
+source collections. The comparison covers the all-courses view and every
+course view: item ids and order, plus the summary counts. Exits with status
+1 if any student differs. Rebuild the students it lists with
+backfill_timeline --user <id>.
+
+Usage (from backend/):
+    python -m app.scripts.check_timeline
+    python -m app.scripts.check_timeline --sample 200
+    python -m app.scripts.check_timeline --user 665f1c...
+"""
+
+import argparse
+import random
+import sys
+
+from app.scripts.backfill_timeline import all_students
+from app.services import timeline_store
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Compare student_timeline with the derived timeline.")
+    parser.add_argument("--user", action="append", help="academiq_user_id to check (repeatable)")
+    parser.add_argument("--sample", type=int, default=0, help="check a random sample of this many students")
+    args = parser.parse_args()
+
+    students = args.user or all_students()
+    if args.sample and len(students) > args.sample:
+        students = random.sample(students, args.sample)
+
+    bad = 0
+    for uid in students:
+        problems = timeline_store.check(uid)
+        if problems:
+            bad += 1
+            for line in problems:
+                print(f"   ❌ {line}")
+    print(f"{'✅' if not bad else '❌'} Checked {len(students)} students: {bad} inconsistent")
+    sys.exit(1 if bad else 0)
+
+
+if __name__ == "__main__":
+    main()
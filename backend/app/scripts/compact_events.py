@@ -0,0 +1,108 @@
+"""
+Compact old student_events into daily rollups and report what it bought.
+
+Runs services/event_compaction.compact over every student (or --user) and
+reports:
+
+  * storage: collStats of student_events and student_event_rollups (data
+    and index size) before and after, plus the job's own tally of BSON
+    bytes removed and added
+  * latency: median ms over --repeat runs, for --sample students with old
+    events, of a timeline page (timeline_service.build_timeline), the
+    window summary and event_repository.list_for_user, before and after
+
+Re-running is safe: only events that have aged past EVENT_ROLLUP_AFTER_DAYS
+since the last run are compacted. Mongo only returns freed space to the OS
+after a compact command; collStats' size and the index sizes drop at once.
+
+Usage (from backend/):
+    python -m app.scripts.compact_events
+    python -m app.scripts.compact_events --sample 50 --repeat 5
+    python -m app.scripts.compact_events --user 665f1c... --user 665f1d...
+"""
+
+import argparse
+import random
+import statistics
+import time
+from typing import Dict, List, Optional
+
+from app.config.database import db, ensure_indexes, student_events_collection
+from app.repositories import event_repository
+from app.services import event_compaction, timeline_service
+
+COLLECTIONS = ("student_events", "student_event_rollups")
+
+
+def storage() -> Optional[Dict[str, Dict[str, int]]]:
+    """{collection: {count, size, index_size}} in bytes, or None without collStats."""
+    try:
+        out = {}
+        for name in COLLECTIONS:
+            s = db.command("collStats", name)
+            out[name] = {"count": s.get("count", 0), "size": s.get("size", 0), "index_size": s.get("totalIndexSize", 0)}
+        return out
+    except Exception:
+        return None
+
+
+def latency(students: List[str], repeat: int) -> Dict[str, float]:
+    """Median ms per read over `students`, `repeat` times each."""
+    reads = {
+        "timeline page": lambda uid: timeline_service.build_timeline(uid, limit=100),
+        "timeline summary": lambda uid: timeline_service.timeline_summary(uid),
+        "list_for_user": lambda uid: event_repository.list_for_user(uid),
+    }
+    out = {}
+    for name, read in reads.items():
+        times = []
+        for _ in range(repeat):
+            for uid in students:
+                t0 = time.perf_counter()
+                read(uid)
+                times.append((time.perf_counter() - t0) * 1000)
+        out[name] = statistics.median(times) if times else 0.0
+    return out
+
+
+def _mb(n: int) -> str:
+    return f"{n / 1_048_576:,.1f} MB"
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Compact old student_events into daily rollups.")
+    parser.add_argument("--user", action="append", help="academiq_user_id to compact (repeatable); default: everyone")
+    parser.add_argument("--sample", type=int, default=20, help="students timed before and after")
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    ensure_indexes()
+    cutoff = event_compaction.horizon_ms()
+    students = args.user or sorted(str(u) for u in student_events_collection.distinct(
+        "academiq_user_id", {"timestamp": {"$type": "number", "$lt": cutoff}},
+    ) if u)
+    sample = random.Random(0).sample(students, min(args.sample, len(students)))
+
+    storage_before, latency_before = storage(), latency(sample, args.repeat)
+    report = event_compaction.compact(students)
+    storage_after, latency_after = storage(), latency(sample, args.repeat)
+
+    print(f"✅ Compacted {report['events']:,} events of {report['students']} students "
+          f"into {report['rollups']:,} rollup updates in {report['took_s']:.1f}s")
+    for uid in report["failed"]:
+        print(f"   ❌ {uid}: failed (see the log); re-run to retry")
+    print(f"   Documents: {_mb(report['bytes_removed'])} removed, {_mb(report['bytes_added'])} of new rollups")
+    if storage_before and storage_after:
+        for name in COLLECTIONS:
+            b, a = storage_before[name], storage_after[name]
+            print(f"   {name}: {b['count']:,} → {a['count']:,} docs, data {_mb(b['size'])} → {_mb(a['size'])}, "
+                  f"indexes {_mb(b['index_size'])} → {_mb(a['index_size'])}")
+    else:
+        print("   (collStats unavailable: document sizes above only)")
+    print(f"\n   Latency over {len(sample)} students (median ms, before → after):")
+    for name in latency_before:
+        print(f"   {name:<17} {latency_before[name]:>8.2f} → {latency_after[name]:>8.2f}")
+
+
+if __name__ == "__main__":
+    main()
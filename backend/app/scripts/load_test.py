@@ -0,0 +1,92 @@
+"""
+Load test: concurrent requests against a running API.
+
+Fires --requests GETs at --path with --concurrency in flight at once and
+reports throughput (req/s), latency percentiles and errors. Run it against the
+same endpoint before and after a change (e.g. the async repository layer) on
+the same machine and database to compare:
+
+    git stash && uvicorn main:app --port 8000 &   # old build
+    python -m app.scripts.load_test --path /api/auth/me --token <session token>
+
+Authenticated endpoints take --token, sent as a Bearer header (a session
+token from /api/auth/login or /api/auth/magic-link).
+
+Usage (from backend/):
+    python -m app.scripts.load_test --path /health
+    python -m app.scripts.load_test --url http://localhost:8000 --path /api/auth/me \\
+        --token <session token> --concurrency 64 --requests 5000
+"""
+
+import argparse
+import asyncio
+import time
+from typing import Any, Dict, List, Optional
+
+import httpx
+
+from app.scripts.bench_common import percentile
+
+
+async def _worker(client: httpx.AsyncClient, path: str, remaining: List[int],
+                  latencies: List[float], errors: Dict[str, int]) -> None:
+    while remaining[0] > 0:
+        remaining[0] -= 1
+        t0 = time.perf_counter()
+        try:
+            response = await client.get(path)
+            if response.status_code >= 400:
+                key = str(response.status_code)
+                errors[key] = errors.get(key, 0) + 1
+                continue
+        except httpx.HTTPError as exc:
+            key = type(exc).__name__
+            errors[key] = errors.get(key, 0) + 1
+            continue
+        latencies.append((time.perf_counter() - t0) * 1000)
+
+
+async def load(url: str, path: str, concurrency: int, requests: int,
+               token: Optional[str] = None) -> Dict[str, Any]:
+    headers = {"Authorization": f"Bearer {token}"} if token else {}
+    limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+    latencies: List[float] = []
+    errors: Dict[str, int] = {}
+    remaining = [requests]
+    async with httpx.AsyncClient(base_url=url, headers=headers, limits=limits, timeout=60.0) as client:
+        await client.get(path)  # warm the connection and any lazy loading
+        t0 = time.perf_counter()
+        await asyncio.gather(*(
+            _worker(client, path, remaining, latencies, errors) for _ in range(concurrency)
+        ))
+        elapsed = time.perf_counter() - t0
+    return {
+        "requests": requests,
+        "ok": len(latencies),
+        "errors": errors,
+        "elapsed_s": elapsed,
+        "rps": len(latencies) / elapsed if elapsed else 0.0,
+        "p50": percentile(latencies, 50),
+        "p95": percentile(latencies, 95),
+        "p99": percentile(latencies, 99),
+    }
+
+
+def run(url: str, path: str, concurrency: int, requests: int, token: Optional[str]) -> None:
+    r = asyncio.run(load(url, path, concurrency, requests, token))
+    print(f"\nGET {url}{path} — {requests} requests, {concurrency} concurrent")
+    print(f"{'req/s':>8} | {'p50 ms':>8} | {'p95 ms':>8} | {'p99 ms':>8} | {'ok':>6} | errors")
+    print("-" * 64)
+    print(f"{r['rps']:>8.1f} | {r['p50']:>8.1f} | {r['p95']:>8.1f} | {r['p99']:>8.1f} | "
+          f"{r['ok']:>6} | {r['errors'] or '-'}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Concurrent GET load against a running API.")
+    parser.add_argument("--url", default="http://localhost:8000")
+    parser.add_argument("--path", default="/health")
+    parser.add_argument("--concurrency", type=int, default=32)
+    parser.add_argument("--requests", type=int, default=2000)
+    parser.add_argument("--token", default=None, help="session token, sent as a Bearer header")
+    args = parser.parse_args()
+    run(args.url, args.path, args.concurrency, args.requests, args.token)
@@ -0,0 +1,95 @@
+"""
+One-off migration: per-snapshot prediction history → one bucket per (user, model).
+
+ml_results_history held one document per recorded snapshot.
+services/prediction_history.py now keeps each (user, model)'s snapshots in
+one bucket document in prediction_history. This copies every legacy
+snapshot into its bucket (newest MAX_HISTORY_PER_USER, oldest-first),
+merged with anything recorded into the bucket since the deploy.
+
+Safe by default: runs as a DRY RUN unless `--apply` is passed. Re-running
+is safe: a bucket is marked `migrated` in the same update that merges the
+legacy snapshots, and a migrated bucket is never merged into again. The
+legacy collection is left in place unless `--drop` is passed as well.
+
+Usage (from backend/, venv active):
+    python -m app.scripts.migrate_prediction_history            # dry run (no writes)
+    python -m app.scripts.migrate_prediction_history --apply
+    python -m app.scripts.migrate_prediction_history --apply --drop
+"""
+
+import argparse
+from itertools import groupby
+from typing import Any, Dict, List
+
+from pymongo.errors import DuplicateKeyError
+
+from app.config.database import ml_results_history_collection, prediction_history_collection
+from app.services.prediction_history import MAX_HISTORY_PER_USER, bucket_id
+
+ENTRY_FIELDS = ("probability", "classification", "top_negative_drivers", "shap_map", "recorded_at")
+
+
+def migrate_bucket(user_id: str, model_name: str, docs: List[Dict[str, Any]]) -> bool:
+    """Merge one (user, model)'s legacy snapshots into its bucket. False if it was migrated already."""
+    entries = [{k: d.get(k) for k in ENTRY_FIELDS} for d in docs][-MAX_HISTORY_PER_USER:]
+    try:
+        prediction_history_collection.update_one(
+            {"_id": bucket_id(user_id, model_name), "migrated": {"$ne": True}},
+            {
+                "$push": {"entries": {
+                    "$each": entries, "$sort": {"recorded_at": 1}, "$slice": -MAX_HISTORY_PER_USER,
+                }},
+                "$set": {"academiq_user_id": user_id, "model_name": model_name, "migrated": True},
+                # A bucket written since the deploy already holds newer snapshots.
+                "$setOnInsert": {
+                    "last_probability": entries[-1]["probability"],
+                    "updated_at": entries[-1]["recorded_at"],
+                },
+            },
+            upsert=True,
+        )
+    except DuplicateKeyError:
+        return False
+    return True
+
+
+def migrate(apply: bool) -> Dict[str, int]:
+    counts = {"snapshots": 0, "buckets": 0, "migrated": 0, "skipped": 0}
+    cursor = ml_results_history_collection.find(
+        {"probability": {"$ne": None}},
+    ).sort([("academiq_user_id", 1), ("model_name", 1), ("recorded_at", 1)])
+    for (user_id, model_name), docs in groupby(cursor, key=lambda d: (d.get("academiq_user_id"), d.get("model_name"))):
+        docs = list(docs)
+        counts["snapshots"] += len(docs)
+        counts["buckets"] += 1
+        if not apply:
+            continue
+        if migrate_bucket(str(user_id), model_name, docs):
+            counts["migrated"] += 1
+        else:
+            counts["skipped"] += 1
+    return counts
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Move prediction history into per-(user, model) buckets.")
+    parser.add_argument("--apply", action="store_true", help="write the buckets (default: dry run)")
+    parser.add_argument("--drop", action="store_true", help="with --apply: drop ml_results_history afterwards")
+    args = parser.parse_args()
+
+    print(f"\nMode: {'APPLY' if args.apply else 'DRY RUN (no writes)'}")
+    counts = migrate(args.apply)
+    print(f"Legacy snapshots: {counts['snapshots']} in {counts['buckets']} (user, model) histories")
+    if not args.apply:
+        print("\n[dry run] No changes written. Re-run with --apply to migrate.")
+        return
+    print(f"Buckets: {counts['migrated']} migrated, {counts['skipped']} already migrated")
+    if args.drop:
+        ml_results_history_collection.drop()
+        print("[drop] ml_results_history dropped")
+    print("\n[done] Migration applied.")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,46 @@
+"""
+Precompute counterfactual plans for every Not High Performer.
+
+Runs services/counterfactual_batch.py over all of feature_vectors and stores
+the plans in counterfactual_plans, which /counterfactual then serves without
+recomputing. Students whose features and performance model haven't changed
+since their stored plan are skipped, so re-running (e.g. nightly, or after a
+model update) only does the new work.
+
+Usage (from backend/):
+    python -m app.scripts.precompute_counterfactuals
+    python -m app.scripts.precompute_counterfactuals --workers 8 --chunk-size 512
+    python -m app.scripts.precompute_counterfactuals --mode beam --force   # recompute everyone
+"""
+
+import argparse
+
+from app.services import counterfactual_batch
+from app.services.counterfactual import SEARCH_MODES
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Precompute cohort-wide counterfactual plans.")
+    parser.add_argument("--mode", choices=SEARCH_MODES, default="greedy")
+    parser.add_argument("--chunk-size", type=int, default=counterfactual_batch.DEFAULT_CHUNK_SIZE)
+    parser.add_argument("--workers", type=int, default=None,
+                        help="process-pool size (default: CPU count; 0 = run in-process)")
+    parser.add_argument("--force", action="store_true", help="recompute even unchanged students")
+    args = parser.parse_args()
+
+    report = counterfactual_batch.run(
+        mode=args.mode, chunk_size=args.chunk_size, workers=args.workers, force=args.force,
+    )
+    chunks = report["chunk_seconds"]
+    print(f"✅ Counterfactual batch ({report['mode']}) finished in {report['elapsed_s']}s")
+    print(f"   Scored:          {report['students']} students "
+          f"({report['students_per_s']}/s, {report['chunks']} chunks)")
+    print(f"   Plans stored:    {report['planned']} ({report['inserted']} new)")
+    print(f"   High performers: {report['high_performers']} (stored as 'already classified')")
+    print(f"   Unchanged:       {report['unchanged']} skipped")
+    print(f"   Failed:          {report['failed']}")
+    print(f"   Chunk time:      min {chunks['min']}s / mean {chunks['mean']}s / max {chunks['max']}s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,101 @@
+"""
+Import-time profile: what each module costs to import, cold.
+
+Runs `python -X importtime -c "import <module>"` in a fresh interpreter for
+each target and reports:
+
+  * the total import time of the target
+  * the --top most expensive modules it pulled in, by cumulative time
+  * which heavy stacks (pandas, sklearn, lightgbm, shap, xgboost,
+    tensorflow, nltk, PyPDF2, pptx) got imported at all
+
+The default targets are the routers main.py mounts at startup, which should
+import no heavy stack, and the ML services behind the lazy_import proxies,
+which are expected to be heavy.
+
+Usage (from backend/):
+    python -m app.scripts.profile_imports
+    python -m app.scripts.profile_imports --module main --top 25
+"""
+
+import argparse
+import os
+import subprocess
+import sys
+from typing import List, Tuple
+
+HEAVY = ("pandas", "sklearn", "lightgbm", "shap", "xgboost", "tensorflow", "nltk", "PyPDF2", "pptx")
+
+STARTUP = [
+    "app.routes.auth", "app.routes.admin", "app.routes.moodle", "app.routes.student_data",
+    "app.routes.system_status", "app.routes.ml_result", "app.routes.student", "app.routes.quiz_router",
+]
+DEFERRED = [
+    "app.services.performance_predict", "app.services.grade_risk_predict",
+    "app.services.counterfactual", "quiz_generator",
+]
+
+
+def profile(module: str) -> Tuple[float, List[Tuple[float, str]], str]:
+    """(total ms, [(cumulative ms, module) it imported], error) for a cold import of `module`."""
+    backend = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+    quiz_dir = os.path.join(os.path.dirname(backend), "ai", "quiz_generator-main")
+    env = dict(os.environ, PYTHONPATH=os.pathsep.join([backend, quiz_dir, os.environ.get("PYTHONPATH", "")]))
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        capture_output=True, text=True, cwd=backend, env=env,
+    )
+    rows: List[Tuple[float, str]] = []
+    for line in proc.stderr.splitlines():
+        if not line.startswith("import time:") or "|" not in line:
+            continue
+        _, cumulative, name = line[len("import time:"):].split("|")
+        try:
+            rows.append((int(cumulative) / 1000, name.rstrip()))
+        except ValueError:
+            continue       # the header line
+    # Keep the target and what it imported: the rows just above its own
+    # (top-level) row, back to the previous top-level import (e.g. site).
+    total, own = 0.0, []
+    for i in range(len(rows) - 1, -1, -1):
+        if rows[i][1].strip() == module and _depth(rows[i][1]) == 0:
+            total = rows[i][0]
+            j = i - 1
+            while j >= 0 and _depth(rows[j][1]) > 0:
+                own.append(rows[j])
+                j -= 1
+            break
+    error = "" if proc.returncode == 0 else (proc.stderr.strip().splitlines() or ["failed"])[-1]
+    return total, own, error
+
+
+def _depth(name: str) -> int:
+    return (len(name) - len(name.lstrip()) - 1) // 2
+
+
+def report(module: str, top: int) -> None:
+    total, rows, error = profile(module)
+    imported = {name.strip().split(".")[0] for _, name in rows}
+    heavy = [h for h in HEAVY if h in imported]
+    print(f"\n{module}: {total:,.0f} ms" + (f"  (import failed: {error})" if error else ""))
+    print(f"  heavy stacks: {', '.join(heavy) or 'none'}")
+    for ms, name in sorted(rows, reverse=True)[:top]:
+        print(f"  {ms:>9,.1f} ms  {name.strip()}  (depth {_depth(name)})")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Per-module cold import cost.")
+    parser.add_argument("--module", action="append", help="module to profile (repeatable); default: startup + deferred sets")
+    parser.add_argument("--top", type=int, default=10)
+    args = parser.parse_args()
+
+    if args.module:
+        for name in args.module:
+            report(name, args.top)
+    else:
+        print("== mounted at startup (should import no heavy stack) ==")
+        for name in STARTUP:
+            report(name, args.top)
+        print("\n== behind lazy_import proxies / warm-up ==")
+        for name in DEFERRED:
+            report(name, args.top)
@@ -42,6 +42,9 @@ def main() -> None:
         },
     )
 
+    # Invalidates the auth cache too. Only AUTH_CACHE_REDIS_URL carries that to
+    # the running server; without it the server forgets these sessions after
+    # AUTH_CACHE_TTL_SECONDS.
     session_repository.delete_sessions_for_user(str(user["_id"]))
 
     send_password_reset_email(
@@ -0,0 +1,261 @@
+"""
+Process-wide cache of authenticated sessions for app.auth.get_current_user.
+
+Every authenticated request used to pay two round trips before doing any work
+— the session by token hash, then its user by _id. This keeps
+
+    token_hash -> (session, user)
+
+in memory. Entries are evicted least-recently-used beyond AUTH_CACHE_SIZE and
+expire after AUTH_CACHE_TTL_SECONDS, or when the session itself expires if
+that is sooner.
+
+Nothing relies on the TTL for correctness. The repositories invalidate
+explicitly through repositories/auth_hooks.py, which this module registers
+with on import (auth_hooks imports it on first use if nothing else has):
+session_repository.delete_session drops one token, and
+delete_sessions_for_user, user_repository.update and user_repository.delete
+drop every token of that user (both the sync and the aio modules). A lookup
+that raced with an invalidation is not cached (see generation()).
+
+With several workers, each has its own cache. Setting AUTH_CACHE_REDIS_URL
+makes every invalidation also publish on AUTH_CACHE_CHANNEL. A listener
+thread in each worker applies what the others publish. redis is optional —
+without it, or without the setting, invalidation stays in-process and the
+TTL bounds how stale another worker's cache can be. The same goes for
+writes from another process, such as scripts/reset_user_password: without
+Redis the server keeps serving a revoked session for up to
+AUTH_CACHE_TTL_SECONDS.
+
+Auth overhead (cookie/header to user doc, hit or miss) is recorded per
+request; stats() reports it for /api/system/status.
+"""
+
+import copy
+import threading
+import time
+from collections import OrderedDict, deque
+from datetime import datetime
+from typing import Any, Dict, Optional, Set, Tuple
+
+from app.config.settings import (
+    AUTH_CACHE_CHANNEL,
+    AUTH_CACHE_REDIS_URL,
+    AUTH_CACHE_SIZE,
+    AUTH_CACHE_TTL_SECONDS,
+)
+from app.repositories import auth_hooks
+
+_lock = threading.Lock()
+# token_hash -> (expires_at monotonic, session, user)
+_entries: "OrderedDict[str, Tuple[float, Dict[str, Any], Dict[str, Any]]]" = OrderedDict()
+_tokens_by_user: Dict[str, Set[str]] = {}
+_generation = 0
+_counters = {"hits": 0, "misses": 0, "evictions": 0, "expirations": 0, "invalidations": 0, "remote_invalidations": 0}
+# Recent auth overheads in ms: (elapsed, hit).
+_latencies: "deque[Tuple[float, bool]]" = deque(maxlen=2000)
+
+
+# ── Local cache ────────────────────────────────────────────────────────────────
+
+def _drop(token_hash: str) -> None:
+    entry = _entries.pop(token_hash, None)
+    if entry is None:
+        return
+    user_id = str(entry[1].get("user_id"))
+    tokens = _tokens_by_user.get(user_id)
+    if tokens is not None:
+        tokens.discard(token_hash)
+        if not tokens:
+            del _tokens_by_user[user_id]
+
+
+def generation() -> int:
+    """Invalidation counter; read it before a DB lookup and pass it to put()."""
+    return _generation
+
+
+def get(token_hash: str) -> Optional[Tuple[Dict[str, Any], Dict[str, Any]]]:
+    """The cached (session, user) for a token hash, or None."""
+    now = time.monotonic()
+    with _lock:
+        entry = _entries.get(token_hash)
+        if entry is not None:
+            if entry[0] > now:
+                _entries.move_to_end(token_hash)
+                _counters["hits"] += 1
+                return copy.deepcopy(entry[1]), copy.deepcopy(entry[2])
+            _drop(token_hash)
+            _counters["expirations"] += 1
+        _counters["misses"] += 1
+    return None
+
+
+def put(token_hash: str, session: Dict[str, Any], user: Dict[str, Any], seen_generation: int) -> None:
+    """Cache a resolved session unless something was invalidated since seen_generation."""
+    ttl = float(AUTH_CACHE_TTL_SECONDS)
+    if ttl <= 0 or AUTH_CACHE_SIZE <= 0:
+        return
+    expires_at = session.get("expires_at")
+    if isinstance(expires_at, datetime):
+        ttl = min(ttl, (expires_at - datetime.utcnow()).total_seconds())
+    if ttl <= 0:
+        return
+    entry = (time.monotonic() + ttl, copy.deepcopy(session), copy.deepcopy(user))
+    with _lock:
+        if seen_generation != _generation:
+            return
+        _drop(token_hash)
+        _entries[token_hash] = entry
+        _tokens_by_user.setdefault(str(session.get("user_id")), set()).add(token_hash)
+        while len(_entries) > AUTH_CACHE_SIZE:
+            _drop(next(iter(_entries)))
+            _counters["evictions"] += 1
+
+
+def _invalidate_local(token_hash: Optional[str] = None, user_id: Optional[str] = None) -> None:
+    global _generation
+    with _lock:
+        _generation += 1
+        if token_hash:
+            _drop(token_hash)
+        if user_id:
+            for token in list(_tokens_by_user.get(str(user_id), ())):
+                _drop(token)
+        _counters["invalidations"] += 1
+
+
+def invalidate_token(token_hash: str) -> None:
+    """Forget one session (logout), here and in every other worker."""
+    _invalidate_local(token_hash=token_hash)
+    _publish(f"t:{token_hash}")
+
+
+def invalidate_user(user_id: str) -> None:
+    """Forget every session of a user (user changed, deleted or logged out everywhere)."""
+    _invalidate_local(user_id=str(user_id))
+    _publish(f"u:{user_id}")
+
+
+auth_hooks.on_token_revoked(invalidate_token)
+auth_hooks.on_user_changed(invalidate_user)
+
+
+def clear() -> None:
+    global _generation
+    with _lock:
+        _generation += 1
+        _entries.clear()
+        _tokens_by_user.clear()
+
+
+# ── Shared invalidation (optional, Redis pub/sub) ─────────────────────────────
+
+_redis = None
+_listener: Optional[threading.Thread] = None
+_redis_lock = threading.Lock()
+
+
+def _apply_remote(message: str) -> None:
+    kind, _, key = message.partition(":")
+    if kind == "t":
+        _invalidate_local(token_hash=key)
+    elif kind == "u":
+        _invalidate_local(user_id=key)
+    else:
+        return
+    with _lock:
+        _counters["remote_invalidations"] += 1
+
+
+def _listen(client: Any) -> None:
+    while True:
+        try:
+            pubsub = client.pubsub(ignore_subscribe_messages=True)
+            pubsub.subscribe(AUTH_CACHE_CHANNEL)
+            for message in pubsub.listen():
+                data = message.get("data")
+                if isinstance(data, bytes):
+                    data = data.decode()
+                if isinstance(data, str):
+                    _apply_remote(data)
+        except Exception as exc:
+            print(f"[WARN] auth cache invalidation listener: {exc}; resubscribing")
+            # Anything published while disconnected was missed.
+            clear()
+            time.sleep(1.0)
+
+
+def _shared():
+    """The Redis client, connecting and starting the listener on first use."""
+    global _redis, _listener
+    if not AUTH_CACHE_REDIS_URL:
+        return None
+    if _redis is None:
+        with _redis_lock:
+            if _redis is None:
+                try:
+                    import redis
+                except ImportError:
+                    print("[WARN] AUTH_CACHE_REDIS_URL is set but redis is not installed; "
+                          "auth cache invalidation stays in-process")
+                    return None
+                _redis = redis.Redis.from_url(AUTH_CACHE_REDIS_URL)
+                _listener = threading.Thread(target=_listen, args=(_redis,), name="auth-cache-pubsub", daemon=True)
+                _listener.start()
+    return _redis
+
+
+def start() -> None:
+    """Subscribe to shared invalidations now instead of on first use (app startup)."""
+    _shared()
+
+
+def _publish(message: str) -> None:
+    client = _shared()
+    if client is None:
+        return
+    try:
+        client.publish(AUTH_CACHE_CHANNEL, message)
+    except Exception as exc:
+        print(f"[WARN] auth cache invalidation not published: {exc}")
+
+
+# ── Instrumentation ────────────────────────────────────────────────────────────
+
+def record(elapsed_ms: float, hit: bool) -> None:
+    """Record the auth overhead of one request."""
+    with _lock:
+        _latencies.append((elapsed_ms, hit))
+
+
+def _percentile(samples: list, q: float) -> float:
+    if not samples:
+        return 0.0
+    ordered = sorted(samples)
+    return round(ordered[min(len(ordered) - 1, int(q / 100 * len(ordered)))], 3)
+
+
+def stats() -> Dict[str, Any]:
+    """Hit/miss/invalidation counters and recent auth overhead for /api/system/status."""
+    with _lock:
+        counters = dict(_counters)
+        size = len(_entries)
+        samples = list(_latencies)
+    lookups = counters["hits"] + counters["misses"]
+    hits = [ms for ms, hit in samples if hit]
+    misses = [ms for ms, hit in samples if not hit]
+    return {
+        **counters,
+        "size": size,
+        "max_size": AUTH_CACHE_SIZE,
+        "ttl_seconds": AUTH_CACHE_TTL_SECONDS,
+        "hit_rate": round(counters["hits"] / lookups, 4) if lookups else 0.0,
+        "shared_invalidation": _redis is not None,
+        "auth_ms": {
+            "p50": _percentile([ms for ms, _ in samples], 50),
+            "p99": _percentile([ms for ms, _ in samples], 99),
+            "hit_p50": _percentile(hits, 50),
+            "miss_p50": _percentile(misses, 50),
+        },
+    }
@@ -0,0 +1,396 @@
+"""
+Bulk Moodle ingest: many student payloads per request.
+
+POST /raw-moodle-payloads handles one student per request and makes a round
+trip per step (identity lookup, a write per normalized collection, the raw
+upsert plus a find_one for its _id, the feature upsert, the sync event). An
+exporter or replay tool pushing a whole course paid that thousands of times.
+
+POST /raw-moodle-payloads/bulk takes NDJSON — one extension payload per line —
+and feeds it through BulkIngest, which buffers BULK_INGEST_CHUNK_SIZE payloads
+and writes each chunk with a fixed number of round trips however many students
+and materials it holds:
+
+    1 user lookup        user_provisioning.resolve_or_create_users
+                         (+ one insert per student seen for the first time)
+    1 find               stored section digests (ingest_digest_repository)
+    1 find               previous feature vectors (prediction cache invalidation)
+    (1 find)             compaction watermarks, only for students re-sending
+                         events older than EVENT_ROLLUP_AFTER_DAYS
+    6 bulk writes        course_materials, student_metrics, student_events,
+                         raw payloads, feature vectors, digests — all unordered
+    1 find               raw payload _ids for the feature vectors
+    1 update             the extension_sync system event
+
+Like the single endpoint, sections unchanged since the student's previous
+payload are not written, and students whose feature sections are all
+unchanged are neither re-featurized nor re-scored.
+
+Each payload gets the same summary the single endpoint returns (or an error
+entry; a bad line never fails its neighbours), and the report carries
+payloads-per-second for the whole request and per-chunk timings.
+
+Within a chunk, writes for the same key are collapsed before they are sent —
+unordered bulk writes give no ordering guarantee, so the last payload for a
+student (or material, metric, event) is the one that wins, exactly as if the
+payloads had been posted one by one.
+"""
+
+import json
+import time
+from datetime import datetime
+from typing import Any, AsyncIterator, Dict, Iterable, List, Optional, Tuple
+
+from pymongo import UpdateOne
+
+from app.config.database import (
+    feature_vectors_collection,
+    raw_moodle_payload_collection,
+    system_events_collection,
+)
+from app.config.settings import BULK_INGEST_CHUNK_SIZE
+from app.repositories import (
+    event_repository,
+    event_rollup_repository,
+    ingest_digest_repository,
+    material_repository,
+    metrics_repository,
+)
+from app.services import (
+    event_compaction,
+    moodle_ingest,
+    prediction_cache,
+    scoring_queue,
+    study_buddy_index,
+    timeline_store,
+)
+from app.services.moodle_ingest import plan_payload, slim_payload
+from app.services.preprocessing import compute_features
+from app.services.user_provisioning import extract_identity, resolve_or_create_users
+
+
+async def ndjson_lines(stream: AsyncIterator[bytes]) -> AsyncIterator[bytes]:
+    """Split a byte stream into non-blank lines as it arrives."""
+    buffer = b""
+    async for block in stream:
+        buffer += block
+        *lines, buffer = buffer.split(b"\n")
+        for line in lines:
+            if line.strip():
+                yield line
+    if buffer.strip():
+        yield buffer
+
+
+def _upserted(result: Any) -> Dict[int, Any]:
+    return dict(getattr(result, "upserted_ids", None) or {}) if result is not None else {}
+
+
+class BulkIngest:
+    """
+    Accumulates NDJSON lines and writes them a chunk at a time.
+
+        job = BulkIngest()
+        for line in lines:
+            job.add(line)
+        report = job.finish()
+    """
+
+    def __init__(self, chunk_size: Optional[int] = None):
+        self.chunk_size = max(1, chunk_size or BULK_INGEST_CHUNK_SIZE)
+        self.results: List[Dict[str, Any]] = []
+        self.chunk_seconds: List[float] = []
+        self._chunk: List[Tuple[int, Dict[str, Any]]] = []
+        self._lines = 0
+        self._users: set = set()
+        self._t0 = time.perf_counter()
+
+    def add(self, line: Any) -> None:
+        """Queue one NDJSON line (bytes / str) or an already-parsed payload."""
+        self._lines += 1
+        n = self._lines
+        if isinstance(line, dict):
+            payload = line
+        else:
+            try:
+                payload = json.loads(line)
+            except ValueError as exc:
+                self.results.append({"line": n, "status": "error", "detail": f"Invalid JSON: {exc}"})
+                return
+        if not isinstance(payload, dict):
+            self.results.append({"line": n, "status": "error", "detail": "Payload must be a JSON object"})
+            return
+        self._chunk.append((n, payload))
+        if len(self._chunk) >= self.chunk_size:
+            self.flush()
+
+    def flush(self) -> None:
+        """Write whatever is buffered."""
+        chunk, self._chunk = self._chunk, []
+        if not chunk:
+            return
+        t0 = time.perf_counter()
+        try:
+            self.results.extend(self._write_chunk(chunk))
+        except Exception as exc:
+            self.results.extend(
+                {"line": n, "status": "error", "detail": f"Processing error: {exc}"} for n, _ in chunk
+            )
+        self.chunk_seconds.append(time.perf_counter() - t0)
+
+    def finish(self) -> Dict[str, Any]:
+        """Flush the last chunk and return the report."""
+        self.flush()
+        elapsed = time.perf_counter() - self._t0
+        self.results.sort(key=lambda r: r["line"])
+        ingested = sum(r["status"] != "error" for r in self.results)
+        cs = self.chunk_seconds
+        return {
+            "payloads": self._lines,
+            "ingested": ingested,
+            "failed": self._lines - ingested,
+            "students": len(self._users),
+            "chunks": len(cs),
+            "elapsed_s": round(elapsed, 3),
+            "payloads_per_sec": round(self._lines / elapsed, 1) if elapsed else 0.0,
+            "chunk_seconds": {
+                "min": round(min(cs), 3) if cs else 0.0,
+                "mean": round(sum(cs) / len(cs), 3) if cs else 0.0,
+                "max": round(max(cs), 3) if cs else 0.0,
+            },
+            "results": self.results,
+        }
+
+    # ── One chunk ───────────────────────────────────────────────────────────
+
+    @staticmethod
+    def _resolve(
+        chunk: List[Tuple[int, Dict[str, Any]]], results: List[Dict[str, Any]],
+    ) -> Tuple[List[Tuple[int, Dict[str, Any]]], List[Dict[str, Optional[str]]], List[Tuple[Dict[str, Any], bool]]]:
+        """
+        Accounts for a chunk's payloads, with one lookup when nothing fails.
+
+        If the bulk resolution raises, each identity is resolved on its own so
+        only the lines whose identity cannot be read, matched or provisioned
+        become error results; the rest of the chunk is returned as usual.
+        """
+        kept: List[Tuple[int, Dict[str, Any]]] = []
+        identities: List[Dict[str, Optional[str]]] = []
+        for n, payload in chunk:
+            try:
+                identities.append(extract_identity(payload))
+            except Exception as exc:
+                results.append({"line": n, "status": "error", "detail": f"Identity error: {exc}"})
+                continue
+            kept.append((n, payload))
+        try:
+            return kept, identities, resolve_or_create_users(identities)
+        except Exception:
+            pass
+
+        lines, found, accounts = [], [], []
+        for line, identity in zip(kept, identities):
+            try:
+                accounts.extend(resolve_or_create_users([identity]))
+            except Exception as exc:
+                results.append({"line": line[0], "status": "error", "detail": f"Identity error: {exc}"})
+                continue
+            lines.append(line)
+            found.append(identity)
+        return lines, found, accounts
+
+    def _write_chunk(self, chunk: List[Tuple[int, Dict[str, Any]]]) -> List[Dict[str, Any]]:
+        now = datetime.utcnow()
+        results: List[Dict[str, Any]] = []
+        chunk, identities, resolved = self._resolve(chunk, results)
+
+        # Each payload is compared with the previous one for its student —
+        # earlier in this chunk, or else the stored digests.
+        digests = ingest_digest_repository.get_many([str(user["_id"]) for user, _ in resolved])
+
+        items: List[Dict[str, Any]] = []
+        for (n, payload), identity, (user, created) in zip(chunk, identities, resolved):
+            user_id = str(user["_id"])
+            try:
+                current = moodle_ingest.section_digests(payload)
+                unchanged = moodle_ingest.unchanged_sections(current, digests.get(user_id))
+                changed = moodle_ingest.features_changed(payload, unchanged)
+                features = compute_features(payload) if changed else None
+                plan = plan_payload(payload, user_id, skip=unchanged)
+            except Exception as exc:
+                results.append({"line": n, "status": "error", "detail": f"Processing error: {exc}"})
+                continue
+            digests[user_id] = current
+            items.append({
+                "line": n,
+                "payload": payload,
+                "user_id": user_id,
+                "created": created,
+                "student_id": user.get("student_id") or identity.get("student_id") or (features or {}).get("student_id"),
+                "features": features,
+                "skipped": sorted(unchanged),
+                "plan": plan,
+                "materials_new": 0,
+                "metrics_new": 0,
+                "events_new": 0,
+            })
+        if not items:
+            return results
+
+        # Collapse writes per key; the last payload for a key wins.
+        materials: Dict[Tuple[Any, Any], Tuple[int, UpdateOne]] = {}
+        metrics: Dict[Tuple[str, str], Tuple[int, UpdateOne]] = {}
+        events: Dict[Tuple[str, str], Tuple[int, UpdateOne]] = {}
+        event_docs: Dict[Tuple[str, str], Dict[str, Any]] = {}
+        latest: Dict[str, int] = {}
+        featured: Dict[str, int] = {}   # user -> last item that recomputed features
+        syncs: Dict[str, int] = {}
+        # Watermarks of the students re-sending events old enough to be compacted
+        marks = event_rollup_repository.watermarks(
+            {item["user_id"] for item in items if event_compaction.needs_watermark(item["plan"]["events"], now)}
+        )
+        for i, item in enumerate(items):
+            user_id, plan = item["user_id"], item["plan"]
+            for doc in plan["materials"]:
+                materials[(doc.get("course_id"), doc.get("material_id"))] = (i, material_repository.upsert_op(doc, now))
+            for course_id, snapshot in plan["metrics"]:
+                metrics[(user_id, course_id)] = (i, metrics_repository.upsert_op(user_id, course_id, snapshot, now))
+            # upsert_ops makes one op per event, in order
+            kept = event_compaction.drop_compacted(user_id, plan["events"], marks)
+            for (event_id, op), ev in zip(event_repository.upsert_ops(user_id, kept, now), kept):
+                events[(user_id, event_id)] = (i, op)
+                event_docs[(user_id, event_id)] = ev
+            latest[user_id] = i
+            if item["features"] is not None:
+                featured[user_id] = i
+            syncs[user_id] = syncs.get(user_id, 0) + 1
+        users = list(latest)
+
+        previous = {
+            d["academiq_user_id"]: d.get("features")
+            for d in feature_vectors_collection.find(
+                {"academiq_user_id": {"$in": list(featured)}}, {"academiq_user_id": 1, "features": 1}
+            )
+        } if featured else {}
+
+        inserted_events: Dict[str, List[Dict[str, Any]]] = {}
+        event_keys = list(events)
+        for owned, repo, attr in (
+            (list(materials.values()), material_repository, "materials_new"),
+            (list(metrics.values()), metrics_repository, "metrics_new"),
+            (list(events.values()), event_repository, "events_new"),
+        ):
+            for op_index in _upserted(repo.apply([op for _, op in owned])):
+                items[owned[op_index][0]][attr] += 1
+                if repo is event_repository:
+                    key = event_keys[op_index]
+                    inserted_events.setdefault(key[0], []).append(event_docs[key])
+        for user_id, inserted in inserted_events.items():
+            timeline_store.append_events(user_id, inserted)
+
+        raw_moodle_payload_collection.bulk_write(
+            [
+                UpdateOne(
+                    {"academiq_user_id": user_id},
+                    {
+                        "$set": {
+                            **slim_payload(items[i]["payload"]),
+                            "academiq_user_id": user_id,
+                            "updated_at": now,
+                        },
+                        "$setOnInsert": {"created_at": now},
+                        "$inc": {"sync_count": syncs[user_id]},
+                    },
+                    upsert=True,
+                )
+                for user_id, i in latest.items()
+            ],
+            ordered=False,
+        )
+        # The stored grades are the latest payload's; re-map them if any sync changed them.
+        for user_id in {item["user_id"] for item in items if "grades" not in item["skipped"]}:
+            timeline_store.refresh_grades(user_id, items[latest[user_id]]["payload"].get("grades") or [])
+        raw_ids = {
+            d["academiq_user_id"]: str(d["_id"])
+            for d in raw_moodle_payload_collection.find(
+                {"academiq_user_id": {"$in": users}}, {"academiq_user_id": 1}
+            )
+        }
+
+        if featured:
+            feature_vectors_collection.bulk_write(
+                [
+                    UpdateOne(
+                        {"academiq_user_id": user_id},
+                        {
+                            "$set": {
+                                "raw_payload_id": raw_ids.get(user_id),
+                                "student_id": items[i]["student_id"],
+                                "features": items[i]["features"],
+                                "updated_at": now,
+                            },
+                            "$setOnInsert": {"created_at": now},
+                        },
+                        upsert=True,
+                    )
+                    for user_id, i in featured.items()
+                ],
+                ordered=False,
+            )
+
+        last = items[-1]
+        system_events_collection.update_one(
+            {"type": "extension_sync"},
+            {
+                "$set": {
+                    "type": "extension_sync",
+                    "last_sync_at": now,
+                    "status": "success",
+                    "academiq_user_id": last["user_id"],
+                    "student_id": last["student_id"],
+                }
+            },
+            upsert=True,
+        )
+
+        # Stored last, so a chunk that failed part-way is redone in full.
+        ingest_digest_repository.save_many({user_id: digests[user_id] for user_id in users})
+
+        scoring: Dict[str, str] = {}
+        for user_id, i in featured.items():
+            features = items[i]["features"]
+            # Model outputs memoized for the replaced vector are now stale.
+            if previous.get(user_id) and previous[user_id] != features:
+                prediction_cache.invalidate(previous[user_id])
+            study_buddy_index.note_changed(user_id)
+            scoring[user_id] = scoring_queue.submit(user_id, features)
+        self._users.update(users)
+
+        for item in items:
+            plan = item["plan"]
+            results.append({
+                "line": item["line"],
+                "status": "features_computed" if item["features"] is not None else "features_unchanged",
+                "inserted_id": raw_ids.get(item["user_id"]),
+                "scoring": scoring.get(item["user_id"], "skipped"),
+                "academiq_user_id": item["user_id"],
+                "account_created": item["created"],
+                "student_id": item["student_id"],
+                "normalized": {
+                    "materials_seen": plan["materials_seen"],
+                    "materials_new": item["materials_new"],
+                    "metrics_courses": plan["metrics_courses"],
+                    "metrics_new": item["metrics_new"],
+                    "events_new": item["events_new"],
+                },
+                "skipped": item["skipped"],
+            })
+        return results
+
+
+def ingest(lines: Iterable[Any], chunk_size: Optional[int] = None) -> Dict[str, Any]:
+    """Run a whole batch of NDJSON lines (or payload dicts) through BulkIngest."""
+    job = BulkIngest(chunk_size)
+    for line in lines:
+        job.add(line)
+    return job.finish()
@@ -5,18 +5,25 @@ Bundle keys: model (XGBClassifier), preprocessor (imputer+scaler Pipeline),
 feature_cols, threshold, log_cols, proc_clip. Loaded once, lazily; returns None
 everywhere if the file or xgboost is missing so the dashboard falls back to the
 heuristic.
+
+predict_many scores a whole cohort with one feature matrix, one preprocessor
+pass and one predict_proba call; predict is its one-row case.
 """
 
 import os
-from typing import Any, Dict, Optional
+from typing import Any, Dict, List, Optional
 
 import numpy as np
 
+from app.services import feature_pipeline, model_registry, prediction_cache
+
 _BASE = os.path.dirname(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
 _PATH = os.path.join(_BASE, "models", "burnout detection", "burnout_model.pkl")
 
 _bundle = None
 _loaded = False
+_version = ""
+_compiled = None   # (bundle, FeaturePipeline)
 
 _MESSAGES = {
     "Safe":        "No signs of overload from your current activity.",
@@ -27,13 +34,13 @@ _MESSAGES = {
 
 
 def _get():
-    global _bundle, _loaded
+    global _bundle, _loaded, _version
     if _loaded:
         return _bundle
     _loaded = True
     try:
-        import joblib
-        _bundle = joblib.load(_PATH)
+        _bundle = model_registry.load(_PATH)
+        _version = prediction_cache.artifact_version(_PATH)
         print("[OK] burnout model loaded.")
     except Exception as exc:
         print(f"[INFO] burnout model unavailable: {exc}")
@@ -45,10 +52,10 @@ def available() -> bool:
     return _get() is not None
 
 
-def _pct(v) -> float:
-    # live feature vectors store scores as 0-1; the model trained on 0-100.
-    v = float(v or 0)
-    return v * 100 if 0 <= v <= 1 else v
+def artifact_version() -> str:
+    """Fingerprint of the loaded bundle file (prediction_cache key part)."""
+    _get()
+    return _version
 
 
 def _risk_level(prob: float, threshold: float) -> str:
@@ -61,43 +68,12 @@ def _risk_level(prob: float, threshold: float) -> str:
     return "High Risk"
 
 
-def _row(b, feats: Dict[str, Any]) -> np.ndarray:
-    ac   = float(feats.get("all_clicks", 0) or 0)
-    ad   = float(feats.get("active_days", 0) or 0)
-    mc   = float(feats.get("material_clicks", 0) or 0)
-    tt   = float(feats.get("total_time_spent", 0) or 0)
-    qa   = float(feats.get("quiz_attempts", 0) or 0)
-    asub = float(feats.get("assignment_submissions", 0) or 0)
-    late = float(feats.get("late_submission_count", 0) or 0)
-    qs   = _pct(feats.get("avg_quiz_score"))
-    asc  = _pct(feats.get("avg_assignment_score"))
-
-    r = {
-        "all_clicks": ac,
-        "active_days": ad,
-        "access_frequency": float(feats.get("access_frequency", 0) or 0),
-        "material_clicks": mc,
-        "avg_quiz_score": qs,
-        "quiz_attempts": qa,
-        "avg_assignment_score": asc,
-        "assignment_submissions": asub,
-        "total_time_spent": tt,
-        "procrastination_index": float(feats.get("procrastination_index", 0) or 0),
-        "late_submission_count": late,
-        "clicks_per_day": ac / ad if ad > 0 else 0.0,
-        "time_per_day": tt / ad if ad > 0 else 0.0,
-        "time_per_click": tt / ac if ac > 0 else 0.0,
-        "material_intensity": mc / ad if ad > 0 else 0.0,
-        "quiz_rate": qa / ad if ad > 0 else 0.0,
-        "late_ratio": late / asub if asub > 0 else 0.0,
-        "quiz_performance": qs * float(np.log1p(qa)),
-        "assignment_performance": asc * float(np.log1p(asub)),
-    }
-    for c in b["log_cols"]:
-        r[c] = float(np.log1p(r[c]))
-    lo, hi = b["proc_clip"]
-    r["procrastination_index"] = min(max(r["procrastination_index"], lo), hi)
-    return np.array([[r[c] for c in b["feature_cols"]]], dtype=float)
+def _pipeline(b) -> feature_pipeline.FeaturePipeline:
+    """The bundle's compiled feature pipeline (compiled once per loaded bundle)."""
+    global _compiled
+    if _compiled is None or _compiled[0] is not b:
+        _compiled = (b, feature_pipeline.burnout_pipeline(b))
+    return _compiled[1]
 
 
 def _preprocess(b, x: np.ndarray) -> np.ndarray:
@@ -113,21 +89,37 @@ def _preprocess(b, x: np.ndarray) -> np.ndarray:
     return x
 
 
-def predict(feats: Dict[str, Any]) -> Optional[Dict[str, Any]]:
-    """Return {probability, level, at_risk, message}, or None if unavailable."""
+def predict_many(feats_list: List[Dict[str, Any]]) -> List[Optional[Dict[str, Any]]]:
+    """predict() for many students in one model call. Results are in input
+    order; None where a feature dict is empty or malformed (or everywhere when
+    the model is unavailable)."""
     b = _get()
-    if not b or not feats:
-        return None
+    out: List[Optional[Dict[str, Any]]] = [None] * len(feats_list)
+    given = [i for i, feats in enumerate(feats_list) if feats]
+    if not b or not given:
+        return out
+    R, kept = feature_pipeline.readable_raw_matrix([feats_list[i] for i in given])
+    rows = [given[j] for j in kept]
+    if not rows:
+        return out
     try:
-        x = _preprocess(b, _row(b, feats))
-        prob = float(b["model"].predict_proba(x)[0, 1])
+        x = _preprocess(b, _pipeline(b).transform(R))
+        probs = b["model"].predict_proba(x)[:, 1]
         threshold = float(b["threshold"])
+    except Exception:
+        return out
+    for i, prob in zip(rows, probs):
+        prob = float(prob)
         level = _risk_level(prob, threshold)
-        return {
+        out[i] = {
             "probability": round(prob, 3),
             "level": level,
             "at_risk": prob >= threshold,
             "message": _MESSAGES[level],
         }
-    except Exception:
-        return None
+    return out
+
+
+def predict(feats: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+    """Return {probability, level, at_risk, message}, or None if unavailable."""
+    return predict_many([feats])[0]
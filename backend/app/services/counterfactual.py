@@ -5,26 +5,40 @@ Counterfactual recommendation engine.
 Answers: "What is the minimum behavioural change needed for this student to
 flip from Not High Performer to High Performer?"
 
-Derived-feature engineering here must exactly match
-performance_predict.py::_engineer_features() and the v4 notebook's
-BEHAVIORAL_FEATURES (16 columns: 9 raw + 4 derived + 3 *_relative ratios).
+Derived features come from the shared feature_pipeline kernel — the same
+compiled pipeline performance_predict.py uses — so they always match the v4
+notebook's BEHAVIORAL_FEATURES (16 columns: 9 raw + 4 derived + 3 *_relative
+ratios).
+
+Candidates are scored in batches: the student plus every single-feature move
+share one predict_proba call, and the greedy prefix sequence shares a second,
+so a request costs two model calls instead of one per candidate.
 """
 
-from typing import Any, Dict, Optional
+from typing import Any, Dict, List, Optional, Tuple
 
+import numpy as np
 import pandas as pd
 
+from app.services import feature_pipeline
 from app.services import performance_predict as _pp
 
 # Same 9 mutable behavioural features as PRIMARY_MUTABLE in the notebook.
 # These are the only features the counterfactual engine is allowed to move —
-# everything else (the 10 derived columns) is recomputed by _rebuild_derived.
+# everything else (the derived columns) is recomputed from them by the shared
+# feature pipeline inside _score.
 PRIMARY_MUTABLE = [
     "quiz_attempts", "assignment_submissions", "active_days",
     "total_time_spent", "all_clicks", "access_frequency",
     "material_clicks", "procrastination_index", "late_submission_count",
 ]
 
+SEARCH_MODES = ("greedy", "beam")
+
+# Change-sets kept per level in beam mode. 8 of the 9 mutable features keeps
+# each level to at most ~64 candidates — still a single model call.
+BEAM_WIDTH = 8
+
 
 def _safe_median_get(medians: Optional[Any], key: str, default: float) -> float:
     """
@@ -41,40 +55,95 @@ def _safe_median_get(medians: Optional[Any], key: str, default: float) -> float:
     return medians.get(key, default)
 
 
-def _rebuild_derived(row: pd.Series) -> pd.Series:
-    """
-    Recompute all derived features from the 9 raw inputs.
-
-    Must match performance_predict._engineer_features() exactly: 4 derived
-    scalars + 3 *_relative ratios (16 total features).
-    """
-    row = row.copy()
-    row["clicks_per_day"] = row["all_clicks"] / (row["active_days"] + 1)
-    row["time_per_click"] = row["total_time_spent"] / (row["all_clicks"] + 1)
-    row["engagement_consistency"] = row["active_days"] / (row["total_time_spent"] / 60 + 1)
-    row["behavioral_risk_score"] = (
-        max(row["procrastination_index"], 0) * 0.6
-        + row["late_submission_count"] * 10 * 0.4
-    )
-    for col in ["all_clicks", "total_time_spent", "active_days"]:
-        med = _safe_median_get(_pp._train_medians, col, 1)
-        row[f"{col}_relative"] = row[col] / (med + 1)
-    return row
-
-
-def _predict_proba(row: pd.Series) -> float:
-    """Run the calibrated model on a fully-derived feature row."""
+def _ensure_loaded() -> None:
     if _pp._calibrated_model is None:
         # Mirrors performance_predict.predict_performance()'s own lazy-load
         # guard — artifacts should already be loaded at import time, but if
         # something cleared them, retry once rather than crashing on a None
         # model.
         _pp.load_artifacts()
-    X_df = pd.DataFrame([row], columns=_pp._behavioral_features)
-    return float(_pp._calibrated_model.predict_proba(X_df)[0][1])
 
 
-def find_counterfactual(student_features: Dict[str, Any]) -> Dict[str, Any]:
+def _score(R: np.ndarray) -> np.ndarray:
+    """
+    High-performer probability for every row of a raw candidate matrix.
+
+    This is the engine's only model entry point: each search step stacks all
+    of its candidates into one matrix, so a step costs one predict_proba call
+    however many candidates it scores.
+    """
+    _ensure_loaded()
+    X = _pp._feature_pipeline().transform(R)
+    X_df = pd.DataFrame(X, columns=_pp._behavioral_features)
+    return _pp._calibrated_model.predict_proba(X_df)[:, 1]
+
+
+def _apply(base: np.ndarray, change_sets: List[Tuple[int, ...]], moves: List[Tuple[str, float]]) -> np.ndarray:
+    """One raw row per change-set: `base` with each listed move applied."""
+    R = np.repeat(base[None, :], len(change_sets), axis=0)
+    for row, change_set in enumerate(change_sets):
+        for m in change_set:
+            feat, target = moves[m]
+            R[row, feature_pipeline.RAW_INDEX[feat]] = target
+    return R
+
+
+def _greedy(base: np.ndarray, moves: List[Tuple[str, float]]) -> Tuple[Tuple[int, ...], float]:
+    """
+    Apply moves (already sorted by single-feature gain) cumulatively and stop
+    at the first prefix that flips. All prefixes are scored in one call.
+    """
+    prefixes = [tuple(range(i + 1)) for i in range(len(moves))]
+    probs = _score(_apply(base, prefixes, moves))
+    flipped = np.flatnonzero(probs >= 0.5)
+    k = int(flipped[0]) if flipped.size else len(moves) - 1
+    return prefixes[k], float(probs[k])
+
+
+def _beam(
+    base: np.ndarray,
+    moves: List[Tuple[str, float]],
+    single_probs: np.ndarray,
+    beam_width: int,
+) -> Tuple[Tuple[int, ...], float]:
+    """
+    Level-wise beam search over change-sets.
+
+    Level n holds sets of n moves. Each level expands the `beam_width` most
+    probable sets of the previous level by one more move and scores every
+    expansion in one call. Stops at the first level that contains a flip and
+    returns its most probable flipping set — so the plan has the fewest
+    changes the search could find — else the most probable set seen.
+    """
+    # Change-sets are sorted tuples of move indices and moves are sorted by
+    # gain, so on equal probability max() keeps the set of stronger moves.
+    level = {(i,): float(p) for i, p in enumerate(single_probs)}
+    best = max(level.items(), key=lambda kv: kv[1])
+    while True:
+        flips = {cs: p for cs, p in level.items() if p >= 0.5}
+        if flips:
+            return max(flips.items(), key=lambda kv: kv[1])
+        if len(next(iter(level))) >= len(moves):
+            return best
+        beam = sorted(level, key=lambda cs: -level[cs])[:beam_width]
+        expansions = sorted({
+            tuple(sorted(cs + (m,)))
+            for cs in beam
+            for m in range(len(moves))
+            if m not in cs
+        })
+        probs = _score(_apply(base, expansions, moves))
+        level = {cs: float(p) for cs, p in zip(expansions, probs)}
+        top = max(level.items(), key=lambda kv: kv[1])
+        if top[1] > best[1]:
+            best = top
+
+
+def find_counterfactual(
+    student_features: Dict[str, Any],
+    mode: str = "greedy",
+    beam_width: int = BEAM_WIDTH,
+) -> Dict[str, Any]:
     """
     Find the minimum set of behavioural changes that flip the student's
     classification from Not High Performer to High Performer.
@@ -87,6 +156,11 @@ def find_counterfactual(student_features: Dict[str, Any]) -> Dict[str, Any]:
             ignored; missing keys default to 0.0 so a partial feature
             vector never crashes the engine (it will just produce a less
             informed counterfactual).
+        mode: "greedy" (default) applies moves in order of single-feature
+            gain until the student flips — 2 model calls. "beam" searches
+            multi-feature change-sets level by level (see _beam) and can find
+            smaller plans — 1 model call per level.
+        beam_width: change-sets kept per level in "beam" mode.
 
     Returns:
         {
@@ -100,10 +174,24 @@ def find_counterfactual(student_features: Dict[str, Any]) -> Dict[str, Any]:
             },
         }
     """
+    if mode not in SEARCH_MODES:
+        raise ValueError(f"Unknown counterfactual mode {mode!r}; expected one of {SEARCH_MODES}")
+
     raw = {feat: float(student_features.get(feat, 0.0) or 0.0) for feat in PRIMARY_MUTABLE}
-    student_row = _rebuild_derived(pd.Series(raw))
+    base = feature_pipeline.raw_matrix([raw])[0]
+
+    # Candidate moves: each mutable feature set to the high-performer cohort
+    # median (skipping features already there).
+    moves: List[Tuple[str, float]] = []
+    for feat in PRIMARY_MUTABLE:
+        target = float(_safe_median_get(_pp._hp_medians, feat, raw[feat]))
+        if abs(target - raw[feat]) < 1e-6:
+            continue
+        moves.append((feat, target))
 
-    orig_p = _predict_proba(student_row)
+    # Step 1 — score the student and every single-feature move in one call.
+    probs = _score(_apply(base, [()] + [(i,) for i in range(len(moves))], moves))
+    orig_p = float(probs[0])
     if orig_p >= 0.5:
         return {
             "status": "Already classified as High Performer",
@@ -113,47 +201,33 @@ def find_counterfactual(student_features: Dict[str, Any]) -> Dict[str, Any]:
             "changes_needed": {},
         }
 
-    modified = student_row.copy()
-    changes: Dict[str, Dict[str, float]] = {}
-    current_p = orig_p
+    # Order moves by descending gain (stable, so ties keep PRIMARY_MUTABLE order).
+    order = sorted(range(len(moves)), key=lambda i: -(probs[i + 1] - orig_p))
+    moves = [moves[i] for i in order]
+    single_probs = probs[1:][order]
 
-    # Step 1 — for each mutable feature, measure the probability gain from
-    # moving it (alone) to the high-performer cohort median.
-    gains = []
-    for feat in PRIMARY_MUTABLE:
-        if feat not in modified.index:
-            continue
-        target = float(_safe_median_get(_pp._hp_medians, feat, modified[feat]))
-        if abs(target - float(modified[feat])) < 1e-6:
-            continue
-        test = _rebuild_derived(modified.copy())
-        test[feat] = target
-        test = _rebuild_derived(test)
-        gain = _predict_proba(test) - current_p
-        gains.append((feat, gain, target))
-
-    # Step 2 — apply changes in descending order of impact until the
-    # student flips (or we run out of mutable features).
-    gains.sort(key=lambda x: -x[1])
-
-    for feat, _gain, target in gains:
-        if current_p >= 0.5:
-            break
-        old_val = float(modified[feat])
-        modified[feat] = target
-        modified = _rebuild_derived(modified)
-        current_p = _predict_proba(modified)
+    # Step 2 — search change-sets.
+    if not moves:
+        chosen, final_p = (), orig_p
+    elif mode == "beam":
+        chosen, final_p = _beam(base, moves, single_probs, beam_width)
+    else:
+        chosen, final_p = _greedy(base, moves)
+
+    changes: Dict[str, Dict[str, float]] = {}
+    for m in sorted(chosen):
+        feat, target = moves[m]
+        old_val = raw[feat]
         changes[feat] = {
             "from": round(old_val, 3),
             "to": round(float(target), 3),
             "change": round(float(target) - old_val, 3),
         }
 
-    final_p = _predict_proba(modified)
     return {
         "status": "Flip achieved" if final_p >= 0.5 else "Partial improvement",
         "original_probability": round(orig_p, 3),
         "new_probability": round(final_p, 3),
         "probability_gain": round(final_p - orig_p, 3),
         "changes_needed": changes,
-    }
\ No newline at end of file
+    }
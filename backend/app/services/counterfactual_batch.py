@@ -0,0 +1,189 @@
+"""
+Cohort-wide counterfactual batch job.
+
+Computes a counterfactual plan for every Not High Performer in
+feature_vectors and stores it in counterfactual_plans, tagged with the
+feature hash it was computed from (feature_pipeline.feature_hash) and the
+performance model's artifact version. High Performers are stored too — their
+"already classified" result is the answer the endpoint would compute — so
+every student is served from the store. The /counterfactual endpoint then
+serves the stored plan with a single indexed lookup and only recomputes when
+the student's features or the model have changed.
+
+Students are split into chunks and the chunks are spread across a process
+pool. Each worker loads the performance_predict artifacts once, in its
+initializer, and never touches MongoDB: the parent streams feature vectors
+out, collects plans back and writes each finished chunk with one bulk write.
+At most MAX_IN_FLIGHT_PER_WORKER chunks per worker are scheduled at a time,
+so a full cohort is never held in memory at once. Students whose stored plan
+already matches their current feature hash, the mode and the loaded model are
+skipped before any work is scheduled.
+
+The artifact version always comes from
+scoring_queue.artifact_version(PERFORMANCE_MODEL), both where plans are
+stamped and where they are checked, as in the /counterfactual endpoint.
+"""
+
+import os
+import time
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+from app.config.database import feature_vectors_collection
+from app.repositories import counterfactual_repository
+from app.services import feature_pipeline, scoring_queue
+
+DEFAULT_CHUNK_SIZE = 256
+
+# Chunks submitted to the pool but not yet stored, per worker.
+MAX_IN_FLIGHT_PER_WORKER = 2
+
+HIGH_PERFORMER_STATUS = "Already classified as High Performer"
+
+Chunk = List[Tuple[str, Dict[str, Any]]]
+
+
+def _init_worker() -> None:
+    """Process-pool initializer: load the model artifacts once per worker."""
+    from app.services import performance_predict
+
+    if performance_predict._calibrated_model is None:
+        performance_predict.load_artifacts()
+
+
+def _model_version() -> str:
+    """The performance model's artifact version plans are stamped and checked with."""
+    return scoring_queue.artifact_version(scoring_queue.PERFORMANCE_MODEL)
+
+
+def _plan_chunk(chunk: Chunk, mode: str) -> Dict[str, Any]:
+    """
+    Run find_counterfactual for one chunk of (academiq_user_id, features).
+
+    Runs inside a worker process, so it only returns plain data: the plans,
+    how many students were already High Performers, and how long the chunk
+    took.
+    """
+    from app.services.counterfactual import find_counterfactual
+
+    t0 = time.perf_counter()
+    version = _model_version()
+    plans, high_performers, failed = [], 0, 0
+    for user_id, feats in chunk:
+        try:
+            result = find_counterfactual(feats, mode=mode)
+        except Exception:
+            failed += 1
+            continue
+        high_performers += result["status"] == HIGH_PERFORMER_STATUS
+        plans.append({
+            "academiq_user_id": user_id,
+            "feature_hash": feature_pipeline.feature_hash(feats),
+            "mode": mode,
+            "artifact_version": version,
+            "result": result,
+        })
+    return {
+        "plans": plans,
+        "high_performers": high_performers,
+        "failed": failed,
+        "students": len(chunk),
+        "seconds": time.perf_counter() - t0,
+    }
+
+
+def _pending_chunks(mode: str, chunk_size: int, force: bool, stats: Dict[str, int]) -> Iterator[Chunk]:
+    """Stream feature vectors whose stored plan is missing or stale, in chunks."""
+    stored = {} if force else counterfactual_repository.stored_keys()
+    version = _model_version()
+    chunk: Chunk = []
+    cursor = feature_vectors_collection.find(
+        {"academiq_user_id": {"$type": "string"}},
+        {"_id": 0, "academiq_user_id": 1, "features": 1},
+    )
+    for doc in cursor:
+        feats = doc.get("features") or {}
+        if not feats:
+            continue
+        user_id = doc["academiq_user_id"]
+        if stored.get(user_id) == (feature_pipeline.feature_hash(feats), mode, version):
+            stats["unchanged"] += 1
+            continue
+        chunk.append((user_id, feats))
+        if len(chunk) >= chunk_size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+def run(
+    mode: str = "greedy",
+    chunk_size: int = DEFAULT_CHUNK_SIZE,
+    workers: Optional[int] = None,
+    force: bool = False,
+    log=print,
+) -> Dict[str, Any]:
+    """
+    Compute and store plans for every student whose plan is missing or stale.
+
+    Args:
+        mode: counterfactual search mode ("greedy" or "beam").
+        chunk_size: students per worker task / per bulk write.
+        workers: process-pool size; None uses os.cpu_count(), 0 runs the
+            chunks in this process (no pool — useful for tests and debugging).
+        force: recompute every student even if the stored plan is current.
+        log: per-chunk progress sink (print by default; None to silence).
+
+    Returns a report with throughput and per-chunk timings.
+    """
+    stats = {"unchanged": 0}
+    chunk_seconds: List[float] = []
+    totals = {"students": 0, "planned": 0, "inserted": 0, "high_performers": 0, "failed": 0}
+
+    def _store(out: Dict[str, Any]) -> None:
+        i = len(chunk_seconds)
+        totals["students"] += out["students"]
+        totals["planned"] += len(out["plans"])
+        totals["high_performers"] += out["high_performers"]
+        totals["failed"] += out["failed"]
+        totals["inserted"] += counterfactual_repository.upsert_many(out["plans"])
+        chunk_seconds.append(out["seconds"])
+        if log:
+            rate = out["students"] / out["seconds"] if out["seconds"] else 0.0
+            log(f"[chunk {i}] {out['students']} students in {out['seconds']:.2f}s ({rate:.0f}/s)")
+
+    t0 = time.perf_counter()
+    chunks = _pending_chunks(mode, chunk_size, force, stats)
+    if workers == 0:
+        _init_worker()
+        for chunk in chunks:
+            _store(_plan_chunk(chunk, mode))
+    else:
+        n_workers = workers or os.cpu_count() or 1
+        with ProcessPoolExecutor(max_workers=n_workers, initializer=_init_worker) as pool:
+            # Pull the next chunk only once one has finished.
+            in_flight = set()
+            for chunk in chunks:
+                if len(in_flight) >= MAX_IN_FLIGHT_PER_WORKER * n_workers:
+                    done, in_flight = wait(in_flight, return_when=FIRST_COMPLETED)
+                    for future in done:
+                        _store(future.result())
+                in_flight.add(pool.submit(_plan_chunk, chunk, mode))
+            for future in wait(in_flight).done:
+                _store(future.result())
+    elapsed = time.perf_counter() - t0
+
+    return {
+        "mode": mode,
+        **totals,
+        "unchanged": stats["unchanged"],
+        "chunks": len(chunk_seconds),
+        "elapsed_s": round(elapsed, 3),
+        "students_per_s": round(totals["students"] / elapsed, 1) if elapsed else 0.0,
+        "chunk_seconds": {
+            "min": round(min(chunk_seconds), 3) if chunk_seconds else 0.0,
+            "mean": round(sum(chunk_seconds) / len(chunk_seconds), 3) if chunk_seconds else 0.0,
+            "max": round(max(chunk_seconds), 3) if chunk_seconds else 0.0,
+        },
+    }
@@ -0,0 +1,204 @@
+"""
+Compaction of old student_events into daily rollups.
+
+student_events keeps one document per extension event. Most of them are
+material views, grade-page views and bare page views, which only say that
+the student was active, and nothing needs them one by one once they are
+old. compact() folds events older than EVENT_ROLLUP_AFTER_DAYS (whole UTC
+days) into one rollup per (student, course, day, action_type, page_type),
+stored by event_rollup_repository. A rollup keeps the count and the first
+and last timestamps. That is what the timeline's items, summary counts and
+inactivity gaps need: timeline_service and event_repository.list_for_user
+merge rollups with the raw events, and timeline_store re-derives a built
+student's items after they are compacted.
+
+Events whose timeline item carries its own information are never compacted:
+submissions (late or not) and quiz attempts (with their score).
+
+Each student is compacted in one run:
+
+  1. begin: move the student's watermark to the cutoff, and mark the run pending
+  2. fold the raw events below the cutoff into the rollups ($inc, one bulk write)
+  3. delete those raw events
+  4. finish: clear the pending run
+
+Ingest drops re-synced copies of compacted events (drop_compacted), so
+they are not counted twice. Every rollup update also records the run, so a
+run that died between steps 2 and 4 is resumed exactly. Its rollups that
+already hold the counts are skipped, and the leftover events are just
+deleted.
+"""
+
+from __future__ import annotations
+
+import logging
+import time
+from datetime import datetime, timedelta
+from typing import Any, Iterable
+
+import bson
+from bson import ObjectId
+from pymongo import ASCENDING, UpdateOne
+
+from app.config.database import student_events_collection
+from app.config.settings import EVENT_ROLLUP_AFTER_DAYS
+from app.repositories import event_rollup_repository
+from app.services import timeline_service, timeline_store
+
+logger = logging.getLogger(__name__)
+
+# Timeline item types of the events folded into rollups, besides the events
+# with no item at all (e.g. dashboard views).
+COMPACTED_TYPES = ("material_view", "grade_update")
+
+_DAY_MS = 86_400_000
+_BATCH = 1000
+
+def compactable(ev: dict[str, Any]) -> bool:
+    """Whether an event with a numeric timestamp only counts as activity once rolled up."""
+    if not isinstance(ev.get("timestamp"), (int, float)):
+        return False
+    item = timeline_service.safe_event_item(ev)
+    return item is None or item["type"] in COMPACTED_TYPES
+
+
+def horizon_ms(now: datetime | None = None) -> int:
+    """Start of the UTC day EVENT_ROLLUP_AFTER_DAYS ago: nothing newer is ever compacted."""
+    ms = timeline_service.to_ms((now or datetime.utcnow()) - timedelta(days=EVENT_ROLLUP_AFTER_DAYS), ceil=False)
+    return ms - ms % _DAY_MS
+
+
+# ── Ingest guard ───────────────────────────────────────────────────────────────
+
+def needs_watermark(events: Iterable[dict[str, Any]], now: datetime | None = None) -> bool:
+    """Whether any event is old enough that a compaction may have covered it."""
+    horizon = horizon_ms(now)
+    return any(isinstance(ev.get("timestamp"), (int, float)) and ev["timestamp"] < horizon for ev in events or [])
+
+
+def drop_compacted(
+    academiq_user_id: str,
+    events: list[dict[str, Any]],
+    marks: dict[str, int] | None = None,
+) -> list[dict[str, Any]]:
+    """
+    `events` without the compactable ones below the student's watermark,
+    which their rollups already count. `marks` are the watermarks for batched
+    writers (event_rollup_repository.watermarks); without them, the
+    watermark is read only when an event is older than the horizon.
+    """
+    if marks is None:
+        if not needs_watermark(events):
+            return events
+        marks = event_rollup_repository.watermarks([str(academiq_user_id)])
+    before = marks.get(str(academiq_user_id))
+    if before is None:
+        return events
+    return [ev for ev in events if not (compactable(ev) and ev["timestamp"] < before)]
+
+
+# ── The job ────────────────────────────────────────────────────────────────────
+
+def compact(user_ids: Iterable[str] | None = None, before: datetime | None = None) -> dict[str, Any]:
+    """
+    Compact every student with events older than the cutoff (or just
+    `user_ids`). The cutoff is the horizon, or `before` rounded down to a UTC
+    day if that is earlier.
+
+    Returns {students, events, rollups, bytes_removed, bytes_added, failed, took_s}.
+    The byte counts are BSON document sizes; indexes shrink too.
+    """
+    t0 = time.perf_counter()
+    cutoff = horizon_ms()
+    if before is not None:
+        ms = timeline_service.to_ms(timeline_service.naive_utc(before), ceil=False)
+        cutoff = min(cutoff, ms - ms % _DAY_MS)
+    if user_ids is None:
+        user_ids = sorted(str(u) for u in student_events_collection.distinct(
+            "academiq_user_id", {"timestamp": {"$type": "number", "$lt": cutoff}},
+        ) if u)
+
+    report = {"students": 0, "events": 0, "rollups": 0, "bytes_removed": 0, "bytes_added": 0, "failed": []}
+    for uid in user_ids:
+        try:
+            done = compact_user(uid, cutoff)
+        except Exception:
+            logger.exception("event compaction: failed for %s", uid)
+            report["failed"].append(uid)
+            continue
+        report["students"] += 1
+        for key in ("events", "rollups", "bytes_removed", "bytes_added"):
+            report[key] += done[key]
+    report["took_s"] = round(time.perf_counter() - t0, 2)
+    return report
+
+
+def compact_user(academiq_user_id: str, before_ms: int) -> dict[str, int]:
+    """
+    Fold one student's compactable events older than `before_ms` into
+    rollups, finishing a pending run first. Returns {events, rollups,
+    bytes_removed, bytes_added}.
+    """
+    uid = str(academiq_user_id)
+    totals = {"events": 0, "rollups": 0, "bytes_removed": 0, "bytes_added": 0}
+    pending = event_rollup_repository.get_state(uid).get("pending")
+    runs = [(pending["run"], pending["before"])] if pending else []
+    runs.append((str(ObjectId()), before_ms))
+    for run, cutoff in runs:
+        for key, n in _run(uid, run, cutoff).items():
+            totals[key] += n
+    if totals["events"]:
+        timeline_store.refresh_events(uid)
+    return totals
+
+
+def _run(uid: str, run: str, before_ms: int) -> dict[str, int]:
+    event_rollup_repository.begin(uid, run, before_ms)
+
+    groups: dict[str, dict[str, Any]] = {}
+    ids: list[Any] = []
+    removed = 0
+    events = student_events_collection.find(
+        {"academiq_user_id": uid, "timestamp": {"$type": "number", "$lt": before_ms}}
+    ).sort("timestamp", ASCENDING)
+    for ev in events:
+        if not compactable(ev):
+            continue
+        course, day = str(ev.get("course_id") or ""), int(ev["timestamp"] // _DAY_MS)
+        action, page = (ev.get("action_type") or "").lower(), (ev.get("page_type") or "").lower()
+        key = event_rollup_repository.rollup_id(uid, course, day, action, page)
+        group = groups.setdefault(key, {
+            "academiq_user_id": uid, "course_id": course, "day": day,
+            "action_type": action, "page_type": page,
+            "count": 0, "first": ev["timestamp"], "last": ev["timestamp"],
+        })
+        group["count"] += 1
+        group["last"] = ev["timestamp"]
+        ids.append(ev["_id"])
+        removed += len(bson.encode(ev))
+
+    # A resumed run skips the rollups that already hold its counts.
+    skip = event_rollup_repository.done(groups, run) if groups else set()
+    ops = [
+        UpdateOne(
+            {"_id": key},
+            {
+                "$inc": {"count": g["count"]},
+                "$min": {"first": g["first"]},
+                "$max": {"last": g["last"]},
+                "$set": {"run": run},
+                "$setOnInsert": {k: g[k] for k in ("academiq_user_id", "course_id", "day", "action_type", "page_type")},
+            },
+            upsert=True,
+        )
+        for key, g in groups.items() if key not in skip
+    ]
+    upserted = getattr(event_rollup_repository.apply(ops), "upserted_ids", None) or {}
+    for i in range(0, len(ids), _BATCH):
+        student_events_collection.delete_many({"_id": {"$in": ids[i:i + _BATCH]}})
+    event_rollup_repository.finish(uid)
+
+    new = [ops[i]._filter["_id"] for i in upserted]
+    added = sum(len(bson.encode({"_id": key, **groups[key], "run": run})) for key in new)
+    return {"events": len(ids), "rollups": len(ops), "bytes_removed": removed, "bytes_added": added}
+
@@ -0,0 +1,109 @@
+"""
+Periodic removal of expired sessions, password-reset and magic-link tokens.
+
+The read paths never delete: session validation and token consumption only
+match unexpired documents. The TTL indexes created by
+database.ensure_indexes remove expired ones server-side. This sweeper is the
+backstop for backends without TTL support (mongomock, some
+Mongo-compatible services), and for deployments where the TTL monitor lags
+behind a burst.
+
+Every EXPIRY_SWEEP_INTERVAL_SECONDS a daemon thread deletes documents whose
+expires_at has passed, EXPIRY_SWEEP_BATCH_SIZE at a time: it reads a batch of
+_ids through the expires_at index, then runs one delete_many per batch. A
+large backlog is cleared in bounded steps and never as one long write.
+"""
+
+import logging
+import threading
+import time
+from datetime import datetime
+from typing import Any, Dict, Optional
+
+from app.config.database import (
+    auth_sessions_collection,
+    magic_link_tokens_collection,
+    password_reset_tokens_collection,
+)
+from app.config.settings import EXPIRY_SWEEP_BATCH_SIZE, EXPIRY_SWEEP_INTERVAL_SECONDS
+
+logger = logging.getLogger(__name__)
+
+COLLECTIONS = {
+    "sessions": lambda: auth_sessions_collection,
+    "password_reset_tokens": lambda: password_reset_tokens_collection,
+    "magic_link_tokens": lambda: magic_link_tokens_collection,
+}
+
+_lock = threading.Lock()
+_thread: Optional[threading.Thread] = None
+_totals: Dict[str, int] = {name: 0 for name in COLLECTIONS}
+_last: Dict[str, Any] = {"at": None, "deleted": None, "ms": None, "error": None}
+
+
+def sweep_collection(collection: Any, now: Optional[datetime] = None,
+                     batch_size: Optional[int] = None) -> int:
+    """Delete every document of `collection` expired at `now`, in batches."""
+    now = now or datetime.utcnow()
+    batch_size = max(1, batch_size or EXPIRY_SWEEP_BATCH_SIZE)
+    deleted = 0
+    while True:
+        ids = [
+            d["_id"]
+            for d in collection.find({"expires_at": {"$lt": now}}, {"_id": 1}).limit(batch_size)
+        ]
+        if not ids:
+            return deleted
+        deleted += collection.delete_many({"_id": {"$in": ids}}).deleted_count
+        if len(ids) < batch_size:
+            return deleted
+
+
+def sweep(now: Optional[datetime] = None, batch_size: Optional[int] = None) -> Dict[str, int]:
+    """One pass over every expiring collection. Returns {collection: deleted}."""
+    t0 = time.perf_counter()
+    deleted = {name: sweep_collection(get(), now, batch_size) for name, get in COLLECTIONS.items()}
+    with _lock:
+        for name, n in deleted.items():
+            _totals[name] += n
+        _last.update(at=datetime.utcnow().isoformat(), deleted=deleted,
+                     ms=round((time.perf_counter() - t0) * 1000, 1), error=None)
+    return deleted
+
+
+def _run() -> None:
+    while True:
+        try:
+            sweep()
+        except Exception as exc:
+            with _lock:
+                _last["error"] = str(exc)
+            logger.warning("Expiry sweep failed: %s", exc)
+        time.sleep(EXPIRY_SWEEP_INTERVAL_SECONDS)
+
+
+def start() -> bool:
+    """Start the sweeper thread once per process (app startup). False if disabled."""
+    global _thread
+    if EXPIRY_SWEEP_INTERVAL_SECONDS <= 0:
+        return False
+    with _lock:
+        if _thread is None:
+            _thread = threading.Thread(target=_run, name="expiry-sweeper", daemon=True)
+            _thread.start()
+    return True
+
+
+def stats() -> Dict[str, Any]:
+    """Last pass and running totals for /api/system/status."""
+    with _lock:
+        return {
+            "running": _thread is not None,
+            "interval_s": EXPIRY_SWEEP_INTERVAL_SECONDS,
+            "batch_size": EXPIRY_SWEEP_BATCH_SIZE,
+            "last_sweep_at": _last["at"],
+            "last_deleted": _last["deleted"],
+            "last_sweep_ms": _last["ms"],
+            "last_error": _last["error"],
+            "total_deleted": dict(_totals),
+        }
@@ -0,0 +1,283 @@
+"""
+Shared, NumPy-only feature engineering for every behavioural model.
+
+All three models start from the same raw feature vector (feature_vectors.
+features) but each derives its own extra columns:
+
+    performance  clicks_per_day = clicks / (days + 1), time_per_click,
+                 engagement_consistency, behavioral_risk_score, *_relative
+    burnout      per-day rates (0 when days == 0), late_ratio, *_performance,
+                 then log1p on `log_cols` and a clip on procrastination_index
+    risk/grade   clicks_per_day (0 when days == 0), log1p, clip
+
+Instead of rebuilding a dict / pd.Series per student, callers build ONE
+float64 matrix of raw features in RAW_COLUMNS order (`raw_matrix`) and hand
+it to a compiled `FeaturePipeline`. Compiling resolves every column name to
+an index once, so transforming a cohort is a handful of vectorised column
+operations regardless of how many rows there are.
+"""
+
+import hashlib
+from typing import Any, Callable, Dict, Iterable, List, NamedTuple, Optional, Sequence, Tuple
+
+import numpy as np
+
+# Canonical raw-feature layout. Index map is precomputed so services never do
+# per-key lookups on the hot path.
+RAW_COLUMNS = [
+    "all_clicks", "active_days", "access_frequency", "material_clicks",
+    "quiz_attempts", "assignment_submissions", "total_time_spent",
+    "procrastination_index", "late_submission_count",
+    "avg_quiz_score", "avg_assignment_score",
+]
+RAW_INDEX: Dict[str, int] = {c: i for i, c in enumerate(RAW_COLUMNS)}
+
+# The nine behavioural inputs of the performance model (and the counterfactual
+# engine's mutable features).
+PERFORMANCE_RAW = RAW_COLUMNS[:9]
+
+Derive = Callable[[np.ndarray, Dict[str, int]], None]
+
+
+def _cell(value: Any) -> float:
+    """One raw value as a float, NaN when missing / None / empty."""
+    return np.nan if value is None or value == "" else float(value)
+
+
+def raw_matrix(rows: Iterable[Dict[str, Any]], strict: bool = False) -> np.ndarray:
+    """
+    Stack feature dicts into an (n, len(RAW_COLUMNS)) float64 matrix.
+
+    Missing / None / empty values become 0.0 (what burnout_service and
+    risk_grade_service always did with `float(x or 0)`). With `strict=True`,
+    a missing, None or empty performance input raises instead —
+    predict_performance has always rejected incomplete vectors. A value
+    float() can't read raises ValueError.
+    """
+    table = [[row.get(c) for c in RAW_COLUMNS] for row in rows]
+    if not table:
+        return np.zeros((0, len(RAW_COLUMNS)))
+    try:
+        R = np.array(table, dtype=float)
+    except (TypeError, ValueError):
+        # An empty string somewhere (numpy won't read ""): one cell at a time.
+        R = np.array([[_cell(v) for v in row] for row in table], dtype=float)
+    if strict:
+        bad = np.isnan(R[:, : len(PERFORMANCE_RAW)])
+        if bad.any():
+            i, j = np.argwhere(bad)[0]
+            raise ValueError(f"Missing or null feature {PERFORMANCE_RAW[j]!r} for row {i}")
+    R[np.isnan(R)] = 0.0
+    return R
+
+
+def readable_raw_matrix(rows: Sequence[Any]) -> Tuple[np.ndarray, List[int]]:
+    """
+    raw_matrix of the rows it can read, and their positions in `rows`.
+
+    A row raw_matrix rejects (a value float() can't read, or not a dict at
+    all) is left out, so one malformed vector can't fail a whole cohort.
+    """
+    try:
+        return raw_matrix(rows), list(range(len(rows)))
+    except (AttributeError, TypeError, ValueError):
+        pass
+    kept, parts = [], []
+    for i, row in enumerate(rows):
+        try:
+            parts.append(raw_matrix([row]))
+        except (AttributeError, TypeError, ValueError):
+            continue
+        kept.append(i)
+    if not parts:
+        return np.zeros((0, len(RAW_COLUMNS))), []
+    return np.vstack(parts), kept
+
+
+def feature_hash(row: Dict[str, Any], columns: Sequence[str] = PERFORMANCE_RAW) -> str:
+    """
+    Stable hash of `columns` in a feature dict, normalised like raw_matrix
+    (missing / None -> 0.0, ints and floats hash alike), so a result stored
+    under it stays valid exactly as long as the model inputs are unchanged.
+    """
+    raw = ",".join(repr(float(row.get(c) or 0.0)) for c in columns)
+    return hashlib.sha1(raw.encode()).hexdigest()
+
+
+class Ratio(NamedTuple):
+    """
+    out = num / (den / den_div + den_offset).
+
+    `den=None` divides by the constant `den_offset`; `safe=True` yields 0 where
+    the denominator is <= 0 (the `x / y if y > 0 else 0.0` idiom).
+    """
+    out: str
+    num: str
+    den: Optional[str]
+    den_div: float = 1.0
+    den_offset: float = 0.0
+    safe: bool = False
+
+
+class _RatioGroup:
+    """Ratios of one kind, compiled to index arrays so a group is one divide."""
+
+    def __init__(self, ratios: List[Ratio], index: Dict[str, int]):
+        self.out = np.array([index[r.out] for r in ratios], dtype=np.intp)
+        self.num = np.array([index[r.num] for r in ratios], dtype=np.intp)
+        self.const = ratios[0].den is None
+        self.den = None if self.const else np.array([index[r.den] for r in ratios], dtype=np.intp)
+        self.div = np.array([r.den_div for r in ratios])
+        self.offset = np.array([r.den_offset for r in ratios])
+        self.safe = ratios[0].safe
+
+    def apply(self, W: np.ndarray) -> None:
+        if self.const:
+            W[:, self.out] = W[:, self.num] / self.offset
+            return
+        den = W[:, self.den] / self.div + self.offset
+        if self.safe:
+            res = np.zeros_like(den)
+            np.divide(W[:, self.num], den, out=res, where=den > 0)
+        else:
+            res = W[:, self.num] / den
+        W[:, self.out] = res
+
+
+class FeaturePipeline:
+    """
+    A compiled plan that turns a raw matrix into one model's input matrix.
+
+    Steps, in order, all on the work matrix W (raw columns + derived columns):
+      1. `pct_columns` — 0-1 fractions scaled to 0-100, other values kept
+      2. `ratios`      — grouped divides, see Ratio
+      3. `derive(W, index)` — any remaining derived columns, in place
+    The model matrix is then gathered in `output_columns` order with one fancy
+    index, and the optional log1p / clip steps are applied to it in place.
+    Every column name is resolved to an index at compile time.
+    """
+
+    def __init__(
+        self,
+        output_columns: Sequence[str],
+        derive: Optional[Derive] = None,
+        derived_columns: Sequence[str] = (),
+        ratios: Sequence[Ratio] = (),
+        pct_columns: Sequence[str] = (),
+        log_columns: Sequence[str] = (),
+        clip: Optional[Tuple[str, float, float]] = None,
+    ):
+        self.output_columns = list(output_columns)
+        extra = [r.out for r in ratios] + list(derived_columns) + self.output_columns
+        self.columns = RAW_COLUMNS + list(dict.fromkeys(c for c in extra if c not in RAW_INDEX))
+        self.index = {c: i for i, c in enumerate(self.columns)}
+        self._derive = derive
+        self._pct_idx = np.array([self.index[c] for c in pct_columns], dtype=np.intp)
+        kinds: Dict[Tuple[bool, bool], List[Ratio]] = {}
+        for r in ratios:
+            kinds.setdefault((r.den is None, r.safe), []).append(r)
+        self._ratio_groups = [_RatioGroup(group, self.index) for group in kinds.values()]
+        self._out_idx = np.array([self.index[c] for c in self.output_columns], dtype=np.intp)
+        out_pos = {c: i for i, c in enumerate(self.output_columns)}
+        self._log_idx = np.array([out_pos[c] for c in log_columns if c in out_pos], dtype=np.intp)
+        self._clip = (out_pos[clip[0]], float(clip[1]), float(clip[2])) if clip and clip[0] in out_pos else None
+
+    def transform(self, R: np.ndarray) -> np.ndarray:
+        """Raw matrix (RAW_COLUMNS order) -> model input matrix (output_columns order)."""
+        n = R.shape[0]
+        W = np.empty((n, len(self.columns)))
+        W[:, : len(RAW_COLUMNS)] = R
+        if self._pct_idx.size:
+            # live feature vectors store scores as 0-1; the models trained on 0-100.
+            P = W[:, self._pct_idx]
+            W[:, self._pct_idx] = np.where((P >= 0) & (P <= 1), P * 100, P)
+        for group in self._ratio_groups:
+            group.apply(W)
+        if self._derive is not None:
+            self._derive(W, self.index)
+        X = W[:, self._out_idx]
+        if self._log_idx.size:
+            X[:, self._log_idx] = np.log1p(X[:, self._log_idx])
+        if self._clip is not None:
+            j, lo, hi = self._clip
+            np.clip(X[:, j], lo, hi, out=X[:, j])
+        return X
+
+    def transform_rows(self, rows: List[Dict[str, Any]]) -> np.ndarray:
+        return self.transform(raw_matrix(rows))
+
+
+# ── Performance model ─────────────────────────────────────────────────────────
+
+def performance_pipeline(behavioral_features: Sequence[str], train_medians: Any) -> FeaturePipeline:
+    """
+    Derived features exactly as in the v4 notebook. The former row-wise
+    implementation is kept as the parity reference in tests/feature_reference.py.
+    """
+    def median(col: str) -> float:
+        return float(train_medians.get(col, 1)) if train_medians is not None else 1.0
+
+    ratios = [
+        Ratio("clicks_per_day", "all_clicks", "active_days", den_offset=1),
+        Ratio("time_per_click", "total_time_spent", "all_clicks", den_offset=1),
+        Ratio("engagement_consistency", "active_days", "total_time_spent", den_div=60, den_offset=1),
+    ] + [
+        Ratio(f"{col}_relative", col, None, den_offset=median(col) + 1)
+        for col in ("all_clicks", "total_time_spent", "active_days")
+    ]
+
+    def derive(W: np.ndarray, ix: Dict[str, int]) -> None:
+        W[:, ix["behavioral_risk_score"]] = (
+            np.maximum(W[:, ix["procrastination_index"]], 0) * 0.6
+            + W[:, ix["late_submission_count"]] * 10 * 0.4
+        )
+
+    return FeaturePipeline(
+        behavioral_features, derive,
+        derived_columns=["behavioral_risk_score"],
+        ratios=ratios,
+    )
+
+
+# ── Burnout model ─────────────────────────────────────────────────────────────
+
+def burnout_pipeline(bundle: Dict[str, Any]) -> FeaturePipeline:
+    """Pipeline for the burnout XGBoost bundle (feature_cols, log_cols, proc_clip)."""
+    ratios = [
+        Ratio("clicks_per_day", "all_clicks", "active_days", safe=True),
+        Ratio("time_per_day", "total_time_spent", "active_days", safe=True),
+        Ratio("time_per_click", "total_time_spent", "all_clicks", safe=True),
+        Ratio("material_intensity", "material_clicks", "active_days", safe=True),
+        Ratio("quiz_rate", "quiz_attempts", "active_days", safe=True),
+        Ratio("late_ratio", "late_submission_count", "assignment_submissions", safe=True),
+    ]
+
+    def derive(W: np.ndarray, ix: Dict[str, int]) -> None:
+        W[:, ix["quiz_performance"]] = W[:, ix["avg_quiz_score"]] * np.log1p(W[:, ix["quiz_attempts"]])
+        W[:, ix["assignment_performance"]] = (
+            W[:, ix["avg_assignment_score"]] * np.log1p(W[:, ix["assignment_submissions"]])
+        )
+
+    lo, hi = bundle["proc_clip"]
+    return FeaturePipeline(
+        bundle["feature_cols"], derive,
+        derived_columns=["quiz_performance", "assignment_performance"],
+        ratios=ratios,
+        pct_columns=["avg_quiz_score", "avg_assignment_score"],
+        log_columns=bundle["log_cols"],
+        clip=("procrastination_index", lo, hi),
+    )
+
+
+# ── Risk cluster / grade model ────────────────────────────────────────────────
+
+def risk_grade_pipeline(bundle: Dict[str, Any]) -> FeaturePipeline:
+    """Pipeline for the clustering + grade bundle (feature_cols, log_cols, proc_clip)."""
+    lo, hi = bundle["proc_clip"]
+    return FeaturePipeline(
+        bundle["feature_cols"],
+        ratios=[Ratio("clicks_per_day", "all_clicks", "active_days", safe=True)],
+        pct_columns=["avg_quiz_score", "avg_assignment_score"],
+        log_columns=bundle["log_cols"],
+        clip=("procrastination_index", lo, hi),
+    )
@@ -0,0 +1,85 @@
+"""
+Bounded executor for model inference.
+
+Sync route handlers run in Starlette's threadpool (40 threads) and ingest-time
+scoring in its own workers, so without a bound a burst of requests could run
+dozens of LightGBM / XGBoost / TensorFlow predictions at once — each of which
+is already multi-threaded — and every request would slow down together.
+
+Every model call goes through this module instead: `call` from sync code,
+`run` from coroutines. Both execute on one shared pool of INFERENCE_WORKERS
+threads; callers beyond that wait their turn. A model call made from inside
+the pool (e.g. the counterfactual search calling the performance model) runs
+inline rather than queueing behind itself.
+
+Queue wait and run time are tracked for /api/system/status (stats()).
+"""
+
+import asyncio
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict
+
+from app.config.settings import INFERENCE_WORKERS
+
+_executor = ThreadPoolExecutor(max_workers=INFERENCE_WORKERS, thread_name_prefix="inference")
+_local = threading.local()
+_lock = threading.Lock()
+_counters = {"calls": 0, "inline": 0, "waiting": 0, "running": 0, "wait_ms": 0.0, "run_ms": 0.0, "max_wait_ms": 0.0}
+
+
+def _execute(fn: Callable[..., Any], args: tuple, kwargs: dict, submitted: float) -> Any:
+    started = time.perf_counter()
+    wait_ms = (started - submitted) * 1000
+    with _lock:
+        _counters["waiting"] -= 1
+        _counters["running"] += 1
+        _counters["wait_ms"] += wait_ms
+        _counters["max_wait_ms"] = max(_counters["max_wait_ms"], wait_ms)
+    _local.inside = True
+    try:
+        return fn(*args, **kwargs)
+    finally:
+        _local.inside = False
+        with _lock:
+            _counters["running"] -= 1
+            _counters["run_ms"] += (time.perf_counter() - started) * 1000
+
+
+def _submit(fn: Callable[..., Any], args: tuple, kwargs: dict):
+    with _lock:
+        _counters["calls"] += 1
+        _counters["waiting"] += 1
+    return _executor.submit(_execute, fn, args, kwargs, time.perf_counter())
+
+
+def call(fn: Callable[..., Any], *args: Any, **kwargs: Any) -> Any:
+    """Run `fn` on the inference pool and block until it returns."""
+    if getattr(_local, "inside", False):
+        with _lock:
+            _counters["inline"] += 1
+        return fn(*args, **kwargs)
+    return _submit(fn, args, kwargs).result()
+
+
+async def run(fn: Callable[..., Any], *args: Any, **kwargs: Any) -> Any:
+    """Await `fn` on the inference pool without blocking the event loop."""
+    return await asyncio.wrap_future(_submit(fn, args, kwargs))
+
+
+def stats() -> Dict[str, Any]:
+    """Pool size, occupancy and queue-wait figures for /api/system/status."""
+    with _lock:
+        c = dict(_counters)
+    pooled = c["calls"]
+    return {
+        "workers": INFERENCE_WORKERS,
+        "running": c["running"],
+        "waiting": c["waiting"],
+        "calls": pooled,
+        "inline_calls": c["inline"],
+        "avg_wait_ms": round(c["wait_ms"] / pooled, 3) if pooled else 0.0,
+        "max_wait_ms": round(c["max_wait_ms"], 3),
+        "avg_run_ms": round(c["run_ms"] / pooled, 3) if pooled else 0.0,
+    }
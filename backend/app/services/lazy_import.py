@@ -0,0 +1,123 @@
+"""
+Deferred imports for the heavy ML / document stacks.
+
+Importing performance_predict pulls in pandas, joblib, scikit-learn,
+LightGBM and SHAP and loads six artifacts. grade_risk_predict pulls in
+TensorFlow, and the quiz generator pulls in nltk, PyPDF2 and python-pptx.
+When routes imported them at module level, a fresh container spent seconds
+before /health could answer.
+
+Routes hold a proxy instead:
+
+    performance_predict = lazy_import.module("app.services.performance_predict")
+    ...
+    performance_predict.predict_performance(features)   # imported here, once
+
+The first attribute access imports the real module (thread-safe, once per
+process) and records the time it took. Import errors surface on that access,
+as they would have at import time, and the route's usual error handling
+applies.
+
+main.py calls start_warm_up() from the startup hook. A daemon thread imports
+every registered proxy, then runs model_registry.warm_up(), so the first
+request usually finds everything loaded while /health answers at once.
+Progress is reported as the "ml_warm_up" component of system_registry, and
+stats() lists per-module import state and times.
+"""
+
+import importlib
+import threading
+import time
+from types import ModuleType
+from typing import Any, Callable, Dict, Optional
+
+from app.config.system_registry import mark_component
+
+_lock = threading.Lock()
+_proxies: Dict[str, "LazyModule"] = {}
+_warm_thread: Optional[threading.Thread] = None
+
+
+class LazyModule:
+    """Stands in for a module until an attribute is first used."""
+
+    def __init__(self, name: str):
+        self._name = name
+        self._module: Optional[ModuleType] = None
+        self._lock = threading.Lock()
+        self.import_ms: Optional[float] = None
+        self.error: Optional[str] = None
+
+    @property
+    def loaded(self) -> bool:
+        return self._module is not None
+
+    def load(self) -> ModuleType:
+        if self._module is None:
+            with self._lock:
+                if self._module is None:
+                    t0 = time.perf_counter()
+                    try:
+                        module = importlib.import_module(self._name)
+                    except Exception as exc:
+                        self.error = str(exc)
+                        raise
+                    finally:
+                        self.import_ms = round((time.perf_counter() - t0) * 1000, 1)
+                    self.error = None
+                    self._module = module
+        return self._module
+
+    def __getattr__(self, attr: str) -> Any:
+        return getattr(self.load(), attr)
+
+    def __repr__(self) -> str:
+        return f"<lazy module {self._name!r} ({'loaded' if self.loaded else 'not loaded'})>"
+
+
+def module(name: str) -> LazyModule:
+    """The (shared) proxy for module `name`."""
+    with _lock:
+        if name not in _proxies:
+            _proxies[name] = LazyModule(name)
+        return _proxies[name]
+
+
+def _warm_up(then: Optional[Callable[[], Any]]) -> None:
+    mark_component("ml_warm_up", False, "Warm-up running: importing ML modules.")
+    t0 = time.perf_counter()
+    failed = []
+    for name, proxy in list(_proxies.items()):
+        try:
+            proxy.load()
+        except Exception:
+            failed.append(name)
+    if then is not None:
+        try:
+            then()
+        except Exception as exc:
+            failed.append(f"warm-up predictions ({exc})")
+    took = time.perf_counter() - t0
+    details = f"Warm-up finished in {took:.1f}s."
+    if failed:
+        details += f" Unavailable: {', '.join(failed)}."
+    mark_component("ml_warm_up", True, details)
+
+
+def start_warm_up(then: Optional[Callable[[], Any]] = None) -> threading.Thread:
+    """Import every registered proxy (then call `then`) on a daemon thread."""
+    global _warm_thread
+    with _lock:
+        if _warm_thread is None or not _warm_thread.is_alive():
+            _warm_thread = threading.Thread(target=_warm_up, args=(then,), name="ml-warm-up", daemon=True)
+            _warm_thread.start()
+        return _warm_thread
+
+
+def stats() -> Dict[str, Any]:
+    with _lock:
+        proxies = dict(_proxies)
+    return {
+        name: {"loaded": p.loaded, "import_ms": p.import_ms, "error": p.error}
+        for name, p in proxies.items()
+    }
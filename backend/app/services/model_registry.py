@@ -0,0 +1,229 @@
+"""
+Process-wide registry of model artifacts: load once, share across workers.
+
+Every uvicorn / gunicorn worker used to joblib.load its own copy of each
+artifact: the six performance_model pickles, the burnout bundle and the
+risk/grade bundle. It also paid the unpickling time on its own cold start.
+The services now load through here:
+
+    load(path)      the object in `path`, loaded at most once per process
+
+Sharing
+    The first load of a pickle also writes an uncompressed joblib copy under
+    MODEL_COMPACT_DIR (keyed by the source file's size and mtime). Later
+    loads, in this process or any other, read that copy with
+    mmap_mode="r". Its NumPy arrays (tree tables of the SHAP explainer,
+    scaler / k-means parameters) are then read-only views of one file, so
+    every worker on the host shares the same page-cache pages instead of
+    holding private copies. When the compact copy can't be written (a
+    read-only image), the original pickle is used unchanged.
+
+    Booster internals (LightGBM / XGBoost) live in C++ memory that neither
+    mmap nor native model files can share. For those, preload() loads
+    everything in the parent before workers fork (gunicorn --preload, or
+    any server that imports the app first) and freezes the GC, so forked
+    workers keep the parent's pages copy-on-write instead of touching them.
+
+Reporting
+    stats() gives this worker's pid, RSS / PSS with the private and shared
+    parts, per-artifact cold-load time and source, and the warm-up result;
+    it appears under "model_registry" in /api/system/status.
+
+Warm-up
+    warm_up() runs one dummy prediction through each available model, so
+    lazy initialisation (bundle loads, compiled feature pipelines, the
+    numba-jitted SHAP link) happens before the first request needs it.
+    main.py runs it on the lazy_import warm-up thread at startup.
+"""
+
+import gc
+import os
+import threading
+import time
+from typing import Any, Callable, Dict, List, Optional
+
+from app.config.settings import MODEL_COMPACT_DIR, MODEL_MMAP
+
+_lock = threading.Lock()
+_objects: Dict[str, Any] = {}
+_loads: Dict[str, Dict[str, Any]] = {}
+_warm_up: Optional[Dict[str, Any]] = None
+_preloaded = False
+
+
+# ── Loading ────────────────────────────────────────────────────────────────────
+
+def _compact_path(path: str) -> str:
+    from app.services.prediction_cache import artifact_version
+
+    stem = os.path.basename(os.path.dirname(path)).replace(" ", "_")
+    return os.path.join(MODEL_COMPACT_DIR, f"{stem}-{artifact_version(path)}-{os.path.basename(path)}")
+
+
+def _load_file(path: str) -> Dict[str, Any]:
+    import joblib
+
+    if MODEL_MMAP:
+        compact = _compact_path(path)
+        if os.path.exists(compact):
+            try:
+                return {"object": joblib.load(compact, mmap_mode="r"), "source": "mmap"}
+            except Exception as exc:
+                print(f"[WARN] compact artifact {compact} unreadable, using the original: {exc}")
+    obj = joblib.load(path)
+    source = "pickle"
+    if MODEL_MMAP:
+        try:
+            os.makedirs(MODEL_COMPACT_DIR, exist_ok=True)
+            tmp = f"{compact}.{os.getpid()}.tmp"
+            joblib.dump(obj, tmp, compress=0)
+            os.replace(tmp, compact)
+            source = "pickle (compact copy written)"
+        except Exception as exc:
+            print(f"[INFO] could not write compact artifact for {path}: {exc}")
+    return {"object": obj, "source": source}
+
+
+def load(path: str) -> Any:
+    """The artifact in `path`; loaded (and timed) only on the first call per process."""
+    path = os.path.abspath(path)
+    with _lock:
+        if path in _objects:
+            return _objects[path]
+        if not os.path.exists(path):
+            raise FileNotFoundError(f"Missing artifact: {path}")
+        t0 = time.perf_counter()
+        loaded = _load_file(path)
+        _objects[path] = loaded["object"]
+        _loads[path] = {
+            "ms": round((time.perf_counter() - t0) * 1000, 1),
+            "source": loaded["source"],
+            "bytes": os.path.getsize(path),
+        }
+        return _objects[path]
+
+
+def forget(path: Optional[str] = None) -> None:
+    """Drop one loaded artifact (or all), e.g. after the file was replaced."""
+    with _lock:
+        if path is None:
+            _objects.clear()
+            _loads.clear()
+        else:
+            _objects.pop(os.path.abspath(path), None)
+            _loads.pop(os.path.abspath(path), None)
+
+
+# ── Preload / warm-up ─────────────────────────────────────────────────────────
+
+def _services() -> List[Any]:
+    import importlib
+
+    services = []
+    for name in ("performance_predict", "burnout_service", "risk_grade_service"):
+        try:
+            services.append(importlib.import_module(f"app.services.{name}"))
+        except Exception as exc:
+            print(f"[INFO] {name} unavailable for preload: {exc}")
+    return services
+
+
+def preload() -> None:
+    """Load every model in this (parent) process and freeze the GC so forked
+    workers share the pages copy-on-write."""
+    global _preloaded
+    for service in _services():
+        try:
+            if hasattr(service, "available"):
+                service.available()
+            elif getattr(service, "_calibrated_model", None) is None:
+                service.load_artifacts()
+        except Exception as exc:
+            print(f"[INFO] preload of {service.__name__} failed: {exc}")
+    gc.collect()
+    gc.freeze()
+    _preloaded = True
+
+
+def _dummy_features() -> Dict[str, Any]:
+    from app.services import feature_pipeline
+
+    feats = {col: 1.0 for col in feature_pipeline.RAW_COLUMNS}
+    feats.update({"avg_quiz_score": 0.5, "avg_assignment_score": 0.5, "procrastination_index": 0.0})
+    return feats
+
+
+def _timed(fn: Callable[[], Any]) -> Any:
+    t0 = time.perf_counter()
+    try:
+        ok = fn() is not None
+    except Exception:
+        ok = False
+    return {"ok": ok, "ms": round((time.perf_counter() - t0) * 1000, 1)}
+
+
+def warm_up() -> Dict[str, Any]:
+    """One dummy prediction per model before the worker takes traffic."""
+    global _warm_up
+    from app.services import burnout_service, risk_grade_service
+
+    feats = _dummy_features()
+    t0 = time.perf_counter()
+    result: Dict[str, Any] = {
+        "burnout": _timed(lambda: burnout_service.predict(feats)),
+        "risk_grade": _timed(lambda: risk_grade_service.predict(feats)),
+    }
+    try:
+        from app.services import performance_predict
+
+        result["performance"] = _timed(lambda: performance_predict.predict_performance(feats))
+    except Exception as exc:
+        result["performance"] = {"ok": False, "ms": 0.0, "error": str(exc)}
+    result["total_ms"] = round((time.perf_counter() - t0) * 1000, 1)
+    _warm_up = result
+    return result
+
+
+# ── Reporting ─────────────────────────────────────────────────────────────────
+
+def _memory() -> Dict[str, Optional[float]]:
+    """Memory of this process in MB: RSS, PSS (shared pages split between the
+    processes mapping them), and the private / shared split of the RSS, from
+    /proc/self/smaps_rollup where available."""
+    out: Dict[str, Optional[float]] = dict.fromkeys(("rss_mb", "pss_mb", "private_mb", "shared_mb"))
+    try:
+        kb: Dict[str, int] = {}
+        with open("/proc/self/smaps_rollup") as fh:
+            for line in fh:
+                key, _, value = line.partition(":")
+                if value.strip().endswith("kB"):
+                    kb[key] = int(value.split()[0])
+        out.update({
+            "rss_mb": round(kb["Rss"] / 1024, 1),
+            "pss_mb": round(kb["Pss"] / 1024, 1),
+            "private_mb": round((kb["Private_Clean"] + kb["Private_Dirty"]) / 1024, 1),
+            "shared_mb": round((kb["Shared_Clean"] + kb["Shared_Dirty"]) / 1024, 1),
+        })
+    except (OSError, KeyError):
+        try:
+            import resource
+
+            out["rss_mb"] = round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 1)
+        except Exception:
+            pass
+    return out
+
+
+def stats() -> Dict[str, Any]:
+    with _lock:
+        loads = {os.path.join(os.path.basename(os.path.dirname(p)), os.path.basename(p)): dict(v)
+                 for p, v in _loads.items()}
+    return {
+        "pid": os.getpid(),
+        "preloaded": _preloaded,
+        "mmap": MODEL_MMAP,
+        **_memory(),
+        "cold_start_ms": round(sum(v["ms"] for v in loads.values()), 1),
+        "artifacts": loads,
+        "warm_up": _warm_up,
+    }
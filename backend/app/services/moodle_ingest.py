@@ -11,9 +11,23 @@ Turns a (possibly duplicated) extension payload into the normalized collections:
 `materials` array) and the legacy duplicated shapes
 (`learning_materials` / `materialsByCourse` / `knowledge_base`), so the same
 code powers live ingestion and the one-off migration of old documents.
+
+The extension re-sends everything on every sync. `section_digests` hashes
+each payload section; the ingest routes compare the digests with the ones
+stored for the student (ingest_digest_repository) and pass the unchanged
+sections as `skip`, so only what changed is written — and when
+features_changed says the features cannot have moved, they are not
+recomputed or re-scored at all.
+
+Events go through write_events, which keeps what is derived from them
+current: re-synced copies of compacted events are dropped
+(event_compaction) and newly inserted ones reach the materialized timeline
+(timeline_store). bulk_ingest does the same for a whole chunk.
 """
 
-from typing import Any, Dict, List, Optional
+import hashlib
+import json
+from typing import Any, Collection, Dict, List, Optional, Set
 
 from app.models.material import build_material_doc, stable_material_id
 from app.repositories import (
@@ -21,6 +35,8 @@ from app.repositories import (
     material_repository,
     metrics_repository,
 )
+from app.services import event_compaction, timeline_store
+from app.services.preprocessing import depends_on_clock
 
 # Fields removed from the raw payload before it's stored for audit — these are
 # the duplicated material/event structures now normalized into their own
@@ -34,6 +50,25 @@ _HEAVY_FIELDS = (
 )
 
 
+# Payload sections tracked by content digest, and the payload keys each covers.
+SECTIONS = {
+    "materials": ("materials", "learning_materials", "materialsByCourse", "knowledge_base"),
+    "metricsByCourse": ("metricsByCourse", "courses"),
+    "behavior": ("behavior",),
+    "events": ("events",),
+    "grades": ("grades",),
+}
+
+# The sections compute_features reads (materials stand in for assignment
+# grades when there are none): if none changed, neither did the features,
+# unless they depend on the clock (see features_changed).
+FEATURE_SECTIONS = frozenset({"metricsByCourse", "behavior", "grades", "materials"})
+
+# Bump when the meaning of a section changes (e.g. compute_features reads a
+# new field) so every stored digest stops matching and the next sync is full.
+DIGEST_VERSION = "1"
+
+
 # Course "links" that aren't real enrolled courses (Moodle site home is id 1).
 _GENERIC_COURSE_NAMES = {"my courses", "home", "dashboard", "site home", "my moodle", "courses", "profile"}
 
@@ -95,39 +130,78 @@ def materials_from_payload(payload: Dict[str, Any]) -> List[Dict[str, Any]]:
     return unique
 
 
-def normalize_payload(payload: Dict[str, Any], academiq_user_id: str) -> Dict[str, Any]:
+def section_digests(payload: Dict[str, Any]) -> Dict[str, str]:
+    """Stable content hash of every SECTIONS entry of a payload."""
+    digests = {}
+    for section, keys in SECTIONS.items():
+        content = json.dumps(
+            [payload.get(k) for k in keys], sort_keys=True, separators=(",", ":"), default=str
+        )
+        digests[section] = hashlib.sha1(f"{DIGEST_VERSION}:{content}".encode()).hexdigest()
+    return digests
+
+
+def unchanged_sections(digests: Dict[str, str], previous: Optional[Dict[str, str]]) -> Set[str]:
+    """Sections whose digest matches the previously ingested one."""
+    previous = previous or {}
+    return {section for section, digest in digests.items() if previous.get(section) == digest}
+
+
+def features_changed(payload: Dict[str, Any], unchanged: Collection[str]) -> bool:
     """
-    Write a payload's materials / metrics / events into the normalized
-    collections. Returns a summary with dedup counts.
+    Whether compute_features may give something other than at the last sync:
+    a FEATURE_SECTIONS section changed, or the late-submission count is read
+    off assignment due dates against the clock (preprocessing.depends_on_clock).
+    """
+    if not FEATURE_SECTIONS <= set(unchanged):
+        return True
+    return depends_on_clock(payload)
+
+
+def plan_payload(
+    payload: Dict[str, Any],
+    academiq_user_id: Optional[str],
+    skip: Collection[str] = (),
+) -> Dict[str, Any]:
+    """
+    Work out what a payload writes to the normalized collections, without
+    writing it.
+
+    Returns {"materials": [material docs], "materials_seen": int,
+    "metrics": [(course_id, metrics)], "metrics_courses": int,
+    "events": [events]}. The per-student parts are empty when there is no
+    user id, and the parts of any SECTIONS named in `skip` are left out.
+    Shared by normalize_payload and the bulk ingest path so both filter and
+    shape documents identically.
     """
     names = _course_name_map(payload)
 
-    # --- Materials → course_materials (upsert, deduped) -------------------
-    materials = materials_from_payload(payload)
-    materials_new = 0
+    # --- Materials → course_materials (deduped) ----------------------------
+    materials = [] if "materials" in skip else materials_from_payload(payload)
+    docs: List[Dict[str, Any]] = []
     for material in materials:
         cid = material.get("course_id") or material.get("courseId")
         if not is_real_course(cid, names.get(str(cid or ""))):
             continue  # skip site-home / nav "courses"
         doc = build_material_doc(material, cid, names.get(str(cid or "")))
-        if doc is None:
-            continue
-        if material_repository.upsert(doc):
-            materials_new += 1
+        if doc is not None:
+            docs.append(doc)
 
+    plan: Dict[str, Any] = {
+        "materials": docs,
+        "materials_seen": len(materials),
+        "metrics": [],
+        "metrics_courses": 0,
+        "events": [],
+    }
     # Materials are course-scoped, so they're stored even without a user. The
     # per-student collections below require a user id; skip them if absent.
     if not academiq_user_id:
-        return {
-            "materials_seen": len(materials),
-            "materials_new": materials_new,
-            "metrics_courses": 0,
-            "events_new": 0,
-        }
+        return plan
 
     # --- Metrics → student_metrics (per course + overall) ----------------
-    metrics_by_course = payload.get("metricsByCourse") or {}
-    if not metrics_by_course:
+    metrics_by_course = {} if "metricsByCourse" in skip else payload.get("metricsByCourse") or {}
+    if not metrics_by_course and "metricsByCourse" not in skip:
         # Fall back to the courses array if metricsByCourse isn't present.
         metrics_by_course = {
             str(c.get("course_id")): c
@@ -137,23 +211,70 @@ def normalize_payload(payload: Dict[str, Any], academiq_user_id: str) -> Dict[st
     for course_id, metrics in metrics_by_course.items():
         if not is_real_course(course_id, (metrics or {}).get("course_name")):
             continue  # skip the bogus "My courses" (id 1) etc.
-        metrics_repository.upsert(academiq_user_id, str(course_id), metrics)
+        plan["metrics"].append((str(course_id), metrics))
 
-    behavior = payload.get("behavior")
+    behavior = None if "behavior" in skip else payload.get("behavior")
     if behavior:
-        metrics_repository.upsert(academiq_user_id, metrics_repository.OVERALL, behavior)
+        plan["metrics"].append((metrics_repository.OVERALL, behavior))
+    plan["metrics_courses"] = len(metrics_by_course)
 
     # --- Events → student_events (deduped) -------------------------------
-    events_new = event_repository.upsert_many(academiq_user_id, payload.get("events", []))
+    if "events" not in skip:
+        plan["events"] = payload.get("events", []) or []
+    return plan
+
+
+def normalize_payload(
+    payload: Dict[str, Any],
+    academiq_user_id: str,
+    skip: Collection[str] = (),
+) -> Dict[str, Any]:
+    """
+    Write a payload's materials / metrics / events into the normalized
+    collections. Returns a summary with dedup counts.
+
+    Each collection is written with one unordered bulk write, so a sync costs
+    the same number of round trips however many materials it carries.
+    Sections named in `skip` (unchanged since the last sync) are not written.
+    """
+    plan = plan_payload(payload, academiq_user_id, skip)
+
+    materials_new = material_repository.upsert_many(plan["materials"])
+
+    if not academiq_user_id:
+        return {
+            "materials_seen": plan["materials_seen"],
+            "materials_new": materials_new,
+            "metrics_courses": 0,
+            "metrics_new": 0,
+            "events_new": 0,
+        }
+
+    metrics_new = metrics_repository.upsert_many(academiq_user_id, plan["metrics"])
+    events_new = write_events(academiq_user_id, plan["events"])
 
     return {
-        "materials_seen": len(materials),
+        "materials_seen": plan["materials_seen"],
         "materials_new": materials_new,
-        "metrics_courses": len(metrics_by_course),
+        "metrics_courses": plan["metrics_courses"],
+        "metrics_new": metrics_new,
         "events_new": events_new,
     }
 
 
+def write_events(academiq_user_id: str, events: List[Dict[str, Any]]) -> int:
+    """
+    Upsert a student's events, skipping the ones compaction already counted,
+    and append the newly inserted ones to a built timeline. Returns the
+    number of new events.
+    """
+    events = event_compaction.drop_compacted(academiq_user_id, events or [])
+    inserted = event_repository.upsert_new(academiq_user_id, events)
+    if inserted:
+        timeline_store.append_events(academiq_user_id, inserted)
+    return len(inserted)
+
+
 def slim_payload(payload: Dict[str, Any]) -> Dict[str, Any]:
     """Return a copy of the payload without the heavy/duplicated structures.
 
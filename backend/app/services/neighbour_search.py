@@ -0,0 +1,124 @@
+"""
+Nearest-neighbour search over a study-buddy course index.
+
+Every backend is built once per CourseIndex (services/study_buddy_index.py)
+from the course's standardised behaviour matrix Z. It answers "the k rows
+closest to q among the rows where `mask` is True", with the tier / offset
+filters of study_buddy.recommend passed in as the mask.
+
+    brute     exact vectorized scan of the masked rows (partial sort)
+    kdtree    sklearn KDTree over the whole course
+    balltree  sklearn BallTree over the whole course
+    auto      brute below STUDY_BUDDY_NN_TREE_MIN_ROWS rows, kdtree above
+
+All three are exact. Ties are broken by row order, so backends agree.
+
+Trees index every row, so a filtered query asks the tree for enough
+neighbours that about 2k should pass the mask (given the share it keeps) and
+widens the search until k of them do. A mask that
+keeps only a small share of the course goes straight to brute force over
+those rows, which is then cheaper than any tree walk.
+
+scikit-learn is part of the ML stack and is only imported when a tree is
+built; without it the tree backends degrade to brute force.
+"""
+
+from typing import Optional
+
+import numpy as np
+
+from app.config.settings import STUDY_BUDDY_NN_BACKEND, STUDY_BUDDY_NN_TREE_MIN_ROWS
+
+# Masks keeping less than this share of the rows skip the tree.
+_SELECTIVE_SHARE = 0.05
+
+
+def _closest(Z: np.ndarray, rows: np.ndarray, q: np.ndarray, k: int) -> np.ndarray:
+    """The k of `rows` closest to q, nearest first (ties by row order)."""
+    if not len(rows) or k <= 0:
+        return np.zeros(0, dtype=int)
+    d = ((Z[rows] - q) ** 2).sum(1)
+    if len(rows) > k:
+        keep = d <= np.partition(d, k - 1)[k - 1]     # the k nearest plus any ties
+        rows, d = rows[keep], d[keep]
+    return rows[np.lexsort((rows, d))][:k]
+
+
+class BruteForce:
+    """Exact scan; also the fallback for selective masks."""
+
+    name = "brute"
+
+    def __init__(self, Z: np.ndarray):
+        self.Z = Z
+
+    def query(self, q: np.ndarray, k: int, mask: Optional[np.ndarray] = None) -> np.ndarray:
+        rows = np.arange(len(self.Z)) if mask is None else np.flatnonzero(mask)
+        return _closest(self.Z, rows, q, k)
+
+
+def _sklearn_tree(name: str) -> Optional[type]:
+    """sklearn.neighbors.<name>, imported on first use (None without the ML stack)."""
+    try:
+        from sklearn import neighbors
+    except ImportError:
+        return None
+    return getattr(neighbors, name)
+
+
+class _Tree(BruteForce):
+    tree_name = ""
+    leaf_size = 40
+
+    def __init__(self, Z: np.ndarray):
+        super().__init__(Z)
+        self.tree = _sklearn_tree(self.tree_name)(Z, leaf_size=self.leaf_size) if len(Z) else None
+
+    def query(self, q: np.ndarray, k: int, mask: Optional[np.ndarray] = None) -> np.ndarray:
+        n = len(self.Z)
+        allowed = n if mask is None else int(mask.sum())
+        if self.tree is None or k <= 0 or allowed <= k or allowed < n * _SELECTIVE_SHARE:
+            return super().query(q, k, mask)
+        # Enough neighbours that ~2k of them should pass the mask.
+        want = min(n, max(16, 2 * k * n // allowed))
+        while True:
+            dist, idx = self.tree.query(q[None, :], k=want)
+            dist, idx = dist[0], idx[0]
+            horizon = dist[-1]
+            if mask is not None:
+                keep = mask[idx]
+                dist, idx = dist[keep], idx[keep]
+            if len(idx) >= k or want == n:
+                break
+            want = min(n, want * 4)
+        # A tie at the k-th distance may continue past what the tree
+        # returned; settle it exactly so every backend picks the same rows.
+        if len(idx) > k and dist[k] == dist[k - 1] or want < n and horizon == dist[k - 1]:
+            return super().query(q, k, mask)
+        return idx[np.lexsort((idx, dist))][:k]
+
+
+class KDTree(_Tree):
+    name = "kdtree"
+    tree_name = "KDTree"
+
+
+class BallTree(_Tree):
+    name = "balltree"
+    tree_name = "BallTree"
+
+
+BACKENDS = {b.name: b for b in (BruteForce, KDTree, BallTree)}
+
+
+def build(Z: np.ndarray, backend: Optional[str] = None) -> BruteForce:
+    """A searcher over Z using `backend` (default STUDY_BUDDY_NN_BACKEND)."""
+    backend = (backend or STUDY_BUDDY_NN_BACKEND).lower()
+    if backend == "auto":
+        backend = "kdtree" if len(Z) >= STUDY_BUDDY_NN_TREE_MIN_ROWS else "brute"
+    if backend not in BACKENDS:
+        raise ValueError(f"Unknown neighbour-search backend {backend!r} (expected auto or {', '.join(BACKENDS)})")
+    cls = BACKENDS[backend]
+    if issubclass(cls, _Tree) and _sklearn_tree(cls.tree_name) is None:
+        cls = BruteForce
+    return cls(Z)
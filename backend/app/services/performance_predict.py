@@ -1,12 +1,12 @@
 # backend/app/services/performance_predict.py
 
 import os
-import sys
-import joblib
 import numpy as np
 import pandas as pd
 from typing import Dict, Any, List
 
+from app.services import feature_pipeline, model_registry, prediction_cache, shap_engine
+
 BASE_DIR = os.path.dirname(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
 MODEL_DIR = os.path.join(BASE_DIR, "models", "performance_model")
 
@@ -92,10 +92,12 @@ _calibrated_model = None
 _shap_explainer = None
 _train_medians = None
 _hp_medians = None
+_artifact_version = ""
 
 def load_artifacts():
     """Load all performance model artifacts once at startup."""
     global _artifacts, _behavioral_features, _calibrated_model, _shap_explainer, _train_medians, _hp_medians
+    global _artifact_version
 
     if not os.path.exists(MODEL_DIR):
         raise FileNotFoundError(f"Model directory not found: {MODEL_DIR}")
@@ -103,9 +105,7 @@ def load_artifacts():
     artifacts = {}
     for name, filename in ARTIFACTS.items():
         path = os.path.join(MODEL_DIR, filename)
-        if not os.path.exists(path):
-            raise FileNotFoundError(f"Missing artifact: {path}")
-        artifacts[name] = joblib.load(path)
+        artifacts[name] = model_registry.load(path)
         print(f"✅ Loaded {name} from {path}")
 
     _artifacts = artifacts
@@ -114,41 +114,39 @@ def load_artifacts():
     _shap_explainer = artifacts["shap_explainer"]
     _train_medians = artifacts["train_medians"]
     _hp_medians = artifacts["hp_train_medians"]
-
-def _engineer_features(row: pd.Series, train_medians: pd.Series) -> pd.Series:
-    """Recreate derived features exactly as in the notebook."""
-    row = row.copy()
-    row["clicks_per_day"] = row["all_clicks"] / (row["active_days"] + 1)
-    row["time_per_click"] = row["total_time_spent"] / (row["all_clicks"] + 1)
-    row["engagement_consistency"] = row["active_days"] / (row["total_time_spent"] / 60 + 1)
-    row["behavioral_risk_score"] = (
-        max(row["procrastination_index"], 0) * 0.6 +
-        row["late_submission_count"] * 10 * 0.4
+    _artifact_version = prediction_cache.artifact_version(
+        *(os.path.join(MODEL_DIR, filename) for filename in ARTIFACTS.values())
     )
-    for col in ["all_clicks", "total_time_spent", "active_days"]:
-        median_val = train_medians.get(col, 1)
-        row[f"{col}_relative"] = row[col] / (median_val + 1)
-    return row
 
-def predict_performance(raw_features: Dict[str, Any]) -> Dict[str, Any]:
-    """Run performance model inference."""
-    if _calibrated_model is None:
-        # Attempt to load (for initial call after module load)
-        load_artifacts()
 
-    required = ["all_clicks", "active_days", "access_frequency", "material_clicks",
-                "quiz_attempts", "assignment_submissions", "total_time_spent",
-                "procrastination_index", "late_submission_count"]
-    missing = [k for k in required if k not in raw_features]
-    if missing:
-        raise ValueError(f"Missing features: {missing}")
+def artifact_version() -> str:
+    """Fingerprint of the loaded artifact files (prediction_cache key part)."""
+    return _artifact_version
 
-    base = pd.Series(raw_features)
-    engineered = _engineer_features(base, _train_medians)
-    X_student = engineered[_behavioral_features].values.reshape(1, -1)
-    X_df = pd.DataFrame(X_student, columns=_behavioral_features)
+_REQUIRED = feature_pipeline.PERFORMANCE_RAW
 
-    probability = float(_calibrated_model.predict_proba(X_df)[0][1])
+# Compiled feature pipeline, rebuilt whenever the artifacts it was compiled
+# from are swapped (reload, or tests patching the module globals).
+_pipeline = None
+_pipeline_key = None
+
+
+def _feature_pipeline() -> feature_pipeline.FeaturePipeline:
+    global _pipeline, _pipeline_key
+    key = (id(_behavioral_features), id(_train_medians))
+    if _pipeline is None or key != _pipeline_key:
+        _pipeline = feature_pipeline.performance_pipeline(_behavioral_features, _train_medians)
+        _pipeline_key = key
+    return _pipeline
+
+
+def _engineer_matrix(rows: List[Dict[str, Any]]) -> np.ndarray:
+    """Engineer a cohort into an (n_students, len(_behavioral_features)) matrix."""
+    return _feature_pipeline().transform(feature_pipeline.raw_matrix(rows, strict=True))
+
+
+def _build_result(probability: float, shap_row: np.ndarray, raw_features: Dict[str, Any]) -> Dict[str, Any]:
+    """Turn one student's probability + SHAP row into the API response dict."""
     classification = "High Performer" if probability >= 0.5 else "Not High Performer"
 
     # Approximate grade for tier
@@ -163,11 +161,7 @@ def predict_performance(raw_features: Dict[str, Any]) -> Dict[str, Any]:
         tier = 0
     tier_label = TIER_LABELS[tier]
 
-    # SHAP
-    shap_vals = _shap_explainer.shap_values(X_df)
-    if isinstance(shap_vals, list):
-        shap_vals = shap_vals[1]
-    shap_map = {feat: float(shap_vals[0][i]) for i, feat in enumerate(_behavioral_features)}
+    shap_map = {feat: float(shap_row[i]) for i, feat in enumerate(_behavioral_features)}
 
     # Negative drivers
     negative_drivers = sorted([(feat, val) for feat, val in shap_map.items() if val < 0],
@@ -208,6 +202,49 @@ def predict_performance(raw_features: Dict[str, Any]) -> Dict[str, Any]:
         "shap_map": {k: round(v, 4) for k, v in shap_map.items()},
     }
 
+
+def predict_performance_batch(feature_dicts: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """Run performance model inference for many students at once.
+
+    Engineers the whole cohort into one matrix and makes a single
+    predict_proba call and a single shap_engine.explain call. Returns one dict per input,
+    in input order, identical to what predict_performance returns for that
+    student alone.
+    """
+    if _calibrated_model is None:
+        # Attempt to load (for initial call after module load)
+        load_artifacts()
+
+    if not feature_dicts:
+        return []
+
+    for idx, raw_features in enumerate(feature_dicts):
+        missing = [k for k in _REQUIRED if k not in raw_features]
+        if missing:
+            raise ValueError(f"Missing features for row {idx}: {missing}")
+
+    X = _engineer_matrix(feature_dicts)
+    X_df = pd.DataFrame(X, columns=_behavioral_features)
+
+    probabilities = _calibrated_model.predict_proba(X_df)[:, 1]
+
+    # Cached, batched across concurrent requests, exact or approx per
+    # settings.SHAP_MODE — see shap_engine.
+    shap_vals = shap_engine.explain(X, _shap_explainer, _behavioral_features)
+
+    return [
+        _build_result(float(probabilities[i]), shap_vals[i], raw_features)
+        for i, raw_features in enumerate(feature_dicts)
+    ]
+
+
+def predict_performance(raw_features: Dict[str, Any]) -> Dict[str, Any]:
+    """Run performance model inference."""
+    missing = [k for k in _REQUIRED if k not in raw_features]
+    if missing:
+        raise ValueError(f"Missing features: {missing}")
+    return predict_performance_batch([raw_features])[0]
+
 # Load artifacts immediately when module is imported (unless we defer)
 try:
     load_artifacts()
@@ -0,0 +1,126 @@
+"""
+Process-wide memo cache for model outputs.
+
+The dashboard, performance and insights endpoints each score the student's
+latest feature vector again — and the frontend calls several of them per page
+load — although the vector only changes when the extension syncs. This cache
+remembers each model's output per
+
+    (model name, artifact version, feature_pipeline.feature_hash(features))
+
+so every model runs once per distinct feature vector. Entries are evicted
+least-recently-used beyond PREDICTION_CACHE_SIZE, expire after
+PREDICTION_CACHE_TTL_SECONDS, and are dropped by invalidate() when
+/raw-moodle-payloads replaces the feature vector they were computed from.
+
+Artifact versions come from artifact_version(): the size and mtime of the
+model files, so retraining in place never serves stale outputs. None results
+("model unavailable") are never cached. Values are deep-copied on the way in
+and out, so callers may mutate what they get back.
+"""
+
+import copy
+import hashlib
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Hashable, Optional, Set, Tuple
+
+from app.config.settings import PREDICTION_CACHE_SIZE, PREDICTION_CACHE_TTL_SECONDS
+from app.services import feature_pipeline
+
+_lock = threading.Lock()
+# key -> (expires_at, value); key = (model_name, version, feature_hash)
+_entries: "OrderedDict[Tuple[str, Hashable, str], Tuple[float, Any]]" = OrderedDict()
+_keys_by_hash: Dict[str, Set[Tuple[str, Hashable, str]]] = {}
+_counters = {"hits": 0, "misses": 0, "evictions": 0, "expirations": 0, "invalidations": 0}
+
+
+def artifact_version(*paths: str) -> str:
+    """Short fingerprint of model files (size + mtime), '' for missing files."""
+    parts = []
+    for path in paths:
+        try:
+            st = os.stat(path)
+            parts.append(f"{path}:{st.st_size}:{st.st_mtime_ns}")
+        except OSError:
+            parts.append(f"{path}:missing")
+    return hashlib.sha1("|".join(parts).encode()).hexdigest()[:12]
+
+
+def _drop(key: Tuple[str, Hashable, str]) -> None:
+    _entries.pop(key, None)
+    keys = _keys_by_hash.get(key[2])
+    if keys is not None:
+        keys.discard(key)
+        if not keys:
+            del _keys_by_hash[key[2]]
+
+
+def cached(
+    model_name: str,
+    version: Hashable,
+    features: Dict[str, Any],
+    compute: Callable[[], Optional[Any]],
+) -> Optional[Any]:
+    """Return the cached output for these features, or compute() and cache it."""
+    key = (model_name, version, feature_pipeline.feature_hash(features, feature_pipeline.RAW_COLUMNS))
+    now = time.monotonic()
+    with _lock:
+        entry = _entries.get(key)
+        if entry is not None:
+            if entry[0] > now:
+                _entries.move_to_end(key)
+                _counters["hits"] += 1
+                return copy.deepcopy(entry[1])
+            _drop(key)
+            _counters["expirations"] += 1
+        _counters["misses"] += 1
+
+    value = compute()
+    if value is None:
+        return None
+
+    with _lock:
+        _entries[key] = (now + PREDICTION_CACHE_TTL_SECONDS, copy.deepcopy(value))
+        _entries.move_to_end(key)
+        _keys_by_hash.setdefault(key[2], set()).add(key)
+        while len(_entries) > PREDICTION_CACHE_SIZE:
+            _drop(next(iter(_entries)))
+            _counters["evictions"] += 1
+    return value
+
+
+def invalidate(features: Optional[Dict[str, Any]]) -> int:
+    """Drop every model's cached output for this feature vector. Returns entries dropped."""
+    if not features:
+        return 0
+    fhash = feature_pipeline.feature_hash(features, feature_pipeline.RAW_COLUMNS)
+    with _lock:
+        keys = list(_keys_by_hash.get(fhash, ()))
+        for key in keys:
+            _drop(key)
+        _counters["invalidations"] += len(keys)
+    return len(keys)
+
+
+def clear() -> None:
+    with _lock:
+        _entries.clear()
+        _keys_by_hash.clear()
+
+
+def stats() -> Dict[str, Any]:
+    """Counters for /api/system/status."""
+    with _lock:
+        counters = dict(_counters)
+        size = len(_entries)
+    lookups = counters["hits"] + counters["misses"]
+    return {
+        **counters,
+        "size": size,
+        "capacity": PREDICTION_CACHE_SIZE,
+        "ttl_seconds": PREDICTION_CACHE_TTL_SECONDS,
+        "hit_rate": round(counters["hits"] / lookups, 3) if lookups else 0.0,
+    }
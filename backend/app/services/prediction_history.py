@@ -3,22 +3,29 @@
 Prediction history tracking and trend explanation.
 
 Owns both sides of "probability over time": the write path that appends a
-snapshot to ml_results_history every time a fresh prediction is stored (with
-near-duplicate dedup and a per-user entry cap), and the read path that
-serves the history list and the one-sentence trend explanation.
+snapshot every time a fresh prediction is stored (with near-duplicate dedup
+and a per-user entry cap), and the read path that serves the history list
+and the one-sentence trend explanation.
+
+The history of one (user, model) is one bucket document in
+prediction_history, holding the newest MAX_HISTORY_PER_USER snapshots
+oldest-first:
+
+    {_id: "<user>:<model>", academiq_user_id, model_name,
+     last_probability, entries: [{probability, classification,
+     top_negative_drivers, shap_map, recorded_at}, ...], updated_at}
+
+A write is one conditional upsert: the filter only matches when
+last_probability is at least CHANGE_THRESHOLD away from the new one, and
+$push with $slice appends the entry and drops the oldest overflow. A read is
+one find_one with an $slice projection. The per-snapshot documents of the
+older ml_results_history collection are moved into buckets by
+scripts/migrate_prediction_history.py.
 
 This is additive and entirely separate from ml_results: ml_results is
 upsert-by-(academiq_user_id, model_name) and structurally holds only the
 latest snapshot — every existing reader (get_insights, get_performance,
 ml_result.py) depends on that shape and is untouched by this module.
-
-Design note: the write-side dedup/cap logic was originally specified to live
-inline inside student_data._store_prediction(). It lives here instead, with
-_store_prediction() reduced to a single delegating call into
-record_prediction(). All "history" concerns — write and read — stay
-cohesive in one module rather than being split across two files. This was a
-deliberate choice, not an oversight; see the PR/commit notes if you want the
-literal-inline version instead.
 """
 
 from __future__ import annotations
@@ -26,7 +33,9 @@ from __future__ import annotations
 from datetime import datetime
 from typing import Any, Dict, List
 
-from app.config.database import ml_results_history_collection
+from pymongo.errors import DuplicateKeyError
+
+from app.config.database import prediction_history_collection
 from app.schema.counterfactual_schema import friendly_label
 
 MODEL_NAME = "performance_model_v4"
@@ -42,6 +51,10 @@ CHANGE_THRESHOLD = 0.01
 MAX_HISTORY_PER_USER = 30
 
 
+def bucket_id(academiq_user_id: str, model_name: str = MODEL_NAME) -> str:
+    return f"{academiq_user_id}:{model_name}"
+
+
 def _shap_map_from_result(result: Dict[str, Any]) -> Dict[str, float]:
     """
     Build {feature: shap_impact} from the recommendations the performance
@@ -57,12 +70,18 @@ def record_prediction(
     academiq_user_id: str,
     result: Dict[str, Any],
     model_name: str = MODEL_NAME,
-) -> None:
+) -> bool:
     """
     Append a history snapshot for this prediction, unless it's a
     near-duplicate of the most recent recorded entry (probability moved by
     less than CHANGE_THRESHOLD). Caps history at MAX_HISTORY_PER_USER
-    entries per user by deleting the oldest overflow after inserting.
+    entries per user by dropping the oldest in the same update. Returns
+    whether a snapshot was recorded.
+
+    One round trip: the near-duplicate check is part of the update's
+    filter. When the bucket exists but its last probability is too close,
+    the filter matches nothing and the upsert's insert collides with the
+    bucket's _id, which is how "near-duplicate" is reported.
 
     Scoped by model_name so a second model writing history later (e.g. a
     grade/risk model) can't interleave with this one's probability series
@@ -75,45 +94,39 @@ def record_prediction(
     """
     probability = result.get("probability")
     if probability is None:
-        return  # nothing meaningful to chart
-
-    last = ml_results_history_collection.find_one(
-        {"academiq_user_id": academiq_user_id, "model_name": model_name},
-        sort=[("recorded_at", -1)],
-    )
-    if last is not None and abs(last.get("probability", 0.0) - probability) < CHANGE_THRESHOLD:
-        return
+        return False  # nothing meaningful to chart
 
-    ml_results_history_collection.insert_one({
-        "academiq_user_id": academiq_user_id,
-        "model_name": model_name,
+    now = datetime.utcnow()
+    entry = {
         "probability": probability,
         "classification": result.get("classification"),
         "top_negative_drivers": result.get("top_negative_drivers", []),
         "shap_map": _shap_map_from_result(result),
-        "recorded_at": datetime.utcnow(),
-    })
-
-    # Cap at MAX_HISTORY_PER_USER entries per user — delete the oldest
-    # beyond that. A few extra round trips per write, but each query is
-    # scoped to a single user's small (<= MAX_HISTORY_PER_USER + 1) document
-    # set, so the cost stays negligible even at "thousands of students" scale.
-    total = ml_results_history_collection.count_documents(
-        {"academiq_user_id": academiq_user_id, "model_name": model_name}
-    )
-    overflow = total - MAX_HISTORY_PER_USER
-    if overflow > 0:
-        stale_ids = [
-            doc["_id"]
-            for doc in ml_results_history_collection.find(
-                {"academiq_user_id": academiq_user_id, "model_name": model_name},
-                {"_id": 1},
-                sort=[("recorded_at", 1)],
-                limit=overflow,
-            )
-        ]
-        if stale_ids:
-            ml_results_history_collection.delete_many({"_id": {"$in": stale_ids}})
+        "recorded_at": now,
+    }
+    try:
+        prediction_history_collection.update_one(
+            {
+                "_id": bucket_id(academiq_user_id, model_name),
+                "last_probability": {"$not": {
+                    "$gt": probability - CHANGE_THRESHOLD,
+                    "$lt": probability + CHANGE_THRESHOLD,
+                }},
+            },
+            {
+                "$push": {"entries": {"$each": [entry], "$slice": -MAX_HISTORY_PER_USER}},
+                "$set": {
+                    "academiq_user_id": academiq_user_id,
+                    "model_name": model_name,
+                    "last_probability": probability,
+                    "updated_at": now,
+                },
+            },
+            upsert=True,
+        )
+    except DuplicateKeyError:
+        return False
+    return True
 
 
 def get_history(
@@ -126,15 +139,7 @@ def get_history(
     oldest-to-newest, so a frontend chart can plot left-to-right
     chronologically.
     """
-    docs = list(
-        ml_results_history_collection.find(
-            {"academiq_user_id": academiq_user_id, "model_name": model_name}
-        )
-        .sort("recorded_at", -1)
-        .limit(limit)
-    )
-    docs.reverse()
-    return docs
+    return _entries(academiq_user_id, model_name, limit)
 
 
 def get_trend_summary(
@@ -149,18 +154,12 @@ def get_trend_summary(
     entries exist yet. This is an expected state for new students; a trend
     is never fabricated from a single data point.
     """
-    recent = list(
-        ml_results_history_collection.find(
-            {"academiq_user_id": academiq_user_id, "model_name": model_name}
-        )
-        .sort("recorded_at", -1)
-        .limit(2)
-    )
+    recent = _entries(academiq_user_id, model_name, 2)
 
     if len(recent) < 2:
         return {"hasEnoughData": False}
 
-    latest, previous = recent[0], recent[1]
+    previous, latest = recent
     from_p = float(previous.get("probability", 0.0))
     to_p = float(latest.get("probability", 0.0))
     delta = to_p - from_p
@@ -186,6 +185,17 @@ def get_trend_summary(
     }
 
 
+def _entries(academiq_user_id: str, model_name: str, limit: int) -> List[Dict[str, Any]]:
+    """The newest `limit` entries of a bucket, oldest first ([] without one)."""
+    if limit <= 0:
+        return []
+    doc = prediction_history_collection.find_one(
+        {"_id": bucket_id(academiq_user_id, model_name)},
+        {"_id": 0, "entries": {"$slice": -limit}},
+    )
+    return (doc or {}).get("entries") or []
+
+
 def _build_summary(
     direction: str,
     from_p: float,
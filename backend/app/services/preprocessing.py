@@ -1,5 +1,5 @@
 from datetime import datetime
-from typing import Any, Dict, Optional
+from typing import Any, Dict, Iterator, Optional
 import numpy as np
 import re
 
@@ -20,6 +20,28 @@ def parse_moodle_date(date_str: str) -> Optional[datetime]:
     return None
 
 
+def _assignment_materials(payload: Dict[str, Any]) -> Iterator[Dict[str, Any]]:
+    """The payload's materials tagged or typed as assignments."""
+    from app.services.moodle_ingest import materials_from_payload
+    for material in materials_from_payload(payload):
+        tags  = {str(t).lower() for t in (material.get("semantic_tags") or [])}
+        mtype = str(material.get("material_type") or material.get("type") or "").lower()
+        if "assignment" in tags or mtype == "assignment":
+            yield material
+
+
+def depends_on_clock(payload: Dict[str, Any]) -> bool:
+    """
+    Whether compute_features(payload) can change with no change to the
+    payload: with no assignment grades, late submissions are counted from
+    the assignment materials' due dates against the current time.
+    """
+    grades = payload.get("grades") or []
+    if any("assignment" in (g.get("item_type") or "").lower() for g in grades):
+        return False
+    return any(m.get("due_date") for m in _assignment_materials(payload))
+
+
 def compute_features(payload: Dict[str, Any]) -> Dict[str, Any]:
     """
     Extract ML-ready features from the Chrome extension JSON payload.
@@ -112,13 +134,8 @@ def compute_features(payload: Dict[str, Any]) -> Dict[str, Any]:
     # If Moodle didn't report a "late" status but a past-due assignment material
     # exists, use that as a supplementary signal (only adds, never subtracts).
     if total_assignments == 0:
-        from app.services.moodle_ingest import materials_from_payload
         now = datetime.now()
-        for material in materials_from_payload(payload):
-            tags  = {str(t).lower() for t in (material.get("semantic_tags") or [])}
-            mtype = str(material.get("material_type") or material.get("type") or "").lower()
-            if "assignment" not in tags and mtype != "assignment":
-                continue
+        for material in _assignment_materials(payload):
             total_assignments += 1
             due = parse_moodle_date(material.get("due_date") or "")
             if due and due < now:
@@ -4,28 +4,35 @@ Inference for the clustering + grade model (models/grade_Risk_Model/risk_grade_m
 Bundle keys: scaler, kmeans, rf_cluster, grade_reg, risk_map, feature_cols,
 n_clusters, log_cols, proc_clip. Loaded once, lazily; returns None everywhere
 if the file or xgboost is missing so the API stays up on heuristics.
+
+predict_many scores a whole cohort (a course index, an admin view) with one
+feature matrix and one call per bundle model; predict is its one-row case.
 """
 
 import os
-from typing import Any, Dict, Optional
+from typing import Any, Dict, List, Optional
 
 import numpy as np
 
+from app.services import feature_pipeline, model_registry, prediction_cache
+
 _BASE = os.path.dirname(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
 _PATH = os.path.join(_BASE, "models", "grade_Risk_Model", "risk_grade_model.pkl")
 
 _bundle = None
 _loaded = False
+_version = ""
+_compiled = None   # (bundle, FeaturePipeline)
 
 
 def _get():
-    global _bundle, _loaded
+    global _bundle, _loaded, _version
     if _loaded:
         return _bundle
     _loaded = True
     try:
-        import joblib
-        _bundle = joblib.load(_PATH)
+        _bundle = model_registry.load(_PATH)
+        _version = prediction_cache.artifact_version(_PATH)
         print("[OK] risk/grade model loaded.")
     except Exception as exc:
         print(f"[INFO] risk/grade model unavailable: {exc}")
@@ -37,51 +44,53 @@ def available() -> bool:
     return _get() is not None
 
 
-def _pct(v) -> float:
-    # live feature vectors store scores as 0-1; the model trained on 0-100.
-    v = float(v or 0)
-    return v * 100 if 0 <= v <= 1 else v
-
-
-def _row(b, feats: Dict[str, Any]) -> np.ndarray:
-    r = {
-        "all_clicks": float(feats.get("all_clicks", 0) or 0),
-        "active_days": float(feats.get("active_days", 0) or 0),
-        "access_frequency": float(feats.get("access_frequency", 0) or 0),
-        "material_clicks": float(feats.get("material_clicks", 0) or 0),
-        "avg_quiz_score": _pct(feats.get("avg_quiz_score")),
-        "quiz_attempts": float(feats.get("quiz_attempts", 0) or 0),
-        "avg_assignment_score": _pct(feats.get("avg_assignment_score")),
-        "assignment_submissions": float(feats.get("assignment_submissions", 0) or 0),
-        "total_time_spent": float(feats.get("total_time_spent", 0) or 0),
-        "procrastination_index": float(feats.get("procrastination_index", 0) or 0),
-        "late_submission_count": float(feats.get("late_submission_count", 0) or 0),
-    }
-    r["clicks_per_day"] = r["all_clicks"] / r["active_days"] if r["active_days"] > 0 else 0.0
-    for c in b["log_cols"]:
-        r[c] = float(np.log1p(r[c]))
-    lo, hi = b["proc_clip"]
-    r["procrastination_index"] = min(max(r["procrastination_index"], lo), hi)
-    return np.array([[r[c] for c in b["feature_cols"]]], dtype=float)
+def artifact_version() -> str:
+    """Fingerprint of the loaded bundle file (prediction_cache key part)."""
+    _get()
+    return _version
 
 
-def predict(feats: Dict[str, Any]) -> Optional[Dict[str, Any]]:
-    """Return predicted_grade (0-100), risk_cluster and risk_level, or None."""
+def _pipeline(b) -> feature_pipeline.FeaturePipeline:
+    """The bundle's compiled feature pipeline (compiled once per loaded bundle)."""
+    global _compiled
+    if _compiled is None or _compiled[0] is not b:
+        _compiled = (b, feature_pipeline.risk_grade_pipeline(b))
+    return _compiled[1]
+
+
+def predict_many(feats_list: List[Dict[str, Any]]) -> List[Optional[Dict[str, Any]]]:
+    """predict() for many students: one matrix, one scaler / kmeans / regressor
+    call. Results are in input order; None where a feature dict is empty or
+    malformed (or everywhere when the model is unavailable)."""
     b = _get()
-    if not b or not feats:
-        return None
+    out: List[Optional[Dict[str, Any]]] = [None] * len(feats_list)
+    given = [i for i, feats in enumerate(feats_list) if feats]
+    if not b or not given:
+        return out
+    R, kept = feature_pipeline.readable_raw_matrix([feats_list[i] for i in given])
+    rows = [given[j] for j in kept]
+    if not rows:
+        return out
     try:
-        x = b["scaler"].transform(_row(b, feats))
-        cluster = int(b["kmeans"].predict(x)[0])
-        x_aug = np.hstack([x, np.eye(b["n_clusters"])[[cluster]]])
-        grade = float(np.clip(b["grade_reg"].predict(x_aug)[0], 0, 100))
-        return {
-            "predicted_grade": round(grade, 1),
-            "risk_cluster": cluster,
-            "risk_level": b.get("risk_map", {}).get(cluster),
-        }
+        x = b["scaler"].transform(_pipeline(b).transform(R))
+        clusters = b["kmeans"].predict(x).astype(int)
+        x_aug = np.hstack([x, np.eye(b["n_clusters"])[clusters]])
+        grades = np.clip(b["grade_reg"].predict(x_aug), 0, 100)
     except Exception:
-        return None
+        return out
+    rmap = b.get("risk_map", {})
+    for i, cluster, grade in zip(rows, clusters, grades):
+        out[i] = {
+            "predicted_grade": round(float(grade), 1),
+            "risk_cluster": int(cluster),
+            "risk_level": rmap.get(int(cluster)),
+        }
+    return out
+
+
+def predict(feats: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+    """Return predicted_grade (0-100), risk_cluster and risk_level, or None."""
+    return predict_many([feats])[0]
 
 
 def cluster_of(feats: Dict[str, Any]) -> Optional[int]:
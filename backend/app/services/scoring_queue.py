@@ -0,0 +1,188 @@
+"""
+Ingest-time scoring.
+
+POST /raw-moodle-payloads used to return after storing the feature vector,
+leaving ml_results to be written lazily the first time the student opened
+their insights page — so the first page load after every sync paid for the
+models. Now the ingest route hands the fresh vector to this module and
+returns immediately; a small pool of worker threads runs the performance,
+grade/risk and burnout models once and writes ml_results (tagged with the
+feature hash and each model's artifact version, see store_predictions) plus
+a prediction-history point. The read endpoints serve those
+stored results (student_data._predict / _predict_grade / _burnout with a
+user id).
+
+Bounded, with backpressure:
+  * SCORING_WORKERS threads, so scoring never competes with request
+    handling for more than that many cores' worth of model time.
+  * at most SCORING_QUEUE_SIZE students wait. submit() never blocks: when
+    the queue is full the student is not queued ("deferred") and the read
+    path scores on demand, exactly as before this module existed.
+  * re-syncs of a student who is still waiting replace the waiting vector
+    instead of taking a second slot ("coalesced").
+"""
+
+import logging
+import queue
+import threading
+import time
+from typing import Any, Dict, List, Optional
+
+from app.config.settings import SCORING_QUEUE_SIZE, SCORING_WORKERS
+
+logger = logging.getLogger(__name__)
+
+PERFORMANCE_MODEL = "performance_model_v4"
+GRADE_MODEL = "risk_grade_model"
+BURNOUT_MODEL = "burnout_model"
+
+_queue: "queue.Queue[str]" = queue.Queue(maxsize=SCORING_QUEUE_SIZE)
+_pending: Dict[str, Dict[str, Any]] = {}   # user id -> latest features to score
+_lock = threading.Lock()
+_workers: List[threading.Thread] = []
+_counters = {"queued": 0, "coalesced": 0, "deferred": 0, "scored": 0, "failed": 0}
+_last_latency_ms: Optional[float] = None
+
+
+def artifact_version(model_name: str) -> str:
+    """The loaded artifact fingerprint of one model, "" when it can't be loaded."""
+    try:
+        if model_name == PERFORMANCE_MODEL:
+            from app.services import performance_predict as service
+        elif model_name == GRADE_MODEL:
+            from app.services import risk_grade_service as service
+        else:
+            from app.services import burnout_service as service
+        return service.artifact_version()
+    except Exception:
+        return ""
+
+
+def store_predictions(
+    academiq_user_id: str,
+    predictions: Dict[str, Dict[str, Any]],
+    features: Dict[str, Any],
+    snapshot: bool = True,
+) -> None:
+    """
+    Write {model_name: prediction} to ml_results, tagged with the hash of the
+    `features` they were computed from (kept as the input snapshot unless
+    `snapshot` is False) and each model's artifact version, then refresh the
+    student's risk-change items in the materialized timeline.
+    """
+    from app.repositories import ml_result_repository
+    from app.services import feature_pipeline, timeline_store
+
+    ml_result_repository.upsert_many(
+        academiq_user_id,
+        predictions,
+        feature_hash=feature_pipeline.feature_hash(features, feature_pipeline.RAW_COLUMNS),
+        features=features if snapshot else None,
+        artifact_versions={name: artifact_version(name) for name in predictions},
+    )
+    timeline_store.refresh_ai(academiq_user_id)
+
+
+def score_user(academiq_user_id: str, features: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Run every available model on `features` and store the outputs.
+
+    Writes one ml_results document per model that produced a result (a single
+    bulk write) and records the performance prediction in the history.
+    Returns {model_name: prediction}.
+    """
+    from app.services import prediction_history, student_data
+
+    predictions = {
+        PERFORMANCE_MODEL: student_data._predict(features),
+        GRADE_MODEL: student_data._predict_grade(features),
+        BURNOUT_MODEL: student_data._burnout(features),
+    }
+    predictions = {name: p for name, p in predictions.items() if p}
+    if predictions:
+        store_predictions(academiq_user_id, predictions, features)
+    if PERFORMANCE_MODEL in predictions:
+        prediction_history.record_prediction(academiq_user_id, predictions[PERFORMANCE_MODEL])
+    return predictions
+
+
+def _work() -> None:
+    global _last_latency_ms
+    while True:
+        user_id = _queue.get()
+        with _lock:
+            features = _pending.pop(user_id, None)
+        if features is None:
+            _queue.task_done()
+            continue
+        t0 = time.perf_counter()
+        try:
+            score_user(user_id, features)
+            with _lock:
+                _counters["scored"] += 1
+                _last_latency_ms = (time.perf_counter() - t0) * 1000
+        except Exception as exc:
+            with _lock:
+                _counters["failed"] += 1
+            logger.warning("Ingest-time scoring failed for %s: %s", user_id, exc)
+        finally:
+            _queue.task_done()
+
+
+def _ensure_workers() -> None:
+    if len(_workers) >= SCORING_WORKERS:
+        return
+    with _lock:
+        while len(_workers) < SCORING_WORKERS:
+            worker = threading.Thread(target=_work, name=f"scoring-{len(_workers)}", daemon=True)
+            worker.start()
+            _workers.append(worker)
+
+
+def submit(academiq_user_id: str, features: Dict[str, Any]) -> str:
+    """
+    Queue a student for scoring without blocking.
+
+    Returns "queued", "coalesced" (already waiting — the newer vector will be
+    scored instead) or "deferred" (queue full — scored on first read).
+    """
+    if not features:
+        return "deferred"
+    _ensure_workers()
+    with _lock:
+        if academiq_user_id in _pending:
+            _pending[academiq_user_id] = features
+            _counters["coalesced"] += 1
+            return "coalesced"
+        try:
+            _queue.put_nowait(academiq_user_id)
+        except queue.Full:
+            _counters["deferred"] += 1
+            return "deferred"
+        _pending[academiq_user_id] = features
+        _counters["queued"] += 1
+        return "queued"
+
+
+def drain(timeout: Optional[float] = None) -> bool:
+    """Wait until every queued student has been scored (tests, shutdown)."""
+    deadline = None if timeout is None else time.monotonic() + timeout
+    while _queue.unfinished_tasks:
+        if deadline is not None and time.monotonic() > deadline:
+            return False
+        time.sleep(0.01)
+    return True
+
+
+def stats() -> Dict[str, Any]:
+    """Queue depth and counters for /api/system/status."""
+    with _lock:
+        counters = dict(_counters)
+        last = _last_latency_ms
+    return {
+        **counters,
+        "depth": _queue.qsize(),
+        "capacity": SCORING_QUEUE_SIZE,
+        "workers": len(_workers),
+        "last_score_ms": round(last, 2) if last is not None else None,
+    }
@@ -0,0 +1,305 @@
+"""
+SHAP explanation engine for the performance model.
+
+predict_performance only consumes a per-feature SHAP row (shap_map, and the
+three most negative drivers picked from it), but TreeSHAP over the 400-tree
+LightGBM model costs ~2 ms per row — most of a prediction. This module puts
+three things between callers and the explainer:
+
+  cache     explanations are kept in a process-wide LRU keyed by the
+            engineered feature vector rounded to SHAP_CACHE_DECIMALS, so a
+            re-sync with unchanged (or negligibly changed) behaviour reuses
+            the previous explanation.
+  batching  concurrent requests are coalesced: whichever request arrives
+            while an explainer call is in flight queues its rows, and the
+            next call explains everything queued in one go (see _Batcher).
+  modes     "exact" — TreeSHAP via the committed shap_explainer.pkl.
+            "approx" — Saabas path contributions: for every leaf of every
+            tree the sum of value changes along its decision path, per
+            feature, is precomputed once, so explaining a row is one
+            pred_leaf call plus a table gather. Additive on the same
+            log-odds scale as TreeSHAP, ~20x cheaper, but it only
+            approximates the attribution (see bench_shap.py).
+
+Latency is recorded per explain() call (stats(), surfaced in
+/api/system/status) and per request via request_timer(), which the insights
+route reports as a Server-Timing header.
+"""
+
+import threading
+import time
+from collections import OrderedDict, deque
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Any, Callable, Dict, Iterator, List, Optional, Sequence
+
+import numpy as np
+
+from app.config.settings import SHAP_CACHE_DECIMALS, SHAP_CACHE_SIZE, SHAP_MODE
+
+MODES = ("exact", "approx")
+
+_LATENCY_WINDOW = 1000
+
+
+class _Pending:
+    __slots__ = ("X", "done", "lead", "result", "error")
+
+    def __init__(self, X: np.ndarray):
+        self.X = X
+        self.done = threading.Event()
+        self.lead = False
+        self.result: Optional[np.ndarray] = None
+        self.error: Optional[BaseException] = None
+
+
+class _Batcher:
+    """
+    Coalesces concurrent explain calls into one explainer call.
+
+    The first caller becomes the leader and explains everything queued so
+    far. Callers arriving meanwhile queue up; when the leader finishes it
+    hands leadership to the oldest queued caller, whose batch is everything
+    that queued up during the previous call. Nobody waits on a timer, so a
+    lone request pays no extra latency.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._queue: List[_Pending] = []
+        self._busy = False
+        self.batches = 0
+        self.batched_rows = 0
+
+    def run(self, X: np.ndarray, compute: Callable[[np.ndarray], np.ndarray]) -> np.ndarray:
+        item = _Pending(X)
+        with self._lock:
+            self._queue.append(item)
+            lead = not self._busy
+            self._busy = True
+        if not lead:
+            item.done.wait()
+        if lead or item.lead:
+            self._lead(compute)
+        if item.error is not None:
+            raise item.error
+        return item.result
+
+    def _lead(self, compute: Callable[[np.ndarray], np.ndarray]) -> None:
+        with self._lock:
+            batch, self._queue = self._queue, []
+        try:
+            out = compute(np.vstack([p.X for p in batch]))
+            start = 0
+            for p in batch:
+                p.result = out[start:start + len(p.X)]
+                start += len(p.X)
+        except BaseException as exc:
+            for p in batch:
+                p.error = exc
+        with self._lock:
+            self.batches += 1
+            self.batched_rows += sum(len(p.X) for p in batch)
+            if self._queue:
+                self._queue[0].lead = True
+                self._queue[0].done.set()
+            else:
+                self._busy = False
+        for p in batch:
+            p.done.set()
+
+
+class _PathContributions:
+    """Saabas contributions per (tree, leaf), precomputed from a LightGBM booster."""
+
+    def __init__(self, booster: Any, n_features: int):
+        trees = booster.dump_model()["tree_info"]
+        self.booster = booster
+        self.table = np.zeros((len(trees), max(t["num_leaves"] for t in trees), n_features))
+        self.bias = 0.0
+        for i, tree in enumerate(trees):
+            root = tree["tree_structure"]
+            if "leaf_index" in root:
+                self.bias += root["leaf_value"]
+                continue
+            self.bias += root["internal_value"]
+            stack = [(root, np.zeros(n_features))]
+            while stack:
+                node, acc = stack.pop()
+                for side in ("left_child", "right_child"):
+                    child = node[side]
+                    is_leaf = "leaf_index" in child
+                    contrib = acc.copy()
+                    contrib[node["split_feature"]] += (
+                        (child["leaf_value"] if is_leaf else child["internal_value"]) - node["internal_value"]
+                    )
+                    if is_leaf:
+                        self.table[i, child["leaf_index"]] = contrib
+                    else:
+                        stack.append((child, contrib))
+        self._trees = np.arange(len(trees))
+
+    def __call__(self, X: np.ndarray) -> np.ndarray:
+        leaves = self.booster.predict(X, pred_leaf=True).astype(np.intp).reshape(len(X), -1)
+        return self.table[self._trees, leaves].sum(axis=1)
+
+
+# ── Process-wide state ───────────────────────────────────────────────────────
+
+_lock = threading.Lock()
+_cache: "OrderedDict[bytes, np.ndarray]" = OrderedDict()
+_explainer: Any = None
+_path_contribs: Optional[_PathContributions] = None
+_batchers = {mode: _Batcher() for mode in MODES}
+_counters = {"calls": 0, "rows": 0, "cache_hits": 0, "cache_misses": 0, "approx_fallbacks": 0}
+_latency_ms: deque = deque(maxlen=_LATENCY_WINDOW)
+
+# Milliseconds spent in explain() by the current request (see request_timer).
+_request_ms: ContextVar[Optional[List[float]]] = ContextVar("shap_request_ms", default=None)
+
+
+def _reset_for(explainer: Any) -> None:
+    """Drop cached state when the explainer is swapped (reload, tests)."""
+    global _explainer, _path_contribs
+    if explainer is not _explainer:
+        _cache.clear()
+        _path_contribs = None
+        _explainer = explainer
+
+
+def _booster(explainer: Any) -> Any:
+    model = getattr(explainer, "model", None)
+    booster = getattr(model, "original_model", None)
+    return booster if hasattr(booster, "dump_model") else None
+
+
+def _exact(explainer: Any, columns: Sequence[str]) -> Callable[[np.ndarray], np.ndarray]:
+    def compute(X: np.ndarray) -> np.ndarray:
+        import pandas as pd   # only needed once an explainer exists
+
+        values = explainer.shap_values(pd.DataFrame(X, columns=columns))
+        if isinstance(values, list):
+            values = values[1]
+        return np.asarray(values)
+    return compute
+
+
+def _approx(explainer: Any, n_features: int) -> Optional[Callable[[np.ndarray], np.ndarray]]:
+    global _path_contribs
+    if _path_contribs is None:
+        booster = _booster(explainer)
+        if booster is None:
+            return None
+        _path_contribs = _PathContributions(booster, n_features)
+    return _path_contribs
+
+
+def _key(row: np.ndarray, mode: str) -> bytes:
+    # + 0.0 folds -0.0 into 0.0 so both hash alike.
+    return mode.encode() + (np.round(row, SHAP_CACHE_DECIMALS) + 0.0).tobytes()
+
+
+def explain(
+    X: np.ndarray,
+    explainer: Any,
+    columns: Sequence[str],
+    mode: Optional[str] = None,
+) -> np.ndarray:
+    """
+    SHAP values (n_rows, n_features) for an engineered feature matrix.
+
+    Rows found in the cache are served from it; the rest go through the
+    batcher as one explainer call. `mode` defaults to settings.SHAP_MODE.
+    "approx" needs a LightGBM-backed TreeExplainer and falls back to
+    "exact" for anything else.
+    """
+    mode = mode or SHAP_MODE
+    if mode not in MODES:
+        raise ValueError(f"Unknown SHAP mode {mode!r}; expected one of {MODES}")
+
+    t0 = time.perf_counter()
+    X = np.asarray(X, dtype=float)
+    out = np.empty_like(X)
+    with _lock:
+        _reset_for(explainer)
+        compute = _approx(explainer, X.shape[1]) if mode == "approx" else None
+        if mode == "approx" and compute is None:
+            _counters["approx_fallbacks"] += 1
+            mode = "exact"
+        keys = [_key(row, mode) for row in X]
+        missing = []
+        for i, key in enumerate(keys):
+            hit = _cache.get(key)
+            if hit is None:
+                missing.append(i)
+            else:
+                _cache.move_to_end(key)
+                out[i] = hit
+        _counters["calls"] += 1
+        _counters["rows"] += len(X)
+        _counters["cache_hits"] += len(X) - len(missing)
+        _counters["cache_misses"] += len(missing)
+
+    if missing:
+        values = _batchers[mode].run(X[missing], compute or _exact(explainer, columns))
+        out[missing] = values
+        with _lock:
+            for i, row in zip(missing, values):
+                _cache[keys[i]] = row.copy()
+                _cache.move_to_end(keys[i])
+            while len(_cache) > SHAP_CACHE_SIZE:
+                _cache.popitem(last=False)
+
+    elapsed_ms = (time.perf_counter() - t0) * 1000
+    _latency_ms.append(elapsed_ms)
+    spent = _request_ms.get()
+    if spent is not None:
+        spent.append(elapsed_ms)
+    return out
+
+
+@contextmanager
+def request_timer() -> Iterator[List[float]]:
+    """
+    Collect the milliseconds every explain() call inside the block spends.
+
+        with shap_engine.request_timer() as spent:
+            ...
+        shap_ms = sum(spent)
+    """
+    spent: List[float] = []
+    token = _request_ms.set(spent)
+    try:
+        yield spent
+    finally:
+        _request_ms.reset(token)
+
+
+def stats() -> Dict[str, Any]:
+    """Counters and latency percentiles for /api/system/status."""
+    with _lock:
+        counters = dict(_counters)
+        cache_size = len(_cache)
+    samples = np.asarray(_latency_ms) if _latency_ms else np.zeros(1)
+    batches = sum(b.batches for b in _batchers.values())
+    batched_rows = sum(b.batched_rows for b in _batchers.values())
+    lookups = counters["cache_hits"] + counters["cache_misses"]
+    return {
+        "mode": SHAP_MODE,
+        **counters,
+        "cache_size": cache_size,
+        "cache_capacity": SHAP_CACHE_SIZE,
+        "cache_hit_rate": round(counters["cache_hits"] / lookups, 3) if lookups else 0.0,
+        "explainer_calls": batches,
+        "avg_rows_per_explainer_call": round(batched_rows / batches, 2) if batches else 0.0,
+        "latency_ms": {
+            "p50": round(float(np.percentile(samples, 50)), 3),
+            "p95": round(float(np.percentile(samples, 95)), 3),
+            "max": round(float(samples.max()), 3),
+        },
+    }
+
+
+def clear_cache() -> None:
+    with _lock:
+        _cache.clear()
@@ -0,0 +1,146 @@
+"""
+Request-scoped loader for the documents one student's pages are built from.
+
+/dashboard, /courses, /courses/{id}/performance and /courses/{id}/insights
+each re-read the same few documents — the feature vector, the gradebook in
+the raw payload, every student_metrics row and the stored ml_results —
+several times per call, and the frontend calls all of them per page load.
+
+A StudentContext fetches each source at most once and keeps it for the rest
+of the request:
+
+    features     feature_vectors.features
+    grades       raw_moodle_payload_collection.grades
+    metrics      student_metrics rows (all courses plus _overall)
+    ml_results   ml_results rows, matched to the feature hash on use
+
+Sync callers (the existing endpoints) load sources lazily on first access.
+GET /me/snapshot awaits preload() instead, which reads all four concurrently
+on the async client before the page is computed. Either way, `timings` holds
+each source's fetch time in ms for the Server-Timing header and the snapshot
+payload.
+"""
+
+import asyncio
+import time
+from typing import Any, Dict, List, Optional
+
+from app.config import database
+from app.config.database import feature_vectors_collection, raw_moodle_payload_collection
+from app.repositories import metrics_repository, ml_result_repository
+from app.repositories.aio import metrics_repository as aio_metrics_repository
+from app.repositories.aio import ml_result_repository as aio_ml_result_repository
+from app.services import feature_pipeline
+
+SOURCES = ("features", "grades", "metrics", "ml_results")
+
+
+class StudentContext:
+    """One student's documents, each read at most once per request."""
+
+    def __init__(self, user_id: str):
+        self.user_id = str(user_id)
+        self.timings: Dict[str, float] = {}
+        self._data: Dict[str, Any] = {}
+        self._feature_hash: Optional[str] = None
+
+    # ── Sync (lazy) ─────────────────────────────────────────────────────────
+
+    def _load(self, source: str) -> Any:
+        if source not in self._data:
+            t0 = time.perf_counter()
+            self._data[source] = getattr(self, f"_fetch_{source}")()
+            self.timings[source] = round((time.perf_counter() - t0) * 1000, 3)
+        return self._data[source]
+
+    def _fetch_features(self) -> Dict[str, Any]:
+        doc = feature_vectors_collection.find_one({"academiq_user_id": self.user_id}, {"features": 1})
+        return (doc or {}).get("features", {}) or {}
+
+    def _fetch_grades(self) -> List[Dict[str, Any]]:
+        doc = raw_moodle_payload_collection.find_one({"academiq_user_id": self.user_id}, {"grades": 1})
+        return (doc or {}).get("grades", []) or []
+
+    def _fetch_metrics(self) -> List[Dict[str, Any]]:
+        return metrics_repository.list_for_user(self.user_id)
+
+    def _fetch_ml_results(self) -> List[Dict[str, Any]]:
+        return ml_result_repository.list_for_user(self.user_id)
+
+    # ── Async (all sources at once) ─────────────────────────────────────────
+
+    async def _timed(self, source: str, coro) -> None:
+        t0 = time.perf_counter()
+        self._data[source] = await coro
+        self.timings[source] = round((time.perf_counter() - t0) * 1000, 3)
+
+    async def _afetch_features(self) -> Dict[str, Any]:
+        doc = await database.get_async_db()["feature_vectors"].find_one(
+            {"academiq_user_id": self.user_id}, {"features": 1}
+        )
+        return (doc or {}).get("features", {}) or {}
+
+    async def _afetch_grades(self) -> List[Dict[str, Any]]:
+        doc = await database.get_async_db()["raw_moodle_payload_collection"].find_one(
+            {"academiq_user_id": self.user_id}, {"grades": 1}
+        )
+        return (doc or {}).get("grades", []) or []
+
+    async def preload(self) -> "StudentContext":
+        """Fetch every source not yet loaded, concurrently."""
+        fetchers = {
+            "features": self._afetch_features,
+            "grades": self._afetch_grades,
+            "metrics": lambda: aio_metrics_repository.list_for_user(self.user_id),
+            "ml_results": lambda: aio_ml_result_repository.list_for_user(self.user_id),
+        }
+        t0 = time.perf_counter()
+        await asyncio.gather(*(
+            self._timed(source, fetch()) for source, fetch in fetchers.items() if source not in self._data
+        ))
+        self.timings["preload"] = round((time.perf_counter() - t0) * 1000, 3)
+        return self
+
+    # ── Accessors ───────────────────────────────────────────────────────────
+
+    @property
+    def features(self) -> Dict[str, Any]:
+        return self._load("features")
+
+    @property
+    def grades(self) -> List[Dict[str, Any]]:
+        return self._load("grades")
+
+    @property
+    def metrics(self) -> List[Dict[str, Any]]:
+        return self._load("metrics")
+
+    def metric(self, course_id: str) -> Optional[Dict[str, Any]]:
+        """The student_metrics row for one course, or None."""
+        for doc in self.metrics:
+            if doc.get("course_id") == str(course_id):
+                return doc
+        return None
+
+    def stored(self, model_name: str, artifact_version: str) -> Optional[Dict[str, Any]]:
+        """
+        The ml_results prediction for `model_name`, only if scored from the
+        current features by the `artifact_version` model artifact.
+        """
+        features = self.features
+        if not features:
+            return None
+        if self._feature_hash is None:
+            self._feature_hash = feature_pipeline.feature_hash(features, feature_pipeline.RAW_COLUMNS)
+        for doc in self._load("ml_results"):
+            if (
+                doc.get("model_name") == model_name
+                and doc.get("feature_hash") == self._feature_hash
+                and doc.get("artifact_version") == artifact_version
+            ):
+                return doc.get("prediction")
+        return None
+
+    def server_timing(self) -> str:
+        """The fetch timings as a Server-Timing header value."""
+        return ", ".join(f"{source};dur={ms:.2f}" for source, ms in self.timings.items())
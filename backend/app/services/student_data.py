@@ -8,15 +8,23 @@ models — predictedGrade, performance status, burnout, ranked risk factors —
 computed as transparent HEURISTICS from the student's latest feature vector and
 flagged with `heuristic: True`. Once the ML routes are mounted (Python 3.11/3.12
 venv), these can be swapped for real model output / `ml_results`.
+
+Every page builder takes an optional StudentContext (services/student_context.py)
+so the documents it reads are fetched once per request; get_snapshot builds
+the whole page from one preloaded context.
 """
 
+import time
 from typing import Any, Dict, List, Optional
 
 from app.config.database import (
     feature_vectors_collection,
     raw_moodle_payload_collection,
 )
-from app.repositories import material_repository, metrics_repository
+from app.repositories import material_repository, metrics_repository, ml_result_repository
+from app.services import feature_pipeline, inference_pool, prediction_cache, scoring_queue
+from app.services.student_context import StudentContext
+from app.services.scoring_queue import BURNOUT_MODEL, GRADE_MODEL, PERFORMANCE_MODEL
 from app.services.moodle_ingest import is_real_course
 
 _OVERALL = metrics_repository.OVERALL
@@ -104,16 +112,51 @@ _PERF_FEATURES = [
 ]
 
 
-def _predict(features: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+def _stored(
+    user_id: Optional[str],
+    model_name: str,
+    features: Dict[str, Any],
+    ctx: Optional[StudentContext] = None,
+) -> Optional[Dict[str, Any]]:
+    """
+    The ml_results prediction scored at ingest (scoring_queue) for exactly
+    these features by the model artifact loaded now.
+    """
+    if not user_id or not features:
+        return None
+    try:
+        version = scoring_queue.artifact_version(model_name)
+        if ctx is not None:
+            return ctx.stored(model_name, version)
+        fhash = feature_pipeline.feature_hash(features, feature_pipeline.RAW_COLUMNS)
+        return ml_result_repository.get_current(user_id, model_name, fhash, version)
+    except Exception:
+        return None
+
+
+def _predict(
+    features: Dict[str, Any],
+    user_id: Optional[str] = None,
+    ctx: Optional[StudentContext] = None,
+) -> Optional[Dict[str, Any]]:
     """Run the real performance model if its deps are installed; else None.
 
+    With `user_id`, the result scored at ingest time is served when it is
+    current, and the model only runs when it isn't.
+
     Lazy import so the API still boots (on heuristics) when the ML stack isn't
     available (e.g. Python 3.14 without scikit-learn/shap wheels).
     """
+    stored = _stored(user_id, PERFORMANCE_MODEL, features, ctx)
+    if stored:
+        return stored
     try:
-        from app.services.performance_predict import predict_performance
+        from app.services import performance_predict
         raw = {k: features.get(k, 0) for k in _PERF_FEATURES}
-        return predict_performance(raw)
+        return prediction_cache.cached(
+            PERFORMANCE_MODEL, performance_predict.artifact_version(), features,
+            lambda: inference_pool.call(performance_predict.predict_performance, raw),
+        )
     except ImportError:
         return None
     except Exception as exc:
@@ -122,55 +165,67 @@ def _predict(features: Dict[str, Any]) -> Optional[Dict[str, Any]]:
         return None
 
 
-def _predict_grade(features: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+def _predict_grade(
+    features: Dict[str, Any],
+    user_id: Optional[str] = None,
+    ctx: Optional[StudentContext] = None,
+) -> Optional[Dict[str, Any]]:
     """Grade + risk cluster from the clustering/grade model, or None if offline.
 
     Scale handling lives in risk_grade_service (live scores are 0-1, model
-    trained on 0-100).
+    trained on 0-100). `user_id` serves the ingest-time result, as in _predict.
     """
+    stored = _stored(user_id, GRADE_MODEL, features, ctx)
+    if stored:
+        return stored
     try:
         from app.services import risk_grade_service
-        return risk_grade_service.predict(features)
+        return prediction_cache.cached(
+            GRADE_MODEL, risk_grade_service.artifact_version(), features,
+            lambda: inference_pool.call(risk_grade_service.predict, features),
+        )
     except Exception:
         return None
 
 
-def _burnout(features: Dict[str, Any]) -> Optional[Dict[str, Any]]:
-    """Burnout level from the trained model, or None if offline (heuristic used)."""
+def _burnout(
+    features: Dict[str, Any],
+    user_id: Optional[str] = None,
+    ctx: Optional[StudentContext] = None,
+) -> Optional[Dict[str, Any]]:
+    """Burnout level from the trained model, or None if offline (heuristic used).
+
+    `user_id` serves the ingest-time result, as in _predict.
+    """
+    stored = _stored(user_id, BURNOUT_MODEL, features, ctx)
+    if stored:
+        return stored
     try:
         from app.services import burnout_service
-        return burnout_service.predict(features)
+        return prediction_cache.cached(
+            BURNOUT_MODEL, burnout_service.artifact_version(), features,
+            lambda: inference_pool.call(burnout_service.predict, features),
+        )
     except Exception:
         return None
 
 
-def _store_prediction(user_id: str, result: Dict[str, Any]) -> None:
-    """Persist the latest model output to ml_results (one per user+model)."""
+def _store_prediction(user_id: str, result: Dict[str, Any], features: Dict[str, Any]) -> None:
+    """Persist a performance output scored on the read path (ingest-time
+    scoring was deferred or hasn't run yet) to ml_results and the history."""
     try:
-        from datetime import datetime
-        from app.config.database import ml_results_collection
-        now = datetime.utcnow()
-        ml_results_collection.update_one(
-            {"academiq_user_id": user_id, "model_name": "performance_model_v4"},
-            {
-                "$set": {
-                    "academiq_user_id": user_id,
-                    "model_name": "performance_model_v4",
-                    "prediction": result,
-                    "updated_at": now,
-                },
-                "$setOnInsert": {"created_at": now},
-            },
-            upsert=True,
-        )
+        from app.services import prediction_history
+        scoring_queue.store_predictions(user_id, {PERFORMANCE_MODEL: result}, features, snapshot=False)
+        prediction_history.record_prediction(user_id, result)
     except Exception:
         pass
 
 
-def get_courses(user_id: str) -> List[Dict[str, Any]]:
+def get_courses(user_id: str, ctx: Optional[StudentContext] = None) -> List[Dict[str, Any]]:
     """The student's courses (derived from their per-course metrics)."""
+    ctx = ctx or StudentContext(user_id)
     courses = []
-    for m in metrics_repository.list_for_user(user_id):
+    for m in ctx.metrics:
         cid = m.get("course_id")
         if cid == _OVERALL:
             continue
@@ -183,8 +238,8 @@ def get_courses(user_id: str) -> List[Dict[str, Any]]:
     return courses
 
 
-def _course_obj(user_id: str, course_id: str) -> Dict[str, Any]:
-    m = metrics_repository.get(user_id, course_id) or {}
+def _course_obj(ctx: StudentContext, course_id: str) -> Dict[str, Any]:
+    m = ctx.metric(course_id) or {}
     name = _clean_course_name((m.get("metrics") or {}).get("course_name"))
     return {"id": course_id, "name": name, "code": _course_code(name, course_id)}
 
@@ -201,9 +256,10 @@ def get_materials(course_id: str) -> List[Dict[str, Any]]:
     return out
 
 
-def get_performance(user_id: str, course_id: str) -> Dict[str, Any]:
-    metrics = (metrics_repository.get(user_id, course_id) or {}).get("metrics", {}) or {}
-    grades  = _grades(user_id)
+def get_performance(user_id: str, course_id: str, ctx: Optional[StudentContext] = None) -> Dict[str, Any]:
+    ctx     = ctx or StudentContext(user_id)
+    metrics = (ctx.metric(course_id) or {}).get("metrics", {}) or {}
+    grades  = ctx.grades
 
     # ── Course-specific grade averages (from the real Moodle gradebook) ────
     course_avg  = _avg_percentage(grades, course_id) or 0.0
@@ -211,9 +267,9 @@ def get_performance(user_id: str, course_id: str) -> Dict[str, Any]:
     assign_avg  = _avg_percentage(grades, course_id, "assignment") or 0.0
 
     # ── Run global behavioural models ──────────────────────────────────────
-    feats      = _latest_features(user_id)
-    perf       = _predict(feats)        # LightGBM classifier → probability
-    grade_pred = _predict_grade(feats)  # grade regressor + risk cluster
+    feats      = ctx.features
+    perf       = _predict(feats, user_id, ctx)        # LightGBM classifier → probability
+    grade_pred = _predict_grade(feats, user_id, ctx)  # grade regressor + risk cluster
     used_model = bool(perf or grade_pred)
     risk_level = grade_pred.get("risk_level") if grade_pred else None
 
@@ -247,7 +303,7 @@ def get_performance(user_id: str, course_id: str) -> Dict[str, Any]:
     weekly_hours  = round(total_hours / 16, 1)
 
     return {
-        "course":         _course_obj(user_id, course_id),
+        "course":         _course_obj(ctx, course_id),
         "predictedGrade": predicted,          # None when no data — frontend handles this
         "status":         status,
         "statusScope":    status_scope,
@@ -277,13 +333,17 @@ def get_performance(user_id: str, course_id: str) -> Dict[str, Any]:
     }
 
 
-def get_insights(user_id: str, course_id: str) -> Dict[str, Any]:
-    feats = _latest_features(user_id)
+def get_insights(user_id: str, course_id: str, ctx: Optional[StudentContext] = None) -> Dict[str, Any]:
+    ctx   = ctx or StudentContext(user_id)
+    feats = ctx.features
 
     # --- Real model path: SHAP-driven risk factors + recommendations --------
-    result = _predict(feats)
+    result = _stored(user_id, PERFORMANCE_MODEL, feats, ctx)
+    if result is None:
+        result = _predict(feats)
+        if result:
+            _store_prediction(user_id, result, feats)
     if result:
-        _store_prediction(user_id, result)
         recs = result.get("recommendations", []) or []
         shaps = [abs(r.get("shap_impact") or 0) for r in recs] or [0]
         mx = max(shaps) or 1
@@ -303,7 +363,7 @@ def get_insights(user_id: str, course_id: str) -> Dict[str, Any]:
         if note:
             summary += f" {note}"
         return {
-            "course": _course_obj(user_id, course_id),
+            "course": _course_obj(ctx, course_id),
             "isHighPerformer": prob >= 0.5,
             "classificationSummary": summary.strip(),
             "riskFactors": model_factors,
@@ -311,7 +371,7 @@ def get_insights(user_id: str, course_id: str) -> Dict[str, Any]:
         }
 
     # --- Heuristic fallback (no ML stack installed) -------------------------
-    course_avg = _avg_percentage(_grades(user_id), course_id) or 0.0
+    course_avg = _avg_percentage(ctx.grades, course_id) or 0.0
     is_high = course_avg >= 75
 
     factors = []
@@ -331,7 +391,7 @@ def get_insights(user_id: str, course_id: str) -> Dict[str, Any]:
         "Your engagement/score signals suggest room to improve in this course. The factors below have the most impact."
     )
     return {
-        "course": _course_obj(user_id, course_id),
+        "course": _course_obj(ctx, course_id),
         "isHighPerformer": is_high,
         "classificationSummary": summary,
         "riskFactors": factors,
@@ -339,11 +399,12 @@ def get_insights(user_id: str, course_id: str) -> Dict[str, Any]:
     }
 
 
-def get_dashboard(user: Dict[str, Any]) -> Dict[str, Any]:
+def get_dashboard(user: Dict[str, Any], ctx: Optional[StudentContext] = None) -> Dict[str, Any]:
     user_id = str(user["_id"])
-    feats   = _latest_features(user_id)
-    grades  = _grades(user_id)
-    courses = get_courses(user_id)
+    ctx     = ctx or StudentContext(user_id)
+    feats   = ctx.features
+    grades  = ctx.grades
+    courses = get_courses(user_id, ctx)
 
     # ── Average score: real gradebook first, fall back to feature vector ───
     overall_avg = _avg_percentage(grades)
@@ -371,7 +432,7 @@ def get_dashboard(user: Dict[str, Any]) -> Dict[str, Any]:
     # ── Study-time trend: use per-course total_time_spent_seconds ─────────
     # Sum real seconds from student_metrics so the chart isn't fabricated.
     total_seconds = 0
-    for m in metrics_repository.list_for_user(user_id):
+    for m in ctx.metrics:
         if m.get("course_id") == _OVERALL:
             continue
         if not is_real_course(m.get("course_id"), (m.get("metrics") or {}).get("course_name")):
@@ -387,7 +448,7 @@ def get_dashboard(user: Dict[str, Any]) -> Dict[str, Any]:
     ]
 
     # ── Burnout: real model if available, else heuristic ───────────────────
-    burnout = _burnout(feats)
+    burnout = _burnout(feats, user_id, ctx)
     if burnout:
         level, msg = burnout["level"], burnout["message"]
     else:
@@ -415,4 +476,32 @@ def get_dashboard(user: Dict[str, Any]) -> Dict[str, Any]:
         "studyTime": study_time,
         "burnout":   {"level": level, "message": msg},
         "heuristic": True,
-    }
\ No newline at end of file
+    }
+
+
+def get_snapshot(user: Dict[str, Any], course_id: Optional[str], ctx: StudentContext) -> Dict[str, Any]:
+    """
+    Dashboard, courses and (for `course_id`) performance + insights in one
+    payload, all computed from one StudentContext so each source is read once.
+    """
+    user_id = str(user["_id"])
+    compute: Dict[str, float] = {}
+
+    def timed(name: str, fn, *args):
+        t0 = time.perf_counter()
+        out = fn(*args)
+        compute[name] = round((time.perf_counter() - t0) * 1000, 3)
+        return out
+
+    snapshot = {
+        "dashboard": timed("dashboard", get_dashboard, user, ctx),
+        "courses": timed("courses", get_courses, user_id, ctx),
+        "courseId": course_id,
+        "performance": None,
+        "insights": None,
+    }
+    if course_id:
+        snapshot["performance"] = timed("performance", get_performance, user_id, course_id, ctx)
+        snapshot["insights"] = timed("insights", get_insights, user_id, course_id, ctx)
+    snapshot["timings"] = {"fetch_ms": dict(ctx.timings), "compute_ms": compute}
+    return snapshot
@@ -10,32 +10,27 @@ Algorithm (see recommend()):
     1. POOL    co-enrolled, opted-in, != target
     2. TIER    same risk cluster + the next-better one      (skipped if no model)
     3. OFFSET  0..+DELTA_MAX grade points ahead of target   (skipped if no grades)
-    4. RANK    by behavioural distance (study-style), standardised within the pool
+    4. RANK    by behavioural distance (study-style), standardised over the course
     5. RELAX   if fewer than k survive, loosen OFFSET then TIER (never randoms)
     6. RETURN  top k as {studentId, fullName, why} — grades are NEVER exposed
 
-Data sources (already populated by the extension sync):
-    co-enrolment  -> student_metrics            (metrics_repository)
-    study pattern -> feature_vectors.features    (student_data._latest_features)
+Candidates come from the per-course index in services/study_buddy_index.py
+(behaviour matrix, course grade, risk cluster, opt-in), so a request is a
+vectorized filter plus a nearest-neighbour query (services/neighbour_search.py)
+restricted to the rows that pass it.
+The index is built from:
+    co-enrolment  -> student_metrics
+    study pattern -> feature_vectors.features
     performance   -> raw_moodle_payload.grades   (student_data._avg_percentage)
     risk cluster  -> models/grade_Risk_Model/risk_grade_model.pkl (optional)
-    identity/opt-in -> users                     (user_repository)
+    identity/opt-in -> users
 """
 
-from typing import Any, Dict, List, Optional
+from typing import Any, Dict, List
 
 import numpy as np
 
-from app.repositories import metrics_repository, user_repository
-from app.services import risk_grade_service, student_data
-
-# Behavioural signals used for study-style distance.
-_BEHAVIOUR = [
-    "all_clicks", "active_days", "access_frequency", "material_clicks",
-    "avg_quiz_score", "quiz_attempts", "avg_assignment_score",
-    "assignment_submissions", "total_time_spent",
-    "procrastination_index", "late_submission_count",
-]
+from app.services import risk_grade_service, study_buddy_index
 
 _RISK_RANK = {"High Risk": 0, "Medium Risk": 1, "Low Risk": 2}
 DELTA_MIN, DELTA_MAX = 0.0, 15.0   # a buddy should be 0-15 grade points ahead
@@ -51,44 +46,10 @@ def _allowed_clusters(cluster: int) -> List[int]:
     return [c for c, label in rmap.items() if _RISK_RANK.get(label, 0) in wanted]
 
 
-# ── Candidate assembly ───────────────────────────────────────────────────────
-
-def _candidate(user_id: str, course_id: str) -> Optional[Dict[str, Any]]:
-    feats = student_data._latest_features(user_id)
-    if not feats:
-        return None
-    user = user_repository.find_by_id(user_id)
-    if not user:
-        return None
-    grade = student_data._avg_percentage(student_data._grades(user_id), course_id)
-    return {
-        "user_id": user_id,
-        "name": user.get("full_name") or "Student",
-        "email": user.get("email", ""),
-        "optin": bool(user.get("study_buddy_optin", False)),
-        "vec": np.array([float(feats.get(c, 0) or 0) for c in _BEHAVIOUR]),
-        "grade": grade,                      # may be None when no grades yet
-        "cluster": risk_grade_service.cluster_of(feats),   # None when model offline
-    }
-
-
-def _rank_by_distance(target: Dict[str, Any], cands: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
-    """Closest study-style first, using z-scores computed within this pool so
-    distance is meaningful regardless of raw feature scales."""
-    if not cands:
-        return []
-    M = np.vstack([target["vec"]] + [c["vec"] for c in cands]).astype(float)
-    mu, sd = M.mean(0), M.std(0)
-    sd[sd == 0] = 1.0
-    Z = (M - mu) / sd
-    dists = np.linalg.norm(Z[1:] - Z[0], axis=1)
-    return [cands[i] for i in np.argsort(dists)]
-
-
-def _why(target: Dict[str, Any], cand: Dict[str, Any]) -> str:
-    if target["grade"] is not None and cand["grade"] is not None:
+def _why(target_grade: float, cand_grade: float) -> str:
+    if not np.isnan(target_grade) and not np.isnan(cand_grade):
         return ("similar study style, a bit ahead"
-                if cand["grade"] - target["grade"] > 0
+                if cand_grade - target_grade > 0
                 else "similar level & study style")
     return "similar study style"
 
@@ -96,42 +57,46 @@ def _why(target: Dict[str, Any], cand: Dict[str, Any]) -> str:
 # ── Public entry point ───────────────────────────────────────────────────────
 
 def recommend(target_user_id: str, course_id: str, k: int = 5) -> Dict[str, Any]:
-    target = _candidate(target_user_id, course_id)
-    if not target:
+    index = study_buddy_index.get(course_id)
+    t = index.row(target_user_id)
+    if t is None:
         return {"available": False,
                 "reason": "No behavioural data for you in this course yet — sync the extension first.",
                 "buddies": []}
 
-    ids = [i for i in metrics_repository.list_user_ids_for_course(course_id)
-           if i and i != target_user_id]
-    cands = [c for c in (_candidate(i, course_id) for i in ids) if c and c["optin"]]
-    if not cands:
+    # 1) pool: opted-in classmates
+    cands = index.optin.copy()
+    cands[t] = False
+    if not cands.any():
         return {"available": True, "buddies": [],
                 "reason": "No opted-in classmates are available in this course yet."}
 
     # 2) tier filter (only when clusters are available)
-    if target["cluster"] is not None:
-        allowed = _allowed_clusters(target["cluster"])
-        cands = [c for c in cands if c["cluster"] in allowed] or cands
+    if index.cluster[t] >= 0:
+        tiered = cands & np.isin(index.cluster, _allowed_clusters(int(index.cluster[t])))
+        if tiered.any():
+            cands = tiered
 
     # 3) near-peer offset + 5) progressive relaxation (only when grades known)
     pool = cands
-    if target["grade"] is not None:
-        ahead = [c for c in cands if c["grade"] is not None
-                 and DELTA_MIN <= (c["grade"] - target["grade"]) <= DELTA_MAX]
-        if len(ahead) >= k:
+    target_grade = index.grade[t]
+    if not np.isnan(target_grade):
+        graded = ~np.isnan(index.grade)
+        diff = np.where(graded, index.grade - target_grade, 0.0)
+        ahead = cands & graded & (diff >= DELTA_MIN) & (diff <= DELTA_MAX)
+        if ahead.sum() >= k:
             pool = ahead
         else:  # relax: allow roughly-equal peers, never clearly-weaker ones
-            pool = [c for c in cands
-                    if c["grade"] is None or (c["grade"] - target["grade"]) >= -2] or cands
+            relaxed = cands & (~graded | (diff >= -2))
+            pool = relaxed if relaxed.any() else cands
 
     # 4) rank by study-style distance, take top k
-    picks = _rank_by_distance(target, pool)[:k]
+    picks = index.nearest(t, pool, k)
     return {
         "available": True,
         "buddies": [
-            {"studentId": p["user_id"], "fullName": p["name"],
-             "email": p["email"], "why": _why(target, p)}
+            {"studentId": index.user_ids[p], "fullName": index.names[p],
+             "email": index.emails[p], "why": _why(target_grade, index.grade[p])}
             for p in picks
         ],
     }
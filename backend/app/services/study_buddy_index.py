@@ -0,0 +1,236 @@
+"""
+Per-course candidate index for the study-buddy recommender.
+
+study_buddy.recommend used to assemble every classmate on every request. For
+each one it read the feature vector, the user and the whole raw payload (for
+grades) and ran the risk-cluster model: four round trips plus inference per
+student per click.
+
+A CourseIndex holds, for every co-enrolled student with a feature vector:
+
+    X        n x len(BEHAVIOUR) float matrix of behavioural features
+    grade    course grade average (NaN when no grades yet)
+    cluster  risk cluster (-1 when the model is offline)
+    optin    study_buddy_optin flag (only opted-in rows are recommendable)
+
+plus user ids, names and emails. The course-wide standardisation of X (mean
+and std per feature) is kept with it, together with Z = (X - mean) / std and
+the neighbour-search structure over Z (services/neighbour_search.py), so a
+query never re-normalises the pool. Both are recomputed whenever rows change.
+Non-opted-in rows stay in the index because
+the requesting student may not be opted in, and a student may opt in later.
+
+Building a course costs two queries, however large it is: one aggregation
+over student_metrics with $lookup into feature_vectors and the raw payload
+(grades filtered to the course server-side), and one users read by _id
+($lookup can't join users: their _id is an ObjectId and academiq_user_id a
+string). Clusters for the whole course come from one batched
+risk_grade_service.predict_many call.
+
+Updates are incremental. note_changed(user_id) is called on sync (new
+features or course list) and on opt-in changes. It only records the change.
+The next get() for a course re-reads just the changed students with the same
+two queries, restricted by $in, and replaces, appends or drops their rows.
+Each index is also rebuilt after STUDY_BUDDY_INDEX_TTL_SECONDS, which bounds
+staleness for changes made in another worker process.
+"""
+
+import threading
+import time
+from typing import Any, Dict, List, Optional, Sequence
+
+import numpy as np
+
+from app.config.database import (
+    feature_vectors_collection,
+    raw_moodle_payload_collection,
+    student_metrics_collection,
+    users_collection,
+)
+from app.config.settings import STUDY_BUDDY_INDEX_TTL_SECONDS
+from app.repositories.user_repository import _oid
+from app.services import neighbour_search, risk_grade_service, student_data
+
+# Behavioural signals used for study-style distance.
+BEHAVIOUR = [
+    "all_clicks", "active_days", "access_frequency", "material_clicks",
+    "avg_quiz_score", "quiz_attempts", "avg_assignment_score",
+    "assignment_submissions", "total_time_spent",
+    "procrastination_index", "late_submission_count",
+]
+
+_lock = threading.Lock()
+_indexes: Dict[str, "CourseIndex"] = {}
+_changed: Dict[str, int] = {}     # user id -> sequence number of its last change
+_seq = 0
+_counters = {"builds": 0, "refreshes": 0, "refreshed_rows": 0}
+
+
+class CourseIndex:
+    """Candidate rows of one course as parallel NumPy arrays."""
+
+    def __init__(self, course_id: str, rows: List[Dict[str, Any]], seq: int):
+        self.course_id = course_id
+        self.seq = seq
+        self.built_at = time.monotonic()
+        self.user_ids: List[str] = [r["user_id"] for r in rows]
+        self.names: List[str] = [r["name"] for r in rows]
+        self.emails: List[str] = [r["email"] for r in rows]
+        self.X = np.array([r["vec"] for r in rows], dtype=float).reshape(len(rows), len(BEHAVIOUR))
+        self.grade = np.array([np.nan if r["grade"] is None else r["grade"] for r in rows], dtype=float)
+        self.cluster = np.array([-1 if r["cluster"] is None else r["cluster"] for r in rows], dtype=int)
+        self.optin = np.array([r["optin"] for r in rows], dtype=bool)
+        self._rows = {uid: i for i, uid in enumerate(self.user_ids)}
+        self.mean = self.X.mean(0) if len(rows) else np.zeros(len(BEHAVIOUR))
+        self.std = self.X.std(0) if len(rows) else np.ones(len(BEHAVIOUR))
+        self.std[self.std == 0] = 1.0
+        self.Z = (self.X - self.mean) / self.std
+        self._searcher: Optional[neighbour_search.BruteForce] = None
+
+    def __len__(self) -> int:
+        return len(self.user_ids)
+
+    def row(self, user_id: str) -> Optional[int]:
+        return self._rows.get(str(user_id))
+
+    def nearest(self, row: int, mask: np.ndarray, k: int) -> np.ndarray:
+        """The k rows allowed by `mask` closest in study style to `row`, nearest first."""
+        if self._searcher is None:
+            self._searcher = neighbour_search.build(self.Z)
+        return self._searcher.query(self.Z[row], k, mask)
+
+    def rows(self) -> List[Dict[str, Any]]:
+        return [
+            {
+                "user_id": uid,
+                "name": self.names[i],
+                "email": self.emails[i],
+                "vec": self.X[i],
+                "grade": None if np.isnan(self.grade[i]) else float(self.grade[i]),
+                "cluster": None if self.cluster[i] < 0 else int(self.cluster[i]),
+                "optin": bool(self.optin[i]),
+            }
+            for i, uid in enumerate(self.user_ids)
+        ]
+
+    def updated(self, user_ids: Sequence[str], fresh: List[Dict[str, Any]], seq: int) -> "CourseIndex":
+        """A copy with the rows of `user_ids` replaced by `fresh` (students no
+        longer eligible drop out). Indexes are never mutated, so a request
+        holding one keeps a consistent view while another refreshes it."""
+        drop = set(user_ids)
+        index = CourseIndex(self.course_id, [r for r in self.rows() if r["user_id"] not in drop] + fresh, seq)
+        index.built_at = self.built_at
+        return index
+
+
+# ── Loading ────────────────────────────────────────────────────────────────────
+
+def _clusters(features: List[Dict[str, Any]]) -> List[Optional[int]]:
+    return [r["risk_cluster"] if r else None for r in risk_grade_service.predict_many(features)]
+
+
+def load_rows(course_id: str, user_ids: Optional[Sequence[str]] = None) -> List[Dict[str, Any]]:
+    """Candidate rows for a course (or only `user_ids` in it), in two queries."""
+    match: Dict[str, Any] = {"course_id": str(course_id)}
+    if user_ids is not None:
+        match["academiq_user_id"] = {"$in": [str(u) for u in user_ids]}
+    docs = list(student_metrics_collection.aggregate([
+        {"$match": match},
+        {"$lookup": {"from": feature_vectors_collection.name, "localField": "academiq_user_id",
+                     "foreignField": "academiq_user_id", "as": "fv"}},
+        {"$lookup": {"from": raw_moodle_payload_collection.name, "localField": "academiq_user_id",
+                     "foreignField": "academiq_user_id", "as": "raw"}},
+        {"$project": {
+            "_id": 0,
+            "academiq_user_id": 1,
+            "features": {"$arrayElemAt": ["$fv.features", 0]},
+            "grades": {"$filter": {
+                "input": {"$ifNull": [{"$arrayElemAt": ["$raw.grades", 0]}, []]},
+                "as": "g",
+                "cond": {"$eq": [{"$toString": "$$g.course_id"}, str(course_id)]},
+            }},
+        }},
+    ]))
+    docs = [d for d in docs if d.get("features")]
+    oids = [o for o in (_oid(d["academiq_user_id"]) for d in docs) if o is not None]
+    users = {
+        str(u["_id"]): u
+        for u in users_collection.find(
+            {"_id": {"$in": oids}}, {"full_name": 1, "email": 1, "study_buddy_optin": 1}
+        )
+    } if oids else {}
+    docs = [d for d in docs if d["academiq_user_id"] in users]
+    clusters = _clusters([d["features"] for d in docs])
+    rows = []
+    for d, cluster in zip(docs, clusters):
+        user = users[d["academiq_user_id"]]
+        feats = d["features"]
+        rows.append({
+            "user_id": d["academiq_user_id"],
+            "name": user.get("full_name") or "Student",
+            "email": user.get("email", ""),
+            "optin": bool(user.get("study_buddy_optin", False)),
+            "vec": [float(feats.get(c, 0) or 0) for c in BEHAVIOUR],
+            "grade": student_data._avg_percentage(d.get("grades") or [], course_id),
+            "cluster": cluster,
+        })
+    return rows
+
+
+# ── Public API ─────────────────────────────────────────────────────────────────
+
+def note_changed(user_id: str) -> None:
+    """A student's features, courses, grades or opt-in changed; refresh their rows on next use."""
+    global _seq
+    with _lock:
+        _seq += 1
+        _changed[str(user_id)] = _seq
+
+
+def get(course_id: str) -> CourseIndex:
+    """The up-to-date index of a course, building or refreshing it as needed."""
+    course_id = str(course_id)
+    with _lock:
+        index = _indexes.get(course_id)
+        seq = _seq
+        stale = index is None or time.monotonic() - index.built_at > STUDY_BUDDY_INDEX_TTL_SECONDS
+        changed = [] if stale else [u for u, s in _changed.items() if s > index.seq]
+    if stale:
+        index = CourseIndex(course_id, load_rows(course_id), seq)
+        with _lock:
+            _indexes[course_id] = index
+            _counters["builds"] += 1
+    elif changed:
+        index = index.updated(changed, load_rows(course_id, changed), seq)
+        with _lock:
+            _indexes[course_id] = index
+            _counters["refreshes"] += 1
+            _counters["refreshed_rows"] += len(changed)
+    with _lock:
+        _prune()
+    return index
+
+
+def _prune() -> None:
+    """Forget changes every loaded index has already applied (unloaded courses build fresh)."""
+    oldest = min((i.seq for i in _indexes.values()), default=_seq)
+    for user_id in [u for u, s in _changed.items() if s <= oldest]:
+        del _changed[user_id]
+
+
+def clear() -> None:
+    global _seq
+    with _lock:
+        _indexes.clear()
+        _changed.clear()
+        _seq = 0
+
+
+def stats() -> Dict[str, Any]:
+    with _lock:
+        return {
+            **_counters,
+            "courses": len(_indexes),
+            "rows": sum(len(i) for i in _indexes.values()),
+            "pending_changes": len(_changed),
+        }
@@ -4,7 +4,8 @@ import importlib
 from datetime import datetime, timezone
 from typing import Any, Dict, Tuple
 
-from app.config.database import client, system_events_collection
+from app.config import database
+from app.config.database import system_events_collection
 from app.config.system_registry import get_registry_snapshot, mark_component
 
 
@@ -37,7 +38,7 @@ def _component(ok: bool, positive: str, negative: str, details: str) -> Dict[str
 
 def _check_mongodb() -> Dict[str, Any]:
     try:
-        client.admin.command("ping")
+        database.ping()
         return _component(
             True,
             "Connected",
@@ -95,6 +96,30 @@ def _check_extension_sync() -> Dict[str, Any]:
         }
 
 
+# Key in the status payload -> (module, stats function). Each is imported on
+# demand; a module that fails to import or report is shown as None.
+_OPTIONAL_STATS: Dict[str, Tuple[str, str]] = {
+    "prediction_cache": ("app.services.prediction_cache", "stats"),
+    "scoring_queue": ("app.services.scoring_queue", "stats"),
+    "inference_pool": ("app.services.inference_pool", "stats"),
+    "mongo_pool": ("app.config.database", "pool_stats"),
+    "auth_cache": ("app.services.auth_cache", "stats"),
+    "expiry_sweeper": ("app.services.expiry_sweeper", "stats"),
+    "study_buddy_index": ("app.services.study_buddy_index", "stats"),
+    "model_registry": ("app.services.model_registry", "stats"),
+    "lazy_imports": ("app.services.lazy_import", "stats"),
+    "timeline_store": ("app.services.timeline_store", "stats"),
+}
+
+
+def _optional_stats(module_path: str, attr: str = "stats") -> Dict[str, Any] | None:
+    """The result of module_path.attr(), or None if the module cannot import or report."""
+    try:
+        return getattr(importlib.import_module(module_path), attr)()
+    except Exception:
+        return None
+
+
 def _check_performance_and_shap() -> Tuple[Dict[str, Any], Dict[str, Any]]:
     try:
         module = importlib.import_module("app.services.performance_predict")
@@ -134,9 +159,12 @@ def _check_performance_and_shap() -> Tuple[Dict[str, Any], Dict[str, Any]]:
         mark_component("performance_model", performance_loaded, performance_details)
         mark_component("shap_explainer", shap_loaded, shap_details)
 
+        shap_component = _component(shap_loaded, "Loaded", "Not ready", shap_details)
+        shap_component["engine"] = _optional_stats("app.services.shap_engine")
+
         return (
             _component(performance_loaded, "Loaded", "Not ready", performance_details),
-            _component(shap_loaded, "Loaded", "Not ready", shap_details),
+            shap_component,
         )
 
     except Exception as exc:
@@ -265,5 +293,6 @@ def get_system_status() -> Dict[str, Any]:
             "heuristic_fallback": heuristic_fallback,
             "checked_at": _now_iso(),
         },
+        **{key: _optional_stats(*source) for key, source in _OPTIONAL_STATS.items()},
         "registry": get_registry_snapshot(),
     }
\ No newline at end of file
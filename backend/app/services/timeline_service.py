@@ -5,10 +5,30 @@ Builds a human-readable, chronological timeline that answers the question:
   "Why did AcademIQ classify me as at risk?"
 
 Data sources (merged in order of richness):
-  1. student_events      — raw Moodle interaction events from the extension
+  1. student_events      — raw Moodle interaction events from the extension,
+                           plus the daily rollups old ones were compacted
+                           into (event_rollup_repository)
   2. grades (raw payload) — assignment/quiz submission records with status/score
   3. ml_results          — stored ML predictions (risk changes)
-  4. student_metrics     — per-course behavioural aggregates for inactivity gaps
+  4. inactivity gaps     — generated from the spacing of (1)
+
+Assembly is pushed down to Mongo where it can be:
+  * the date window and course filter go into every query; student_events is
+    range-scanned on the (academiq_user_id, timestamp) index in date order
+  * only the matching grade records are projected out of the raw payload
+  * the sources are merged lazily (heapq.merge) and the merge stops once
+    `limit` items have been produced, so the event cursor is only read as
+    far as the page needs
+  * summary counts come from a separate $group over student_events that
+    returns one row per (event shape, day) instead of every event, so they
+    stay exact for the whole window without mapping it
+
+Rollups are read as event-shaped documents merged into the event stream by
+their first event's timestamp; each maps to one item counting the events it
+folds in. A rollup keeps the day's first and last timestamps, so inactivity
+gaps come out as they did from the raw events: gaps are found per UTC day,
+from the latest activity of the earlier day (metadata.until for a rollup
+item) to the first of the later one.
 
 Event schema (what the extension actually sends):
   {
@@ -40,10 +60,14 @@ Grade schema (from raw_moodle_payload_collection.grades):
 
 from __future__ import annotations
 
+import base64
 import hashlib
+import heapq
+import json
 import logging
 from datetime import datetime, timedelta, timezone
-from typing import Any
+from itertools import chain, groupby, islice
+from typing import Any, Iterable, Iterator
 
 from app.config.database import (
     ml_results_collection,
@@ -51,6 +75,8 @@ from app.config.database import (
     student_events_collection,
     student_metrics_collection,
 )
+from app.repositories import event_rollup_repository
+from app.services.scoring_queue import PERFORMANCE_MODEL
 
 logger = logging.getLogger(__name__)
 
@@ -62,9 +88,23 @@ _LOW_QUIZ_THRESHOLD = 60.0
 # Consecutive inactive days that trigger an inactivity timeline item
 _INACTIVITY_GAP_DAYS = 3
 
-# Maximum events we pull per query (prevent huge payloads in active students)
+# Maximum events scanned when looking for the last mapped event outside the
+# window (needed to place inactivity gaps that cross the window's edges)
 _MAX_EVENTS = 500
 
+_DAY_MS = 86_400_000
+
+# Event fields that decide how (and whether) an event maps to a timeline item.
+# Events agreeing on all of them map to the same type and severity, so the
+# summary aggregation only needs one representative per shape.
+_EVENT_SHAPE = (
+    "page_type", "action_type", "assignment_submission", "submission_status",
+    "late", "quiz_attempt", "score",
+)
+
+# `before` cursor that pages back from the end of the window
+LATEST = "latest"
+
 
 # ── Public entry-point ─────────────────────────────────────────────────────────
 
@@ -74,124 +114,462 @@ def build_timeline(
     limit: int = 100,
     start_date: datetime | None = None,
     end_date: datetime | None = None,
+    before: str | None = None,
+    after: str | None = None,
 ) -> dict[str, Any]:
     """
-    Return the full Evidence Timeline payload for one student.
+    Return one page of the Evidence Timeline payload for one student.
 
     Args:
         academiq_user_id: The AcademIQ internal user id (from the users collection).
         course_id:        Optional — restrict to a single Moodle course.
-        limit:            Maximum timeline items to return (applied after merge + sort).
+        limit:            Maximum timeline items to return.
         start_date:       Inclusive lower bound for event timestamps.
         end_date:         Inclusive upper bound for event timestamps.
+        before:           Cursor — the `limit` items just before it (LATEST: the
+                          last `limit` items of the window).
+        after:            Cursor — the `limit` items just after it. With neither,
+                          the page starts at the beginning of the window.
+
+    Items are always in chronological order. next_cursor / prev_cursor are the
+    `after` / `before` cursors for the adjacent pages (None when there is
+    nothing more that way). Raises ValueError for a malformed cursor.
 
     Returns a dict matching EvidenceTimelineResponse (see schemas/timeline.py).
     """
-    items: list[dict[str, Any]] = []
+    window = (naive_utc(start_date), naive_utc(end_date))
+    after_key = decode_cursor(after) if after else None
+    before_key = decode_cursor(before) if before and before != LATEST else None
+    backwards = before is not None
+
+    side = _side_items(academiq_user_id, course_id, window)
+    page, next_cursor, prev_cursor = paginate(
+        _merged(academiq_user_id, course_id, window, side, after_key, before_key, backwards),
+        limit, backwards, bool(before_key or after_key),
+    )
 
-    # 1 ── Raw Moodle interaction events ───────────────────────────────────────
+    return {
+        "student_id": academiq_user_id,
+        "course_id": course_id,
+        "timeline": page,
+        "summary": _summary(academiq_user_id, course_id, window, side),
+        "next_cursor": next_cursor,
+        "prev_cursor": prev_cursor,
+    }
+
+
+def iter_timeline(
+    academiq_user_id: str,
+    course_id: str | None = None,
+    start_date: datetime | None = None,
+    end_date: datetime | None = None,
+    after: str | None = None,
+) -> Iterator[dict[str, Any]]:
+    """
+    Every timeline item of the window (after the `after` cursor), oldest
+    first, produced as the merged sources are read — for streaming responses.
+    The cursor is decoded before the first item, so a malformed one raises
+    ValueError on the first next().
+    """
+    window = (naive_utc(start_date), naive_utc(end_date))
+    after_key = decode_cursor(after) if after else None
+    side = _side_items(academiq_user_id, course_id, window)
+    yield from _merged(academiq_user_id, course_id, window, side, after_key, None, False)
+
+
+def timeline_summary(
+    academiq_user_id: str,
+    course_id: str | None = None,
+    start_date: datetime | None = None,
+    end_date: datetime | None = None,
+) -> dict[str, Any]:
+    """The TimelineSummary of the window (what build_timeline returns as "summary")."""
+    window = (naive_utc(start_date), naive_utc(end_date))
+    return _summary(academiq_user_id, course_id, window, _side_items(academiq_user_id, course_id, window))
+
+
+def paginate(
+    items: Iterable[dict[str, Any]],
+    limit: int,
+    backwards: bool,
+    from_cursor: bool,
+) -> tuple[list[dict[str, Any]], str | None, str | None]:
+    """
+    (page, next_cursor, prev_cursor) from items in page-reading order
+    (descending when `backwards`). Reads at most limit + 1 items.
+    """
+    page = list(islice(items, limit + 1))
+    more, page = len(page) > limit, page[:limit]
+    if backwards:
+        page.reverse()
+        prev_cursor = encode_cursor(page[0]) if more else None
+        next_cursor = encode_cursor(page[-1]) if page and from_cursor else None
+    else:
+        next_cursor = encode_cursor(page[-1]) if more else None
+        prev_cursor = encode_cursor(page[0]) if page and from_cursor else None
+    return page, next_cursor, prev_cursor
+
+
+def encode_cursor(item: dict[str, Any]) -> str:
+    """Opaque cursor for a timeline item's (date, id) position."""
+    raw = json.dumps([item["date"].isoformat(), item["id"]], separators=(",", ":"))
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> tuple[datetime, str]:
+    """(date, id) of a cursor from encode_cursor. Raises ValueError if malformed."""
     try:
-        raw_events = _fetch_events(academiq_user_id, course_id)
-        items.extend(_map_events(raw_events))
-    except Exception:
-        logger.exception("timeline: failed to fetch/map student_events for %s", academiq_user_id)
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        date, item_id = json.loads(raw)
+        return datetime.fromisoformat(date), str(item_id)
+    except Exception as exc:
+        raise ValueError(f"invalid timeline cursor: {cursor!r}") from exc
+
+
+# ── Assembly ───────────────────────────────────────────────────────────────────
+
+def _merged(
+    academiq_user_id: str,
+    course_id: str | None,
+    window: tuple[datetime | None, datetime | None],
+    side: list[dict[str, Any]],
+    after_key: tuple[datetime, str] | None,
+    before_key: tuple[datetime, str] | None,
+    backwards: bool,
+) -> Iterator[dict[str, Any]]:
+    """
+    Items strictly between the cursors in (date, id) order (descending when
+    `backwards`). The cursor dates narrow the window the events are
+    range-scanned over; heapq.merge reads the event cursor only as far as the
+    caller consumes.
+    """
+    start, end = window
+    if after_key and (start is None or after_key[0] > start):
+        start = after_key[0]
+    if before_key and (end is None or before_key[0] < end):
+        end = before_key[0]
+    page_window = (start, end)
+
+    events = _event_stream(
+        academiq_user_id, course_id, page_window, _edges(academiq_user_id, course_id, page_window), backwards,
+    )
+    side = _in_window(side, page_window)
+    if backwards:
+        side.reverse()
+    for item in _unique(heapq.merge(events, side, key=_merge_key, reverse=backwards)):
+        key = _merge_key(item)
+        if (after_key and key <= after_key) or (before_key and key >= before_key):
+            continue
+        yield item
+
+
+def _side_items(
+    academiq_user_id: str,
+    course_id: str | None,
+    window: tuple[datetime | None, datetime | None],
+) -> list[dict[str, Any]]:
+    """Grade and ml_results items of the window (both small), in (date, id) order."""
+    items: list[dict[str, Any]] = []
 
-    # 2 ── Grade/submission records from the raw payload ───────────────────────
+    # Grade/submission records from the raw payload
     try:
-        grades = _fetch_grades(academiq_user_id, course_id)
-        items.extend(_map_grades(grades))
+        items.extend(map_grades(_fetch_grades(academiq_user_id, course_id, window)))
     except Exception:
         logger.exception("timeline: failed to fetch/map grades for %s", academiq_user_id)
 
-    # 3 ── ML prediction history (risk changes) ────────────────────────────────
+    # ML prediction history (risk changes)
     try:
-        items.extend(_map_ml_results(academiq_user_id))
+        items.extend(map_ml_results(academiq_user_id, window))
     except Exception:
         logger.exception("timeline: failed to fetch/map ml_results for %s", academiq_user_id)
 
-    # 4 ── Inactivity gap detection from metrics ───────────────────────────────
+    return sorted(_in_window(items, window), key=_merge_key)
+
+
+def _summary(
+    academiq_user_id: str,
+    course_id: str | None,
+    window: tuple[datetime | None, datetime | None],
+    side: list[dict[str, Any]],
+) -> dict[str, Any]:
+    """Summary stats over the whole window: the event aggregation plus the side items."""
     try:
-        items.extend(_detect_inactivity(academiq_user_id, course_id, items))
+        summary = _event_summary(academiq_user_id, course_id, window, _edges(academiq_user_id, course_id, window))
     except Exception:
-        logger.exception("timeline: failed inactivity detection for %s", academiq_user_id)
-
-    # 5 ── Date-range filter ───────────────────────────────────────────────────
-    if start_date:
-        items = [i for i in items if i["date"] >= start_date]
-    if end_date:
-        items = [i for i in items if i["date"] <= end_date]
-
-    # 6 ── Sort chronologically and deduplicate by id ─────────────────────────
-    seen: set[str] = set()
-    unique: list[dict[str, Any]] = []
-    for item in sorted(items, key=lambda x: x["date"]):
-        if item["id"] not in seen:
-            seen.add(item["id"])
-            unique.append(item)
-
-    # 7 ── Apply limit ─────────────────────────────────────────────────────────
-    limited = unique[:limit]
-
-    # 8 ── Summary stats ───────────────────────────────────────────────────────
-    risk_signals = sum(1 for i in unique if i["severity"] in ("warning", "danger"))
-    positive_signals = sum(1 for i in unique if i["severity"] == "positive")
-    last_activity = unique[-1]["date"] if unique else None
-
-    return {
-        "student_id": academiq_user_id,
-        "course_id": course_id,
-        "timeline": limited,
-        "summary": {
-            "total_events": len(unique),
-            "risk_signals": risk_signals,
-            "positive_signals": positive_signals,
-            "last_activity": last_activity,
-        },
-    }
+        logger.exception("timeline: failed to summarise student_events for %s", academiq_user_id)
+        summary = {"total_events": 0, "risk_signals": 0, "positive_signals": 0, "last_activity": None}
+    for item in _unique(side):
+        summary["total_events"] += 1
+        summary["risk_signals"] += item["severity"] in ("warning", "danger")
+        summary["positive_signals"] += item["severity"] == "positive"
+        if summary["last_activity"] is None or item["date"] > summary["last_activity"]:
+            summary["last_activity"] = item["date"]
+    return summary
 
 
 # ── Data fetchers ──────────────────────────────────────────────────────────────
 
-def _fetch_events(
+def _event_query(
     academiq_user_id: str,
     course_id: str | None,
-) -> list[dict[str, Any]]:
-    query: dict[str, Any] = {"academiq_user_id": academiq_user_id}
+    timestamp: dict[str, Any],
+) -> dict[str, Any]:
+    # $type keeps the range scan (and the summary's $divide) on numeric epoch-ms
+    query: dict[str, Any] = {
+        "academiq_user_id": academiq_user_id,
+        "timestamp": {"$type": "number", **timestamp},
+    }
     if course_id:
         query["course_id"] = str(course_id)
-    return list(
-        student_events_collection.find(query)
-        .sort("timestamp", -1)
-        .limit(_MAX_EVENTS)
+    return query
+
+
+def _window_ms(window: tuple[datetime | None, datetime | None]) -> dict[str, Any]:
+    start, end = window
+    bounds: dict[str, Any] = {}
+    if start:
+        bounds["$gte"] = to_ms(start)
+    if end:
+        bounds["$lte"] = to_ms(end, ceil=False)
+    return bounds
+
+
+def _event_stream(
+    academiq_user_id: str,
+    course_id: str | None,
+    window: tuple[datetime | None, datetime | None],
+    edges: tuple[datetime | None, datetime | None],
+    backwards: bool = False,
+) -> Iterator[dict[str, Any]]:
+    """
+    Timeline items for the window's events in (date, id) order, with an
+    inactivity item yielded where each gap falls. Events are read a UTC day
+    at a time and ordered by (date, id) within the day. Reads the cursors
+    lazily, so the merge only pulls as many batches as the page needs.
+    """
+    # Forwards, `last` is the latest activity so far; backwards, the
+    # earliest start of the days already yielded.
+    last = edges[1] if backwards else edges[0]
+    try:
+        events = merged_events(academiq_user_id, course_id, _window_ms(window), -1 if backwards else 1)
+        for _, same_day in groupby(events, key=lambda ev: ev["timestamp"] // _DAY_MS):
+            items = [item for item in map(safe_event_item, same_day) if item]
+            if not items:
+                continue
+            items.sort(key=_merge_key, reverse=backwards)
+            start, end = min(i["date"] for i in items), max(map(item_until, items))
+            gap = _gap_between(academiq_user_id, course_id, last, end if backwards else start, window)
+            if gap:
+                yield gap
+            if backwards:
+                last = start
+            else:
+                last = end if last is None else max(last, end)
+            yield from items
+        gap = _gap_between(academiq_user_id, course_id, last, edges[0] if backwards else edges[1], window)
+        if gap:
+            yield gap
+    except Exception:
+        logger.exception("timeline: failed to fetch/map student_events for %s", academiq_user_id)
+
+
+def merged_events(
+    academiq_user_id: str,
+    course_id: str | None,
+    timestamp: dict[str, Any],
+    direction: int = 1,
+) -> Iterator[dict[str, Any]]:
+    """
+    Raw events and rollups (as event-shaped documents) in `timestamp`'s
+    range, merged in timestamp order (descending when direction is -1).
+    """
+    raw = student_events_collection.find(
+        _event_query(academiq_user_id, course_id, timestamp)
+    ).sort("timestamp", direction)
+    rollups = map(
+        event_rollup_repository.as_event,
+        event_rollup_repository.find(academiq_user_id, course_id, timestamp, direction),
     )
+    return heapq.merge(raw, rollups, key=lambda ev: ev["timestamp"], reverse=direction < 0)
+
+
+def _gap_between(
+    academiq_user_id: str,
+    course_id: str | None,
+    a: datetime | None,
+    b: datetime | None,
+    window: tuple[datetime | None, datetime | None],
+) -> dict[str, Any] | None:
+    """The inactivity item between two event dates (either order), if any and in the window."""
+    if a is None or b is None or a == b:
+        return None
+    gap = inactivity_item(academiq_user_id, course_id, min(a, b), max(a, b))
+    return gap if gap and _in_window([gap], window) else None
+
+
+def _edges(
+    academiq_user_id: str,
+    course_id: str | None,
+    window: tuple[datetime | None, datetime | None],
+) -> tuple[datetime | None, datetime | None]:
+    """
+    The latest activity before / first event after the window, so
+    inactivity gaps that cross its edges are still found.
+    """
+    start, end = window
+    before = after = None
+    try:
+        if start:
+            before = _edge_event_date(academiq_user_id, course_id, {"$lt": to_ms(start)}, -1)
+        if end:
+            after = _edge_event_date(academiq_user_id, course_id, {"$gt": to_ms(end, ceil=False)}, 1)
+    except Exception:
+        logger.exception("timeline: failed to look up window edges for %s", academiq_user_id)
+    return before, after
+
+
+def _edge_event_date(
+    academiq_user_id: str,
+    course_id: str | None,
+    timestamp: dict[str, Any],
+    direction: int,
+) -> datetime | None:
+    """
+    The nearest activity in `timestamp`'s range (scan capped at _MAX_EVENTS):
+    the start of the first day with a mapped event, or (direction -1) the end
+    of the last one.
+    """
+    events = islice(merged_events(academiq_user_id, course_id, timestamp, direction), _MAX_EVENTS)
+    for _, same_day in groupby(events, key=lambda ev: ev["timestamp"] // _DAY_MS):
+        items = [item for item in map(safe_event_item, same_day) if item]
+        if items:
+            return max(map(item_until, items)) if direction < 0 else min(i["date"] for i in items)
+    return None
+
+
+def _event_summary(
+    academiq_user_id: str,
+    course_id: str | None,
+    window: tuple[datetime | None, datetime | None],
+    edges: tuple[datetime | None, datetime | None],
+) -> dict[str, Any]:
+    """
+    Counts for the window's events and inactivity gaps from one aggregation.
+
+    student_events is grouped by (event shape, UTC day), keeping the count and
+    the first/last timestamp of each group. Each shape is mapped once to get
+    its type and severity. A gap of >= _INACTIVITY_GAP_DAYS can only fall
+    between two consecutive active days, and there it runs from the earlier
+    day's last event to the later day's first, so the per-day bounds give
+    exactly the gaps the event stream finds. Rollups are grouped the same
+    way, summing their counts.
+    """
+    pipeline = [
+        {"$match": _event_query(academiq_user_id, course_id, _window_ms(window))},
+        {"$group": {
+            "_id": {
+                **{field: f"${field}" for field in _EVENT_SHAPE},
+                "day": {"$floor": {"$divide": ["$timestamp", _DAY_MS]}},
+            },
+            "count": {"$sum": 1},
+            "first": {"$min": "$timestamp"},
+            "last": {"$max": "$timestamp"},
+        }},
+    ]
+    summary: dict[str, Any] = {"total_events": 0, "risk_signals": 0, "positive_signals": 0, "last_activity": None}
+    days: dict[Any, list[datetime]] = {}
+    groups = chain(
+        student_events_collection.aggregate(pipeline),
+        event_rollup_repository.daily(academiq_user_id, course_id, _window_ms(window)),
+    )
+    for group in groups:
+        shape = {k: v for k, v in group["_id"].items() if k != "day"}
+        item = safe_event_item({**shape, "timestamp": group["last"]})
+        if item is None:
+            continue
+        summary["total_events"] += group["count"]
+        if item["severity"] in ("warning", "danger"):
+            summary["risk_signals"] += group["count"]
+        elif item["severity"] == "positive":
+            summary["positive_signals"] += group["count"]
+        first, last = _parse_timestamp(group["first"]), item["date"]
+        bounds = days.setdefault(group["_id"]["day"], [first, last])
+        bounds[0], bounds[1] = min(bounds[0], first), max(bounds[1], last)
+
+    active = [bounds for _, bounds in sorted(days.items())]
+    if active:
+        summary["last_activity"] = active[-1][1]
+    if edges[0] is not None:
+        active.insert(0, [edges[0], edges[0]])
+    if edges[1] is not None:
+        active.append([edges[1], edges[1]])
+    for prev, nxt in zip(active, active[1:]):
+        gap = _gap_between(academiq_user_id, course_id, prev[1], nxt[0], window)
+        if gap:
+            summary["total_events"] += 1
+            summary["risk_signals"] += gap["severity"] == "warning"
+            if summary["last_activity"] is None or gap["date"] > summary["last_activity"]:
+                summary["last_activity"] = gap["date"]
+    return summary
 
 
 def _fetch_grades(
     academiq_user_id: str,
     course_id: str | None,
+    window: tuple[datetime | None, datetime | None] = (None, None),
 ) -> list[dict[str, Any]]:
-    doc = raw_moodle_payload_collection.find_one({"academiq_user_id": academiq_user_id})
-    if not doc:
-        return []
-    all_grades: list[dict[str, Any]] = doc.get("grades", []) or []
+    """
+    The grade records for a course and window, projected out of the raw
+    payload server-side. submission_time is an ISO string, so the window is
+    compared as text, widened by two days to allow for UTC offsets; callers
+    apply the exact bounds after parsing.
+    """
+    conditions: list[dict[str, Any]] = []
     if course_id:
-        all_grades = [g for g in all_grades if str(g.get("course_id", "")) == str(course_id)]
-    return all_grades
+        conditions.append({"$eq": [{"$toString": "$$g.course_id"}, str(course_id)]})
+    start, end = window
+    if start:
+        conditions.append({"$gte": ["$$g.submission_time", (start - timedelta(days=2)).date().isoformat()]})
+    if end:
+        conditions.append({"$lt": ["$$g.submission_time", (end + timedelta(days=2)).date().isoformat()]})
+
+    grades: Any = {"$ifNull": ["$grades", []]}
+    if conditions:
+        grades = {"$filter": {"input": grades, "as": "g", "cond": {"$and": conditions}}}
+    docs = list(raw_moodle_payload_collection.aggregate([
+        {"$match": {"academiq_user_id": academiq_user_id}},
+        {"$limit": 1},
+        {"$project": {"_id": 0, "grades": grades}},
+    ]))
+    return (docs[0].get("grades") or []) if docs else []
 
 
 # ── Mappers ────────────────────────────────────────────────────────────────────
 
 def _map_events(events: list[dict[str, Any]]) -> list[dict[str, Any]]:
     """Convert raw student_events documents into timeline items."""
-    items: list[dict[str, Any]] = []
-    for ev in events:
-        try:
-            item = _event_to_item(ev)
-            if item:
-                items.append(item)
-        except Exception:
-            logger.debug("timeline: could not map event %s", ev.get("event_id"))
-    return items
+    return [item for item in map(safe_event_item, events) if item]
+
+
+def safe_event_item(ev: dict[str, Any]) -> dict[str, Any] | None:
+    """One student_events document (or daily rollup) as a timeline item; None if unmapped."""
+    try:
+        item = _event_to_item(ev)
+    except Exception:
+        logger.debug("timeline: could not map event %s", ev.get("event_id"))
+        return None
+    if item is not None and ev.get("rollup_count") is not None:
+        _fold_rollup(item, ev)
+    return item
+
+
+def _fold_rollup(item: dict[str, Any], ev: dict[str, Any]) -> None:
+    """Turn the item of a rollup's first event into the item for the whole rollup."""
+    count = ev["rollup_count"]
+    if count > 1:
+        item["label"] += f" ({count} times)"
+    item["metadata"]["count"] = count
+    item["metadata"]["until"] = _parse_timestamp(ev.get("last_timestamp")) or item["date"]
 
 
 def _event_to_item(ev: dict[str, Any]) -> dict[str, Any] | None:
@@ -294,7 +672,7 @@ def _event_to_item(ev: dict[str, Any]) -> dict[str, Any] | None:
     return None
 
 
-def _map_grades(grades: list[dict[str, Any]]) -> list[dict[str, Any]]:
+def map_grades(grades: list[dict[str, Any]]) -> list[dict[str, Any]]:
     """
     Map raw grade records (from raw_moodle_payload) to timeline items.
 
@@ -381,19 +759,25 @@ def _grade_to_item(g: dict[str, Any]) -> dict[str, Any] | None:
     return None
 
 
-def _map_ml_results(academiq_user_id: str) -> list[dict[str, Any]]:
+def map_ml_results(
+    academiq_user_id: str,
+    window: tuple[datetime | None, datetime | None] = (None, None),
+) -> list[dict[str, Any]]:
     """
-    Surface ML prediction records as 'risk_change' timeline items.
+    Surface ML prediction records as 'risk_change' timeline items, oldest first.
 
     We only add a timeline item when a stored prediction exists, using its
     updated_at timestamp. This is the best proxy for "when the system assessed you".
     """
     items: list[dict[str, Any]] = []
-    cursor = ml_results_collection.find(
-        {"academiq_user_id": academiq_user_id},
-        sort=[("updated_at", -1)],
-        limit=5,
-    )
+    query: dict[str, Any] = {"academiq_user_id": academiq_user_id, "model_name": PERFORMANCE_MODEL}
+    start, end = window
+    if start or end:
+        query["updated_at"] = {
+            **({"$gte": start} if start else {}),
+            **({"$lte": end} if end else {}),
+        }
+    cursor = ml_results_collection.find(query, sort=[("updated_at", -1)], limit=5)
     for doc in cursor:
         ts = doc.get("updated_at") or doc.get("created_at")
         if not ts:
@@ -436,6 +820,7 @@ def _map_ml_results(academiq_user_id: str) -> list[dict[str, Any]]:
                 "top_negative_drivers": prediction.get("top_negative_drivers"),
             },
         ))
+    items.sort(key=lambda i: i["date"])
     return items
 
 
@@ -446,33 +831,41 @@ def _detect_inactivity(
 ) -> list[dict[str, Any]]:
     """
     Find gaps of >= _INACTIVITY_GAP_DAYS between consecutive events and
-    emit an inactivity item for each one. We derive this from the metrics
-    snapshot's last_active dates, or from the sorted existing event dates.
+    emit an inactivity item for each one, from the sorted existing event dates.
+    (build_timeline finds the same gaps while streaming events.)
     """
     # Collect all event dates from already-mapped items
     event_dates: list[datetime] = sorted(
         {i["date"] for i in existing_items if i.get("source") == "moodle_event"},
     )
+    gaps = (
+        inactivity_item(academiq_user_id, course_id, prev, nxt)
+        for prev, nxt in zip(event_dates, event_dates[1:])
+    )
+    return [gap for gap in gaps if gap]
 
-    if len(event_dates) < 2:
-        return []
-
-    inactivity_items: list[dict[str, Any]] = []
-    for i in range(1, len(event_dates)):
-        gap = event_dates[i] - event_dates[i - 1]
-        if gap.days >= _INACTIVITY_GAP_DAYS:
-            gap_start = event_dates[i - 1] + timedelta(days=1)
-            item_id = _stable_id(f"inactivity-{academiq_user_id}-{gap_start.isoformat()}")
-            inactivity_items.append(_item(
-                id=f"inact-{item_id}",
-                date=gap_start,
-                label=f"No activity detected for {gap.days} days",
-                item_type="inactivity",
-                severity="warning" if gap.days >= 7 else "neutral",
-                source="generated",
-                metadata={"gap_days": gap.days, "course_id": course_id},
-            ))
-    return inactivity_items
+
+def inactivity_item(
+    academiq_user_id: str,
+    course_id: str | None,
+    prev: datetime,
+    nxt: datetime,
+) -> dict[str, Any] | None:
+    """The inactivity item for the gap between two consecutive event dates, if long enough."""
+    gap = nxt - prev
+    if gap.days < _INACTIVITY_GAP_DAYS:
+        return None
+    gap_start = prev + timedelta(days=1)
+    item_id = _stable_id(f"inactivity-{academiq_user_id}-{gap_start.isoformat()}")
+    return _item(
+        id=f"inact-{item_id}",
+        date=gap_start,
+        label=f"No activity detected for {gap.days} days",
+        item_type="inactivity",
+        severity="warning" if gap.days >= 7 else "neutral",
+        source="generated",
+        metadata={"gap_days": gap.days, "course_id": course_id},
+    )
 
 
 # ── Helpers ────────────────────────────────────────────────────────────────────
@@ -498,6 +891,50 @@ def _item(
     }
 
 
+def _merge_key(item: dict[str, Any]) -> tuple[datetime, str]:
+    """Timeline order — also the position a cursor encodes."""
+    return item["date"], item["id"]
+
+
+def item_until(item: dict[str, Any]) -> datetime:
+    """When the activity behind an item ended: metadata.until for a rollup, else its date."""
+    return (item.get("metadata") or {}).get("until") or item["date"]
+
+
+def _unique(items: Iterable[dict[str, Any]]) -> Iterator[dict[str, Any]]:
+    """
+    Drop repeated ids from items in _merge_key order. Every id embeds its
+    item's date (event_id, submission_time, updated_at, gap start), so
+    repeats are adjacent and memory stays constant however long the stream.
+    """
+    last = None
+    for item in items:
+        if item["id"] != last:
+            last = item["id"]
+            yield item
+
+
+def _in_window(
+    items: list[dict[str, Any]],
+    window: tuple[datetime | None, datetime | None],
+) -> list[dict[str, Any]]:
+    start, end = window
+    return [i for i in items if (not start or i["date"] >= start) and (not end or i["date"] <= end)]
+
+
+def naive_utc(dt: datetime | None) -> datetime | None:
+    """Timeline dates are naive UTC; convert aware query bounds to match."""
+    if dt is not None and dt.tzinfo is not None:
+        return dt.astimezone(timezone.utc).replace(tzinfo=None)
+    return dt
+
+
+def to_ms(dt: datetime, ceil: bool = True) -> int:
+    """Naive-UTC datetime to epoch ms, rounded up (or down) to a whole ms."""
+    us = (dt - datetime(1970, 1, 1)) // timedelta(microseconds=1)
+    return -(-us // 1000) if ceil else us // 1000
+
+
 def _stable_id(raw: str) -> str:
     """Return a short, stable, URL-safe id derived from a raw string."""
     return hashlib.sha1(raw.encode()).hexdigest()[:16]
@@ -0,0 +1,428 @@
+"""
+Materialized Evidence Timeline (student_timeline).
+
+timeline_service derives a student's timeline from student_events, the raw
+payload's grades and ml_results on every request. It parses timestamps and
+grade strings, hashes ids and walks the event dates for inactivity gaps.
+This module keeps the derived items stored instead, one document per item:
+
+    {_id, academiq_user_id, views: [...], id, date, label, type, severity,
+     source, metadata}
+
+`views` lists the timeline views the item belongs to. Event and grade items
+are in "*" (all courses) and their course. Risk changes are in "*" and
+AI_VIEW, because they show in every course view. An inactivity gap depends
+on which events are in view, so each gap is stored once per scope ("*" or
+a course) with views [scope]. A read is one range scan of the
+(academiq_user_id, views, date, id) index.
+
+The items are kept current by the writers:
+
+  * append_events()  — moodle_ingest.write_events / bulk_ingest, for newly
+                       inserted events. Gaps are recomputed only between the
+                       events around the new ones.
+  * refresh_grades() — when a sync's grades section changed
+  * refresh_ai()     — scoring_queue.store_predictions
+  * refresh_events() — event_compaction, after old events became rollups
+
+rebuild() derives a student's items from scratch (scripts/backfill_timeline.py
+runs it for everyone). Reads rebuild a student the backfill has not reached
+yet. A failed incremental update drops the student's built marker, so the
+next read rebuilds them. check() compares the stored timeline with
+timeline_service's (scripts/check_timeline.py).
+
+The read functions take the same arguments and return the same shapes as
+timeline_service's. routes/student_data.py picks one by TIMELINE_MATERIALIZED.
+"""
+
+from __future__ import annotations
+
+import logging
+import threading
+from datetime import datetime, timedelta
+from typing import Any, Iterable, Iterator
+
+from bson import ObjectId
+from pymongo import ASCENDING, DESCENDING, UpdateOne
+
+from app.config.database import (
+    raw_moodle_payload_collection,
+    student_events_collection,
+    student_timeline_collection,
+)
+from app.services import timeline_service as derive
+
+logger = logging.getLogger(__name__)
+
+ALL_VIEW = "*"
+AI_VIEW = "@ai"
+
+_BATCH = 1000
+_PROJECTION = {"_id": 0, "id": 1, "date": 1, "label": 1, "type": 1, "severity": 1, "source": 1, "metadata": 1}
+
+_lock = threading.Lock()
+_counters = {"reads": 0, "lazy_builds": 0, "rebuilds": 0, "appended": 0, "failures": 0}
+
+
+# ── Reads (same contract as timeline_service) ──────────────────────────────────
+
+def build_timeline(
+    academiq_user_id: str,
+    course_id: str | None = None,
+    limit: int = 100,
+    start_date: datetime | None = None,
+    end_date: datetime | None = None,
+    before: str | None = None,
+    after: str | None = None,
+) -> dict[str, Any]:
+    """timeline_service.build_timeline, served from student_timeline."""
+    uid = _ensure(academiq_user_id)
+    window = (derive.naive_utc(start_date), derive.naive_utc(end_date))
+    after_key = derive.decode_cursor(after) if after else None
+    before_key = derive.decode_cursor(before) if before and before != derive.LATEST else None
+    backwards = before is not None
+
+    page, next_cursor, prev_cursor = derive.paginate(
+        _scan(uid, course_id, window, after_key, before_key, backwards),
+        limit, backwards, bool(before_key or after_key),
+    )
+    return {
+        "student_id": academiq_user_id,
+        "course_id": course_id,
+        "timeline": page,
+        "summary": _summary(uid, course_id, window),
+        "next_cursor": next_cursor,
+        "prev_cursor": prev_cursor,
+    }
+
+
+def iter_timeline(
+    academiq_user_id: str,
+    course_id: str | None = None,
+    start_date: datetime | None = None,
+    end_date: datetime | None = None,
+    after: str | None = None,
+) -> Iterator[dict[str, Any]]:
+    """timeline_service.iter_timeline, served from student_timeline."""
+    after_key = derive.decode_cursor(after) if after else None
+    uid = _ensure(academiq_user_id)
+    window = (derive.naive_utc(start_date), derive.naive_utc(end_date))
+    yield from _scan(uid, course_id, window, after_key, None, False)
+
+
+def timeline_summary(
+    academiq_user_id: str,
+    course_id: str | None = None,
+    start_date: datetime | None = None,
+    end_date: datetime | None = None,
+) -> dict[str, Any]:
+    """timeline_service.timeline_summary, served from student_timeline."""
+    uid = _ensure(academiq_user_id)
+    return _summary(uid, course_id, (derive.naive_utc(start_date), derive.naive_utc(end_date)))
+
+
+def _query(
+    uid: str,
+    course_id: str | None,
+    window: tuple[datetime | None, datetime | None],
+    after_key: tuple[datetime, str] | None = None,
+    before_key: tuple[datetime, str] | None = None,
+) -> dict[str, Any]:
+    query: dict[str, Any] = {
+        "academiq_user_id": uid,
+        "views": {"$in": [str(course_id), AI_VIEW]} if course_id else ALL_VIEW,
+    }
+    start, end = window
+    if start or end:
+        query["date"] = {**({"$gte": start} if start else {}), **({"$lte": end} if end else {})}
+    positions = []
+    if after_key:
+        positions.append({"$or": [{"date": {"$gt": after_key[0]}}, {"date": after_key[0], "id": {"$gt": after_key[1]}}]})
+    if before_key:
+        positions.append({"$or": [{"date": {"$lt": before_key[0]}}, {"date": before_key[0], "id": {"$lt": before_key[1]}}]})
+    if positions:
+        query["$and"] = positions
+    return query
+
+
+def _scan(
+    uid: str,
+    course_id: str | None,
+    window: tuple[datetime | None, datetime | None],
+    after_key: tuple[datetime, str] | None,
+    before_key: tuple[datetime, str] | None,
+    backwards: bool,
+) -> Iterator[dict[str, Any]]:
+    order = DESCENDING if backwards else ASCENDING
+    _count("reads")
+    yield from student_timeline_collection.find(
+        _query(uid, course_id, window, after_key, before_key), _PROJECTION,
+    ).sort([("date", order), ("id", order)])
+
+
+def _summary(uid: str, course_id: str | None, window: tuple[datetime | None, datetime | None]) -> dict[str, Any]:
+    summary: dict[str, Any] = {"total_events": 0, "risk_signals": 0, "positive_signals": 0, "last_activity": None}
+    for row in student_timeline_collection.aggregate([
+        {"$match": _query(uid, course_id, window)},
+        {"$group": {
+            "_id": "$severity",
+            # A rollup item stands for metadata.count events, up to metadata.until
+            "count": {"$sum": {"$ifNull": ["$metadata.count", 1]}},
+            "last": {"$max": {"$ifNull": ["$metadata.until", "$date"]}},
+        }},
+    ]):
+        summary["total_events"] += row["count"]
+        if row["_id"] in ("warning", "danger"):
+            summary["risk_signals"] += row["count"]
+        elif row["_id"] == "positive":
+            summary["positive_signals"] += row["count"]
+        if summary["last_activity"] is None or row["last"] > summary["last_activity"]:
+            summary["last_activity"] = row["last"]
+    return summary
+
+
+# ── Incremental maintenance (called by the writers) ────────────────────────────
+
+def append_events(academiq_user_id: str, events: Iterable[dict[str, Any]]) -> int:
+    """
+    Add the items of newly inserted events and redo the inactivity gaps
+    around them. Returns the number of items written (0 for a student not
+    built yet, whose first read builds everything).
+    """
+    uid = str(academiq_user_id)
+    try:
+        if not _is_built(uid):
+            return 0
+        items = [item for item in map(derive.safe_event_item, events) if item]
+        if not items:
+            return 0
+        _write([_op(uid, item, [ALL_VIEW, _course(item)]) for item in items])
+        for scope in {ALL_VIEW} | {_course(item) for item in items}:
+            dates = sorted({i["date"] for i in items if scope == ALL_VIEW or _course(i) == scope})
+            _regap(uid, scope, dates)
+        _count("appended", len(items))
+        return len(items)
+    except Exception:
+        _unbuild(uid, "append events")
+        return 0
+
+
+def refresh_grades(academiq_user_id: str, grades: list[dict[str, Any]] | None = None) -> None:
+    """Replace the student's grade items (`grades`: the payload's grades; read from the raw payload if None)."""
+    uid = str(academiq_user_id)
+    try:
+        if not _is_built(uid):
+            return
+        if grades is None:
+            grades = (raw_moodle_payload_collection.find_one({"academiq_user_id": uid}, {"grades": 1}) or {}).get("grades")
+        items = derive.map_grades(grades or [])
+        _replace_source(uid, "moodle_grade", [_op(uid, i, [ALL_VIEW, _course(i)]) for i in items])
+    except Exception:
+        _unbuild(uid, "refresh grades")
+
+
+def refresh_ai(academiq_user_id: str) -> None:
+    """Replace the student's risk-change items from ml_results."""
+    uid = str(academiq_user_id)
+    try:
+        if not _is_built(uid):
+            return
+        items = derive.map_ml_results(uid)
+        _replace_source(uid, "ai_result", [_op(uid, i, [ALL_VIEW, AI_VIEW]) for i in items])
+    except Exception:
+        _unbuild(uid, "refresh ml results")
+
+
+def _regap(uid: str, scope: str, new_dates: list[datetime]) -> None:
+    """
+    Recompute the `scope` gaps that the events at `new_dates` can change:
+    those from the activity before the earliest new date up to the first
+    event after the latest one. A rollup item is active from its date to
+    metadata.until, so a gap runs from the latest activity so far.
+    """
+    lo, hi = new_dates[0], new_dates[-1]
+    in_view = {"academiq_user_id": uid, "views": scope, "source": "moodle_event"}
+    fields = {"date": 1, "metadata.until": 1}
+    prev = student_timeline_collection.find_one({**in_view, "date": {"$lt": lo}}, fields, sort=[("date", DESCENDING)])
+    nxt = student_timeline_collection.find_one({**in_view, "date": {"$gt": hi}}, fields, sort=[("date", ASCENDING)])
+    # From the start of prev's day: a rollup earlier that day may end after it.
+    since = datetime(prev["date"].year, prev["date"].month, prev["date"].day) if prev else lo
+    spans = sorted({(d["date"], derive.item_until(d)) for d in student_timeline_collection.find(
+        {**in_view, "date": {"$gte": since, "$lte": hi}}, fields,
+    )} | {(d, d) for d in new_dates})
+
+    pairs, end = [], None
+    for start, until in spans:
+        if end is not None:
+            pairs.append((end, start))
+        end = until if end is None else max(end, until)
+    if nxt:
+        pairs.append((end, nxt["date"]))
+
+    # Every gap anchored at an activity end up to `end`: dated anchor + 1 day.
+    student_timeline_collection.delete_many({
+        "academiq_user_id": uid, "views": scope, "source": "generated",
+        "date": {"$gte": spans[0][0] + timedelta(days=1), "$lte": end + timedelta(days=1)},
+    })
+    course_id = None if scope == ALL_VIEW else scope
+    gaps = (derive.inactivity_item(uid, course_id, a, b) for a, b in pairs)
+    _write([_op(uid, gap, [scope], scope=scope) for gap in gaps if gap])
+
+
+def refresh_events(academiq_user_id: str) -> None:
+    """Re-derive a built student whose old events were compacted into rollups."""
+    uid = str(academiq_user_id)
+    try:
+        if _is_built(uid):
+            rebuild(uid)
+    except Exception:
+        _unbuild(uid, "refresh compacted events")
+
+
+def _replace_source(uid: str, source: str, ops: list[UpdateOne]) -> None:
+    _write(ops)
+    student_timeline_collection.delete_many({
+        "academiq_user_id": uid, "source": source, "_id": {"$nin": [op._filter["_id"] for op in ops]},
+    })
+
+
+# ── Full build ────────────────────────────────────────────────────────────────
+
+def rebuild(academiq_user_id: str) -> int:
+    """
+    Derive every item of one student from the source collections and replace
+    what is stored. Returns the number of items written.
+    """
+    uid = str(academiq_user_id)
+    rev = str(ObjectId())
+    ops: list[UpdateOne] = []
+    written = 0
+
+    def flush():
+        nonlocal ops, written
+        _write(ops)
+        written += len(ops)
+        ops = []
+
+    last: dict[str, datetime] = {}     # latest activity so far, per scope
+    for ev in derive.merged_events(uid, None, {}):
+        item = derive.safe_event_item(ev)
+        if item is None:
+            continue
+        course = _course(item)
+        ops.append(_op(uid, item, [ALL_VIEW, course], rev))
+        for scope in (ALL_VIEW, course):
+            if scope in last and item["date"] > last[scope]:
+                gap = derive.inactivity_item(uid, None if scope == ALL_VIEW else scope, last[scope], item["date"])
+                if gap:
+                    ops.append(_op(uid, gap, [scope], rev, scope=scope))
+            last[scope] = max(last.get(scope, item["date"]), derive.item_until(item))
+        if len(ops) >= _BATCH:
+            flush()
+
+    raw = raw_moodle_payload_collection.find_one({"academiq_user_id": uid}, {"grades": 1}) or {}
+    ops += [_op(uid, i, [ALL_VIEW, _course(i)], rev) for i in derive.map_grades(raw.get("grades") or [])]
+    ops += [_op(uid, i, [ALL_VIEW, AI_VIEW], rev) for i in derive.map_ml_results(uid)]
+    flush()
+
+    student_timeline_collection.delete_many({"academiq_user_id": uid, "rev": {"$ne": rev}})
+    student_timeline_collection.update_one(
+        {"_id": _state_id(uid)},
+        {"$set": {"academiq_user_id": uid, "views": [], "rev": rev, "built_at": datetime.utcnow()}},
+        upsert=True,
+    )
+    _count("rebuilds")
+    return written
+
+
+def check(academiq_user_id: str, limit: int = 100_000) -> list[str]:
+    """
+    Differences between the stored timeline and timeline_service's, for the
+    all-courses view and each course view. Empty when they agree.
+    """
+    uid = str(academiq_user_id)
+    if not _is_built(uid):
+        return [f"{uid}: not materialized"]
+    courses = set(student_timeline_collection.distinct("views", {"academiq_user_id": uid}))
+    courses |= {str(c) for c in student_events_collection.distinct("course_id", {"academiq_user_id": uid})}
+    courses -= {ALL_VIEW, AI_VIEW}
+
+    problems = []
+    for course_id in [None, *sorted(courses)]:
+        view = f"{uid} course={course_id or ALL_VIEW}"
+        stored = build_timeline(uid, course_id, limit)
+        derived = derive.build_timeline(uid, course_id, limit)
+        got = [i["id"] for i in stored["timeline"]]
+        want = [i["id"] for i in derived["timeline"]]
+        if got != want:
+            missing, extra = set(want) - set(got), set(got) - set(want)
+            where = next((n for n, (a, b) in enumerate(zip(got, want)) if a != b), min(len(got), len(want)))
+            problems.append(
+                f"{view}: items differ from position {where} "
+                f"({len(missing)} missing, {len(extra)} extra, {len(got)} vs {len(want)})"
+            )
+        for key in ("total_events", "risk_signals", "positive_signals", "last_activity"):
+            if stored["summary"][key] != derived["summary"][key]:
+                problems.append(f"{view}: summary {key} {stored['summary'][key]!r} != {derived['summary'][key]!r}")
+    return problems
+
+
+# ── Helpers ────────────────────────────────────────────────────────────────────
+
+def _ensure(academiq_user_id: str) -> str:
+    uid = str(academiq_user_id)
+    if not _is_built(uid):
+        rebuild(uid)
+        _count("lazy_builds")
+    return uid
+
+
+def _state_id(uid: str) -> str:
+    return f"{uid}:_built"
+
+
+def _is_built(uid: str) -> bool:
+    return student_timeline_collection.find_one({"_id": _state_id(uid)}, {"_id": 1}) is not None
+
+
+def _unbuild(uid: str, what: str) -> None:
+    logger.exception("timeline store: failed to %s for %s; rebuilding on next read", what, uid)
+    _count("failures")
+    try:
+        student_timeline_collection.delete_one({"_id": _state_id(uid)})
+    except Exception:
+        logger.exception("timeline store: could not drop the built marker for %s", uid)
+
+
+def _course(item: dict[str, Any]) -> str:
+    return str((item.get("metadata") or {}).get("course_id") or "")
+
+
+def _op(uid: str, item: dict[str, Any], views: list[str], rev: str | None = None, scope: str | None = None) -> UpdateOne:
+    key = f"{uid}:{scope}:{item['id']}" if scope else f"{uid}:{item['id']}"
+    doc = {"academiq_user_id": uid, "views": views, **item}
+    if rev:
+        doc["rev"] = rev
+    return UpdateOne({"_id": key}, {"$set": doc}, upsert=True)
+
+
+def _write(ops: list[UpdateOne]) -> None:
+    if ops:
+        student_timeline_collection.bulk_write(ops, ordered=False)
+
+
+def _count(name: str, n: int = 1) -> None:
+    with _lock:
+        _counters[name] += n
+
+
+def stats() -> dict[str, Any]:
+    with _lock:
+        return dict(_counters)
+
+
+def clear() -> None:
+    """Reset the counters (tests)."""
+    with _lock:
+        for name in _counters:
+            _counters[name] = 0
@@ -13,7 +13,7 @@ If no account matches, a new `student` account is created automatically with a
 secure random password, and a credentials email is sent.
 """
 
-from typing import Any, Dict, Optional, Tuple
+from typing import Any, Dict, List, Optional, Tuple
 
 from app.models.user import ROLE_STUDENT, build_user_document
 from app.repositories import user_repository
@@ -127,3 +127,52 @@ def resolve_or_create_user(
     send_account_created_email(email, full_name, password)
 
     return created_user, True
+
+
+def resolve_or_create_users(
+    identities: List[Dict[str, Optional[str]]],
+) -> List[Tuple[Dict[str, Any], bool]]:
+    """
+    `resolve_or_create_user` for many identities, with one lookup query.
+
+    Existing accounts are fetched together and matched in memory using the
+    same priority as find_matching_user. Identities with no match go through
+    resolve_or_create_user one at a time; accounts created that way are
+    remembered, so several payloads for the same new student inside one batch
+    provision a single account.
+    """
+    users = user_repository.find_by_identities(
+        [i.get("moodle_user_id") for i in identities],
+        [i.get("student_id") for i in identities],
+        [i.get("email") for i in identities],
+    )
+    index: Dict[Tuple[str, str], Dict[str, Any]] = {}
+
+    def remember(user: Dict[str, Any]) -> None:
+        for field in ("moodle_user_id", "student_id", "email"):
+            if user.get(field):
+                index[(field, str(user[field]).strip().lower() if field == "email" else str(user[field]))] = user
+
+    for user in users:
+        remember(user)
+
+    resolved: List[Tuple[Dict[str, Any], bool]] = []
+    for identity in identities:
+        email = (identity.get("email") or "").strip().lower() or None
+        match = None
+        for field, value in (
+            ("moodle_user_id", identity.get("moodle_user_id")),
+            ("student_id", identity.get("student_id")),
+            ("email", email),
+        ):
+            if value:
+                match = index.get((field, value))
+                if match:
+                    break
+        if match:
+            user, created = _backfill_identity(match, identity), False
+        else:
+            user, created = resolve_or_create_user(identity)
+        remember(user)
+        resolved.append((user, created))
+    return resolved
@@ -8,9 +8,17 @@ sys.path.insert(0, str(Path(__file__).parent))
 from fastapi import FastAPI, HTTPException
 from fastapi.middleware.cors import CORSMiddleware
 
-from app.config.database import client, ensure_indexes
+from app.config import database
+from app.config.database import ensure_indexes
 from app.routes import moodle, auth, admin, student_data, system_status
 from app.routes.ml_result import router as ml_result_router
+from app.config.settings import MODEL_PRELOAD, MODEL_WARM_UP
+from app.services import auth_cache, expiry_sweeper, lazy_import, model_registry
+
+# With gunicorn --preload this runs once in the master, and every forked
+# worker starts with the models already in (copy-on-write shared) memory.
+if MODEL_PRELOAD:
+    model_registry.preload()
 
 app = FastAPI(title="AcademIQ Backend", version="1.0")
 
@@ -34,6 +42,12 @@ def _startup():
         ensure_indexes()
     except Exception as exc:
         print(f"[WARN] Could not ensure indexes: {exc}")
+    auth_cache.start()
+    expiry_sweeper.start()
+    # Heavy ML imports and one dummy prediction per model, off the startup
+    # path: /health answers while this runs (status: "ml_warm_up" component).
+    if MODEL_WARM_UP:
+        lazy_import.start_warm_up(then=model_registry.warm_up)
 
 
 @app.get("/")
@@ -44,7 +58,7 @@ def root():
 @app.get("/health")
 def health():
     try:
-        client.admin.command("ping")
+        database.ping()
         return {"status": "ok", "database": "connected"}
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Database unreachable: {str(e)}")
@@ -59,6 +73,7 @@ app.include_router(system_status.router)  # /api/system/status
 app.include_router(ml_result_router)      # /api/ml/result
 
 # ── Optional ML routes (student.py) ──────────────────────────────────────────
+# Both routers hold lazy_import proxies, so mounting them imports no ML stack.
 try:
     from app.routes import student
     app.include_router(student.router)
@@ -18,6 +18,22 @@ os.environ["MONGODB_URI"] = "mongodb://localhost:27017"
 os.environ["MONGODB_DB_NAME"] = "academiq_test"
 
 
+@pytest.fixture(autouse=True)
+def empty_event_rollups(monkeypatch):
+    """
+    Give every test an empty mongomock student_event_rollups collection.
+
+    Event reads merge in the rollups and event writes check the compaction
+    watermark for old events, so most event tests touch the collection in
+    passing. Tests about compaction use the returned collection.
+    """
+    from app.repositories import event_rollup_repository
+
+    collection = MongoClient().db["student_event_rollups"]
+    monkeypatch.setattr(event_rollup_repository, "student_event_rollups_collection", collection)
+    return collection
+
+
 @pytest.fixture
 def mock_mongo_client():
     """Provide a mongomock client for testing (no real database needed)."""
@@ -68,6 +84,159 @@ def test_client(monkeypatch, mock_collections, mock_database):
     return TestClient(app)
 
 
+@pytest.fixture
+def mongomock_bulk_write(monkeypatch):
+    """
+    Make `collection.bulk_write([UpdateOne, ...])` work on a mongomock collection.
+
+    mongomock 4.1.2 can't replay the UpdateOne objects of the pymongo 4.x we
+    run against (it rejects their `sort` argument), so repositories that batch
+    upserts through bulk_write are exercised by applying each operation with
+    update_one instead. Returns a function that patches one collection.
+
+    Pass a list as `calls` to record round trips: each bulk_write or direct
+    update_one call appends the collection's name (the update_one calls a
+    bulk write replays are not recorded).
+    """
+    from types import SimpleNamespace
+
+    def patch(collection, calls=None):
+        update_one = collection.update_one
+
+        def bulk_write(ops, ordered=True):
+            if calls is not None:
+                calls.append(collection.name)
+            upserted_ids, matched = {}, 0
+            for i, op in enumerate(ops):
+                res = update_one(op._filter, op._doc, upsert=bool(op._upsert))
+                if res.upserted_id is not None:
+                    upserted_ids[i] = res.upserted_id
+                matched += res.matched_count
+            return SimpleNamespace(
+                upserted_count=len(upserted_ids), upserted_ids=upserted_ids, matched_count=matched
+            )
+
+        def recorded_update_one(*args, **kwargs):
+            calls.append(collection.name)
+            return update_one(*args, **kwargs)
+
+        monkeypatch.setattr(collection, "bulk_write", bulk_write)
+        if calls is not None:
+            monkeypatch.setattr(collection, "update_one", recorded_update_one)
+        return collection
+
+    return patch
+
+
+class _CountedCollection:
+    """Delegates to a collection, recording each call of the counted methods."""
+
+    def __init__(self, collection, calls, methods):
+        self._collection = collection
+        self._calls = calls
+        self._counted = methods
+        self.name = collection.name
+        self.methods = []
+
+    def __getattr__(self, name):
+        attr = getattr(self._collection, name)
+        if not callable(attr) or (self._counted is not None and name not in self._counted):
+            return attr
+
+        def call(*args, **kwargs):
+            self.methods.append(name)
+            if self._calls is not None:
+                self._calls.append(self.name)
+            return attr(*args, **kwargs)
+
+        return call
+
+
+@pytest.fixture
+def mongomock_counted():
+    """
+    Count the calls a code path makes on a mongomock collection.
+
+    Returns a function taking the collection, an optional `calls` list and
+    the method names to count (every method by default) that returns a
+    wrapper to patch in place of the collection. Each counted call appends
+    the method name to the wrapper's `methods` and, like mongomock_bulk_write,
+    the collection's name to `calls`, so one list shared by several wrappers
+    shows which collections were touched and in what order.
+    """
+
+    def counted(collection, calls=None, methods=None):
+        return _CountedCollection(collection, calls, methods)
+
+    return counted
+
+
+class _AsyncCursor:
+    def __init__(self, cursor):
+        self._cursor = cursor
+
+    def sort(self, *args, **kwargs):
+        self._cursor = self._cursor.sort(*args, **kwargs)
+        return self
+
+    def limit(self, n):
+        self._cursor = self._cursor.limit(n)
+        return self
+
+    async def to_list(self, length=None):
+        docs = list(self._cursor)
+        return docs if length is None else docs[:length]
+
+
+class _AsyncCollection:
+    """Coroutine facade over a mongomock collection (find returns a cursor)."""
+
+    def __init__(self, collection):
+        self._collection = collection
+
+    def find(self, *args, **kwargs):
+        return _AsyncCursor(self._collection.find(*args, **kwargs))
+
+    def __getattr__(self, name):
+        method = getattr(self._collection, name)
+
+        async def call(*args, **kwargs):
+            return method(*args, **kwargs)
+
+        return call
+
+
+class _AsyncDatabase:
+    def __init__(self, db):
+        self._db = db
+
+    def __getitem__(self, name):
+        return _AsyncCollection(self._db[name])
+
+
+@pytest.fixture
+def mongomock_async(monkeypatch):
+    """
+    Point the async repositories (app/repositories/aio) at a mongomock database.
+
+    database.get_async_db is replaced with an awaitable facade over the given
+    mongomock database, so sync and async repositories share documents. The
+    session auth cache is cleared, since cached sessions from another test
+    would otherwise answer without touching the database. Returns a function
+    that takes the mongomock database.
+    """
+    from app.config import database
+    from app.services import auth_cache
+
+    def patch(db):
+        monkeypatch.setattr(database, "get_async_db", lambda: _AsyncDatabase(db))
+        auth_cache.clear()
+        return db
+
+    yield patch
+    auth_cache.clear()
+
+
 @pytest.fixture
 def sample_user_data():
     """Sample user data for testing."""
@@ -0,0 +1,234 @@
+# backend/tests/feature_reference.py
+"""
+Frozen reference implementations for the feature-engineering parity tests.
+
+The `legacy_*` functions are verbatim copies of the per-student code the
+services used before app/services/feature_pipeline.py existed
+(performance_predict._engineer_features and predict_performance, and the
+burnout/risk-grade `_row` dict builders). They are kept here, not imported
+from the app, so the tests pin today's output to the original behaviour.
+"""
+
+from typing import Any, Dict, List
+
+import numpy as np
+import pandas as pd
+
+# Burnout / risk-grade bundle layout (feature_cols, log_cols, proc_clip exactly
+# as stored in the committed burnout_model.pkl) — no model needed here.
+BURNOUT_BUNDLE = {
+    "feature_cols": [
+        "all_clicks", "active_days", "access_frequency", "material_clicks", "avg_quiz_score",
+        "quiz_attempts", "avg_assignment_score", "assignment_submissions", "total_time_spent",
+        "procrastination_index", "late_submission_count", "clicks_per_day", "time_per_day",
+        "time_per_click", "material_intensity", "quiz_rate", "late_ratio", "quiz_performance",
+        "assignment_performance",
+    ],
+    "log_cols": [
+        "all_clicks", "material_clicks", "total_time_spent", "clicks_per_day",
+        "time_per_day", "time_per_click", "material_intensity",
+    ],
+    "proc_clip": (-11.621370003460399, 48.6),
+}
+
+RISK_GRADE_BUNDLE = {
+    "feature_cols": BURNOUT_BUNDLE["feature_cols"][:12],
+    "log_cols": ["all_clicks", "material_clicks", "total_time_spent", "clicks_per_day"],
+    "proc_clip": (-11.621370003460399, 48.6),
+}
+
+BEHAVIORAL_FEATURES = [
+    "all_clicks", "active_days", "access_frequency", "material_clicks", "quiz_attempts",
+    "assignment_submissions", "total_time_spent", "procrastination_index",
+    "late_submission_count", "clicks_per_day", "time_per_click", "engagement_consistency",
+    "behavioral_risk_score", "all_clicks_relative", "total_time_spent_relative",
+    "active_days_relative",
+]
+
+TRAIN_MEDIANS = pd.Series({"all_clicks": 583.5, "total_time_spent": 1167.0, "active_days": 41.0})
+
+_SCALES = {
+    "all_clicks": 600, "active_days": 40, "access_frequency": 15, "material_clicks": 40,
+    "quiz_attempts": 3, "assignment_submissions": 5, "total_time_spent": 1200,
+    "procrastination_index": 3, "late_submission_count": 2,
+    "avg_quiz_score": 0.4, "avg_assignment_score": 0.4,
+}
+
+
+def cohort(n: int, seed: int = 0) -> List[Dict[str, Any]]:
+    """`n` plausible feature-vector dicts, ints and floats mixed like the stored ones."""
+    rng = np.random.default_rng(seed)
+    keys = list(_SCALES)
+    draws = rng.gamma(2.0, 1.0, size=(n, len(keys))) * np.array([_SCALES[k] for k in keys])
+    rows = []
+    for i in range(n):
+        row = {k: float(draws[i, j]) for j, k in enumerate(keys)}
+        row["procrastination_index"] -= 3.0
+        row["avg_quiz_score"] = min(row["avg_quiz_score"], 1.0)
+        row["avg_assignment_score"] = min(row["avg_assignment_score"], 1.0)
+        for k in ("all_clicks", "active_days", "material_clicks", "quiz_attempts",
+                  "assignment_submissions", "total_time_spent", "late_submission_count"):
+            row[k] = int(row[k])
+        rows.append(row)
+    return rows
+
+
+# ── Performance model ────────────────────────────────────────────────────────
+
+def legacy_engineer_features(row: pd.Series, train_medians: pd.Series) -> pd.Series:
+    row = row.copy()
+    row["clicks_per_day"] = row["all_clicks"] / (row["active_days"] + 1)
+    row["time_per_click"] = row["total_time_spent"] / (row["all_clicks"] + 1)
+    row["engagement_consistency"] = row["active_days"] / (row["total_time_spent"] / 60 + 1)
+    row["behavioral_risk_score"] = (
+        max(row["procrastination_index"], 0) * 0.6 +
+        row["late_submission_count"] * 10 * 0.4
+    )
+    for col in ["all_clicks", "total_time_spent", "active_days"]:
+        median_val = train_medians.get(col, 1)
+        row[f"{col}_relative"] = row[col] / (median_val + 1)
+    return row
+
+
+def legacy_performance_row(raw: Dict[str, Any], features, train_medians) -> np.ndarray:
+    engineered = legacy_engineer_features(pd.Series(raw), train_medians)
+    return engineered[features].values.reshape(1, -1)
+
+
+def legacy_predict_performance(
+    raw_features: Dict[str, Any],
+    model: Any,
+    explainer: Any,
+    features: List[str],
+    train_medians: pd.Series,
+    recommendation_map: Dict[str, Dict[str, str]],
+    tier_labels: Dict[int, str],
+) -> Dict[str, Any]:
+    """predict_performance as it was before the batch path, with its module globals as arguments."""
+    X_student = legacy_performance_row(raw_features, features, train_medians)
+    X_df = pd.DataFrame(X_student, columns=features)
+
+    probability = float(model.predict_proba(X_df)[0][1])
+    classification = "High Performer" if probability >= 0.5 else "Not High Performer"
+
+    approx_grade = int(round(probability * 100))
+    if approx_grade >= 85:
+        tier = 3
+    elif approx_grade >= 75:
+        tier = 2
+    elif approx_grade >= 60:
+        tier = 1
+    else:
+        tier = 0
+    tier_label = tier_labels[tier]
+
+    shap_vals = explainer.shap_values(X_df)
+    if isinstance(shap_vals, list):
+        shap_vals = shap_vals[1]
+    shap_map = {feat: float(shap_vals[0][i]) for i, feat in enumerate(features)}
+
+    negative_drivers = sorted([(feat, val) for feat, val in shap_map.items() if val < 0],
+                              key=lambda x: x[1])[:3]
+    driver_names = [f for f, _ in negative_drivers]
+
+    recommendations = []
+    for feat, shap_val in negative_drivers:
+        if feat in recommendation_map:
+            rec = recommendation_map[feat].copy()
+            rec["feature"] = feat
+            rec["shap_impact"] = round(shap_val, 4)
+            if feat in raw_features:
+                rec["your_value"] = round(raw_features[feat], 2)
+                med_val = train_medians.get(feat, 0)
+                rec["median_value"] = round(med_val, 2)
+            recommendations.append(rec)
+
+    if not recommendations:
+        recommendations = [{
+            "icon": "✅", "short": "Strong engagement – keep it up!",
+            "action": "Challenge yourself with optional advanced materials.",
+            "why": "Your behavioural patterns align with high performers.",
+            "feature": None, "shap_impact": 0.0
+        }]
+
+    confidence_note = None
+    if 0.4 <= probability <= 0.6:
+        confidence_note = "⚠️ Model is uncertain about this student's classification. Recommendations are directional."
+
+    return {
+        "probability": round(probability, 4),
+        "classification": classification,
+        "tier": tier_label,
+        "confidence_note": confidence_note,
+        "top_negative_drivers": driver_names,
+        "recommendations": recommendations,
+        "shap_map": {k: round(v, 4) for k, v in shap_map.items()},
+    }
+
+
+# ── Burnout / risk-grade models ──────────────────────────────────────────────
+
+def _legacy_pct(v) -> float:
+    v = float(v or 0)
+    return v * 100 if 0 <= v <= 1 else v
+
+
+def legacy_burnout_row(b, feats: Dict[str, Any]) -> np.ndarray:
+    ac   = float(feats.get("all_clicks", 0) or 0)
+    ad   = float(feats.get("active_days", 0) or 0)
+    mc   = float(feats.get("material_clicks", 0) or 0)
+    tt   = float(feats.get("total_time_spent", 0) or 0)
+    qa   = float(feats.get("quiz_attempts", 0) or 0)
+    asub = float(feats.get("assignment_submissions", 0) or 0)
+    late = float(feats.get("late_submission_count", 0) or 0)
+    qs   = _legacy_pct(feats.get("avg_quiz_score"))
+    asc  = _legacy_pct(feats.get("avg_assignment_score"))
+
+    r = {
+        "all_clicks": ac,
+        "active_days": ad,
+        "access_frequency": float(feats.get("access_frequency", 0) or 0),
+        "material_clicks": mc,
+        "avg_quiz_score": qs,
+        "quiz_attempts": qa,
+        "avg_assignment_score": asc,
+        "assignment_submissions": asub,
+        "total_time_spent": tt,
+        "procrastination_index": float(feats.get("procrastination_index", 0) or 0),
+        "late_submission_count": late,
+        "clicks_per_day": ac / ad if ad > 0 else 0.0,
+        "time_per_day": tt / ad if ad > 0 else 0.0,
+        "time_per_click": tt / ac if ac > 0 else 0.0,
+        "material_intensity": mc / ad if ad > 0 else 0.0,
+        "quiz_rate": qa / ad if ad > 0 else 0.0,
+        "late_ratio": late / asub if asub > 0 else 0.0,
+        "quiz_performance": qs * float(np.log1p(qa)),
+        "assignment_performance": asc * float(np.log1p(asub)),
+    }
+    for c in b["log_cols"]:
+        r[c] = float(np.log1p(r[c]))
+    lo, hi = b["proc_clip"]
+    r["procrastination_index"] = min(max(r["procrastination_index"], lo), hi)
+    return np.array([[r[c] for c in b["feature_cols"]]], dtype=float)
+
+
+def legacy_risk_grade_row(b, feats: Dict[str, Any]) -> np.ndarray:
+    r = {
+        "all_clicks": float(feats.get("all_clicks", 0) or 0),
+        "active_days": float(feats.get("active_days", 0) or 0),
+        "access_frequency": float(feats.get("access_frequency", 0) or 0),
+        "material_clicks": float(feats.get("material_clicks", 0) or 0),
+        "avg_quiz_score": _legacy_pct(feats.get("avg_quiz_score")),
+        "quiz_attempts": float(feats.get("quiz_attempts", 0) or 0),
+        "avg_assignment_score": _legacy_pct(feats.get("avg_assignment_score")),
+        "assignment_submissions": float(feats.get("assignment_submissions", 0) or 0),
+        "total_time_spent": float(feats.get("total_time_spent", 0) or 0),
+        "procrastination_index": float(feats.get("procrastination_index", 0) or 0),
+        "late_submission_count": float(feats.get("late_submission_count", 0) or 0),
+    }
+    r["clicks_per_day"] = r["all_clicks"] / r["active_days"] if r["active_days"] > 0 else 0.0
+    for c in b["log_cols"]:
+        r[c] = float(np.log1p(r[c]))
+    lo, hi = b["proc_clip"]
+    r["procrastination_index"] = min(max(r["procrastination_index"], lo), hi)
+    return np.array([[r[c] for c in b["feature_cols"]]], dtype=float)
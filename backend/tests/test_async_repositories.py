@@ -0,0 +1,139 @@
+# backend/tests/test_async_repositories.py
+"""
+Tests for the async repository layer (app/repositories/aio), the async
+get_current_user dependency and the bounded inference executor
+(app/services/inference_pool.py).
+
+database.get_async_db is replaced with an awaitable wrapper around a mongomock
+database (conftest mongomock_async), so the async modules read and write the
+same documents the sync repositories do.
+"""
+
+import asyncio
+import sys
+import threading
+import time
+from pathlib import Path
+
+import mongomock
+import pytest
+from fastapi import HTTPException
+from starlette.requests import Request
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from app import auth  # noqa: E402
+from app.repositories import user_repository  # noqa: E402
+from app.repositories.aio import (  # noqa: E402
+    event_repository as aio_events,
+    material_repository as aio_materials,
+    session_repository as aio_sessions,
+    user_repository as aio_users,
+)
+from app.routes import moodle  # noqa: E402
+from app.services import inference_pool, timeline_store  # noqa: E402
+from app.services.security import hash_token  # noqa: E402
+
+
+@pytest.fixture
+def db(monkeypatch, mongomock_bulk_write, mongomock_async):
+    db = mongomock.MongoClient()["academiq_test"]
+    mongomock_bulk_write(db["student_events"])
+    mongomock_async(db)
+    monkeypatch.setattr(user_repository, "users_collection", db["users"])
+    monkeypatch.setattr(timeline_store, "student_timeline_collection", db["student_timeline"])
+    return db
+
+
+def _request(token=None):
+    headers = [(b"authorization", f"Bearer {token}".encode())] if token else []
+    return Request({"type": "http", "headers": headers})
+
+
+def test_async_repositories_share_documents_with_sync_layer(db):
+    async def scenario():
+        user = await aio_users.create({"email": "a@x.edu", "full_name": "Ada", "created_at": 1})
+        await aio_users.create({"email": "b@x.edu", "full_name": "Bob", "created_at": 2})
+        assert [u["full_name"] for u in await aio_users.list_users()] == ["Bob", "Ada"]
+        assert [u["full_name"] for u in await aio_users.list_users(search="ad")] == ["Ada"]
+        updated = await aio_users.update(str(user["_id"]), {"full_name": "Ada L."})
+        return user, updated
+
+    user, updated = asyncio.run(scenario())
+    assert updated["full_name"] == "Ada L." and "updated_at" in updated
+    assert user_repository.find_by_id(str(user["_id"]))["full_name"] == "Ada L."
+
+
+def test_get_current_user_resolves_session_without_blocking(db):
+    async def scenario():
+        user = await aio_users.create({"email": "a@x.edu", "role": "student"})
+        await aio_sessions.create_session(hash_token("tok"), str(user["_id"]), "student")
+        return await auth.get_current_user(_request("tok"))
+
+    assert asyncio.run(scenario())["email"] == "a@x.edu"
+
+    with pytest.raises(HTTPException) as missing:
+        asyncio.run(auth.get_current_user(_request()))
+    assert missing.value.status_code == 401
+    with pytest.raises(HTTPException) as bad:
+        asyncio.run(auth.get_current_user(_request("other")))
+    assert bad.value.status_code == 401
+
+
+def test_async_event_and_material_writes(db):
+    events = [{"event_id": "e1", "timestamp": 1}, {"event_id": "e2", "timestamp": 2}]
+
+    async def scenario():
+        first = await aio_events.upsert_many("u1", events)
+        again = await aio_events.upsert_many("u1", events)
+        listed = await aio_events.list_for_user("u1")
+        await aio_materials.set_content("101", "m1", "text")
+        return first, again, listed
+
+    first, again, listed = asyncio.run(scenario())
+    assert (first, again) == (2, 0)
+    assert [e["event_id"] for e in listed] == ["e2", "e1"]
+    assert db["course_materials"].find_one({"material_id": "m1"})["content_text"] == "text"
+
+
+def test_raw_payload_update_and_delete_use_the_async_client(db, monkeypatch):
+    raw = db["raw_moodle_payload_collection"]
+    oid = raw.insert_one({"academiq_user_id": "u1"}).inserted_id
+    # The sync collection must not be touched from the event loop.
+    monkeypatch.setattr(moodle, "raw_moodle_payload_collection", None)
+
+    async def scenario():
+        updated = await moodle.put_raw_moodle_payload(str(oid), {"note": "x"})
+        deleted = await moodle.delete_raw_moodle_payload(str(oid))
+        return updated, deleted
+
+    updated, deleted = asyncio.run(scenario())
+    assert updated == {"matched_count": 1, "modified_count": 1}
+    assert deleted == {"deleted_count": 1}
+    assert raw.count_documents({}) == 0
+
+
+def test_inference_pool_bounds_concurrency_and_runs_nested_calls_inline():
+    active, peak = [0], [0]
+    lock = threading.Lock()
+
+    def model(x):
+        with lock:
+            active[0] += 1
+            peak[0] = max(peak[0], active[0])
+        time.sleep(0.02)
+        with lock:
+            active[0] -= 1
+        return x * 2
+
+    async def burst():
+        return await asyncio.gather(*(inference_pool.run(model, i) for i in range(8)))
+
+    assert asyncio.run(burst()) == [i * 2 for i in range(8)]
+    assert peak[0] <= inference_pool.INFERENCE_WORKERS
+
+    before = inference_pool.stats()["inline_calls"]
+    assert inference_pool.call(lambda: inference_pool.call(model, 5)) == 10
+    stats = inference_pool.stats()
+    assert stats["inline_calls"] == before + 1
+    assert stats["running"] == stats["waiting"] == 0
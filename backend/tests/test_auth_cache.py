@@ -0,0 +1,175 @@
+# backend/tests/test_auth_cache.py
+"""
+Tests for the session auth cache (app/services/auth_cache.py) behind
+app.auth.get_current_user: hits skip the database, logout, admin edits,
+password resets, deletes and identity backfills invalidate (through the
+repository writes, not the callers), lookups racing an invalidation are not
+cached, the LRU bound holds, and invalidations from other workers are
+applied.
+"""
+
+import asyncio
+import sys
+from datetime import datetime, timedelta
+from pathlib import Path
+
+import mongomock
+import pytest
+from fastapi import HTTPException
+from starlette.requests import Request
+from starlette.responses import Response
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from app import auth  # noqa: E402
+from app.repositories import auth_hooks, session_repository, user_repository  # noqa: E402
+from app.repositories.aio import session_repository as aio_sessions, user_repository as aio_users  # noqa: E402
+from app.routes import admin, auth as auth_routes  # noqa: E402
+from app.services import auth_cache, user_provisioning  # noqa: E402
+from app.services.security import hash_token  # noqa: E402
+
+
+@pytest.fixture
+def db(monkeypatch, mongomock_async):
+    db = mongomock.MongoClient()["academiq_test"]
+    mongomock_async(db)
+    monkeypatch.setattr(user_repository, "users_collection", db["users"])
+    monkeypatch.setattr(session_repository, "auth_sessions_collection", db["sessions"])
+    return db
+
+
+def _login(token="tok", role="student"):
+    async def scenario():
+        user = await aio_users.create({"email": f"{token}@x.edu", "role": role})
+        await aio_sessions.create_session(hash_token(token), str(user["_id"]), role)
+        return str(user["_id"])
+
+    return asyncio.run(scenario())
+
+
+def _request(token):
+    return Request({"type": "http", "headers": [(b"authorization", f"Bearer {token}".encode())]})
+
+
+def _me(token="tok"):
+    return asyncio.run(auth.get_current_user(_request(token)))
+
+
+def test_second_request_is_served_from_cache(db):
+    _login()
+    assert _me()["email"] == "tok@x.edu"
+    hits = auth_cache.stats()["hits"]
+
+    # Even with the documents gone, a cached session answers without the DB.
+    db["sessions"].delete_many({})
+    db["users"].delete_many({})
+    assert _me()["email"] == "tok@x.edu"
+    assert auth_cache.stats()["hits"] == hits + 1
+    assert auth_cache.stats()["auth_ms"]["p99"] >= 0
+
+
+def test_logout_and_user_changes_invalidate(db):
+    user_id = _login()
+    _me()
+
+    asyncio.run(admin.update_user(user_id, admin.UpdateUserRequest(role="admin")))
+    assert _me()["role"] == "admin"
+
+    user_provisioning.resolve_or_create_user({"email": "tok@x.edu", "full_name": "Sync edit"})
+    assert _me()["full_name"] == "Sync edit"
+
+    asyncio.run(auth_routes.logout(_request("tok"), Response()))
+    with pytest.raises(HTTPException) as exc:
+        _me()
+    assert exc.value.status_code == 401
+
+
+def test_revoking_all_sessions_and_deleting_user_invalidate(db):
+    user_id = _login("a")
+    _login("b")
+    _me("a"), _me("b")
+
+    asyncio.run(admin.reset_password(user_id, admin.ResetPasswordRequest(password="new-password")))
+    with pytest.raises(HTTPException):
+        _me("a")
+    assert _me("b")["email"] == "b@x.edu"
+
+    other = str(db["users"].find_one({"email": "b@x.edu"})["_id"])
+    asyncio.run(admin.delete_user(other))
+    with pytest.raises(HTTPException):
+        _me("b")
+
+
+def test_repository_writes_invalidate_without_the_caller(db):
+    user_id = _login("a")
+    _me("a")
+
+    user_repository.update(user_id, {"full_name": "Sync edit"})
+    assert _me("a")["full_name"] == "Sync edit"
+    asyncio.run(aio_users.update(user_id, {"role": "admin"}))
+    assert _me("a")["role"] == "admin"
+
+    session_repository.delete_session(hash_token("a"))
+    with pytest.raises(HTTPException):
+        _me("a")
+
+    asyncio.run(aio_sessions.create_session(hash_token("a2"), user_id, "admin"))
+    _me("a2")
+    asyncio.run(aio_sessions.delete_sessions_for_user(user_id))
+    with pytest.raises(HTTPException):
+        _me("a2")
+
+
+def test_writes_load_the_cache_hooks_in_a_process_that_never_imported_them(db, monkeypatch):
+    import app.services
+
+    user_id = _login()
+    # As in a script: nothing registered, auth_cache not imported yet.
+    monkeypatch.setattr(auth_hooks, "_token_hooks", [])
+    monkeypatch.setattr(auth_hooks, "_user_hooks", [])
+    monkeypatch.setattr(app.services, "auth_cache", auth_cache)
+    monkeypatch.delitem(sys.modules, "app.services.auth_cache")
+
+    session_repository.delete_sessions_for_user(user_id)
+
+    fresh = sys.modules["app.services.auth_cache"]
+    assert fresh is not auth_cache
+    assert auth_hooks._user_hooks == [fresh.invalidate_user]
+    assert auth_hooks._token_hooks == [fresh.invalidate_token]
+    assert fresh.stats()["invalidations"] == 1
+
+
+def test_lookup_racing_an_invalidation_is_not_cached():
+    session = {"user_id": "u1", "expires_at": datetime.utcnow() + timedelta(hours=1)}
+    seen = auth_cache.generation()
+    auth_cache.invalidate_user("u1")
+    auth_cache.put("h1", session, {"_id": "u1"}, seen)
+    assert auth_cache.get("h1") is None
+
+    auth_cache.put("h1", session, {"_id": "u1"}, auth_cache.generation())
+    assert auth_cache.get("h1")[1] == {"_id": "u1"}
+    auth_cache.clear()
+
+
+def test_size_bound_and_session_expiry(monkeypatch):
+    monkeypatch.setattr(auth_cache, "AUTH_CACHE_SIZE", 2)
+    future = datetime.utcnow() + timedelta(hours=1)
+    for h in ("h1", "h2", "h3"):
+        auth_cache.put(h, {"user_id": h, "expires_at": future}, {}, auth_cache.generation())
+    assert auth_cache.get("h1") is None and auth_cache.get("h3") is not None
+
+    expired = {"user_id": "u", "expires_at": datetime.utcnow() - timedelta(seconds=1)}
+    auth_cache.put("old", expired, {}, auth_cache.generation())
+    assert auth_cache.get("old") is None
+    auth_cache.clear()
+
+
+def test_invalidations_from_other_workers_are_applied():
+    future = datetime.utcnow() + timedelta(hours=1)
+    auth_cache.put("h1", {"user_id": "u1", "expires_at": future}, {}, auth_cache.generation())
+    auth_cache.put("h2", {"user_id": "u2", "expires_at": future}, {}, auth_cache.generation())
+
+    auth_cache._apply_remote("u:u1")
+    auth_cache._apply_remote("t:h2")
+    assert auth_cache.get("h1") is None and auth_cache.get("h2") is None
+    assert auth_cache.stats()["remote_invalidations"] >= 2
@@ -0,0 +1,216 @@
+# backend/tests/test_bulk_ingest.py
+"""
+Tests for bulk Moodle ingest (app.services.bulk_ingest): NDJSON splitting,
+bulk identity resolution, per-key collapsing of chunk writes, per-line
+summaries and the constant number of bulk writes per chunk.
+
+Collections are mongomock; scoring and emails are stubbed.
+"""
+
+import asyncio
+import json
+import sys
+from pathlib import Path
+
+import mongomock
+import pytest
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from app.repositories import (  # noqa: E402
+    event_repository,
+    ingest_digest_repository,
+    material_repository,
+    metrics_repository,
+    user_repository,
+)
+from app.services import bulk_ingest, scoring_queue, timeline_service, timeline_store, user_provisioning  # noqa: E402
+
+
+def _payload(moodle_id, clicks, material_ids=("m1",), events=("e1",)):
+    return {
+        "student": {"moodle_user_id": moodle_id, "full_name": f"Student {moodle_id}"},
+        "behavior": {"total_time_spent_on_moodle": 3600, "active_days_count": 5},
+        "metricsByCourse": {"101": {"course_name": "Python", "click_count": clicks}},
+        "materials": [
+            {"course_id": "101", "material_id": m, "title": f"Lecture {m}", "type": "resource"}
+            for m in material_ids
+        ],
+        "events": [{"event_id": e, "timestamp": 1704067200, "course_id": "101"} for e in events],
+    }
+
+
+@pytest.fixture
+def db(monkeypatch, mongomock_bulk_write):
+    db = mongomock.MongoClient()["academiq_test"]
+    writes = []
+
+    def counted(collection):
+        return mongomock_bulk_write(collection, calls=writes)
+
+    monkeypatch.setattr(user_repository, "users_collection", db["users"])
+    monkeypatch.setattr(material_repository, "course_materials_collection", counted(db["course_materials"]))
+    monkeypatch.setattr(metrics_repository, "student_metrics_collection", counted(db["student_metrics"]))
+    monkeypatch.setattr(event_repository, "student_events_collection", counted(db["student_events"]))
+    monkeypatch.setattr(bulk_ingest, "raw_moodle_payload_collection", counted(db["raw_moodle_payload_collection"]))
+    monkeypatch.setattr(bulk_ingest, "feature_vectors_collection", counted(db["feature_vectors"]))
+    monkeypatch.setattr(bulk_ingest, "system_events_collection", db["system_events"])
+    monkeypatch.setattr(timeline_store, "student_timeline_collection", db["student_timeline"])
+    monkeypatch.setattr(ingest_digest_repository, "ingest_digests_collection", counted(db["ingest_digests"]))
+    monkeypatch.setattr(user_provisioning, "send_account_created_email", lambda *a: None)
+    monkeypatch.setattr(user_provisioning, "hash_password", lambda p: "hashed")
+    submitted = []
+    monkeypatch.setattr(scoring_queue, "submit", lambda user_id, features: submitted.append(user_id) or "queued")
+    db.writes = writes
+    db.submitted = submitted
+    return db
+
+
+def test_chunk_collapses_writes_and_reports_each_line(db):
+    lines = [
+        json.dumps(_payload(42, 10, material_ids=("m1", "m2"))),
+        json.dumps(_payload(43, 20, events=("e1", "e2"))),
+        json.dumps(_payload(42, 30, material_ids=("m1", "m3"), events=("e1", "e9"))),
+    ]
+    report = bulk_ingest.ingest(lines, chunk_size=10)
+
+    assert report["payloads"] == report["ingested"] == 3
+    assert report["students"] == 2 and report["chunks"] == 1
+    assert [r["line"] for r in report["results"]] == [1, 2, 3]
+    assert [r["account_created"] for r in report["results"]] == [True, True, False]
+    assert db["users"].count_documents({}) == 2
+
+    first, _, last = report["results"]
+    assert first["academiq_user_id"] == last["academiq_user_id"]
+    raw = db["raw_moodle_payload_collection"].find_one({"academiq_user_id": first["academiq_user_id"]})
+    assert raw["sync_count"] == 2 and str(raw["_id"]) == first["inserted_id"]
+    assert "materials" not in raw and "events" not in raw
+
+    fv = db["feature_vectors"].find_one({"academiq_user_id": first["academiq_user_id"]})
+    assert fv["features"]["all_clicks"] == 30
+    assert fv["raw_payload_id"] == first["inserted_id"]
+
+    assert db["course_materials"].count_documents({}) == 3
+    assert db["student_events"].count_documents({}) == 4
+    assert sum(r["normalized"]["materials_new"] for r in report["results"]) == 3
+    assert sum(r["normalized"]["events_new"] for r in report["results"]) == 4
+    assert db["student_metrics"].count_documents({"course_id": "101"}) == 2
+
+    # One bulk write per collection for the whole chunk.
+    assert sorted(db.writes) == sorted([
+        "course_materials", "student_events", "student_metrics",
+        "raw_moodle_payload_collection", "feature_vectors", "ingest_digests",
+    ])
+
+
+def test_existing_accounts_are_matched_not_recreated(db):
+    bulk_ingest.ingest([_payload(42, 10)])
+    report = bulk_ingest.ingest([_payload(42, 11), _payload(44, 12)])
+
+    assert [r["account_created"] for r in report["results"]] == [False, True]
+    assert db["users"].count_documents({}) == 2
+    assert db["raw_moodle_payload_collection"].find_one({"academiq_user_id": report["results"][0]["academiq_user_id"]})["sync_count"] == 2
+
+
+def test_identical_resync_skips_every_section(db):
+    first = bulk_ingest.ingest([_payload(42, 10)])["results"][0]
+    assert first["skipped"] == [] and first["status"] == "features_computed"
+    db.writes.clear()
+
+    again = bulk_ingest.ingest([_payload(42, 10)])["results"][0]
+    assert again["status"] == "features_unchanged" and again["scoring"] == "skipped"
+    assert again["skipped"] == ["behavior", "events", "grades", "materials", "metricsByCourse"]
+    assert again["normalized"] == {
+        "materials_seen": 0, "materials_new": 0, "metrics_courses": 0, "metrics_new": 0, "events_new": 0,
+    }
+    assert db.submitted == [first["academiq_user_id"]]
+    # Only the audit record and the digests are written.
+    assert sorted(db.writes) == ["ingest_digests", "raw_moodle_payload_collection"]
+    raw = db["raw_moodle_payload_collection"].find_one({"academiq_user_id": first["academiq_user_id"]})
+    assert raw["sync_count"] == 2
+
+
+def test_changed_section_is_the_only_one_rewritten(db):
+    bulk_ingest.ingest([_payload(42, 10)])
+    # Same chunk: the second payload is compared with the first, not the store.
+    first, second = bulk_ingest.ingest([_payload(42, 10, events=("e1", "e2")), _payload(42, 25, events=("e1", "e2"))])["results"]
+
+    assert first["skipped"] == ["behavior", "grades", "materials", "metricsByCourse"]
+    assert first["normalized"]["events_new"] == 1 and first["scoring"] == "queued"
+    assert second["skipped"] == ["behavior", "events", "grades", "materials"]
+    assert second["status"] == "features_computed"
+    fv = db["feature_vectors"].find_one({"academiq_user_id": second["academiq_user_id"]})
+    assert fv["features"]["all_clicks"] == 25
+
+
+def test_materials_alone_can_change_the_features(db):
+    first = bulk_ingest.ingest([_payload(42, 10)])["results"][0]
+    payload = _payload(42, 10)
+    payload["materials"].append({"course_id": "101", "material_id": "a1", "title": "Essay", "type": "assignment",
+                                 "due_date": "Monday, 6 October 2025, 2:00 AM"})
+
+    second = bulk_ingest.ingest([payload])["results"][0]
+    assert second["skipped"] == ["behavior", "events", "grades", "metricsByCourse"]
+    assert second["status"] == "features_computed"
+    fv = db["feature_vectors"].find_one({"academiq_user_id": first["academiq_user_id"]})
+    assert fv["features"]["late_submission_count"] == 1
+
+    # Due dates are compared with the clock, so an identical re-sync is featurized again.
+    assert bulk_ingest.ingest([payload])["results"][0]["status"] == "features_computed"
+    assert db.submitted == [first["academiq_user_id"]] * 3
+
+
+def test_bad_lines_do_not_fail_their_chunk(db):
+    report = bulk_ingest.ingest(
+        [json.dumps(_payload(42, 10)), "{not json", "[1, 2]", json.dumps(_payload(43, 10))],
+        chunk_size=1,
+    )
+    statuses = [r["status"] for r in report["results"]]
+    assert statuses == ["features_computed", "error", "error", "features_computed"]
+    assert report["failed"] == 2 and report["chunks"] == 2
+    assert report["payloads_per_sec"] > 0
+
+
+def test_bad_identity_only_fails_its_own_line(db, monkeypatch):
+    create = user_provisioning.resolve_or_create_user
+
+    def flaky(identity):
+        if identity.get("moodle_user_id") == "43":
+            raise RuntimeError("insert failed")
+        return create(identity)
+    monkeypatch.setattr(user_provisioning, "resolve_or_create_user", flaky)
+
+    report = bulk_ingest.ingest([_payload(42, 10), _payload(43, 10), {"student": "x"}, _payload(44, 10)])
+    assert [r["status"] for r in report["results"]] == ["features_computed", "error", "error", "features_computed"]
+    assert "insert failed" in report["results"][1]["detail"]
+    assert report["chunks"] == 1 and db["users"].count_documents({}) == 2
+
+
+def test_ndjson_lines_splits_across_blocks():
+    async def stream():
+        for block in (b'{"a": 1}\n{"b"', b": 2}\n\n", b'{"c": 3}'):
+            yield block
+
+    async def collect():
+        return [line async for line in bulk_ingest.ndjson_lines(stream())]
+
+    assert asyncio.run(collect()) == [b'{"a": 1}', b'{"b": 2}', b'{"c": 3}']
+
+
+def test_new_events_and_grades_reach_a_built_timeline(db, monkeypatch, mongomock_bulk_write):
+    mongomock_bulk_write(db["student_timeline"])
+    monkeypatch.setattr(timeline_store, "student_events_collection", db["student_events"])
+    monkeypatch.setattr(timeline_service, "student_events_collection", db["student_events"])
+    monkeypatch.setattr(timeline_store, "raw_moodle_payload_collection", db["raw_moodle_payload_collection"])
+    monkeypatch.setattr(timeline_service, "ml_results_collection", db["ml_results"])
+    uid = bulk_ingest.ingest([_payload(42, 10)])["results"][0]["academiq_user_id"]
+    timeline_store.rebuild(uid)
+
+    payload = _payload(42, 11, events=("e1", "e2"))
+    payload["events"][1].update(action_type="material_click", page_type="resource", timestamp=1_704_067_200_000)
+    payload["grades"] = [{"course_id": "101", "item_name": "QuizOne", "item_type": "quiz",
+                          "percentage": 80, "submission_time": "2024-01-02T09:00:00"}]
+    bulk_ingest.ingest([payload])
+
+    stored = db["student_timeline"].find({"academiq_user_id": uid, "views": "101"})
+    assert sorted(d["type"] for d in stored) == ["material_view", "quiz_attempt"]
@@ -0,0 +1,107 @@
+# backend/tests/test_cohort_inference.py
+"""
+Tests for risk_grade_service.predict_many() and burnout_service.predict_many().
+
+The pickled bundles are replaced with small deterministic stand-ins that
+record every call, so these tests check that a cohort is scored with one
+call per bundle model and that each result equals the one-row predict().
+"""
+
+import sys
+from pathlib import Path
+
+import numpy as np
+import pytest
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from app.services import burnout_service, risk_grade_service  # noqa: E402
+
+FEATURE_COLS = [
+    "all_clicks", "active_days", "material_clicks", "quiz_attempts", "avg_quiz_score",
+    "assignment_submissions", "avg_assignment_score", "total_time_spent",
+    "procrastination_index", "late_submission_count", "clicks_per_day",
+]
+
+
+class _Recorder:
+    def __init__(self, calls, name, fn):
+        self._calls, self._name, self._fn = calls, name, fn
+
+    def __getattr__(self, method):
+        def call(x):
+            self._calls.append((self._name, len(x)))
+            return self._fn(method, np.asarray(x, dtype=float))
+        return call
+
+
+def _cohort(n):
+    rng = np.random.default_rng(0)
+    return [
+        {"all_clicks": float(rng.integers(10, 900)), "active_days": float(rng.integers(1, 60)),
+         "material_clicks": float(rng.integers(0, 80)), "quiz_attempts": float(rng.integers(0, 6)),
+         "avg_quiz_score": float(rng.random()), "assignment_submissions": float(rng.integers(0, 8)),
+         "avg_assignment_score": float(rng.random()), "total_time_spent": float(rng.integers(0, 3000)),
+         "procrastination_index": float(rng.normal()), "late_submission_count": float(rng.integers(0, 4))}
+        for _ in range(n)
+    ]
+
+
+@pytest.fixture
+def calls(monkeypatch):
+    calls = []
+    risk_bundle = {
+        "feature_cols": FEATURE_COLS, "log_cols": ["all_clicks", "total_time_spent"], "proc_clip": (-3.0, 3.0),
+        "n_clusters": 3, "risk_map": {0: "High Risk", 1: "Medium Risk", 2: "Low Risk"},
+        "scaler": _Recorder(calls, "scaler", lambda m, x: x / 10.0),
+        "kmeans": _Recorder(calls, "kmeans", lambda m, x: (x[:, 0] * 10).astype(int) % 3),
+        "grade_reg": _Recorder(calls, "grade_reg", lambda m, x: x[:, :3].sum(1) * 20 + x[:, -3:] @ [0, 5, 10]),
+    }
+    burnout_bundle = {
+        "feature_cols": FEATURE_COLS, "log_cols": ["all_clicks"], "proc_clip": (-3.0, 3.0), "threshold": 0.5,
+        "preprocessor": type("P", (), {"steps": [("scale", _Recorder(calls, "preprocessor", lambda m, x: x))]})(),
+        "model": _Recorder(calls, "model", lambda m, x: np.column_stack([
+            1 - 1 / (1 + np.exp(-x[:, 1] / 10 + 1)), 1 / (1 + np.exp(-x[:, 1] / 10 + 1))])),
+    }
+    for module, bundle in ((risk_grade_service, risk_bundle), (burnout_service, burnout_bundle)):
+        monkeypatch.setattr(module, "_bundle", bundle)
+        monkeypatch.setattr(module, "_loaded", True)
+        monkeypatch.setattr(module, "_compiled", None)
+    return calls
+
+
+@pytest.mark.parametrize("service, models", [
+    (risk_grade_service, ["scaler", "kmeans", "grade_reg"]),
+    (burnout_service, ["preprocessor", "model"]),
+])
+def test_predict_many_calls_each_model_once_and_matches_predict(calls, service, models):
+    cohort = _cohort(40)
+    cohort[7] = {}
+
+    batch = service.predict_many(cohort)
+
+    assert calls == [(name, 39) for name in models]
+    assert batch[7] is None and service.predict({}) is None
+    for feats, result in zip(cohort, batch):
+        if feats:
+            assert result == service.predict(feats)
+
+
+@pytest.mark.parametrize("service", [risk_grade_service, burnout_service])
+def test_malformed_vectors_only_lose_their_own_result(calls, service):
+    cohort = _cohort(4)
+    cohort[1] = {"all_clicks": "lots"}
+    cohort[2] = {"all_clicks": "", "active_days": None}
+
+    batch = service.predict_many(cohort)
+
+    assert batch[1] is None and service.predict(cohort[1]) is None
+    assert batch[2] is not None and batch[2] == service.predict({"all_clicks": 0})
+    assert batch[0] == service.predict(cohort[0]) and batch[3] == service.predict(cohort[3])
+
+
+def test_predict_many_is_empty_handed_without_a_model(monkeypatch):
+    monkeypatch.setattr(burnout_service, "_bundle", None)
+    monkeypatch.setattr(burnout_service, "_loaded", True)
+    assert burnout_service.predict_many(_cohort(3)) == [None, None, None]
+    assert burnout_service.predict_many([]) == []
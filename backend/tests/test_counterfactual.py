@@ -8,7 +8,7 @@ app.services.performance_predict that counterfactual.py reads
 (_calibrated_model, _behavioral_features, _train_medians, _hp_medians) with a
 small synthetic logistic model. This keeps the tests fast, deterministic, and
 independent of the binary artifacts, while still exercising the real
-_rebuild_derived() / find_counterfactual() code paths exactly as they run in
+feature pipeline / find_counterfactual() code paths exactly as they run in
 production.
 
 Synthetic model: probability is driven almost entirely by
@@ -28,6 +28,7 @@ sys.path.insert(0, str(Path(__file__).parent.parent))
 
 from app.services import performance_predict as pp  # noqa: E402
 from app.services import counterfactual as cf  # noqa: E402
+from app.services import feature_pipeline  # noqa: E402
 
 
 BEHAVIORAL_FEATURES = [
@@ -62,7 +63,9 @@ TRAIN_MEDIANS = {
 
 class _FakeCalibratedModel:
     """
-    Deterministic stand-in for the real CalibratedClassifierCV.
+    Deterministic stand-in for the real CalibratedClassifierCV. Vectorised
+    over rows, like the real model, since the engine scores candidates in
+    batches.
 
     predict_proba is a hand-rolled logistic function dominated by
     assignment_submissions and quiz_attempts (mirroring the notebook's real
@@ -72,17 +75,16 @@ class _FakeCalibratedModel:
     """
 
     def predict_proba(self, X_df: pd.DataFrame) -> np.ndarray:
-        row = X_df.iloc[0]
         score = (
             -3.0
-            + 0.35 * row["assignment_submissions"]
-            + 0.18 * row["quiz_attempts"]
-            + 0.015 * row["active_days"]
-            + 0.00015 * row["total_time_spent"]
-            - 0.05 * row["late_submission_count"]
+            + 0.35 * X_df["assignment_submissions"].to_numpy()
+            + 0.18 * X_df["quiz_attempts"].to_numpy()
+            + 0.015 * X_df["active_days"].to_numpy()
+            + 0.00015 * X_df["total_time_spent"].to_numpy()
+            - 0.05 * X_df["late_submission_count"].to_numpy()
         )
         p1 = 1.0 / (1.0 + np.exp(-score))
-        return np.array([[1 - p1, p1]])
+        return np.column_stack([1 - p1, p1])
 
 
 @pytest.fixture(autouse=True)
@@ -180,11 +182,9 @@ def test_probability_after_changes_is_not_lower_than_original():
     # and confirm the resulting probability matches new_probability — this
     # guards against changes_needed and new_probability silently diverging.
     raw = {feat: float(AT_RISK_STUDENT.get(feat, 0.0)) for feat in cf.PRIMARY_MUTABLE}
-    row = cf._rebuild_derived(pd.Series(raw))
     for feat, change in result["changes_needed"].items():
-        row[feat] = change["to"]
-        row = cf._rebuild_derived(row)
-    replayed_p = cf._predict_proba(row)
+        raw[feat] = change["to"]
+    replayed_p = float(cf._score(feature_pipeline.raw_matrix([raw]))[0])
     assert round(replayed_p, 3) == result["new_probability"]
 
 
@@ -196,3 +196,21 @@ def test_changes_needed_only_uses_primary_mutable_features():
             f"{feat} is a derived feature and must never appear in "
             f"changes_needed — only PRIMARY_MUTABLE features are adjustable."
         )
+
+
+def test_beam_mode_never_needs_more_changes_than_greedy():
+    """Beam search returns the same shape and, when both flip, no larger plan."""
+    greedy = cf.find_counterfactual(AT_RISK_STUDENT)
+    beam = cf.find_counterfactual(AT_RISK_STUDENT, mode="beam")
+
+    assert set(beam) == set(greedy)
+    assert all(feat in cf.PRIMARY_MUTABLE for feat in beam["changes_needed"])
+    assert beam["new_probability"] >= beam["original_probability"]
+    if greedy["status"] == "Flip achieved":
+        assert beam["status"] == "Flip achieved"
+        assert len(beam["changes_needed"]) <= len(greedy["changes_needed"])
+
+
+def test_unknown_search_mode_raises():
+    with pytest.raises(ValueError):
+        cf.find_counterfactual(AT_RISK_STUDENT, mode="exhaustive")
@@ -0,0 +1,131 @@
+# backend/tests/test_counterfactual_batch.py
+"""
+Tests for the cohort-wide counterfactual batch job
+(app.services.counterfactual_batch) and its plan store
+(app.repositories.counterfactual_repository).
+
+Runs the job in-process (workers=0) against mongomock collections, with the
+same synthetic logistic model test_counterfactual.py uses patched into
+performance_predict, so no artifacts or process pool are needed. Plan writes
+go through conftest's mongomock_bulk_write shim.
+"""
+
+import sys
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+import mongomock
+import pytest
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from app.repositories import counterfactual_repository  # noqa: E402
+from app.services import counterfactual as cf  # noqa: E402
+from app.services import counterfactual_batch  # noqa: E402
+from app.services import feature_pipeline  # noqa: E402
+from app.services import performance_predict as pp  # noqa: E402
+from tests.test_counterfactual import (  # noqa: E402
+    AT_RISK_STUDENT,
+    BEHAVIORAL_FEATURES,
+    HIGH_PERFORMER_STUDENT,
+    HP_MEDIANS,
+    TRAIN_MEDIANS,
+    _FakeCalibratedModel,
+)
+
+
+@pytest.fixture
+def collections(monkeypatch, mongomock_bulk_write):
+    db = mongomock.MongoClient()["academiq_test"]
+    monkeypatch.setattr(counterfactual_batch, "feature_vectors_collection", db["feature_vectors"])
+    monkeypatch.setattr(
+        counterfactual_repository, "counterfactual_plans_collection",
+        mongomock_bulk_write(db["counterfactual_plans"]),
+    )
+    monkeypatch.setattr(pp, "_calibrated_model", _FakeCalibratedModel())
+    monkeypatch.setattr(pp, "_behavioral_features", BEHAVIORAL_FEATURES)
+    monkeypatch.setattr(pp, "_train_medians", TRAIN_MEDIANS)
+    monkeypatch.setattr(pp, "_hp_medians", HP_MEDIANS)
+    db["feature_vectors"].insert_many([
+        {"academiq_user_id": f"at-risk-{i}", "features": {**AT_RISK_STUDENT, "quiz_attempts": float(i)}}
+        for i in range(5)
+    ] + [{"academiq_user_id": "hp", "features": HIGH_PERFORMER_STUDENT}])
+    return db
+
+
+def test_batch_stores_a_plan_per_student_tagged_with_feature_hash(collections):
+    report = counterfactual_batch.run(workers=0, chunk_size=2, log=None)
+
+    assert report["students"] == 6
+    assert report["chunks"] == 3
+    assert report["high_performers"] == 1
+    assert report["inserted"] == 6
+
+    for doc in collections["feature_vectors"].find():
+        plan = counterfactual_repository.get(doc["academiq_user_id"])
+        assert plan["feature_hash"] == feature_pipeline.feature_hash(doc["features"])
+        assert plan["result"] == cf.find_counterfactual(doc["features"])
+
+
+def test_rerun_only_recomputes_changed_students(collections):
+    counterfactual_batch.run(workers=0, log=None)
+    collections["feature_vectors"].update_one(
+        {"academiq_user_id": "at-risk-0"},
+        {"$set": {"features.assignment_submissions": 5.0}},
+    )
+
+    report = counterfactual_batch.run(workers=0, log=None)
+
+    assert report["students"] == 1
+    assert report["unchanged"] == 5
+    assert report["inserted"] == 0
+    plan = counterfactual_repository.get("at-risk-0")
+    assert plan["feature_hash"] == feature_pipeline.feature_hash(
+        {**AT_RISK_STUDENT, "quiz_attempts": 0.0, "assignment_submissions": 5.0}
+    )
+
+
+def test_mode_change_or_force_recomputes(collections):
+    counterfactual_batch.run(workers=0, log=None)
+    assert counterfactual_batch.run(workers=0, mode="beam", log=None)["students"] == 6
+    assert counterfactual_batch.run(workers=0, mode="beam", force=True, log=None)["students"] == 6
+    assert counterfactual_batch.run(workers=0, mode="beam", log=None)["students"] == 0
+
+
+def test_new_model_artifact_recomputes(collections, monkeypatch):
+    monkeypatch.setattr(pp, "_artifact_version", "v1")
+    counterfactual_batch.run(workers=0, log=None)
+    assert counterfactual_repository.get("hp")["artifact_version"] == "v1"
+    assert counterfactual_batch.run(workers=0, log=None)["students"] == 0
+
+    monkeypatch.setattr(pp, "_artifact_version", "v2")
+    assert counterfactual_batch.run(workers=0, log=None)["students"] == 6
+    assert counterfactual_repository.get("hp")["artifact_version"] == "v2"
+
+
+def test_pool_keeps_a_bounded_number_of_chunks_in_flight(collections, monkeypatch):
+    # Threads stand in for processes; the scheduling is the same.
+    monkeypatch.setattr(counterfactual_batch, "ProcessPoolExecutor", ThreadPoolExecutor)
+    stored, ahead = [], []
+    upsert_many = counterfactual_repository.upsert_many
+    monkeypatch.setattr(counterfactual_repository, "upsert_many", lambda plans: stored.append(1) or upsert_many(plans))
+    pending_chunks = counterfactual_batch._pending_chunks
+
+    def watched(*args):
+        for n, chunk in enumerate(pending_chunks(*args)):
+            ahead.append(n - len(stored))
+            yield chunk
+    monkeypatch.setattr(counterfactual_batch, "_pending_chunks", watched)
+
+    report = counterfactual_batch.run(workers=1, chunk_size=1, log=None)
+
+    assert report["students"] == report["chunks"] == 6
+    assert max(ahead) == counterfactual_batch.MAX_IN_FLIGHT_PER_WORKER
+
+
+def test_feature_hash_ignores_non_model_keys_and_int_float():
+    base = {k: int(v) if v.is_integer() else v for k, v in AT_RISK_STUDENT.items()}
+    noisy = {**AT_RISK_STUDENT, "avg_quiz_score": 0.9, "student_id": "x"}
+    assert feature_pipeline.feature_hash(base) == feature_pipeline.feature_hash(noisy)
+    assert feature_pipeline.feature_hash({}) == feature_pipeline.feature_hash({"all_clicks": None})
+    assert feature_pipeline.feature_hash(base) != feature_pipeline.feature_hash({**base, "all_clicks": 121})
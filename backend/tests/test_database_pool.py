@@ -0,0 +1,54 @@
+# backend/tests/test_database_pool.py
+"""
+Tests for the managed MongoDB client in app.config.database: lazy creation,
+pool options taken from settings, and the connection-pool counters published
+in /api/system/status.
+"""
+
+import sys
+from pathlib import Path
+from types import SimpleNamespace
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from app.config import database  # noqa: E402
+from app.services import system_status_service  # noqa: E402
+
+
+def test_client_is_shared_and_built_from_pool_settings():
+    assert database.get_client() is database.get_client() is database.client
+
+    options = database._client_options(database._PoolMonitor())
+    assert options["maxPoolSize"] == database.MONGO_MAX_POOL_SIZE
+    assert options["minPoolSize"] == database.MONGO_MIN_POOL_SIZE
+    assert options["waitQueueTimeoutMS"] == database.MONGO_WAIT_QUEUE_TIMEOUT_MS
+    assert options["readPreference"] == database.MONGO_READ_PREFERENCE
+    assert isinstance(options["event_listeners"][0], database._PoolMonitor)
+
+
+def test_pool_monitor_tracks_checkouts_and_waits():
+    monitor = database._PoolMonitor()
+    monitor.connection_created(SimpleNamespace())
+    monitor.connection_created(SimpleNamespace())
+    monitor.connection_checked_out(SimpleNamespace(duration=0.004))
+    monitor.connection_checked_out(SimpleNamespace(duration=0.002))
+    monitor.connection_checked_in(SimpleNamespace())
+    monitor.connection_check_out_failed(SimpleNamespace(duration=5.0))
+
+    assert monitor.snapshot() == {
+        "open": 2,
+        "checked_out": 1,
+        "checkouts": 2,
+        "checkout_failures": 1,
+        "avg_wait_ms": 3.0,
+        "max_wait_ms": 4.0,
+    }
+
+
+def test_pool_stats_are_published_in_system_status(monkeypatch):
+    monkeypatch.setattr(database, "ping", lambda: None)
+    status = system_status_service.get_system_status()
+
+    pool = status["mongo_pool"]
+    assert pool["settings"]["max_pool_size"] == database.MONGO_MAX_POOL_SIZE
+    assert set(pool["sync"]) >= {"checked_out", "avg_wait_ms", "max_wait_ms"}
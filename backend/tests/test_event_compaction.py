@@ -0,0 +1,167 @@
+# backend/tests/test_event_compaction.py
+"""
+Tests for student_events compaction (app/services/event_compaction.py): old
+low-signal events become daily rollups while the timeline keeps its summary
+counts and inactivity gaps, the materialized timeline stays consistent,
+re-synced compacted events are not counted twice, and a run interrupted
+before its deletes finishes exactly on the next run.
+
+Every collection is a mongomock one.
+"""
+
+import random
+import sys
+import time
+from datetime import datetime
+from pathlib import Path
+
+import mongomock
+import pytest
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from app.repositories import event_repository, event_rollup_repository  # noqa: E402
+from app.services import event_compaction, moodle_ingest, timeline_service, timeline_store  # noqa: E402
+
+DAY = 86_400_000
+START = 1_700_000_000_000          # Nov 2023: far past the compaction horizon
+RECENT = int(time.time() * 1000) - DAY
+
+SHAPES = [
+    {"action_type": "material_click", "page_type": "resource"},
+    {"action_type": "view", "page_type": "resource"},
+    {"action_type": "view", "page_type": "grades"},
+    {"action_type": "view", "page_type": "dashboard"},
+    {"action_type": "view", "page_type": "quiz", "quiz_attempt": True, "score": "35"},
+    {"action_type": "view", "page_type": "assignment", "assignment_submission": True, "late": True},
+]
+
+
+def _events(n, seed):
+    rng, t, out = random.Random(seed), START, []
+    for _ in range(n):
+        t += rng.choice([600_000] * 8 + [5 * 3_600_000, 2 * DAY, 4 * DAY, 9 * DAY])
+        course = rng.choice(["101", "202"])
+        shape = rng.choice(SHAPES[:4] * 3 + SHAPES[4:])
+        out.append({"timestamp": t, "course_id": course, "title": f"Item {t}", "event_id": f"{t}-{course}", **shape})
+    return out
+
+
+@pytest.fixture
+def db(monkeypatch, mongomock_bulk_write, empty_event_rollups):
+    db = mongomock.MongoClient().db
+    for name in ("student_events", "student_timeline"):
+        mongomock_bulk_write(db[name])
+    mongomock_bulk_write(empty_event_rollups)
+    for module, attrs in (
+        (timeline_service, ("student_events", "raw_moodle_payload", "ml_results")),
+        (timeline_store, ("student_events", "raw_moodle_payload", "student_timeline")),
+        (event_repository, ("student_events",)),
+        (event_compaction, ("student_events",)),
+    ):
+        for attr in attrs:
+            monkeypatch.setattr(module, f"{attr}_collection", db[attr])
+    db.rollups = empty_event_rollups
+    return db
+
+
+def _views(uid):
+    return {course: timeline_service.build_timeline(uid, course, limit=10_000) for course in (None, "101", "202")}
+
+
+def test_compaction_keeps_summaries_and_inactivity_gaps(db):
+    events = _events(400, seed=3)
+    moodle_ingest.write_events("u1", events)
+    before = _views("u1")
+    window = (datetime(2023, 12, 1), datetime(2024, 1, 31, 23, 59, 59, 999000))
+    windowed = timeline_service.timeline_summary("u1", "101", *window)
+
+    report = event_compaction.compact(["u1"])
+
+    compacted = sum(event_compaction.compactable(ev) for ev in events)
+    assert report["events"] == compacted and report["failed"] == []
+    assert db.student_events.count_documents({}) == len(events) - compacted
+    assert sum(r["count"] for r in db.rollups.find({"academiq_user_id": "u1"})) == compacted
+    assert report["bytes_removed"] > report["bytes_added"] > 0
+
+    after = _views("u1")
+    for course in before:
+        assert after[course]["summary"] == before[course]["summary"]
+        kept = [i["id"] for i in before[course]["timeline"] if i["type"] not in ("material_view", "grade_update")]
+        assert [i["id"] for i in after[course]["timeline"] if i["type"] not in ("material_view", "grade_update")] == kept
+        assert len(after[course]["timeline"]) < len(before[course]["timeline"])
+    assert timeline_service.timeline_summary("u1", "101", *window) == windowed
+
+    assert event_compaction.compact(["u1"])["events"] == 0
+
+
+def test_paging_backwards_through_rollups_matches_forwards(db):
+    moodle_ingest.write_events("u1", _events(300, seed=5))
+    event_compaction.compact(["u1"])
+
+    forwards = [i["id"] for i in timeline_service.iter_timeline("u1", "202")]
+    backwards, before = [], timeline_service.LATEST
+    while before:
+        page = timeline_service.build_timeline("u1", "202", limit=9, before=before)
+        backwards[:0] = [i["id"] for i in page["timeline"]]
+        before = page["prev_cursor"]
+    assert backwards == forwards
+
+
+def test_materialized_timeline_follows_compaction(db):
+    moodle_ingest.write_events("u1", _events(300, seed=7))
+    timeline_store.rebuild("u1")
+
+    event_compaction.compact(["u1"])
+    assert timeline_store.check("u1") == []
+
+    # A late event inside a compacted day, then one long after: gaps redone around both.
+    rollup = db.rollups.find_one({"academiq_user_id": "u1", "course_id": "101"}, sort=[("first", 1)])
+    late = {"timestamp": rollup["first"] + 60_000, "course_id": "101", "event_id": "late-quiz",
+            "action_type": "view", "page_type": "quiz", "quiz_attempt": True, "score": 0.9}
+    recent = {"timestamp": RECENT, "course_id": "202", "event_id": "recent",
+              "action_type": "view", "page_type": "resource"}
+    assert moodle_ingest.write_events("u1", [late, recent]) == 2
+    assert timeline_store.check("u1") == []
+
+
+def test_resynced_compacted_events_are_dropped(db):
+    events = _events(200, seed=11)
+    moodle_ingest.write_events("u1", events)
+    event_compaction.compact(["u1"])
+    stored = db.student_events.count_documents({})
+    summary = timeline_service.timeline_summary("u1")
+
+    # Old quiz attempts are never compacted, so one arriving late is still stored.
+    quiz = {"timestamp": events[-1]["timestamp"] + 60_000, "course_id": "101", "event_id": "new", **SHAPES[4]}
+    assert moodle_ingest.write_events("u1", events + [quiz]) == 1
+    assert db.student_events.count_documents({}) == stored + 1
+    assert timeline_service.timeline_summary("u1")["total_events"] == summary["total_events"] + 1
+
+
+def test_interrupted_run_finishes_exactly(db, monkeypatch):
+    moodle_ingest.write_events("u1", _events(300, seed=13))
+    before = _views("u1")
+
+    def fail(*args, **kwargs):
+        raise RuntimeError("connection reset")
+
+    with monkeypatch.context() as m:
+        m.setattr(db.student_events, "delete_many", fail)
+        assert event_compaction.compact(["u1"])["failed"] == ["u1"]
+    assert event_rollup_repository.get_state("u1")["pending"]
+
+    event_compaction.compact(["u1"])
+    assert not event_rollup_repository.get_state("u1")["pending"]
+    assert all(_views("u1")[c]["summary"] == before[c]["summary"] for c in before)
+
+
+def test_list_for_user_returns_rollups_among_raw_events(db):
+    moodle_ingest.write_events("u1", _events(200, seed=17))
+    event_compaction.compact(["u1"])
+
+    listed = event_repository.list_for_user("u1", limit=50)
+    stamps = [ev["timestamp"] for ev in listed]
+    assert len(listed) == 50 and stamps == sorted(stamps, reverse=True)
+    assert any(ev.get("rollup_count") for ev in listed)
+    assert any(not ev.get("rollup_count") for ev in listed)
@@ -0,0 +1,93 @@
+# backend/tests/test_feature_pipeline.py
+"""
+Parity tests for app.services.feature_pipeline.
+
+The reference implementations are the pre-kernel row-wise functions, kept
+verbatim in tests/feature_reference.py. Every pipeline must reproduce them
+bit-for-bit, including the
+edge cases the old code special-cased (zero active days, 0-1 vs 0-100
+scores, missing/None values, clipping).
+"""
+
+import sys
+from pathlib import Path
+
+import numpy as np
+import pytest
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from app.services import burnout_service, feature_pipeline, risk_grade_service  # noqa: E402
+from tests import feature_reference as ref  # noqa: E402
+
+
+def _rows():
+    rows = ref.cohort(200, seed=3)
+    rows += [
+        {},                                                   # all missing -> zeros
+        {"all_clicks": 10, "active_days": 0},                 # zero-day guards
+        {"all_clicks": None, "avg_quiz_score": 1.0, "avg_assignment_score": 0},
+        {"avg_quiz_score": 85.0, "avg_assignment_score": -0.5, "procrastination_index": 500},
+        {"procrastination_index": -99, "assignment_submissions": 0, "late_submission_count": 3},
+        {"all_clicks": "", "active_days": "4", "avg_quiz_score": "", "quiz_attempts": None},
+    ]
+    return rows
+
+
+def test_performance_pipeline_matches_row_wise_engineering():
+    pipe = feature_pipeline.performance_pipeline(ref.BEHAVIORAL_FEATURES, ref.TRAIN_MEDIANS)
+    rows = [{k: r[k] for k in feature_pipeline.PERFORMANCE_RAW} for r in ref.cohort(200)]
+    X = pipe.transform(feature_pipeline.raw_matrix(rows, strict=True))
+    for i, row in enumerate(rows):
+        expected = ref.legacy_performance_row(row, ref.BEHAVIORAL_FEATURES, ref.TRAIN_MEDIANS)
+        np.testing.assert_array_equal(X[i], expected[0].astype(float))
+
+
+def test_performance_pipeline_without_medians_uses_default():
+    pipe = feature_pipeline.performance_pipeline(ref.BEHAVIORAL_FEATURES, None)
+    X = pipe.transform_rows([{"all_clicks": 10, "total_time_spent": 4, "active_days": 2}])
+    out = dict(zip(ref.BEHAVIORAL_FEATURES, X[0]))
+    assert out["all_clicks_relative"] == 5.0
+    assert out["active_days_relative"] == 1.0
+
+
+@pytest.mark.parametrize("bundle, legacy, service", [
+    (ref.BURNOUT_BUNDLE, ref.legacy_burnout_row, burnout_service),
+    (ref.RISK_GRADE_BUNDLE, ref.legacy_risk_grade_row, risk_grade_service),
+])
+def test_bundle_pipelines_match_row_wise_builders(bundle, legacy, service):
+    rows = _rows()
+    X = service._pipeline(bundle).transform_rows(rows)
+    assert X.shape == (len(rows), len(bundle["feature_cols"]))
+    R, kept = feature_pipeline.readable_raw_matrix(rows)
+    assert kept == list(range(len(rows)))
+    np.testing.assert_array_equal(service._pipeline(bundle).transform(R), X)
+    for i, row in enumerate(rows):
+        np.testing.assert_array_equal(X[i], legacy(bundle, row)[0])
+
+
+def test_strict_raw_matrix_rejects_missing_performance_inputs():
+    with pytest.raises(ValueError):
+        feature_pipeline.raw_matrix([{"all_clicks": 1}], strict=True)
+    R = feature_pipeline.raw_matrix([{"all_clicks": 1}])
+    assert R.shape == (1, len(feature_pipeline.RAW_COLUMNS))
+    assert R[0, feature_pipeline.RAW_INDEX["all_clicks"]] == 1.0
+    assert not np.isnan(R).any()
+
+
+def test_raw_matrix_reads_empty_strings_and_none_as_zero():
+    R = feature_pipeline.raw_matrix([{"all_clicks": "", "active_days": None, "quiz_attempts": "3"}, {"all_clicks": 2}])
+    ix = feature_pipeline.RAW_INDEX
+    assert (R[0, ix["all_clicks"]], R[0, ix["active_days"]], R[0, ix["quiz_attempts"]]) == (0.0, 0.0, 3.0)
+    assert R[1, ix["all_clicks"]] == 2.0 and not np.isnan(R).any()
+
+    complete = {c: 1 for c in feature_pipeline.PERFORMANCE_RAW}
+    with pytest.raises(ValueError):
+        feature_pipeline.raw_matrix([{**complete, "all_clicks": ""}], strict=True)
+    with pytest.raises(ValueError):
+        feature_pipeline.raw_matrix([{"all_clicks": "many"}])
+
+
+def test_empty_cohort():
+    pipe = feature_pipeline.burnout_pipeline(ref.BURNOUT_BUNDLE)
+    assert pipe.transform_rows([]).shape == (0, len(ref.BURNOUT_BUNDLE["feature_cols"]))
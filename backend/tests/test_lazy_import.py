@@ -0,0 +1,69 @@
+# backend/tests/test_lazy_import.py
+"""
+Tests for deferred ML imports (app/services/lazy_import.py): a proxy imports
+its module on first attribute access only, the warm-up thread imports every
+proxy and reports through system_registry, and mounting the routers no longer
+pulls in the heavy stacks.
+
+Proxied modules are tiny files written to a temp dir on sys.path.
+"""
+
+import subprocess
+import sys
+from pathlib import Path
+
+import pytest
+
+BACKEND = Path(__file__).parent.parent
+sys.path.insert(0, str(BACKEND))
+
+from app.config.system_registry import get_registry_snapshot  # noqa: E402
+from app.services import lazy_import  # noqa: E402
+
+
+@pytest.fixture
+def fake_modules(tmp_path, monkeypatch):
+    (tmp_path / "lazy_fake_ok.py").write_text("VALUE = 42\n")
+    (tmp_path / "lazy_fake_broken.py").write_text("raise ImportError('no wheels for this platform')\n")
+    monkeypatch.syspath_prepend(str(tmp_path))
+    monkeypatch.setattr(lazy_import, "_proxies", {})
+    yield
+    for name in ("lazy_fake_ok", "lazy_fake_broken"):
+        sys.modules.pop(name, None)
+
+
+def test_proxy_imports_on_first_attribute_access(fake_modules):
+    proxy = lazy_import.module("lazy_fake_ok")
+    assert lazy_import.module("lazy_fake_ok") is proxy
+    assert not proxy.loaded and "lazy_fake_ok" not in sys.modules
+
+    assert proxy.VALUE == 42
+    assert proxy.loaded and lazy_import.stats()["lazy_fake_ok"]["import_ms"] is not None
+
+
+def test_import_errors_surface_on_use(fake_modules):
+    proxy = lazy_import.module("lazy_fake_broken")
+    with pytest.raises(ImportError):
+        proxy.anything
+    state = lazy_import.stats()["lazy_fake_broken"]
+    assert state["loaded"] is False and state["error"] == "no wheels for this platform"
+
+
+def test_warm_up_imports_every_proxy_then_runs_the_hook(fake_modules):
+    ok, broken = lazy_import.module("lazy_fake_ok"), lazy_import.module("lazy_fake_broken")
+    ran = []
+
+    lazy_import.start_warm_up(then=lambda: ran.append(True)).join(timeout=10)
+
+    assert ok.loaded and not broken.loaded and ran == [True]
+    component = get_registry_snapshot()["ml_warm_up"]
+    assert component["loaded"] is True and "lazy_fake_broken" in component["details"]
+
+
+def test_mounting_ml_routes_imports_no_heavy_stack():
+    code = (
+        "import sys; from app.routes import student, student_data, moodle; "
+        "print(sorted(m for m in ('pandas', 'sklearn', 'lightgbm', 'shap', 'tensorflow') if m in sys.modules))"
+    )
+    out = subprocess.run([sys.executable, "-c", code], cwd=BACKEND, capture_output=True, text=True, check=True)
+    assert out.stdout.strip() == "[]"
@@ -0,0 +1,72 @@
+# backend/tests/test_model_registry.py
+"""
+Tests for the model artifact registry (app/services/model_registry.py): an
+artifact is unpickled once per process, later loads memory-map the compact
+copy, and stats() / warm_up() report per-worker figures.
+
+Artifacts are small pickles written to a temp dir; the compact dir is
+redirected there too.
+"""
+
+import sys
+from pathlib import Path
+
+import joblib
+import numpy as np
+import pytest
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from app.services import burnout_service, model_registry, risk_grade_service  # noqa: E402
+
+
+@pytest.fixture
+def artifact(tmp_path, monkeypatch):
+    monkeypatch.setattr(model_registry, "MODEL_COMPACT_DIR", str(tmp_path / ".compact"))
+    monkeypatch.setattr(model_registry, "MODEL_MMAP", True)
+    path = tmp_path / "bundle_dir" / "bundle.pkl"
+    path.parent.mkdir()
+    joblib.dump({"weights": np.arange(1000, dtype=float), "name": "demo"}, path, compress=3)
+    model_registry.forget()
+    yield str(path)
+    model_registry.forget()
+
+
+def test_load_once_then_memory_map_the_compact_copy(artifact):
+    first = model_registry.load(artifact)
+    assert model_registry.load(artifact) is first
+    assert model_registry.stats()["artifacts"]["bundle_dir/bundle.pkl"]["source"] == "pickle (compact copy written)"
+
+    model_registry.forget()            # a new worker process
+    second = model_registry.load(artifact)
+
+    assert isinstance(second["weights"], np.memmap) and second["name"] == "demo"
+    np.testing.assert_array_equal(second["weights"], first["weights"])
+    assert model_registry.stats()["artifacts"]["bundle_dir/bundle.pkl"]["source"] == "mmap"
+
+
+def test_changed_artifact_gets_a_new_compact_copy(artifact, tmp_path):
+    model_registry.load(artifact)
+    joblib.dump({"weights": np.zeros(3), "name": "v2"}, artifact)
+    model_registry.forget(artifact)
+
+    assert model_registry.load(artifact)["name"] == "v2"
+    assert len(list((tmp_path / ".compact").iterdir())) == 2
+
+
+def test_missing_artifact_raises(tmp_path):
+    with pytest.raises(FileNotFoundError):
+        model_registry.load(str(tmp_path / "nope.pkl"))
+
+
+def test_warm_up_and_stats_report_this_worker(monkeypatch):
+    monkeypatch.setattr(burnout_service, "predict", lambda feats: {"level": "Safe"})
+    monkeypatch.setattr(risk_grade_service, "predict", lambda feats: None)
+
+    result = model_registry.warm_up()
+    stats = model_registry.stats()
+
+    assert result["burnout"]["ok"] is True and result["risk_grade"]["ok"] is False
+    assert "performance" in result and result["total_ms"] >= 0
+    assert stats["warm_up"] is result and stats["pid"] > 0
+    assert stats["rss_mb"] is None or stats["rss_mb"] > 0
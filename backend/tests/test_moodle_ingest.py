@@ -0,0 +1,83 @@
+# backend/tests/test_moodle_ingest.py
+"""
+Tests for moodle_ingest.normalize_payload and the repository batch upserts it
+uses (material_repository.upsert_many, metrics_repository.upsert_many).
+
+Collections are mongomock; every write is counted to check that a sync costs a
+constant number of round trips.
+"""
+
+import sys
+from pathlib import Path
+
+import mongomock
+import pytest
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from app.repositories import event_repository, material_repository, metrics_repository  # noqa: E402
+from app.services import timeline_store  # noqa: E402
+from app.services.moodle_ingest import normalize_payload  # noqa: E402
+
+
+def _payload(n_materials, course_ids=("101", "102")):
+    return {
+        "metricsByCourse": {cid: {"course_name": f"Course {cid}", "click_count": 3} for cid in course_ids},
+        "behavior": {"active_days_count": 4},
+        "materials": [
+            {"course_id": course_ids[i % len(course_ids)], "material_id": f"m{i}", "title": f"Item {i}"}
+            for i in range(n_materials)
+        ],
+        "events": [{"event_id": "e1", "course_id": "101"}],
+    }
+
+
+@pytest.fixture
+def db(monkeypatch, mongomock_bulk_write):
+    """mongomock collections whose update_one / bulk_write round trips are recorded."""
+    db = mongomock.MongoClient()["academiq_test"]
+    db.round_trips = []
+    for module, attr, name in (
+        (material_repository, "course_materials_collection", "course_materials"),
+        (metrics_repository, "student_metrics_collection", "student_metrics"),
+        (event_repository, "student_events_collection", "student_events"),
+    ):
+        monkeypatch.setattr(module, attr, mongomock_bulk_write(db[name], calls=db.round_trips))
+    monkeypatch.setattr(timeline_store, "student_timeline_collection", db["student_timeline"])
+    return db
+
+
+def test_sync_is_one_write_per_collection(db):
+    summary = normalize_payload(_payload(300), "u1")
+
+    assert summary == {
+        "materials_seen": 300,
+        "materials_new": 300,
+        "metrics_courses": 2,
+        "metrics_new": 3,
+        "events_new": 1,
+    }
+    assert sorted(db.round_trips) == ["course_materials", "student_events", "student_metrics"]
+    assert db["student_metrics"].count_documents({"academiq_user_id": "u1"}) == 3
+
+
+def test_resync_reports_no_new_inserts(db):
+    normalize_payload(_payload(20), "u1")
+    summary = normalize_payload(_payload(25), "u1")
+
+    assert summary["materials_new"] == 5
+    assert summary["metrics_new"] == 0 and summary["events_new"] == 0
+    assert db["course_materials"].count_documents({}) == 25
+    assert db["course_materials"].find_one({"material_id": "m0"})["first_seen"] is not None
+
+
+def test_upsert_many_collapses_duplicate_keys(db):
+    docs = [
+        {"course_id": "101", "material_id": "m1", "title": "old"},
+        {"course_id": "101", "material_id": "m1", "title": "new"},
+    ]
+    assert material_repository.upsert_many(docs) == 1
+    assert material_repository.get("101", "m1")["title"] == "new"
+    assert metrics_repository.upsert_many("u1", [("101", {"a": 1}), ("101", {"a": 2})]) == 1
+    assert metrics_repository.get("u1", "101")["metrics"] == {"a": 2}
+    assert material_repository.upsert_many([]) == 0
@@ -0,0 +1,63 @@
+# backend/tests/test_neighbour_search.py
+"""
+Tests for the study-buddy neighbour-search backends
+(app/services/neighbour_search.py): brute force, KD-tree and ball tree return
+the same exact top-k under a row mask, including ties and selective masks,
+and a CourseIndex keeps its course-wide standardisation.
+"""
+
+import sys
+from pathlib import Path
+
+import numpy as np
+import pytest
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from app.services import neighbour_search, study_buddy_index  # noqa: E402
+
+pytest.importorskip("sklearn")
+
+
+@pytest.fixture
+def Z():
+    rng = np.random.default_rng(0)
+    Z = rng.normal(size=(3000, len(study_buddy_index.BEHAVIOUR)))
+    Z[100:110] = Z[5]          # duplicates: ties at every distance from row 5
+    return Z
+
+
+@pytest.mark.parametrize("backend", ["kdtree", "balltree"])
+def test_trees_match_brute_force_under_masks(Z, backend):
+    brute = neighbour_search.build(Z, "brute")
+    tree = neighbour_search.build(Z, backend)
+    assert tree.name == backend
+    rng = np.random.default_rng(1)
+    for share in (1.0, 0.5, 0.1, 0.01):
+        mask = rng.random(len(Z)) < share
+        for q in (0, 5, 42, 2999):
+            np.testing.assert_array_equal(tree.query(Z[q], 5, mask), brute.query(Z[q], 5, mask))
+    np.testing.assert_array_equal(tree.query(Z[5], 4), [5, 100, 101, 102])
+
+
+def test_auto_picks_a_tree_only_for_large_courses(Z, monkeypatch):
+    monkeypatch.setattr(neighbour_search, "STUDY_BUDDY_NN_TREE_MIN_ROWS", 1000)
+    assert neighbour_search.build(Z[:50], "auto").name == "brute"
+    assert neighbour_search.build(Z, "auto").name == "kdtree"
+    with pytest.raises(ValueError):
+        neighbour_search.build(Z, "annoy")
+
+
+def test_course_index_keeps_its_standardisation():
+    rows = [
+        {"user_id": f"u{i}", "name": f"s{i}", "email": "", "optin": True, "grade": None, "cluster": None,
+         "vec": [float(i), 7.0] + [0.0] * (len(study_buddy_index.BEHAVIOUR) - 2)}
+        for i in range(5)
+    ]
+    index = study_buddy_index.CourseIndex("101", rows, seq=0)
+
+    assert index.mean[0] == 2.0 and index.std[1] == 1.0      # constant feature: std clamped to 1
+    np.testing.assert_allclose(index.Z[:, 0], (np.arange(5) - 2.0) / np.std(np.arange(5)))
+    mask = np.ones(5, dtype=bool)
+    mask[2] = False
+    assert list(index.nearest(2, mask, 2)) == [1, 3]
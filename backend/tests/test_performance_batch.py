@@ -0,0 +1,118 @@
+# backend/tests/test_performance_batch.py
+"""
+Tests for performance_predict.predict_performance_batch().
+
+Like test_counterfactual.py, the real LightGBM/SHAP artifacts are replaced
+with small deterministic stand-ins wired into performance_predict's
+module-level globals, so these tests exercise the real feature engineering
+and result-building code without the binary artifacts. Results are compared
+with the original pandas, one-student-at-a-time predict_performance, kept in
+tests/feature_reference.py.
+"""
+
+import sys
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+import pytest
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from app.services import performance_predict as pp  # noqa: E402
+from tests.feature_reference import legacy_predict_performance  # noqa: E402
+
+BEHAVIORAL_FEATURES = [
+    "all_clicks", "active_days", "access_frequency",
+    "material_clicks", "quiz_attempts", "assignment_submissions",
+    "total_time_spent", "procrastination_index", "late_submission_count",
+    "clicks_per_day", "time_per_click",
+    "engagement_consistency", "behavioral_risk_score",
+    "all_clicks_relative", "total_time_spent_relative", "active_days_relative",
+]
+
+TRAIN_MEDIANS = pd.Series({
+    "all_clicks": 583.5, "total_time_spent": 1167.0, "active_days": 41.0,
+    "quiz_attempts": 2.0, "late_submission_count": 2.0,
+    "procrastination_index": -0.18, "assignment_submissions": 5.0,
+})
+
+_WEIGHTS = np.linspace(-0.4, 0.4, len(BEHAVIORAL_FEATURES))
+
+
+class _FakeModel:
+    """Logistic model over scaled columns; works on any number of rows."""
+
+    def predict_proba(self, X_df: pd.DataFrame) -> np.ndarray:
+        X = np.log1p(np.abs(X_df.to_numpy(dtype=float)))
+        p1 = 1.0 / (1.0 + np.exp(-(X @ _WEIGHTS - 0.5)))
+        return np.column_stack([1 - p1, p1])
+
+
+class _FakeExplainer:
+    """Linear 'SHAP' values — one row of contributions per input row."""
+
+    def shap_values(self, X_df: pd.DataFrame) -> np.ndarray:
+        X = np.log1p(np.abs(X_df.to_numpy(dtype=float)))
+        return (X - 1.0) * _WEIGHTS
+
+
+@pytest.fixture(autouse=True)
+def _patch_model_artifacts(monkeypatch):
+    monkeypatch.setattr(pp, "_calibrated_model", _FakeModel())
+    monkeypatch.setattr(pp, "_shap_explainer", _FakeExplainer())
+    monkeypatch.setattr(pp, "_behavioral_features", BEHAVIORAL_FEATURES)
+    monkeypatch.setattr(pp, "_train_medians", TRAIN_MEDIANS)
+    yield
+
+
+def _cohort(n: int):
+    rng = np.random.default_rng(7)
+    rows = []
+    for i in range(n):
+        vals = rng.gamma(2.0, 1.0, 9) * [600, 40, 15, 40, 3, 5, 1200, 3, 2]
+        row = dict(zip(pp._REQUIRED, (float(v) for v in vals)))
+        row["procrastination_index"] -= 3.0
+        if i % 2:
+            row = {k: int(v) for k, v in row.items()}
+        rows.append(row)
+    return rows
+
+
+def test_batch_matches_original_single_student_path():
+    rows = _cohort(40)
+    batch = pp.predict_performance_batch(rows)
+    assert len(batch) == len(rows)
+    for row, result in zip(rows, batch):
+        expected = legacy_predict_performance(
+            row, pp._calibrated_model, pp._shap_explainer, BEHAVIORAL_FEATURES, TRAIN_MEDIANS,
+            pp.RECOMMENDATION_MAP, pp.TIER_LABELS,
+        )
+        assert result == expected
+        assert pp.predict_performance(row) == expected
+
+
+def test_batch_calls_model_and_explainer_once(monkeypatch):
+    calls = {"model": 0, "shap": 0}
+    model, explainer = pp._calibrated_model, pp._shap_explainer
+
+    class _CountingModel:
+        def predict_proba(self, X_df):
+            calls["model"] += 1
+            return model.predict_proba(X_df)
+
+    class _CountingExplainer:
+        def shap_values(self, X_df):
+            calls["shap"] += 1
+            return explainer.shap_values(X_df)
+
+    monkeypatch.setattr(pp, "_calibrated_model", _CountingModel())
+    monkeypatch.setattr(pp, "_shap_explainer", _CountingExplainer())
+    pp.predict_performance_batch(_cohort(100))
+    assert calls == {"model": 1, "shap": 1}
+
+
+def test_empty_batch_and_missing_features():
+    assert pp.predict_performance_batch([]) == []
+    with pytest.raises(ValueError):
+        pp.predict_performance_batch([{"all_clicks": 1}])
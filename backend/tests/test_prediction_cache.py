@@ -0,0 +1,109 @@
+# backend/tests/test_prediction_cache.py
+"""
+Tests for app.services.prediction_cache and its use in student_data's
+_predict / _predict_grade / _burnout wrappers.
+"""
+
+import sys
+from collections import OrderedDict
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from app.services import burnout_service, prediction_cache, student_data  # noqa: E402
+
+FEATS = {
+    "all_clicks": 120, "active_days": 8, "access_frequency": 3.5, "material_clicks": 15,
+    "quiz_attempts": 1, "assignment_submissions": 2, "total_time_spent": 300,
+    "procrastination_index": 28.0, "late_submission_count": 4, "avg_quiz_score": 0.4,
+}
+
+
+@pytest.fixture(autouse=True)
+def _fresh_cache(monkeypatch):
+    monkeypatch.setattr(prediction_cache, "_entries", OrderedDict())
+    monkeypatch.setattr(prediction_cache, "_keys_by_hash", {})
+    monkeypatch.setattr(prediction_cache, "_counters", {k: 0 for k in prediction_cache._counters})
+    yield
+
+
+class _Counter:
+    def __init__(self, value="out"):
+        self.calls, self.value = 0, value
+
+    def __call__(self):
+        self.calls += 1
+        return {"value": self.value}
+
+
+def test_second_lookup_is_a_hit_and_returns_a_copy():
+    compute = _Counter()
+    first = prediction_cache.cached("m", "v1", FEATS, compute)
+    first["value"] = "mutated"
+    second = prediction_cache.cached("m", "v1", {**FEATS, "student_id": "ignored"}, compute)
+
+    assert compute.calls == 1
+    assert second == {"value": "out"}
+    assert prediction_cache.stats()["hits"] == 1
+    assert prediction_cache.stats()["misses"] == 1
+
+
+def test_model_version_and_features_are_part_of_the_key():
+    compute = _Counter()
+    prediction_cache.cached("m", "v1", FEATS, compute)
+    prediction_cache.cached("m", "v2", FEATS, compute)
+    prediction_cache.cached("other", "v1", FEATS, compute)
+    prediction_cache.cached("m", "v1", {**FEATS, "active_days": 9}, compute)
+    assert compute.calls == 4
+
+
+def test_none_results_are_not_cached():
+    calls = []
+    for _ in range(2):
+        prediction_cache.cached("m", "v1", FEATS, lambda: calls.append(1))
+    assert len(calls) == 2
+
+
+def test_lru_eviction(monkeypatch):
+    monkeypatch.setattr(prediction_cache, "PREDICTION_CACHE_SIZE", 2)
+    compute = _Counter()
+    for days in (1, 2, 3):
+        prediction_cache.cached("m", "v1", {**FEATS, "active_days": days}, compute)
+    prediction_cache.cached("m", "v1", {**FEATS, "active_days": 1}, compute)
+    assert compute.calls == 4
+    assert prediction_cache.stats()["evictions"] == 2
+
+
+def test_ttl_expiry(monkeypatch):
+    clock = [1000.0]
+    monkeypatch.setattr(prediction_cache.time, "monotonic", lambda: clock[0])
+    compute = _Counter()
+    prediction_cache.cached("m", "v1", FEATS, compute)
+    clock[0] += prediction_cache.PREDICTION_CACHE_TTL_SECONDS + 1
+    prediction_cache.cached("m", "v1", FEATS, compute)
+    assert compute.calls == 2
+    assert prediction_cache.stats()["expirations"] == 1
+
+
+def test_invalidate_drops_every_model_for_that_vector():
+    compute = _Counter()
+    prediction_cache.cached("a", "v1", FEATS, compute)
+    prediction_cache.cached("b", "v1", FEATS, compute)
+    prediction_cache.cached("a", "v1", {**FEATS, "active_days": 99}, compute)
+
+    assert prediction_cache.invalidate(FEATS) == 2
+    prediction_cache.cached("a", "v1", FEATS, compute)
+    prediction_cache.cached("a", "v1", {**FEATS, "active_days": 99}, compute)
+    assert compute.calls == 4
+
+
+def test_student_data_burnout_is_memoized(monkeypatch):
+    calls = []
+    monkeypatch.setattr(burnout_service, "artifact_version", lambda: "test")
+    monkeypatch.setattr(burnout_service, "predict", lambda f: calls.append(f) or {"level": "Safe"})
+
+    assert student_data._burnout(FEATS) == {"level": "Safe"}
+    assert student_data._burnout(dict(FEATS)) == {"level": "Safe"}
+    assert len(calls) == 1
@@ -0,0 +1,97 @@
+# backend/tests/test_prediction_history.py
+"""
+Tests for prediction history buckets (app/services/prediction_history.py):
+near-duplicates are skipped and the entry cap holds within the one update a
+write makes, reads come back oldest-first and scoped by model, and the
+migration from per-snapshot documents is idempotent and merges with
+snapshots recorded since the deploy.
+
+Every collection is a mongomock one.
+"""
+
+import sys
+from datetime import datetime, timedelta
+from pathlib import Path
+
+import mongomock
+import pytest
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from app.scripts import migrate_prediction_history  # noqa: E402
+from app.services import prediction_history as ph  # noqa: E402
+
+
+@pytest.fixture
+def db(monkeypatch, mongomock_counted):
+    db = mongomock.MongoClient().db
+    db.counted = mongomock_counted(db["prediction_history"])
+    monkeypatch.setattr(ph, "prediction_history_collection", db.counted)
+    monkeypatch.setattr(migrate_prediction_history, "prediction_history_collection", db["prediction_history"])
+    monkeypatch.setattr(migrate_prediction_history, "ml_results_history_collection", db["ml_results_history"])
+    return db
+
+
+def _result(p, **shap):
+    return {"probability": p, "classification": "On Track",
+            "recommendations": [{"feature": f, "shap_impact": v} for f, v in shap.items()]}
+
+
+def test_each_write_is_one_round_trip_and_skips_near_duplicates(db):
+    assert ph.record_prediction("u1", _result(0.50)) is True
+    assert ph.record_prediction("u1", _result(0.505)) is False
+    assert ph.record_prediction("u1", _result(0.52)) is True
+    assert ph.record_prediction("u1", {"classification": "On Track"}) is False
+
+    assert db.counted.methods == ["update_one"] * 3
+    assert [e["probability"] for e in ph.get_history("u1")] == [0.50, 0.52]
+
+
+def test_history_is_capped_oldest_first(db):
+    for i in range(ph.MAX_HISTORY_PER_USER + 5):
+        ph.record_prediction("u1", _result(i / 50))
+
+    history = ph.get_history("u1")
+    assert len(history) == ph.MAX_HISTORY_PER_USER
+    assert history[0]["probability"] == 5 / 50 and history[-1]["probability"] == 34 / 50
+    assert [e["probability"] for e in ph.get_history("u1", limit=3)] == [32 / 50, 33 / 50, 34 / 50]
+    assert ph.get_history("u1", limit=0) == [] and ph.get_history("nobody") == []
+
+
+def test_trend_reads_the_last_two_entries_of_its_model(db):
+    assert ph.get_trend_summary("u1") == {"hasEnoughData": False}
+    ph.record_prediction("u1", _result(0.40, active_days=-0.1))
+    ph.record_prediction("u1", _result(0.55, active_days=0.2))
+    ph.record_prediction("u1", _result(0.90), model_name="risk_model")
+
+    trend = ph.get_trend_summary("u1")
+    assert trend["direction"] == "improving"
+    assert (trend["fromProbability"], trend["toProbability"]) == (0.4, 0.55)
+    assert "stronger contribution" in trend["summary"]
+    assert [e["probability"] for e in ph.get_history("u1", model_name="risk_model")] == [0.90]
+
+
+def test_migration_merges_with_new_buckets_and_is_idempotent(db):
+    t0 = datetime(2026, 1, 1)
+    legacy = [
+        {"academiq_user_id": "u1", "model_name": ph.MODEL_NAME, "probability": 0.1 + i / 100,
+         "classification": "At Risk", "shap_map": {}, "top_negative_drivers": [], "recorded_at": t0 + timedelta(days=i)}
+        for i in range(ph.MAX_HISTORY_PER_USER)
+    ] + [{"academiq_user_id": "u2", "model_name": ph.MODEL_NAME, "probability": 0.7,
+          "classification": "On Track", "recorded_at": t0}]
+    db["ml_results_history"].insert_many(legacy)
+    ph.record_prediction("u1", _result(0.95))  # recorded after the deploy
+
+    assert migrate_prediction_history.migrate(apply=False)["migrated"] == 0
+    assert db["prediction_history"].count_documents({}) == 1
+
+    counts = migrate_prediction_history.migrate(apply=True)
+    assert (counts["snapshots"], counts["buckets"], counts["migrated"]) == (ph.MAX_HISTORY_PER_USER + 1, 2, 2)
+    u1 = ph.get_history("u1")
+    assert len(u1) == ph.MAX_HISTORY_PER_USER
+    assert u1[-1]["probability"] == 0.95 and u1[0]["probability"] == 0.11
+    assert [e["probability"] for e in ph.get_history("u2")] == [0.7]
+
+    assert migrate_prediction_history.migrate(apply=True)["skipped"] == 2
+    assert len(ph.get_history("u1")) == ph.MAX_HISTORY_PER_USER
+    assert ph.record_prediction("u1", _result(0.951)) is False
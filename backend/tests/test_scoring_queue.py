@@ -0,0 +1,114 @@
+# backend/tests/test_scoring_queue.py
+"""
+Tests for ingest-time scoring (app.services.scoring_queue) and the read path
+serving its stored results (student_data._predict & co. with a user id).
+
+Models are replaced by counting fakes and collections by mongomock.
+"""
+
+import queue
+import sys
+from pathlib import Path
+
+import mongomock
+import pytest
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from app.repositories import ml_result_repository  # noqa: E402
+from app.services import (  # noqa: E402
+    feature_pipeline,
+    prediction_cache,
+    prediction_history,
+    scoring_queue,
+    student_data,
+    timeline_store,
+)
+
+FEATS = {"all_clicks": 120, "active_days": 8, "quiz_attempts": 1, "avg_quiz_score": 0.4}
+
+
+class _Models:
+    def __init__(self):
+        self.calls = {"perf": 0, "grade": 0, "burnout": 0}
+
+    def install(self, monkeypatch):
+        from app.services import burnout_service, performance_predict, risk_grade_service
+
+        def perf(raw):
+            self.calls["perf"] += 1
+            return {"probability": 0.42, "classification": "Not High Performer", "recommendations": []}
+
+        def grade(f):
+            self.calls["grade"] += 1
+            return {"predicted_grade": 71.0, "risk_level": "Medium Risk"}
+
+        def burnout(f):
+            self.calls["burnout"] += 1
+            return {"probability": 0.2, "level": "Safe"}
+
+        monkeypatch.setattr(performance_predict, "predict_performance", perf)
+        monkeypatch.setattr(performance_predict, "artifact_version", lambda: "t")
+        monkeypatch.setattr(risk_grade_service, "predict", grade)
+        monkeypatch.setattr(risk_grade_service, "artifact_version", lambda: "t")
+        monkeypatch.setattr(burnout_service, "predict", burnout)
+        monkeypatch.setattr(burnout_service, "artifact_version", lambda: "t")
+
+
+@pytest.fixture
+def models(monkeypatch, mongomock_bulk_write):
+    db = mongomock.MongoClient()["academiq_test"]
+    monkeypatch.setattr(ml_result_repository, "ml_results_collection", mongomock_bulk_write(db["ml_results"]))
+    monkeypatch.setattr(prediction_history, "prediction_history_collection", db["prediction_history"])
+    monkeypatch.setattr(timeline_store, "student_timeline_collection", db["student_timeline"])
+    monkeypatch.setattr(prediction_cache, "_entries", type(prediction_cache._entries)())
+    monkeypatch.setattr(prediction_cache, "_keys_by_hash", {})
+    monkeypatch.setattr(scoring_queue, "_pending", {})
+    monkeypatch.setattr(scoring_queue, "_counters", {k: 0 for k in scoring_queue._counters})
+    m = _Models()
+    m.install(monkeypatch)
+    m.db = db
+    return m
+
+
+def test_queued_student_is_scored_and_stored(models, monkeypatch):
+    refreshed = []
+    monkeypatch.setattr(timeline_store, "refresh_ai", refreshed.append)
+    assert scoring_queue.submit("u1", FEATS) == "queued"
+    assert scoring_queue.drain(timeout=5)
+
+    docs = {d["model_name"]: d for d in models.db["ml_results"].find({"academiq_user_id": "u1"})}
+    assert set(docs) == {scoring_queue.PERFORMANCE_MODEL, scoring_queue.GRADE_MODEL, scoring_queue.BURNOUT_MODEL}
+    fhash = feature_pipeline.feature_hash(FEATS, feature_pipeline.RAW_COLUMNS)
+    assert all(d["feature_hash"] == fhash and d["artifact_version"] == "t" for d in docs.values())
+    assert len(models.db["prediction_history"].find_one({"academiq_user_id": "u1"})["entries"]) == 1
+    assert refreshed == ["u1"]
+    assert scoring_queue.stats()["scored"] >= 1
+
+
+def test_read_path_serves_stored_results_without_scoring(models):
+    scoring_queue.score_user("u1", FEATS)
+    prediction_cache.clear()
+    before = dict(models.calls)
+
+    assert student_data._predict(FEATS, "u1")["probability"] == 0.42
+    assert student_data._predict_grade(FEATS, "u1")["predicted_grade"] == 71.0
+    assert student_data._burnout(FEATS, "u1")["level"] == "Safe"
+    assert models.calls == before
+
+
+def test_stale_stored_result_is_rescored(models):
+    scoring_queue.score_user("u1", FEATS)
+    prediction_cache.clear()
+    student_data._predict({**FEATS, "active_days": 9}, "u1")
+    assert models.calls["perf"] == 2
+
+
+def test_backpressure_defers_when_full_and_coalesces_resyncs(models, monkeypatch):
+    monkeypatch.setattr(scoring_queue, "_queue", queue.Queue(maxsize=1))
+    monkeypatch.setattr(scoring_queue, "_ensure_workers", lambda: None)  # nothing drains
+
+    assert scoring_queue.submit("u1", FEATS) == "queued"
+    assert scoring_queue.submit("u1", {**FEATS, "active_days": 9}) == "coalesced"
+    assert scoring_queue.submit("u2", FEATS) == "deferred"
+    assert scoring_queue._pending["u1"]["active_days"] == 9
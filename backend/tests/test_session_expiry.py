@@ -0,0 +1,86 @@
+# backend/tests/test_session_expiry.py
+"""
+Tests for session / token expiry: validation and token consumption are reads
+(or one conditional update) that never delete, and services/expiry_sweeper.py
+removes expired documents in batches.
+
+Collections are mongomock without TTL indexes — the situation the sweeper
+exists for.
+"""
+
+import sys
+from datetime import datetime, timedelta
+from pathlib import Path
+
+import mongomock
+import pytest
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from app.config import database  # noqa: E402
+from app.repositories import magic_link_repository, password_reset_repository, session_repository  # noqa: E402
+from app.services import expiry_sweeper  # noqa: E402
+
+
+@pytest.fixture
+def db(monkeypatch):
+    db = mongomock.MongoClient()["academiq_test"]
+    for module, attr, name in (
+        (session_repository, "auth_sessions_collection", "sessions"),
+        (password_reset_repository, "password_reset_tokens_collection", "password_reset_tokens"),
+        (magic_link_repository, "magic_link_tokens_collection", "magic_link_tokens"),
+        (expiry_sweeper, "auth_sessions_collection", "sessions"),
+        (expiry_sweeper, "password_reset_tokens_collection", "password_reset_tokens"),
+        (expiry_sweeper, "magic_link_tokens_collection", "magic_link_tokens"),
+    ):
+        monkeypatch.setattr(module, attr, db[name])
+    return db
+
+
+def _expire(collection, token_hash):
+    collection.update_one({"token_hash": token_hash}, {"$set": {"expires_at": datetime.utcnow() - timedelta(seconds=1)}})
+
+
+def test_expired_session_is_rejected_without_a_write(db):
+    session_repository.create_session("live", "u1", "student")
+    session_repository.create_session("old", "u1", "student")
+    _expire(db["sessions"], "old")
+
+    assert session_repository.find_valid_session("live")["user_id"] == "u1"
+    assert session_repository.find_valid_session("old") is None
+    assert db["sessions"].count_documents({}) == 2
+
+
+def test_tokens_are_consumed_once_and_expired_ones_left_for_the_sweeper(db):
+    password_reset_repository.create_reset_token("r1", "u1")
+    assert password_reset_repository.consume_reset_token("r1") == "u1"
+    assert password_reset_repository.consume_reset_token("r1") is None
+
+    magic_link_repository.create_magic_token("m1", "u2")
+    _expire(db["magic_link_tokens"], "m1")
+    assert magic_link_repository.consume_magic_token("m1") is None
+    assert db["magic_link_tokens"].count_documents({}) == 1
+
+
+def test_sweeper_deletes_expired_documents_in_batches(db):
+    for i in range(7):
+        session_repository.create_session(f"s{i}", "u1", "student")
+    for i in range(5):
+        _expire(db["sessions"], f"s{i}")
+    password_reset_repository.create_reset_token("r1", "u1")
+    _expire(db["password_reset_tokens"], "r1")
+
+    deleted = expiry_sweeper.sweep(batch_size=2)
+
+    assert deleted == {"sessions": 5, "password_reset_tokens": 1, "magic_link_tokens": 0}
+    assert sorted(d["token_hash"] for d in db["sessions"].find()) == ["s5", "s6"]
+    assert expiry_sweeper.stats()["last_deleted"] == deleted
+
+
+def test_ensure_ttl_replaces_a_plain_expiry_index():
+    collection = mongomock.MongoClient()["academiq_test"]["sessions"]
+    collection.create_index([("expires_at", 1)], name="session_expiry")
+
+    database._ensure_ttl(collection, "session_expiry")
+
+    assert collection.index_information()["session_expiry"]["expireAfterSeconds"] == 0
@@ -0,0 +1,128 @@
+# backend/tests/test_shap_engine.py
+"""
+Tests for app.services.shap_engine: the explanation cache, cross-request
+batching and the approximate (path-contribution) mode.
+
+Exact mode is exercised with a counting stand-in explainer. Approx mode
+needs a real LightGBM booster, so that test trains a tiny one and is skipped
+when lightgbm/shap aren't installed.
+"""
+
+import sys
+import threading
+import time
+from collections import OrderedDict
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+import pytest
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from app.services import shap_engine  # noqa: E402
+
+COLUMNS = ["a", "b", "c"]
+
+
+class _CountingExplainer:
+    def __init__(self, delay: float = 0.0):
+        self.calls, self.rows, self.delay = 0, 0, delay
+
+    def shap_values(self, X_df: pd.DataFrame) -> np.ndarray:
+        self.calls += 1
+        self.rows += len(X_df)
+        time.sleep(self.delay)
+        return X_df.to_numpy() * 2.0
+
+
+@pytest.fixture(autouse=True)
+def _fresh_engine(monkeypatch):
+    monkeypatch.setattr(shap_engine, "_cache", OrderedDict())
+    monkeypatch.setattr(shap_engine, "_explainer", None)
+    monkeypatch.setattr(shap_engine, "_batchers", {m: shap_engine._Batcher() for m in shap_engine.MODES})
+    yield
+
+
+def test_repeat_rows_are_served_from_cache():
+    explainer = _CountingExplainer()
+    X = np.array([[1.0, 2.0, 3.0], [4.0, 5.0, 6.0]])
+
+    first = shap_engine.explain(X, explainer, COLUMNS, mode="exact")
+    # Row 0 again (within the quantization step) plus one new row.
+    second = shap_engine.explain(np.array([[1.0 + 1e-6, 2.0, 3.0], [7.0, 8.0, 9.0]]), explainer, COLUMNS, mode="exact")
+
+    np.testing.assert_allclose(first, X * 2)
+    np.testing.assert_allclose(second[0], first[0])
+    np.testing.assert_allclose(second[1], [14.0, 16.0, 18.0])
+    assert explainer.calls == 2
+    assert explainer.rows == 3
+
+
+def test_cache_is_bounded_lru(monkeypatch):
+    monkeypatch.setattr(shap_engine, "SHAP_CACHE_SIZE", 2)
+    explainer = _CountingExplainer()
+    for v in (1.0, 2.0, 3.0):
+        shap_engine.explain(np.full((1, 3), v), explainer, COLUMNS, mode="exact")
+    assert len(shap_engine._cache) == 2
+
+    shap_engine.explain(np.full((1, 3), 1.0), explainer, COLUMNS, mode="exact")  # evicted
+    assert explainer.calls == 4
+
+
+def test_new_explainer_invalidates_cache():
+    X = np.ones((1, 3))
+    shap_engine.explain(X, _CountingExplainer(), COLUMNS, mode="exact")
+    fresh = _CountingExplainer()
+    shap_engine.explain(X, fresh, COLUMNS, mode="exact")
+    assert fresh.calls == 1
+
+
+def test_concurrent_requests_are_coalesced():
+    explainer = _CountingExplainer(delay=0.05)
+    results = {}
+
+    def request(i):
+        results[i] = shap_engine.explain(np.full((1, 3), float(i)), explainer, COLUMNS, mode="exact")
+
+    threads = [threading.Thread(target=request, args=(i,)) for i in range(8)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    assert explainer.rows == 8
+    assert explainer.calls < 8
+    for i in range(8):
+        np.testing.assert_allclose(results[i], np.full((1, 3), 2.0 * i))
+
+
+def test_request_timer_collects_explain_latency():
+    with shap_engine.request_timer() as spent:
+        shap_engine.explain(np.ones((1, 3)), _CountingExplainer(), COLUMNS, mode="exact")
+    assert len(spent) == 1 and spent[0] >= 0
+    assert shap_engine.stats()["latency_ms"]["max"] >= 0
+
+
+def test_approx_mode_falls_back_without_booster():
+    explainer = _CountingExplainer()
+    out = shap_engine.explain(np.ones((1, 3)), explainer, COLUMNS, mode="approx")
+    np.testing.assert_allclose(out, 2 * np.ones((1, 3)))
+    assert explainer.calls == 1
+
+
+def test_approx_mode_is_additive_and_close_to_treeshap():
+    lgb = pytest.importorskip("lightgbm")
+    shap = pytest.importorskip("shap")
+    rng = np.random.default_rng(0)
+    X = rng.normal(size=(400, 3))
+    y = (X[:, 0] + 0.5 * X[:, 1] > 0).astype(int)
+    model = lgb.LGBMClassifier(n_estimators=20, max_depth=3, verbose=-1).fit(pd.DataFrame(X, columns=COLUMNS), y)
+    explainer = shap.TreeExplainer(model.booster_)
+
+    approx = shap_engine.explain(X[:50], explainer, COLUMNS, mode="approx")
+    exact = shap_engine.explain(X[:50], explainer, COLUMNS, mode="exact")
+
+    raw = model.booster_.predict(X[:50], raw_score=True)
+    np.testing.assert_allclose(approx.sum(axis=1) + shap_engine._path_contribs.bias, raw, atol=1e-9)
+    assert np.corrcoef(approx.ravel(), exact.ravel())[0, 1] > 0.8
@@ -0,0 +1,120 @@
+# backend/tests/test_student_snapshot.py
+"""
+Tests for the request-scoped StudentContext (app/services/student_context.py)
+and GET /me/snapshot: every source is read once per request, preloaded
+sources are never re-read, stored ml_results are served for the current
+features and model artifacts, and the response carries per-source fetch timings.
+
+Collections are mongomock (sync and, through conftest mongomock_async, async);
+every sync read is counted.
+"""
+
+import asyncio
+import sys
+from pathlib import Path
+
+import mongomock
+import pytest
+from fastapi import Response
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from app.repositories import metrics_repository, ml_result_repository  # noqa: E402
+from app.routes import student_data as student_data_routes  # noqa: E402
+from app.services import feature_pipeline, scoring_queue, student_context, student_data  # noqa: E402
+from app.services.student_context import StudentContext  # noqa: E402
+
+FEATS = {"all_clicks": 120, "active_days": 8, "quiz_attempts": 1, "avg_quiz_score": 0.4}
+
+
+@pytest.fixture
+def db(monkeypatch, mongomock_async, mongomock_counted):
+    db = mongomock.MongoClient()["academiq_test"]
+    mongomock_async(db)
+    db.reads = []
+    for module, attr, name in (
+        (student_context, "feature_vectors_collection", "feature_vectors"),
+        (student_context, "raw_moodle_payload_collection", "raw_moodle_payload_collection"),
+        (metrics_repository, "student_metrics_collection", "student_metrics"),
+        (ml_result_repository, "ml_results_collection", "ml_results"),
+    ):
+        monkeypatch.setattr(module, attr, mongomock_counted(db[name], db.reads, ("find", "find_one")))
+
+    db["feature_vectors"].insert_one({"academiq_user_id": "u1", "features": FEATS})
+    db["raw_moodle_payload_collection"].insert_one({
+        "academiq_user_id": "u1",
+        "grades": [{"course_id": "101", "item_type": "quiz", "percentage": 80.0}],
+    })
+    db["student_metrics"].insert_many([
+        {"academiq_user_id": "u1", "course_id": "101",
+         "metrics": {"course_name": "Python", "quiz_attempts": 2, "total_time_spent_seconds": 7200}},
+        {"academiq_user_id": "u1", "course_id": "102", "metrics": {"course_name": "Databases"}},
+        {"academiq_user_id": "u1", "course_id": metrics_repository.OVERALL, "metrics": {}},
+    ])
+    monkeypatch.setattr(scoring_queue, "artifact_version", lambda model_name: f"{model_name}@1")
+    fhash = feature_pipeline.feature_hash(FEATS, feature_pipeline.RAW_COLUMNS)
+    for model, prediction in (
+        (student_data.PERFORMANCE_MODEL, {"probability": 0.7, "classification": "High Performer",
+                                          "recommendations": [{"short": "Keep going", "shap_impact": 0.3}]}),
+        (student_data.GRADE_MODEL, {"predicted_grade": 78.0, "risk_level": "Low Risk"}),
+        (student_data.BURNOUT_MODEL, {"level": "Safe", "message": "All good"}),
+    ):
+        db["ml_results"].insert_one({"academiq_user_id": "u1", "model_name": model, "feature_hash": fhash,
+                                     "artifact_version": f"{model}@1", "prediction": prediction})
+    return db
+
+
+def test_lazy_context_reads_each_source_once_across_pages(db):
+    ctx = StudentContext("u1")
+    student_data.get_dashboard({"_id": "u1", "email": "s@x.edu"}, ctx)
+    performance = student_data.get_performance("u1", "101", ctx)
+    insights = student_data.get_insights("u1", "101", ctx)
+
+    assert sorted(db.reads) == sorted(["feature_vectors", "raw_moodle_payload_collection",
+                                       "student_metrics", "ml_results"])
+    assert performance["predictedGrade"] == 78.0 and performance["course"]["name"] == "Python"
+    assert insights["heuristic"] is False and insights["isHighPerformer"] is True
+    assert set(ctx.timings) == set(student_context.SOURCES)
+
+
+def test_stored_result_requires_current_feature_hash(db):
+    db["feature_vectors"].update_one({"academiq_user_id": "u1"}, {"$set": {"features": {**FEATS, "all_clicks": 999}}})
+    ctx = StudentContext("u1")
+    assert ctx.stored(student_data.GRADE_MODEL, f"{student_data.GRADE_MODEL}@1") is None
+    assert StudentContext("nobody").stored(student_data.GRADE_MODEL, f"{student_data.GRADE_MODEL}@1") is None
+
+
+def test_stored_result_requires_current_model_artifact(db, monkeypatch):
+    grade = student_data.GRADE_MODEL
+    assert StudentContext("u1").stored(grade, f"{grade}@1") == {"predicted_grade": 78.0, "risk_level": "Low Risk"}
+    assert student_data._stored("u1", grade, FEATS)["predicted_grade"] == 78.0
+
+    # The grade model was replaced: its stored output no longer counts, the other models' still does.
+    monkeypatch.setattr(scoring_queue, "artifact_version", lambda model_name: f"{model_name}@{2 if model_name == grade else 1}")
+    assert StudentContext("u1").stored(grade, f"{grade}@2") is None
+    assert student_data._stored("u1", grade, FEATS) is None
+    assert student_data._stored("u1", grade, FEATS, StudentContext("u1")) is None
+    assert student_data._stored("u1", student_data.BURNOUT_MODEL, FEATS)["level"] == "Safe"
+
+
+def test_snapshot_preloads_once_and_reports_timings(db):
+    user = {"_id": "u1", "email": "s@x.edu", "full_name": "Sam"}
+    response = Response()
+
+    result = asyncio.run(student_data_routes.snapshot(response, course_id="101", user=user))
+
+    # Everything came from the async preload; the page builders never read.
+    assert db.reads == []
+    assert [c["id"] for c in result["courses"]] == ["102", "101"]
+    assert result["dashboard"]["burnout"] == {"level": "Safe", "message": "All good"}
+    assert result["performance"]["riskLevel"] == "Low Risk"
+    assert result["insights"]["riskFactors"][0]["title"] == "Keep going"
+    assert set(result["timings"]["fetch_ms"]) == {*student_context.SOURCES, "preload"}
+    assert {"dashboard", "performance", "insights"} <= set(result["timings"]["compute_ms"])
+    assert "features;dur=" in response.headers["Server-Timing"]
+
+
+def test_snapshot_without_course_skips_course_sections(db):
+    result = asyncio.run(student_data_routes.snapshot(Response(), course_id=None, user={"_id": "u1"}))
+    assert result["performance"] is None and result["insights"] is None
+    assert result["dashboard"]["stats"]["enrolledCourses"] == 2
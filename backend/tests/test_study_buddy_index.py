@@ -0,0 +1,111 @@
+# backend/tests/test_study_buddy_index.py
+"""
+Tests for the per-course study-buddy index (app/services/study_buddy_index.py)
+and the vectorized recommender on top of it: a course is built with a fixed
+number of queries, note_changed refreshes only the changed students, and
+recommend keeps the pool / tier / near-peer rules.
+
+Collections are mongomock and every aggregate / find is counted; the risk
+model is replaced by a cluster read from the features.
+"""
+
+import sys
+from pathlib import Path
+
+import mongomock
+import pytest
+from bson import ObjectId
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from app.services import risk_grade_service, study_buddy, study_buddy_index  # noqa: E402
+
+COURSE = "101"
+
+
+@pytest.fixture
+def db(monkeypatch, mongomock_counted):
+    db = mongomock.MongoClient()["academiq_test"]
+    db.reads = []
+    for attr, name in (
+        ("student_metrics_collection", "student_metrics"),
+        ("feature_vectors_collection", "feature_vectors"),
+        ("raw_moodle_payload_collection", "raw_moodle_payload_collection"),
+        ("users_collection", "users"),
+    ):
+        monkeypatch.setattr(study_buddy_index, attr, mongomock_counted(db[name], db.reads, ("aggregate", "find")))
+    monkeypatch.setattr(risk_grade_service, "predict_many",
+                        lambda feats_list: [{"risk_cluster": f.get("cluster")} for f in feats_list])
+    monkeypatch.setattr(risk_grade_service, "risk_map", lambda: {0: "High Risk", 1: "Medium Risk", 2: "Low Risk"})
+    study_buddy_index.clear()
+    yield db
+    study_buddy_index.clear()
+
+
+def _student(db, name, clicks, grade=None, cluster=1, optin=True, course=COURSE):
+    oid = ObjectId()
+    uid = str(oid)
+    db["users"].insert_one({"_id": oid, "full_name": name, "email": f"{name}@x.edu", "study_buddy_optin": optin})
+    db["student_metrics"].insert_one({"academiq_user_id": uid, "course_id": course, "metrics": {}})
+    db["feature_vectors"].insert_one({"academiq_user_id": uid, "features": {"all_clicks": clicks, "cluster": cluster}})
+    grades = [] if grade is None else [{"course_id": course, "item_type": "quiz", "percentage": grade},
+                                       {"course_id": "other", "item_type": "quiz", "percentage": 0.0}]
+    db["raw_moodle_payload_collection"].insert_one({"academiq_user_id": uid, "grades": grades})
+    return uid
+
+
+def test_course_is_built_with_two_queries_regardless_of_size(db):
+    uids = [_student(db, f"s{i}", clicks=i * 10, grade=50.0 + i) for i in range(12)]
+    _student(db, "elsewhere", clicks=5, course="202")
+
+    index = study_buddy_index.get(COURSE)
+
+    assert db.reads == ["student_metrics", "users"]
+    assert len(index) == 12 and index.X.shape == (12, len(study_buddy_index.BEHAVIOUR))
+    assert index.grade[index.row(uids[3])] == 53.0      # other courses' grades filtered out
+    assert study_buddy_index.get(COURSE) is index and len(db.reads) == 2
+
+
+def test_note_changed_refreshes_only_changed_students(db):
+    a = _student(db, "a", clicks=10, grade=60.0, optin=False)
+    _student(db, "b", clicks=20, grade=70.0)
+    study_buddy_index.get(COURSE)
+    db.reads.clear()
+
+    db["users"].update_one({"_id": ObjectId(a)}, {"$set": {"study_buddy_optin": True}})
+    study_buddy_index.note_changed(a)
+    c = _student(db, "c", clicks=30)
+    study_buddy_index.note_changed(c)
+    index = study_buddy_index.get(COURSE)
+
+    assert db.reads == ["student_metrics", "users"]
+    assert index.optin[index.row(a)] and index.row(c) is not None and len(index) == 3
+    assert study_buddy_index.stats()["refreshed_rows"] == 2
+    assert study_buddy_index.stats()["pending_changes"] == 0
+
+
+def test_recommend_prefers_near_peers_ahead_and_hides_opted_out(db):
+    me = _student(db, "me", clicks=100, grade=60.0, optin=False)
+    for i, grade in enumerate((62.0, 65.0, 70.0, 72.0, 74.0)):
+        _student(db, f"ahead{i}", clicks=100 + i, grade=grade)
+    _student(db, "far-ahead", clicks=100, grade=95.0)
+    _student(db, "hidden", clicks=100, grade=61.0, optin=False)
+    _student(db, "other-tier", clicks=100, grade=63.0, cluster=0)
+
+    result = study_buddy.recommend(me, COURSE, k=5)
+
+    names = [b["fullName"] for b in result["buddies"]]
+    assert names == ["ahead0", "ahead1", "ahead2", "ahead3", "ahead4"]
+    assert all(b["why"] == "similar study style, a bit ahead" for b in result["buddies"])
+
+
+def test_recommend_relaxes_offset_and_reports_missing_data(db):
+    me = _student(db, "me", clicks=100, grade=60.0)
+    _student(db, "equal", clicks=100, grade=59.0)
+    _student(db, "weaker", clicks=100, grade=40.0)
+    _student(db, "ungraded", clicks=500)
+
+    result = study_buddy.recommend(me, COURSE, k=5)
+    assert [b["fullName"] for b in result["buddies"]] == ["equal", "ungraded"]
+
+    assert study_buddy.recommend(str(ObjectId()), COURSE)["available"] is False
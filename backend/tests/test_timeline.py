@@ -5,8 +5,7 @@ Tests the service layer in isolation using monkeypatching — no real MongoDB
 required. Follows the same pattern as the existing test files in this suite.
 """
 
-from datetime import datetime, timezone
-from unittest.mock import MagicMock, patch
+from datetime import datetime, timedelta, timezone
 
 import pytest
 
@@ -232,29 +231,23 @@ class TestBuildTimeline:
     """
 
     def _patch_collections(self, monkeypatch, events=None, grades_payload=None, ml_docs=None):
-        import app.services.timeline_service as svc
-
-        # student_events_collection
-        mock_events_coll = MagicMock()
-        mock_events_coll.find.return_value.sort.return_value.limit.return_value = events or []
-        monkeypatch.setattr(svc, "student_events_collection", mock_events_coll)
+        import mongomock
 
-        # raw_moodle_payload_collection
-        mock_raw_coll = MagicMock()
-        mock_raw_coll.find_one.return_value = (
-            {"academiq_user_id": "u1", "grades": grades_payload} if grades_payload is not None else None
-        )
-        monkeypatch.setattr(svc, "raw_moodle_payload_collection", mock_raw_coll)
-
-        # ml_results_collection
-        mock_ml_coll = MagicMock()
-        mock_ml_coll.find.return_value = ml_docs or []
-        monkeypatch.setattr(svc, "ml_results_collection", mock_ml_coll)
+        import app.services.timeline_service as svc
 
+        db = mongomock.MongoClient().db
+        if events:
+            db.student_events.insert_many([dict(ev) for ev in events])
+        if grades_payload is not None:
+            db.raw.insert_one({"academiq_user_id": "u1", "grades": grades_payload})
+        if ml_docs:
+            db.ml_results.insert_many([dict(doc) for doc in ml_docs])
+        monkeypatch.setattr(svc, "student_events_collection", db.student_events)
+        monkeypatch.setattr(svc, "raw_moodle_payload_collection", db.raw)
+        monkeypatch.setattr(svc, "ml_results_collection", db.ml_results)
         # student_metrics_collection (not used in build_timeline directly yet)
-        mock_metrics_coll = MagicMock()
-        mock_metrics_coll.find_one.return_value = None
-        monkeypatch.setattr(svc, "student_metrics_collection", mock_metrics_coll)
+        monkeypatch.setattr(svc, "student_metrics_collection", db.student_metrics)
+        return db
 
     def test_empty_student_returns_empty_timeline(self, monkeypatch):
         self._patch_collections(monkeypatch)
@@ -347,8 +340,215 @@ class TestBuildTimeline:
             }
         ]
         self._patch_collections(monkeypatch, events=events)
-        result = build_timeline("u1", course_id="999")
-        # The mock returns the same events regardless of filter (it's a unit test);
-        # we verify the route sets course_id correctly and that the function
-        # accepts the param without crashing.
-        assert "timeline" in result
\ No newline at end of file
+        assert build_timeline("u1", course_id="999")["timeline"] == []
+        assert len(build_timeline("u1", course_id="101")["timeline"]) == 1
+
+    def test_only_performance_predictions_become_risk_changes(self, monkeypatch):
+        """Ingest scoring stores grade/risk and burnout docs next to performance."""
+        ml_docs = [
+            {
+                "academiq_user_id": "u1",
+                "model_name": model_name,
+                "prediction": {"classification": "At Risk", "probability": 0.7},
+                "updated_at": datetime(2023, 12, 1),
+            }
+            for model_name in ("performance_model_v4", "risk_grade_model", "burnout_model")
+        ]
+        self._patch_collections(monkeypatch, ml_docs=ml_docs)
+        result = build_timeline("u1")
+        risk_changes = [i for i in result["timeline"] if i["type"] == "risk_change"]
+        assert len(risk_changes) == 1
+        assert result["summary"]["total_events"] == 1
+
+# ── Push-down assembly (window in the queries, lazy merge, summary aggregation) ─
+
+def _reference_timeline(db, user_id, course_id=None, limit=100, start=None, end=None):
+    """The pre-push-down algorithm: map everything, then filter / sort / dedup / limit."""
+    import app.services.timeline_service as svc
+
+    query = {"academiq_user_id": user_id, **({"course_id": course_id} if course_id else {})}
+    items = svc._map_events(list(db.student_events.find(query)))
+    raw = db.raw.find_one({"academiq_user_id": user_id}) or {}
+    grades = [g for g in raw.get("grades", []) if not course_id or str(g.get("course_id")) == course_id]
+    items += svc.map_grades(grades)
+    items += svc.map_ml_results(user_id)
+    items += svc._detect_inactivity(user_id, course_id, items)
+    items = [i for i in items if (not start or i["date"] >= start) and (not end or i["date"] <= end)]
+    unique = list(svc._unique(sorted(items, key=svc._merge_key)))
+    return {
+        "timeline": unique[:limit],
+        "summary": {
+            "total_events": len(unique),
+            "risk_signals": sum(i["severity"] in ("warning", "danger") for i in unique),
+            "positive_signals": sum(i["severity"] == "positive" for i in unique),
+            "last_activity": unique[-1]["date"] if unique else None,
+        },
+    }
+
+
+class TestPushDown:
+    @pytest.fixture
+    def student(self, monkeypatch):
+        import random
+
+        rng = random.Random(7)
+        t, events = 1_700_000_000_000, []
+        shapes = [
+            {"action_type": "material_click", "page_type": "resource"},
+            {"action_type": "view", "page_type": "quiz", "quiz_attempt": True, "score": "35"},
+            {"action_type": "view", "page_type": "quiz", "quiz_attempt": True, "score": 0.9},
+            {"action_type": "view", "page_type": "assignment", "assignment_submission": True, "late": True},
+            {"action_type": "view", "page_type": "grades"},
+            {"action_type": "view", "page_type": "dashboard"},            # not mapped
+        ]
+        for n in range(400):
+            # mostly hours apart, sometimes a multi-day (or multi-week) gap
+            t += rng.choice([3_600_000] * 8 + [4 * 86_400_000, 9 * 86_400_000])
+            events.append({
+                "academiq_user_id": "u1", "event_id": f"e{n}", "timestamp": t,
+                "course_id": rng.choice(["101", "202"]), "title": f"Item {n}", **rng.choice(shapes),
+            })
+        grades = [
+            {"course_id": c, "item_name": f"QuizWeek {n}", "item_type": "quiz", "percentage": 30 + n,
+             "submission_time": (datetime(2023, 11, 15) + timedelta(days=2 * n)).isoformat()}
+            for n, c in enumerate(["101", "202", 101] * 10)
+        ]
+        ml = [{"academiq_user_id": "u1", "model_name": "performance_model_v4",
+               "prediction": {"classification": "At Risk", "probability": 0.7},
+               "updated_at": datetime(2023, 12, 1 + n)} for n in range(3)]
+        return TestBuildTimeline()._patch_collections(monkeypatch, events, grades, ml)
+
+    @pytest.mark.parametrize("course_id", [None, "101"])
+    @pytest.mark.parametrize("window", [
+        (None, None),
+        (datetime(2023, 11, 20), None),
+        (None, datetime(2023, 12, 5, 12)),
+        (datetime(2023, 11, 25, 6), datetime(2023, 12, 20)),
+        (datetime(2030, 1, 1), None),
+    ])
+    @pytest.mark.parametrize("limit", [5, 500])
+    def test_matches_the_full_scan(self, student, course_id, window, limit):
+        start, end = window
+        got = build_timeline("u1", course_id=course_id, limit=limit, start_date=start, end_date=end)
+        want = _reference_timeline(student, "u1", course_id, limit, start, end)
+
+        assert [i["id"] for i in got["timeline"]] == [i["id"] for i in want["timeline"]]
+        assert got["summary"] == want["summary"]
+
+    def test_merge_stops_reading_events_once_limit_is_reached(self, student, monkeypatch):
+        import app.services.timeline_service as svc
+
+        pulled = []
+
+        class _Counting:
+            def __init__(self, coll):
+                self._coll = coll
+
+            def find(self, *args, **kwargs):
+                cursor = self._coll.find(*args, **kwargs)
+
+                class _Cursor:
+                    def sort(self, *a):
+                        cursor.sort(*a)
+                        return self
+
+                    def limit(self, n):
+                        cursor.limit(n)
+                        return self
+
+                    def __iter__(self):
+                        for doc in cursor:
+                            pulled.append(doc["event_id"])
+                            yield doc
+                return _Cursor()
+
+            def __getattr__(self, name):
+                return getattr(self._coll, name)
+
+        monkeypatch.setattr(svc, "student_events_collection", _Counting(student.student_events))
+        result = build_timeline("u1", limit=10)
+
+        assert len(result["timeline"]) == 10
+        assert len(pulled) < 40
+        assert result["summary"]["total_events"] > 300      # counts still cover every event
+
+    def test_aware_bounds_are_compared_as_utc(self, student):
+        naive = build_timeline("u1", start_date=datetime(2023, 11, 25))
+        aware = build_timeline("u1", start_date=datetime(2023, 11, 25, tzinfo=timezone.utc))
+        assert aware == naive
+
+    def test_index_backs_the_range_scan(self, monkeypatch):
+        import mongomock
+
+        import app.config.database as database
+
+        db = mongomock.MongoClient().db
+        for name in dir(database):
+            if name.endswith("_collection"):
+                monkeypatch.setattr(database, name, db[name])
+        database.ensure_indexes()
+        assert "user_timestamp" in db["student_events_collection"].index_information()
+
+    # ── cursor paging and NDJSON streaming ────────────────────────────────────
+
+    @pytest.mark.parametrize("course_id,window,limit", [
+        (None, (None, None), 60),
+        ("101", (datetime(2023, 11, 25, 6), datetime(2024, 1, 20)), 7),
+    ])
+    def test_cursor_pages_cover_the_window_both_ways(self, student, course_id, window, limit):
+        start, end = window
+        want = [i["id"] for i in _reference_timeline(student, "u1", course_id, 10_000, start, end)["timeline"]]
+        kwargs = {"course_id": course_id, "limit": limit, "start_date": start, "end_date": end}
+
+        forward, page = [], build_timeline("u1", **kwargs)
+        assert page["prev_cursor"] is None
+        while True:
+            forward += [i["id"] for i in page["timeline"]]
+            if not page["next_cursor"]:
+                break
+            page = build_timeline("u1", after=page["next_cursor"], **kwargs)
+        assert forward == want
+
+        backward, page = [], build_timeline("u1", before="latest", **kwargs)
+        assert page["next_cursor"] is None
+        while True:
+            backward = [i["id"] for i in page["timeline"]] + backward
+            if not page["prev_cursor"]:
+                break
+            page = build_timeline("u1", before=page["prev_cursor"], **kwargs)
+        assert backward == want
+
+    def test_cursor_round_trip_and_rejection(self, student):
+        import app.services.timeline_service as svc
+
+        first = build_timeline("u1", limit=3)
+        back = build_timeline("u1", limit=3, before=build_timeline("u1", limit=3, after=first["next_cursor"])["prev_cursor"])
+        assert [i["id"] for i in back["timeline"]] == [i["id"] for i in first["timeline"]]
+        assert back["summary"] == first["summary"]
+
+        with pytest.raises(ValueError):
+            build_timeline("u1", after="not-a-cursor")
+        with pytest.raises(ValueError):
+            svc.decode_cursor("W10")
+
+    def test_stream_route_writes_items_then_summary(self, student, test_client, monkeypatch):
+        import json
+
+        from app.auth import get_current_user
+        from app.routes import student_data
+
+        monkeypatch.setattr(student_data, "TIMELINE_MATERIALIZED", False)
+
+        test_client.app.dependency_overrides[get_current_user] = lambda: {"_id": "u1"}
+        try:
+            resp = test_client.get("/timeline/stream", params={"course_id": "101"})
+            bad = test_client.get("/timeline/stream", params={"after": "nope"})
+        finally:
+            test_client.app.dependency_overrides.clear()
+
+        assert resp.status_code == 200 and resp.headers["content-type"] == "application/x-ndjson"
+        lines = [json.loads(line) for line in resp.text.splitlines()]
+        want = _reference_timeline(student, "u1", "101", 10_000)
+        assert [line["id"] for line in lines[:-1]] == [i["id"] for i in want["timeline"]]
+        assert lines[-1]["summary"]["total_events"] == want["summary"]["total_events"] == len(lines) - 1
+        assert bad.status_code == 400
@@ -0,0 +1,142 @@
+# backend/tests/test_timeline_store.py
+"""
+Tests for the materialized Evidence Timeline (app/services/timeline_store.py):
+a rebuilt student reads the same as the derived timeline in every view, and
+the ingest-side writers (moodle_ingest.write_events,
+scoring_queue.store_predictions, grade refresh) keep
+it that way incrementally — including inactivity gaps around events that
+arrive out of order — without rebuilding.
+
+Every collection is a mongomock one; check() is the consistency checker the
+scripts use.
+"""
+
+import random
+import sys
+from datetime import datetime, timedelta
+from pathlib import Path
+
+import mongomock
+import pytest
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from app.repositories import event_repository, ml_result_repository  # noqa: E402
+from app.services import moodle_ingest, scoring_queue, timeline_service, timeline_store  # noqa: E402
+
+SHAPES = [
+    {"action_type": "material_click", "page_type": "resource"},
+    {"action_type": "view", "page_type": "quiz", "quiz_attempt": True, "score": "35"},
+    {"action_type": "view", "page_type": "quiz", "quiz_attempt": True, "score": 0.9},
+    {"action_type": "view", "page_type": "assignment", "assignment_submission": True},
+    {"action_type": "view", "page_type": "dashboard"},
+]
+
+
+def _events(n, seed, start=1_700_000_000_000):
+    rng, t, out = random.Random(seed), start, []
+    for _ in range(n):
+        t += rng.choice([3_600_000] * 6 + [4 * 86_400_000, 10 * 86_400_000])
+        course = rng.choice(["101", "202"])
+        out.append({
+            "timestamp": t, "course_id": course, "title": f"Item {t}",
+            "event_id": f"{t}-{course}", **rng.choice(SHAPES),
+        })
+    return out
+
+
+@pytest.fixture
+def db(monkeypatch, mongomock_bulk_write):
+    db = mongomock.MongoClient().db
+    for name in ("student_events", "student_timeline", "ml_results"):
+        mongomock_bulk_write(db[name])
+    for module, attrs in (
+        (timeline_service, ("student_events", "raw_moodle_payload", "ml_results")),
+        (timeline_store, ("student_events", "raw_moodle_payload", "student_timeline")),
+        (event_repository, ("student_events",)),
+        (ml_result_repository, ("ml_results",)),
+    ):
+        for attr in attrs:
+            monkeypatch.setattr(module, f"{attr}_collection", db[attr])
+    monkeypatch.setattr(scoring_queue, "artifact_version", lambda model_name: "t")
+    timeline_store.clear()
+    yield db
+    timeline_store.clear()
+
+
+def _grades(n):
+    return [
+        {"course_id": c, "item_name": f"QuizWeek {k}", "item_type": "quiz", "percentage": 40 + k,
+         "submission_time": (datetime(2023, 11, 16) + timedelta(days=3 * k)).isoformat()}
+        for k, c in enumerate(["101", 202] * (n // 2))
+    ]
+
+
+def test_rebuilt_timeline_reads_like_the_derived_one(db):
+    moodle_ingest.write_events("u1", _events(300, seed=1))
+    db.raw_moodle_payload.insert_one({"academiq_user_id": "u1", "grades": _grades(10)})
+    scoring_queue.store_predictions("u1", {"performance": {"classification": "At Risk", "probability": 0.8}}, {})
+
+    assert timeline_store.rebuild("u1") > 0
+    assert timeline_store.check("u1") == []
+
+    for course_id in (None, "202"):
+        kwargs = {"course_id": course_id, "limit": 9, "start_date": datetime(2023, 11, 20),
+                  "end_date": datetime(2024, 1, 10)}
+        for page in ({}, {"before": "latest"}):
+            stored = timeline_store.build_timeline("u1", **kwargs, **page)
+            derived = timeline_service.build_timeline("u1", **kwargs, **page)
+            assert stored == derived
+            cursor = {"after": stored["next_cursor"]} if stored["next_cursor"] else {"before": stored["prev_cursor"]}
+            assert timeline_store.build_timeline("u1", **kwargs, **cursor) == \
+                timeline_service.build_timeline("u1", **kwargs, **cursor)
+
+
+def test_ingest_keeps_it_consistent_without_rebuilding(db):
+    events = _events(400, seed=2)
+    moodle_ingest.write_events("u1", events[:150])
+    timeline_store.build_timeline("u1")                              # first read builds
+    assert timeline_store.stats()["lazy_builds"] == 1
+
+    moodle_ingest.write_events("u1", events[300:])                  # newer events
+    moodle_ingest.write_events("u1", events[150:300:2])             # older, filling gaps
+    moodle_ingest.write_events("u1", events[151:300:2] + events[:10])   # and a re-sync
+    db.raw_moodle_payload.insert_one({"academiq_user_id": "u1", "grades": _grades(6)})
+    timeline_store.refresh_grades("u1")
+    scoring_queue.store_predictions("u1", {"burnout": {"classification": "High Performer"}}, {})
+
+    assert timeline_store.check("u1") == []
+    stats = timeline_store.stats()
+    assert stats["rebuilds"] == 1 and stats["failures"] == 0 and stats["appended"] > 0
+
+    db.raw_moodle_payload.update_one({"academiq_user_id": "u1"}, {"$set": {"grades": _grades(2)}})
+    timeline_store.refresh_grades("u1")                               # replaced, not merged
+    assert db.student_timeline.count_documents({"source": "moodle_grade"}) == 2
+    assert timeline_store.check("u1") == []
+
+
+def test_writers_skip_students_not_built_yet(db):
+    moodle_ingest.write_events("u1", _events(20, seed=3))
+    scoring_queue.store_predictions("u1", {"performance": {"classification": "At Risk"}}, {})
+    assert db.student_timeline.count_documents({}) == 0
+
+    assert timeline_store.timeline_summary("u1")["total_events"] > 0
+    assert timeline_store.check("u1") == []
+
+
+def test_failed_update_falls_back_to_a_rebuild(db, monkeypatch):
+    moodle_ingest.write_events("u1", _events(50, seed=4))
+    timeline_store.rebuild("u1")
+
+    def broken(*args, **kwargs):
+        raise RuntimeError("primary stepped down")
+
+    regap = timeline_store._regap
+    monkeypatch.setattr(timeline_store, "_regap", broken)
+    moodle_ingest.write_events("u1", _events(20, seed=5, start=1_800_000_000_000))   # ingest still succeeds
+    monkeypatch.setattr(timeline_store, "_regap", regap)
+
+    assert timeline_store.stats()["failures"] == 1
+    assert timeline_store.check("u1") == ["u1: not materialized"]
+    timeline_store.build_timeline("u1")
+    assert timeline_store.check("u1") == []